@@ -0,0 +1,290 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Analysis agent which analyzes the build actions handed out by an analysis
+coordinator (see analysis_coordinator) and sends the results back to it.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import base64
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    from urllib2 import HTTPError, Request, URLError, urlopen
+except ImportError:
+    from urllib.error import HTTPError, URLError
+    from urllib.request import Request, urlopen
+
+from libcodechecker.analyze import analysis_coordinator
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+# Number of attempts to reach the coordinator before giving up.
+CONNECTION_RETRIES = 5
+
+# Time to wait (in seconds) before asking for a new job if there was none.
+POLL_INTERVAL = 1
+
+
+class CoordinatorGone(Exception):
+    """
+    The coordinator finished the analysis or it can not be reached anymore.
+    """
+    pass
+
+
+class CoordinatorClient(object):
+    """
+    Client of the HTTP protocol served by the analysis coordinator.
+    """
+
+    def __init__(self, address, agent_id, token):
+        host, port = analysis_coordinator.parse_address(address)
+        self.__url = 'http://{0}:{1}'.format(host, port)
+        self.__token = token
+        self.agent_id = agent_id
+
+    def __request(self, path, data=None):
+        """
+        Send a request to the coordinator and return the response body.
+        Returns None if the coordinator has nothing to say (HTTP 204).
+        """
+        if data is not None:
+            data = json.dumps(dict(data, agent=self.agent_id))
+
+        for attempt in range(CONNECTION_RETRIES):
+            try:
+                request = Request(
+                    self.__url + path, data,
+                    {'Content-Type': 'application/json',
+                     analysis_coordinator.TOKEN_HEADER: self.__token})
+                response = urlopen(request, timeout=60)
+                if response.getcode() == 204:
+                    return None
+                return response.read()
+            except HTTPError as ex:
+                if ex.code == 410:
+                    raise CoordinatorGone("The analysis is finished.")
+                if ex.code == 403:
+                    raise CoordinatorGone("The coordinator rejected the "
+                                          "token.")
+                raise
+            except (URLError, socket.error) as ex:
+                LOG.debug("Failed to reach the coordinator: %s", ex)
+                if attempt < CONNECTION_RETRIES - 1:
+                    time.sleep(2 ** attempt)
+
+        raise CoordinatorGone("The coordinator can not be reached at " +
+                              self.__url)
+
+    def get_config(self):
+        return pickle.loads(self.__request('/config'))
+
+    def get_job(self):
+        """
+        Lease the next (index, build action) job or return None if there is
+        no job at the moment.
+        """
+        job = self.__request('/job', {})
+        return pickle.loads(job) if job else None
+
+    def send_heartbeat(self):
+        self.__request('/heartbeat', {})
+
+    def send_result(self, result, files):
+        self.__request('/result', {'result': result, 'files': files})
+
+    def release_job(self, index):
+        """
+        Give back a leased job whose result can not be sent, so it is given
+        to another agent.
+        """
+        self.__request('/release', {'index': index})
+
+
+def collect_result_files(result, output_dir):
+    """
+    Read the files created by the analysis of a build action and rewrite the
+    paths of the result record relative to the output directory.
+
+    Returns the modified result record and a dict which maps the relative
+    paths of the files to their base64 encoded content. The collected files
+    are removed from the output directory.
+    """
+    def relative(path):
+        return os.path.relpath(path, output_dir) if path else path
+
+    result = list(result)
+    result_files = set(result[7].keys())
+    if result[4]:
+        result_files.add(result[4])
+
+    paths = []
+    for result_file in result_files:
+        paths.append(result_file)
+
+        # Debug archives and the captured analyzer output.
+        base_name = os.path.basename(result_file)
+        for sub_dir in ['success', 'failed']:
+            sub_dir = os.path.join(output_dir, sub_dir)
+            paths.extend(os.path.join(sub_dir, f)
+                         for f in os.listdir(sub_dir)
+                         if f.startswith(base_name))
+
+    files = {}
+    for path in paths:
+        if os.path.isfile(path):
+            with open(path, 'rb') as result_file:
+                files[relative(path)] = base64.b64encode(result_file.read())
+            os.remove(path)
+
+    result[4] = relative(result[4])
+    if result[5]:
+        result[5] = list(result[5])
+        result[5][1] = relative(result[5][1])
+    result[7] = dict((relative(path), source)
+                     for path, source in result[7].items())
+
+    # The failure zips are written by the coordinator.
+    result[11] = [dict(failure, zip_file=relative(failure['zip_file']))
+                  for failure in result[11]]
+
+    return result, files
+
+
+def process_job(client, job, analyze, work_dir):
+    """
+    Analyze a job leased from the coordinator with the 'analyze' function
+    and send its result back. If this fails, the error is logged and the job
+    is given back to the coordinator. Only CoordinatorGone is raised.
+    """
+    try:
+        result = analyze(job)
+        result, files = collect_result_files(result, work_dir)
+        client.send_result(result, files)
+    except CoordinatorGone:
+        raise
+    except Exception as ex:
+        LOG.error("Failed to analyze build action %d: %s", job[0], ex)
+        try:
+            client.release_job(job[0])
+        except CoordinatorGone:
+            raise
+        except Exception as ex:
+            LOG.debug("Failed to give back build action %d: %s", job[0], ex)
+
+
+def run_agent(coordinator, context, jobs, token, work_dir=None):
+    """
+    Analyze the build actions of the coordinator at the given HOST:PORT
+    address in a pool of 'jobs' worker processes until the coordinator
+    finishes the analysis. The requests carry the token of the analysis.
+    """
+    agent_id = '{0}-{1}-{2}'.format(socket.gethostname(), os.getpid(),
+                                    uuid.uuid4().hex[:8])
+    client = CoordinatorClient(coordinator, agent_id, token)
+
+    LOG.info("Connecting to the analysis coordinator at %s as %s ...",
+             coordinator, agent_id)
+    config = client.get_config()
+
+    remove_work_dir = work_dir is None
+    if work_dir is None:
+        work_dir = tempfile.mkdtemp(prefix='codechecker-agent-')
+    elif not os.path.isdir(work_dir):
+        os.makedirs(work_dir)
+
+    state = analysis_manager.create_analysis_state(
+        config['actions_map'], context, config['analyzer_config_map'],
+        work_dir, config['skip_handler'], config['quiet'],
+        config['capture_analysis_output'], config['timeout'],
+        config['ctu_reanalyze_on_failure'], config['statistics_data'],
+        config['cache_fingerprints'])
+
+    checked_var = multiprocessing.Value('i', 1)
+    actions_num = multiprocessing.Value('i', config['action_num'])
+    pool = multiprocessing.Pool(jobs,
+                                initializer=analysis_manager.init_worker,
+                                initargs=(checked_var,
+                                          actions_num,
+                                          state))
+
+    finished = threading.Event()
+
+    def heartbeat():
+        while not finished.wait(analysis_coordinator.HEARTBEAT_INTERVAL):
+            try:
+                client.send_heartbeat()
+            except CoordinatorGone:
+                finished.set()
+            except HTTPError as ex:
+                LOG.debug("Heartbeat failed: %s", ex)
+
+    def analyze(job):
+        return pool.apply(analysis_manager.check, (job,))
+
+    def work():
+        while not finished.is_set():
+            try:
+                job = client.get_job()
+                if job is None:
+                    time.sleep(POLL_INTERVAL)
+                    continue
+
+                process_job(client, job, analyze, work_dir)
+            except CoordinatorGone as ex:
+                LOG.info(str(ex))
+                finished.set()
+            except Exception as ex:
+                # The coordinator may recover, the agent keeps asking it.
+                LOG.error("Failed to get a job: %s", ex)
+                time.sleep(POLL_INTERVAL)
+
+    def signal_handler(*arg, **kwarg):
+        try:
+            pool.terminate()
+        finally:
+            sys.exit(1)
+
+    signal.signal(signal.SIGINT, signal_handler)
+
+    threads = [threading.Thread(target=work) for _ in range(jobs)]
+    threads.append(threading.Thread(target=heartbeat))
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        # Waiting with timeout makes the main thread receive signals.
+        while not finished.wait(1):
+            pass
+        for thread in threads:
+            thread.join()
+        pool.close()
+    except Exception:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        if remove_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    LOG.info("Analysis agent finished.")
@@ -0,0 +1,211 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Persistent cache of the already analyzed build actions.
+
+The cache is stored in the output directory of the analysis and makes it
+possible to skip the reanalysis of translation units whose inputs (the build
+command, the analyzer binary and configuration, the source file and every
+header included by it) did not change since the last successful analysis.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+
+from libcodechecker import util
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+CACHE_FILE_NAME = 'analysis_cache.json'
+
+# Increase this if the layout of the cache file changes, old caches will be
+# dropped automatically.
+CACHE_FORMAT_VERSION = 1
+
+
+def get_analyzer_fingerprint(analyzer_version, enabled_checkers,
+                             extra_content=None):
+    """
+    Compute a hash over everything that determines the result of an analyzer
+    besides the analyzed build action itself: the version string of the
+    analyzer binary, the set of the enabled checkers and any additional
+    configuration content (e.g. extra analyzer arguments, skip file).
+    """
+    hasher = hashlib.sha1()
+    hasher.update(analyzer_version or '')
+    for checker in sorted(enabled_checkers):
+        hasher.update('\0' + checker)
+    for content in extra_content or []:
+        hasher.update('\0' + (content or ''))
+    return hasher.hexdigest()
+
+
+def get_action_key(action, analyzer_fingerprint):
+    """
+    Return the cache key of a build action which is prepared to be analyzed
+    by the analyzer described by the given fingerprint.
+    """
+    hasher = hashlib.sha1()
+    hasher.update(action.original_command_hash)
+    hasher.update(str(action.analyzer_type))
+    hasher.update(analyzer_fingerprint)
+    return hasher.hexdigest()
+
+
+def get_file_fingerprint(path):
+    """
+    Return a (modification time, size, content hash) triple for the given
+    file or None if the file can not be read.
+    """
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime, stat.st_size, util.get_file_content_hash(path)]
+    except (IOError, OSError) as err:
+        LOG.debug("Failed to fingerprint '{0}': {1}".format(path, err))
+        return None
+
+
+def fingerprint_dependencies(dependencies, directory):
+    """
+    Fingerprint every file in the dependency list of a build action.
+    Relative paths are resolved against the build action's directory.
+
+    Returns a dict mapping absolute file paths to file fingerprints or None
+    if any of the dependencies can not be read, in which case the action must
+    not be cached.
+    """
+    result = {}
+    for dep in dependencies:
+        path = os.path.normpath(os.path.join(directory, dep))
+        if path in result:
+            continue
+
+        fingerprint = get_file_fingerprint(path)
+        if fingerprint is None:
+            return None
+        result[path] = fingerprint
+    return result
+
+
+class AnalysisCache(object):
+    """
+    Stores the result file and the fingerprinted dependencies for every
+    successfully analyzed build action (per analyzer).
+    """
+
+    def __init__(self, output_path):
+        self.__cache_file = os.path.join(output_path, CACHE_FILE_NAME)
+        self.__entries = {}
+
+        # Content hashes of the files which were already checked in this
+        # session. Headers are shared between many translation units so they
+        # are hashed only once.
+        self.__verified_files = {}
+
+        data = None
+        if os.path.exists(self.__cache_file):
+            data = util.load_json_or_empty(self.__cache_file, {},
+                                           'analysis cache')
+
+        if data and data.get('version') == CACHE_FORMAT_VERSION:
+            self.__entries = data.get('entries', {})
+        elif data:
+            LOG.debug("Dropping analysis cache with unknown format.")
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __is_file_unchanged(self, path, fingerprint):
+        """
+        Check whether the file still has the given fingerprint. The content
+        hash is only recomputed if the modification time or size of the file
+        changed.
+        """
+        current = self.__verified_files.get(path)
+        if current is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+
+            mtime, size, content_hash = fingerprint
+            if stat.st_mtime == mtime and stat.st_size == size:
+                current = content_hash
+            else:
+                try:
+                    current = util.get_file_content_hash(path)
+                except IOError:
+                    return False
+            self.__verified_files[path] = current
+
+        return current == fingerprint[2]
+
+    def is_up_to_date(self, key):
+        """
+        Returns True if the build action identified by the given key was
+        analyzed successfully before, its result file still exists and none
+        of its dependencies changed since.
+        """
+        entry = self.__entries.get(key)
+        if not entry:
+            return False
+
+        if not os.path.exists(entry['result_file']):
+            return False
+
+        for path, fingerprint in entry['dependencies'].items():
+            if not self.__is_file_unchanged(path, fingerprint):
+                LOG.debug("'{0}' changed since the last analysis."
+                          .format(path))
+                return False
+
+        return True
+
+    def update(self, key, result_file, dependencies):
+        """
+        Store the result of a successful analysis.
+        """
+        self.__entries[key] = {'result_file': result_file,
+                               'dependencies': dependencies}
+
+    def invalidate(self, key):
+        """
+        Remove an entry from the cache, e.g. because the analysis failed.
+        """
+        self.__entries.pop(key, None)
+
+    def save(self):
+        """
+        Write the cache to the output directory.
+        """
+        LOG.debug("Writing analysis cache to '" + self.__cache_file + "'")
+        tmp_file = self.__cache_file + '.tmp'
+        with open(tmp_file, 'w') as cache:
+            json.dump({'version': CACHE_FORMAT_VERSION,
+                       'entries': self.__entries}, cache)
+        os.rename(tmp_file, self.__cache_file)
+
+
+def filter_up_to_date_actions(actions, analysis_cache, fingerprints):
+    """
+    Split the build actions to the ones which should be analyzed and to the
+    ones which have an up-to-date result in the cache.
+    """
+    to_analyze = []
+    up_to_date = []
+    for action in actions:
+        fingerprint = fingerprints.get(action.analyzer_type)
+        if fingerprint is not None and analysis_cache.is_up_to_date(
+                get_action_key(action, fingerprint)):
+            up_to_date.append(action)
+        else:
+            to_analyze.append(action)
+    return to_analyze, up_to_date
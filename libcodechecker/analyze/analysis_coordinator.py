@@ -0,0 +1,508 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Distribute the analysis of the build actions among analysis agents running
+on other machines.
+
+The coordinator is a small HTTP server. The agents (see analysis_agent)
+download the analysis configuration once, then repeatedly lease a build
+action, analyze it with analysis_manager.check() and upload the result
+record together with the created result files. Every request of an agent
+counts as a heartbeat. If an agent is not heard of for a while, its leased
+build actions are given to other agents.
+
+Every request must carry the token of the analysis, which the coordinator
+and the agents take from the CC_COORDINATOR_TOKEN environment variable. The
+configuration and the build actions are sent to the agents pickled, the
+agents send JSON to the coordinator. Agents must connect only to trusted
+coordinators.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import base64
+import binascii
+from collections import deque
+import hmac
+import json
+import os
+import pickle
+import signal
+import sys
+import threading
+import time
+
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from Queue import Empty, Queue
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from queue import Empty, Queue
+    from socketserver import ThreadingMixIn
+
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import analysis_scheduler
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+# Agents send a heartbeat this often (in seconds).
+HEARTBEAT_INTERVAL = 5
+
+# The build actions leased by an agent are requeued if the agent was not
+# heard of for this many seconds.
+AGENT_TIMEOUT = 60
+
+# A build action is considered as a failed analysis if it was lost this many
+# times, e.g. because it crashes every agent which analyzes it.
+MAX_ATTEMPTS = 3
+
+# The environment variable of the token shared by the coordinator and the
+# agents of an analysis.
+TOKEN_ENV_VAR = 'CC_COORDINATOR_TOKEN'
+
+# The HTTP header of the requests which carries the token.
+TOKEN_HEADER = 'X-CodeChecker-Token'
+
+
+def parse_address(address, default_host='localhost'):
+    """
+    Split a HOST:PORT or PORT string into a (host, port) pair.
+    """
+    host, _, port = address.rpartition(':')
+    return host or default_host, int(port)
+
+
+def failed_result(job):
+    """
+    Result record of a build action which could not be analyzed by any of
+    the agents, in the format returned by analysis_manager.check().
+    """
+    index, action = job
+    return 1, False, False, action.analyzer_type, '', None, 0.0, {}, index, \
+        [], None, []
+
+
+class JobQueue(object):
+    """
+    The build actions of a distributed analysis and their leases.
+    All methods are thread safe.
+    """
+
+    def __init__(self, jobs, agent_timeout=AGENT_TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS):
+        self.__lock = threading.Lock()
+        self.__indices = set(job[0] for job in jobs)
+        self.__pending = deque(jobs)
+        self.__leases = {}
+        self.__attempts = {}
+        self.__agents = {}
+        self.__done = set()
+        self.__agent_timeout = agent_timeout
+        self.__max_attempts = max_attempts
+
+    def heartbeat(self, agent):
+        """
+        Register that the given agent is alive.
+        """
+        with self.__lock:
+            self.__agents[agent] = time.time()
+
+    def lease(self, agent):
+        """
+        Return the next (index, build action) job for the agent or None if
+        there is no pending job at the moment.
+        """
+        with self.__lock:
+            self.__agents[agent] = time.time()
+            if not self.__pending:
+                return None
+
+            job = self.__pending.popleft()
+            self.__leases[job[0]] = (agent, job)
+            self.__attempts[job[0]] = self.__attempts.get(job[0], 0) + 1
+            return job
+
+    def __check_index(self, index):
+        if index not in self.__indices:
+            raise ValueError("Unknown build action: " + str(index))
+
+    def is_done(self, index):
+        """
+        Returns True if the job was already completed.
+        """
+        self.__check_index(index)
+        with self.__lock:
+            return index in self.__done
+
+    def complete(self, agent, index):
+        """
+        Mark the job as done. Returns False if the job was already completed
+        by another agent, so the result must be dropped.
+        """
+        self.__check_index(index)
+
+        with self.__lock:
+            self.__agents[agent] = time.time()
+            if index in self.__done:
+                return False
+
+            self.__done.add(index)
+            self.__leases.pop(index, None)
+
+            # The job may have been requeued while its first agent finished.
+            for job in list(self.__pending):
+                if job[0] == index:
+                    self.__pending.remove(job)
+            return True
+
+    def release(self, agent, index):
+        """
+        Give back the job leased by the agent whose result could not be
+        received. The job is requeued, or if it was attempted too many times,
+        it is marked as done and returned, so it can be considered as failed.
+        Returns None otherwise.
+        """
+        with self.__lock:
+            lease = self.__leases.get(index)
+            if lease is None or lease[0] != agent:
+                # The job was already requeued or leased to another agent.
+                return None
+
+            job = lease[1]
+            del self.__leases[index]
+            if self.__attempts[index] >= self.__max_attempts:
+                self.__done.add(index)
+                return job
+
+            self.__pending.appendleft(job)
+            return None
+
+    def is_finished(self):
+        with self.__lock:
+            return not self.__pending and not self.__leases
+
+    def requeue_lost_jobs(self, now=None):
+        """
+        Give the jobs of the agents which were not heard of for a while to
+        other agents. Returns the list of the requeued jobs and the list of
+        the jobs which were lost too many times. The latter ones are marked
+        as done.
+        """
+        if now is None:
+            now = time.time()
+
+        requeued = []
+        abandoned = []
+        with self.__lock:
+            for index, (agent, job) in list(self.__leases.items()):
+                if now - self.__agents.get(agent, 0) < self.__agent_timeout:
+                    continue
+
+                del self.__leases[index]
+                if self.__attempts[index] >= self.__max_attempts:
+                    self.__done.add(index)
+                    abandoned.append(job)
+                else:
+                    # Lost jobs are restarted first, they were among the
+                    # longest ones.
+                    self.__pending.appendleft(job)
+                    requeued.append(job)
+
+        return requeued, abandoned
+
+
+class CoordinatorRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handle the requests of the analysis agents.
+    """
+
+    def log_message(self, msg_format, *args):
+        """ Silencing http server. """
+        return
+
+    def __send(self, code, body=b''):
+        self.send_response(code)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length))
+
+    def __authorize(self):
+        """
+        Check the token of the request, and answer it if the token is not
+        the one of the analysis.
+        """
+        token = self.headers.get(TOKEN_HEADER) or ''
+        if hmac.compare_digest(str(token), self.server.token):
+            return True
+
+        LOG.warning("Request with invalid token from %s.",
+                    self.client_address[0])
+        self.__send(403)
+        return False
+
+    def do_GET(self):
+        if not self.__authorize():
+            return
+
+        if self.path == '/config':
+            self.__send(200, self.server.config_payload)
+        else:
+            self.__send(404)
+
+    def do_POST(self):
+        if not self.__authorize():
+            return
+
+        try:
+            request = self.__read_json()
+            agent = request['agent']
+        except (ValueError, KeyError):
+            self.__send(400)
+            return
+
+        job_queue = self.server.job_queue
+
+        if self.path == '/heartbeat':
+            job_queue.heartbeat(agent)
+            self.__send(200)
+        elif self.path == '/job':
+            if job_queue.is_finished():
+                self.__send(410)
+                return
+
+            job = job_queue.lease(agent)
+            if job is None:
+                self.__send(204)
+            else:
+                LOG.debug("Build action %d is leased to %s", job[0], agent)
+                self.__send(200, pickle.dumps(job, pickle.HIGHEST_PROTOCOL))
+        elif self.path == '/result':
+            try:
+                self.server.receive_result(agent, request['result'],
+                                           request.get('files', {}))
+            except (ValueError, KeyError, TypeError, IndexError) as ex:
+                LOG.warning("Invalid result from agent %s: %s", agent, ex)
+                self.__send(400)
+                return
+            except (IOError, OSError) as ex:
+                LOG.error("Failed to save the result of agent %s: %s",
+                          agent, ex)
+                self.__send(500)
+                return
+            self.__send(200)
+        elif self.path == '/release':
+            try:
+                index = int(request['index'])
+            except (ValueError, KeyError, TypeError):
+                self.__send(400)
+                return
+            LOG.warning("Agent %s gave back build action %d.", agent, index)
+            self.server.release_job(agent, index)
+            self.__send(200)
+        else:
+            self.__send(404)
+
+
+class CoordinatorServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server which hands out the build actions of the analysis to the
+    agents and collects the results into the output directory.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, job_queue, config, output_path,
+                 token):
+        HTTPServer.__init__(self, server_address, CoordinatorRequestHandler)
+        self.token = str(token)
+        self.job_queue = job_queue
+        self.config_payload = pickle.dumps(config, pickle.HIGHEST_PROTOCOL)
+        self.output_path = os.path.realpath(output_path)
+        self.results = Queue()
+
+    def __local_path(self, path):
+        """
+        Turn a path relative to the output directory of an agent into a path
+        in the output directory of the coordinator.
+        """
+        if not path:
+            return path
+
+        local_path = os.path.realpath(os.path.join(self.output_path, path))
+        if not local_path.startswith(self.output_path + os.sep):
+            raise ValueError("Path outside of the output directory: " + path)
+        return local_path
+
+    def release_job(self, agent, index):
+        """
+        Give back the job of an agent which could not deliver its result.
+        The job is considered as failed if it was attempted too many times.
+        """
+        job = self.job_queue.release(agent, index)
+        if job is not None:
+            LOG.error("The result of build action %d could not be received "
+                      "too many times, considering it as failed.", index)
+            self.results.put(failed_result(job))
+
+    def receive_result(self, agent, result, files):
+        """
+        Save the result files uploaded by an agent and queue the result
+        record of the build action for processing.
+
+        The build action is completed only if the whole result could be
+        saved. Otherwise it is given back to the job queue and the error is
+        raised.
+        """
+        index = result[8]
+        if self.job_queue.is_done(index):
+            LOG.debug("Dropping duplicated result of build action %d", index)
+            return
+
+        try:
+            result_files = [(self.__local_path(path),
+                             base64.b64decode(content))
+                            for path, content in files.items()]
+
+            # Rewrite the paths of the result record to the local output
+            # dir.
+            result = list(result)
+            result[4] = self.__local_path(result[4])
+            if result[5]:
+                result[5] = list(result[5])
+                result[5][1] = self.__local_path(result[5][1])
+            result[7] = dict((self.__local_path(path), source)
+                             for path, source in result[7].items())
+            result[11] = [dict(failure,
+                               zip_file=self.__local_path(
+                                   failure['zip_file']))
+                          for failure in result[11]]
+
+            for local_path, content in result_files:
+                local_dir = os.path.dirname(local_path)
+                if not os.path.isdir(local_dir):
+                    os.makedirs(local_dir)
+                with open(local_path, 'wb') as result_file:
+                    result_file.write(content)
+        except Exception:
+            self.release_job(agent, index)
+            raise
+
+        if not self.job_queue.complete(agent, index):
+            LOG.debug("Dropping duplicated result of build action %d", index)
+            return
+
+        self.results.put(tuple(result))
+
+
+def start_coordinator(actions_map, actions, context, analyzer_config_map,
+                      address, output_path, skip_handler, metadata,
+                      quiet_analyze, capture_analysis_output, timeout,
+                      ctu_reanalyze_on_failure, statistics_data,
+                      result_cache=None, cache_fingerprints=None,
+                      up_to_date_num=0):
+    """
+    Serve the build actions to analysis agents on the given HOST:PORT
+    address (localhost if only a port is given) until every build action is
+    analyzed. The agents must send the token of the CC_COORDINATOR_TOKEN
+    environment variable, or a generated one if it is not set.
+
+    This is the distributed equivalent of analysis_manager.start_workers(),
+    the results are collected into the same output directory layout and
+    metadata.
+    """
+    history = analysis_scheduler.AnalysisHistory(output_path)
+    actions, _ = history.order_longest_first(actions, 1)
+
+    config = {'action_num': len(actions),
+              'actions_map': actions_map,
+              'analyzer_config_map': analyzer_config_map,
+              'skip_handler': skip_handler,
+              'quiet': quiet_analyze,
+              'capture_analysis_output': capture_analysis_output,
+              'timeout': timeout,
+              'ctu_reanalyze_on_failure': ctu_reanalyze_on_failure,
+              'statistics_data': statistics_data,
+              'cache_fingerprints': cache_fingerprints}
+
+    token = os.environ.get(TOKEN_ENV_VAR)
+    if not token:
+        token = binascii.hexlify(os.urandom(16))
+        LOG.info("Start the analysis agents with the %s=%s environment "
+                 "variable.", TOKEN_ENV_VAR, token)
+
+    job_queue = JobQueue(list(enumerate(actions)))
+    server = CoordinatorServer(parse_address(address), job_queue, config,
+                               output_path, token)
+
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    def signal_handler(*arg, **kwarg):
+        sys.exit(1)
+
+    signal.signal(signal.SIGINT, signal_handler)
+
+    host, port = server.server_address
+    LOG.info("Waiting for analysis agents on %s:%d ...", host, port)
+
+    result_handler = analysis_manager.WorkerResultHandler(metadata,
+                                                          output_path,
+                                                          result_cache)
+    failure_archiver = analysis_manager.FailureArchiver(output_path,
+                                                        actions_map)
+    start_time = time.time()
+    handled_num = 0
+    completed = False
+    try:
+        while handled_num < len(actions):
+            try:
+                # The timeout also makes the main thread receive signals.
+                result = server.results.get(True, HEARTBEAT_INTERVAL)
+            except Empty:
+                result = None
+
+            if result:
+                handled_num += 1
+                result_handler.handle(result)
+                if not result[1]:
+                    history.record(actions[result[8]], result[6])
+                for failure in result[11]:
+                    failure_archiver.add(actions[result[8]], failure)
+                LOG.info("[%d/%d] %s analyzed %s.", handled_num,
+                         len(actions), actions[result[8]].analyzer_type,
+                         os.path.basename(next(actions[result[8]].sources,
+                                               '')))
+
+            requeued, abandoned = job_queue.requeue_lost_jobs()
+            for job in requeued:
+                LOG.warning("Agent of build action %d is lost, requeueing.",
+                            job[0])
+            for job in abandoned:
+                LOG.error("Build action %d was lost %d times, considering "
+                          "it as failed.", job[0], MAX_ATTEMPTS)
+                server.results.put(failed_result(job))
+        completed = True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+        # An interrupted analysis does not wait for the failure zips which
+        # are not started yet.
+        failure_archiver.finish(discard_pending=not completed)
+
+        result_handler.flush()
+        history.save()
+
+    result_handler.finish(up_to_date_num,
+                          (None, time.time() - start_time))
@@ -0,0 +1,363 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Long-lived analysis service for IDE and CI callers which analyze a few
+translation units at a time.
+
+A 'CodeChecker analyze' pays for loading the package context, discovering
+the checkers of the analyzers, parsing the compilation database and starting
+the worker processes, even if it analyzes a single file. The daemon does
+these once and keeps their results warm between the analyses: the worker
+pool, the parsed compilation databases and the analyzer configurations.
+
+The daemon listens on a local (UNIX domain) socket. A request is one JSON
+object in one line, the response is a stream of JSON objects, one per line:
+
+    {"command": "analyze", "args": {...}, "argv": [...], "cwd": "...",
+     "env": {...}}
+
+analyzes like 'CodeChecker analyze' with the given parsed command line
+arguments (see libhandlers/analyze.py) in the given working directory and
+environment, and responds with a {"type": "result", ...} message for every
+analyzed build action as soon as it is finished, and a {"type": "finished",
+...} message at the end. The "status" and "shutdown" commands query and stop
+the daemon.
+
+The requests are served one at a time, in the order they arrive.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+from collections import OrderedDict
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+
+try:
+    from SocketServer import StreamRequestHandler, UnixStreamServer
+except ImportError:
+    from socketserver import StreamRequestHandler, UnixStreamServer
+
+from libcodechecker import util
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import log_parser
+from libcodechecker.analyze.analyzers import analyzer_types
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+SOCKET_FILE_NAME = 'analyze-daemon.sock'
+
+# The number of analyzer configurations kept warm. Every different set of
+# analysis options needs its own configuration.
+MAX_CONFIG_MAPS = 16
+
+# The number of compilation databases kept warm.
+MAX_COMPILE_DATABASES = 4
+
+
+def get_default_socket():
+    """
+    The daemon of the user listens on this socket by default.
+    """
+    return os.path.join(util.get_default_workspace(), SOCKET_FILE_NAME)
+
+
+def file_signature(path):
+    """
+    Return a value which changes if the file is modified, or None if the file
+    does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return path, stat.st_mtime, stat.st_size, stat.st_ino
+
+
+class WarmState(object):
+    """
+    The state which the daemon keeps between the analyses.
+    """
+
+    def __init__(self, jobs):
+        self.pool = analysis_manager.WarmPool(jobs)
+        self.result_callback = None
+        self.__config_maps = OrderedDict()
+        self.__compile_databases = OrderedDict()
+
+    @staticmethod
+    def __put_bounded(cache, key, value, size):
+        """
+        Store the value in the OrderedDict and drop its least recently used
+        entries above the given size.
+        """
+        cache.pop(key, None)
+        cache[key] = value
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def __get_recent(cache, key):
+        """
+        Return the entry of the OrderedDict and mark it as the most recently
+        used one, or None if there is no such entry.
+        """
+        value = cache.pop(key, None)
+        if value is not None:
+            cache[key] = value
+        return value
+
+    def handle_result(self, action, result):
+        """
+        Called with every analyzed build action and its result, in the format
+        of analysis_manager.check().
+        """
+        if self.result_callback:
+            self.result_callback(action, result)
+
+    def get_actions(self, logfile, parse_options):
+        """
+        Return the build actions of the compilation database. The database is
+        parsed again if it (or a compiler info file) has changed since the
+        last analysis.
+        """
+        logfile = os.path.realpath(logfile)
+        # The compiler info depends on which compilers are found in the PATH.
+        key = (os.environ.get('PATH'),
+               file_signature(logfile),
+               file_signature(parse_options.compiler_includes_file),
+               file_signature(parse_options.compiler_target_file),
+               parse_options.compiler_info_cache)
+
+        entry = self.__get_recent(self.__compile_databases, logfile)
+        if entry is None or entry[0] != key:
+            LOG.debug("Parsing compilation database '%s'.", logfile)
+            entry = (key, log_parser.parse_log(logfile, parse_options))
+            self.__put_bounded(self.__compile_databases, logfile, entry,
+                               MAX_COMPILE_DATABASES)
+        else:
+            LOG.debug("Using the warm compilation database '%s'.", logfile)
+
+        return list(entry[1])
+
+    def get_config_handlers(self, args, context, analyzers):
+        """
+        Return the configuration handlers of the analyzers for the analysis
+        options. The configuration is built again if the options, the
+        analyzer argument files or the analyzer binaries have changed.
+        """
+        files = [getattr(args, 'clangsa_args_cfg_file', None),
+                 getattr(args, 'tidy_args_cfg_file', None)]
+        files.extend(context.analyzer_binaries.get(analyzer)
+                     for analyzer in analyzers)
+        key = repr((analyzers, sorted(vars(args).items()),
+                    [file_signature(path) for path in files]))
+
+        config_map = self.__get_recent(self.__config_maps, key)
+        if config_map is None:
+            config_map = analyzer_types.build_config_handlers(args, context,
+                                                              analyzers)
+            self.__put_bounded(self.__config_maps, key, config_map,
+                               MAX_CONFIG_MAPS)
+        else:
+            LOG.debug("Using the warm analyzer configuration.")
+
+        return config_map
+
+    def close(self):
+        self.pool.close()
+
+
+class DaemonRequestHandler(StreamRequestHandler):
+    """
+    Read a request of a client and stream the response back.
+    """
+
+    def __send(self, message):
+        if self.disconnected:
+            return
+        try:
+            self.wfile.write(json.dumps(message) + '\n')
+            self.wfile.flush()
+        except (IOError, socket.error):
+            # The analysis is finished even if the client went away.
+            LOG.debug("The client of the analysis daemon disconnected.")
+            self.disconnected = True
+
+    def handle(self):
+        self.disconnected = False
+        try:
+            request = json.loads(self.rfile.readline())
+            command = request['command']
+        except (ValueError, KeyError, TypeError):
+            self.__send({'type': 'error', 'message': "Invalid request."})
+            return
+
+        self.server.serve_request(command, request, self.__send)
+
+
+class AnalysisDaemon(UnixStreamServer):
+    """
+    Serve the analysis requests on a local socket with the warm state.
+
+    'analyze' is called with the parsed command line arguments, the command
+    line and the warm state to run an analysis, like the main function of
+    'CodeChecker analyze' would do.
+    """
+
+    def __init__(self, socket_path, warm_state, analyze):
+        # Only the user of the daemon may send requests to it. The socket is
+        # created with this mode by bind(), so it is never open to others.
+        old_umask = os.umask(0o177)
+        try:
+            UnixStreamServer.__init__(self, socket_path, DaemonRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+        self.socket_path = socket_path
+        self.warm_state = warm_state
+        self.__analyze = analyze
+        self.__served_num = 0
+        self.__start_time = time.time()
+
+    def serve_request(self, command, request, send):
+        if command == 'analyze':
+            self.__analyze_request(request, send)
+        elif command == 'status':
+            send({'type': 'status',
+                  'pid': os.getpid(),
+                  'jobs': self.warm_state.pool.jobs,
+                  'served': self.__served_num,
+                  'uptime': time.time() - self.__start_time})
+        elif command == 'shutdown':
+            send({'type': 'finished', 'return_code': 0})
+            # The server can only be shut down from another thread.
+            threading.Thread(target=self.shutdown).start()
+        else:
+            send({'type': 'error',
+                  'message': "Unknown command: " + str(command)})
+
+    def __analyze_request(self, request, send):
+        """
+        Analyze in the working directory and the environment of the client
+        and stream the results of the build actions to it.
+        """
+        self.__served_num += 1
+        counts = {'successful': 0, 'failed': 0, 'skipped': 0}
+
+        def result_callback(action, result):
+            return_code, skipped, _, analyzer_type, result_file, _, \
+                duration, result_sources, _, _, _, _ = result
+
+            status = 'skipped' if skipped else \
+                'successful' if return_code == 0 else 'failed'
+            counts[status] += 1
+
+            send({'type': 'result',
+                  'analyzer': analyzer_type,
+                  'source': os.path.join(action.directory,
+                                         next(action.sources, '')),
+                  'status': status,
+                  'result_file': result_file,
+                  'result_sources': result_sources,
+                  'duration': duration})
+
+        original_cwd = os.getcwd()
+        original_env = dict(os.environ)
+        return_code = 0
+        try:
+            os.chdir(request.get('cwd', original_cwd))
+            if request.get('env') is not None:
+                util.replace_environ(request['env'])
+            args = argparse.Namespace(**request['args'])
+
+            self.warm_state.result_callback = result_callback
+            self.__analyze(args, request.get('argv', []), self.warm_state)
+        except SystemExit as ex:
+            return_code = ex.code if isinstance(ex.code, int) else 1
+        except Exception as ex:
+            traceback.print_exc()
+            send({'type': 'error', 'message': str(ex)})
+            return_code = 1
+        finally:
+            self.warm_state.result_callback = None
+            os.chdir(original_cwd)
+            util.replace_environ(original_env)
+
+        send(dict(counts, type='finished', return_code=return_code))
+
+    def server_close(self):
+        UnixStreamServer.server_close(self)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def send_request(socket_path, request):
+    """
+    Send a request to the daemon listening on the socket and yield the
+    messages of its response as they arrive.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request) + '\n')
+
+        response = client.makefile('r')
+        for line in iter(response.readline, ''):
+            yield json.loads(line)
+    finally:
+        client.close()
+
+
+def is_running(socket_path):
+    """
+    Check if a daemon is listening on the socket.
+    """
+    try:
+        for message in send_request(socket_path, {'command': 'status'}):
+            return message.get('type') == 'status'
+    except socket.error:
+        return False
+    return False
+
+
+def serve(socket_path, jobs, analyze):
+    """
+    Start a daemon with a warm pool of 'jobs' worker processes on the socket
+    and serve the requests until a shutdown request or an interrupt.
+    """
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            LOG.error("An analysis daemon is already listening on '%s'.",
+                      socket_path)
+            return 1
+        # The socket of a daemon which was killed.
+        os.remove(socket_path)
+
+    socket_dir = os.path.dirname(socket_path)
+    if socket_dir and not os.path.isdir(socket_dir):
+        os.makedirs(socket_dir)
+
+    warm_state = WarmState(jobs)
+    server = AnalysisDaemon(socket_path, warm_state, analyze)
+
+    LOG.info("Analysis daemon is listening on '%s'.", socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        LOG.info("Analysis daemon is interrupted.")
+    finally:
+        server.server_close()
+        warm_state.close()
+
+    LOG.info("Analysis daemon stopped.")
+    return 0
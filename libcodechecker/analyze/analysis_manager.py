@@ -9,22 +9,34 @@ from __future__ import print_function
 from __future__ import division
 from __future__ import absolute_import
 
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 import codecs
-import glob
+import json
 import multiprocessing
 import os
 import shlex
 import shutil
 import signal
 import sys
+import threading
+import time
 import traceback
 import zipfile
 
+try:
+    from Queue import Empty, Queue
+except ImportError:
+    from queue import Empty, Queue
+
 from libcodechecker import util
+from libcodechecker.analyze import analysis_cache
+from libcodechecker.analyze import analysis_profile
+from libcodechecker.analyze import analysis_scheduler
 from libcodechecker.analyze import analyzer_env
+from libcodechecker.analyze import dependency_index
 from libcodechecker.analyze import gcc_toolchain
-from libcodechecker.analyze import plist_parser
+from libcodechecker.analyze import memory_governor
+from libcodechecker.analyze import tidy_output_converter
 from libcodechecker.analyze.analyzers import analyzer_clangsa
 from libcodechecker.analyze.analyzers import analyzer_types
 from libcodechecker.analyze.statistics_collector \
@@ -36,71 +48,167 @@ from libcodechecker.logger import get_logger
 LOG = get_logger('analyzer')
 
 
-def worker_result_handler(results, metadata, output_path):
+# The metadata file of the analysis is rewritten at most this often (in
+# seconds) while the results of the analysis are arriving.
+METADATA_FLUSH_INTERVAL = 10
+
+# At most this many failure zips are kept in an output directory, and their
+# source files are stored in this file, up to the given size (in bytes).
+MAX_FAILURE_ARCHIVES = 100
+FAILURE_SOURCES_FILE_NAME = 'failed_sources.zip'
+MAX_FAILURE_SOURCES_SIZE = 1024 * memory_governor.MB
+
+
+def write_metadata(metadata, output_path):
     """
-    Print the analysis summary.
+    Write the metadata of the analysis into the output directory.
+    The file is replaced atomically so readers never see a partial file.
     """
+    metadata_file = os.path.join(output_path, 'metadata.json')
+    LOG.debug("Analysis metadata write to '" + metadata_file + "'")
 
-    if metadata is None:
-        metadata = {}
+    tmp_file = metadata_file + '.tmp'
+    with open(tmp_file, 'w') as metafile:
+        json.dump(metadata, metafile)
+    os.rename(tmp_file, metadata_file)
 
-    successful_analysis = defaultdict(int)
-    failed_analysis = defaultdict(int)
-    skipped_num = 0
-    reanalyzed_num = 0
 
-    for res, skipped, reanalyzed, analyzer_type, _ in results:
+class WorkerResultHandler(object):
+    """
+    Process the results of the analysis workers one by one, as they finish.
+
+    The metadata file in the output directory is updated periodically while
+    the analysis is running, so even an interrupted analysis leaves behind
+    metadata which describes every result file that was saved until then.
+    """
+
+    def __init__(self, metadata, output_path, result_cache=None,
+                 flush_interval=METADATA_FLUSH_INTERVAL,
+                 dependency_index=None):
+        if metadata is None:
+            metadata = {}
+
+        self.__metadata = metadata
+        self.__metadata.setdefault('result_source_files', {})
+        self.__metadata.setdefault('analysis_profile', {})
+        self.__output_path = output_path
+        self.__result_cache = result_cache
+        self.__dependency_index = dependency_index
+        self.__flush_interval = flush_interval
+        self.__last_flush = time.time()
+
+        self.results_num = 0
+        self.successful_analysis = defaultdict(int)
+        self.failed_analysis = defaultdict(int)
+        self.skipped_num = 0
+        self.reanalyzed_num = 0
+
+    def handle(self, result):
+        """
+        Process the result of one build action returned by check().
+        """
+        res, skipped, reanalyzed, analyzer_type, _, cache_entry, _, \
+            result_sources, _, profile, dependencies, _ = result
+
+        self.results_num += 1
         if skipped:
-            skipped_num += 1
+            self.skipped_num += 1
         else:
             if reanalyzed:
-                reanalyzed_num += 1
+                self.reanalyzed_num += 1
 
             if res == 0:
-                successful_analysis[analyzer_type] += 1
+                self.successful_analysis[analyzer_type] += 1
             else:
-                failed_analysis[analyzer_type] += 1
-
-    LOG.info("----==== Summary ====----")
-    LOG.info("Total analyzed compilation commands: %s", str(len(results)))
-    if successful_analysis:
-        LOG.info("Successfully analyzed")
-        for analyzer_type, res in successful_analysis.items():
-            LOG.info('  ' + analyzer_type + ': ' + str(res))
-
-    if failed_analysis:
-        LOG.info("Failed to analyze")
-        for analyzer_type, res in failed_analysis.items():
-            LOG.info('  ' + analyzer_type + ': ' + str(res))
-
-    if reanalyzed_num:
-        LOG.info("Reanalyzed compilation commands: " + str(reanalyzed_num))
-    if skipped_num:
-        LOG.info("Skipped compilation commands: " + str(skipped_num))
-    LOG.info("----=================----")
-
-    metadata['successful'] = successful_analysis
-    metadata['failed'] = failed_analysis
-    metadata['skipped'] = skipped_num
-
-    # check() created the result .plist files and additional, per-analysis
-    # meta information in forms of .plist.source files.
-    # We now soak these files into the metadata dict, as they are not needed
-    # as loose files on the disk... but synchronizing LARGE dicts between
-    # threads would be more error prone.
-    source_map = {}
-    for f in glob.glob(os.path.join(output_path, "*.source")):
-        with open(f, 'r') as sfile:
-            source_map[f[:-7]] = sfile.read().strip()
-        os.remove(f)
-
-    for f in glob.glob(os.path.join(output_path, 'failed', "*.error")):
-        err_file, _ = os.path.splitext(f)
-        plist_file = os.path.basename(err_file) + ".plist"
-        plist_file = os.path.join(output_path, plist_file)
-        metadata['result_source_files'].pop(plist_file, None)
-
-    metadata['result_source_files'].update(source_map)
+                self.failed_analysis[analyzer_type] += 1
+
+        source_files = self.__metadata['result_source_files']
+        for result_file, source_file in result_sources.items():
+            if source_file is None:
+                # The analysis failed, the previous result file was removed.
+                source_files.pop(result_file, None)
+            else:
+                source_files[result_file] = source_file
+
+        profiles = self.__metadata['analysis_profile']
+        for entry in profile:
+            if entry['result_file']:
+                profiles[entry['result_file']] = entry
+
+        if self.__result_cache is not None and cache_entry:
+            key, result_file, fingerprints = cache_entry
+            if res == 0 and not skipped and fingerprints is not None:
+                self.__result_cache.update(key, result_file, fingerprints)
+            else:
+                self.__result_cache.invalidate(key)
+
+        if self.__dependency_index is not None and dependencies:
+            for source, files in dependencies.items():
+                self.__dependency_index.update(source, files)
+
+        if time.time() - self.__last_flush >= self.__flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the metadata (and the analysis cache and the dependency index)
+        as it is known now.
+        """
+        self.__metadata['successful'] = self.successful_analysis
+        self.__metadata['failed'] = self.failed_analysis
+        self.__metadata['skipped'] = self.skipped_num
+
+        write_metadata(self.__metadata, self.__output_path)
+
+        if self.__result_cache is not None:
+            self.__result_cache.save()
+
+        if self.__dependency_index is not None:
+            self.__dependency_index.save()
+
+        self.__last_flush = time.time()
+
+    def finish(self, up_to_date_num=0, makespan=None):
+        """
+        Print the analysis summary and write the final metadata.
+
+        makespan is a (predicted, actual) pair of the analysis length in
+        seconds. The predicted length is None if there was no analysis
+        history to predict it from.
+        """
+        LOG.info("----==== Summary ====----")
+        LOG.info("Total analyzed compilation commands: %s",
+                 str(self.results_num))
+        if self.successful_analysis:
+            LOG.info("Successfully analyzed")
+            for analyzer_type, res in self.successful_analysis.items():
+                LOG.info('  ' + analyzer_type + ': ' + str(res))
+
+        if self.failed_analysis:
+            LOG.info("Failed to analyze")
+            for analyzer_type, res in self.failed_analysis.items():
+                LOG.info('  ' + analyzer_type + ': ' + str(res))
+
+        if self.reanalyzed_num:
+            LOG.info("Reanalyzed compilation commands: " +
+                     str(self.reanalyzed_num))
+        if self.skipped_num:
+            LOG.info("Skipped compilation commands: " +
+                     str(self.skipped_num))
+        if up_to_date_num:
+            LOG.info("Up-to-date compilation commands (not reanalyzed): " +
+                     str(up_to_date_num))
+        if makespan:
+            predicted, actual = makespan
+            if predicted is not None:
+                LOG.info("Predicted analysis length: %.1f sec", predicted)
+            LOG.info("Actual analysis length: %.1f sec", actual)
+            self.__metadata['makespan'] = {'predicted': predicted,
+                                           'actual': actual}
+        LOG.info("----=================----")
+
+        self.__metadata['up_to_date'] = up_to_date_num
+        self.flush()
 
 
 def create_dependencies(command, build_dir):
@@ -198,11 +306,24 @@ def create_dependencies(command, build_dir):
 progress_checked_num = None
 progress_actions = None
 
+# Read-only data of the analysis which is the same for every build action.
+# It is set once in every worker process by init_worker().
+analysis_state = None
 
-def init_worker(checked_num, action_num):
-    global progress_checked_num, progress_actions
+
+def init_worker(checked_num, action_num, state=None):
+    """
+    Initialize an analysis worker process.
+
+    The small shared progress counters are the only data which are modified
+    by the workers. Every other data needed by check() is received in
+    'state' when the worker process starts, so it does not have to be sent
+    with each build action.
+    """
+    global progress_checked_num, progress_actions, analysis_state
     progress_checked_num = checked_num
     progress_actions = action_num
+    analysis_state = state
 
 
 def get_dependent_headers(buildaction, archive):
@@ -243,12 +364,62 @@ def get_dependent_headers(buildaction, archive):
     return dependencies
 
 
+def fingerprint_action_dependencies(action):
+    """
+    Fingerprint the source and every header file which the given build action
+    depends on, so the analysis result can be stored in the analysis cache.
+    Returns None if the dependencies could not be collected.
+    """
+    try:
+        dependencies = create_dependencies(
+            shlex.split(action.original_command), action.directory)
+    except Exception as ex:
+        LOG.debug("Couldn't create dependencies for the analysis cache:")
+        LOG.debug(str(ex))
+        return None
+
+    return analysis_cache.fingerprint_dependencies(dependencies,
+                                                   action.directory)
+
+
+def get_action_dependencies(action, cache_entry=None):
+    """
+    Return the real paths of the source file of the build action and every
+    header file it includes in a {source: dependencies} dict for the
+    dependency index, or None if the dependencies could not be collected.
+    The dependencies already fingerprinted for the analysis cache entry of
+    the build action are reused.
+    """
+    if cache_entry and cache_entry[2] is not None:
+        dependencies = cache_entry[2].keys()
+    else:
+        try:
+            dependencies = create_dependencies(
+                shlex.split(action.original_command), action.directory)
+        except Exception as ex:
+            LOG.debug("Couldn't create dependencies for the dependency "
+                      "index:")
+            LOG.debug(str(ex))
+            return None
+
+    source = os.path.join(action.directory, next(action.sources))
+    return {os.path.realpath(source):
+            sorted(set(os.path.realpath(os.path.join(action.directory, dep))
+                       for dep in dependencies))}
+
+
 def collect_debug_data(zip_file, other_files, buildaction, out, err,
                        original_command, analyzer_cmd, analyzer_returncode,
-                       action_directory, action_target, actions_map):
+                       action_directory, action_target, actions_map,
+                       source_store, make_room=None):
     """
     Collect analysis and build system information which can be used
     to reproduce the failed analysis.
+
+    The source files are stored in the given FailureSourceStore, the
+    'sources.json' file of the zip maps their paths to their names in the
+    store. make_room() is called if the store is full (see
+    FailureSourceStore.add()).
     """
     LOG.debug("Collecting debug data")
     with zipfile.ZipFile(zip_file, 'w') as archive:
@@ -292,43 +463,31 @@ def collect_debug_data(zip_file, other_files, buildaction, out, err,
             dependencies_copy.add(dependent_source)
         dependencies = dependencies_copy
 
-        LOG.debug("Writing dependent files to archive.")
+        LOG.debug("Writing dependent files to the source store.")
+        sources = {}
         for dependent_source in dependencies:
-            LOG.debug("[ZIP] Writing '" + dependent_source + "' "
-                      "to the archive.")
-            archive_subpath = dependent_source.lstrip('/')
-
-            archive_path = os.path.join('sources-root',
-                                        archive_subpath)
-            try:
-                _ = archive.getinfo(archive_path)
-                LOG.debug("[ZIP] '{0}' is already in the ZIP "
-                          "file, won't add it again!"
-                          .format(archive_path))
-                continue
-            except KeyError:
-                # If the file is already contained in the ZIP,
-                # a valid object is returned, otherwise a KeyError
-                # is raised.
-                pass
-
             try:
-                archive.write(dependent_source,
-                              archive_path,
-                              zipfile.ZIP_DEFLATED)
+                stored_name = source_store.add(dependent_source,
+                                               make_room)
+                if stored_name is None:
+                    raise IOError("The size limit of the failure source "
+                                  "store is reached.")
+                sources[dependent_source] = stored_name
             except Exception as ex:
                 # In certain cases, the output could contain
                 # invalid tokens (such as error messages that were
                 # printed even though the dependency generation
                 # returned 0).
-                LOG.debug("[ZIP] Couldn't write, because " +
-                          str(ex))
+                LOG.debug("[ZIP] Couldn't store, because " + str(ex))
                 archive.writestr(
                     os.path.join('failed-sources-root',
-                                 archive_subpath),
+                                 dependent_source.lstrip('/')),
                     "Couldn't write this file, because:\n" +
                     str(ex))
 
+        archive.writestr("sources.json",
+                         json.dumps(sources, indent=2, sort_keys=True))
+
         LOG.debug("[ZIP] Writing extra information...")
 
         archive.writestr("build-action", original_command)
@@ -341,28 +500,288 @@ def collect_debug_data(zip_file, other_files, buildaction, out, err,
             archive.writestr("gcc-toolchain-path", toolchain)
 
 
-def save_output(base_file_name, out, err):
+class FailureSourceStore(object):
+    """
+    The source files of the failure zips of an output directory in one zip
+    file. Every file content is stored once by its content hash, so the
+    headers included by many failed translation units take space only once.
+
+    The store counts the failure zips which refer to its files. Only the
+    referred files count into the size limit, the others are removed from
+    the store when it is closed.
+    """
+
+    def __init__(self, output_path, max_size=MAX_FAILURE_SOURCES_SIZE):
+        self.path = os.path.join(output_path, FAILURE_SOURCES_FILE_NAME)
+        self.__max_size = max_size
+        self.__archive = None
+        self.__sizes = {}
+        self.__references = {}
+        self.__size = 0
+
+        if os.path.exists(self.path):
+            try:
+                with zipfile.ZipFile(self.path) as archive:
+                    self.__sizes = dict((info.filename, info.compress_size)
+                                        for info in archive.infolist())
+            except (IOError, zipfile.BadZipfile) as ex:
+                LOG.debug("Dropping the broken failure source store: %s", ex)
+                os.remove(self.path)
+
+    @property
+    def size(self):
+        """
+        The size of the stored files which are referred by failure zips.
+        """
+        return self.__size
+
+    def refer(self, names):
+        """
+        Register an existing failure zip which refers to the given stored
+        files.
+        """
+        for name in names:
+            if name not in self.__sizes:
+                continue
+            count = self.__references.get(name, 0)
+            if count == 0:
+                self.__size += self.__sizes[name]
+            self.__references[name] = count + 1
+
+    def release(self, names):
+        """
+        Unregister a removed failure zip which referred to the given stored
+        files.
+        """
+        for name in names:
+            count = self.__references.get(name, 0)
+            if count == 1:
+                del self.__references[name]
+                self.__size -= self.__sizes[name]
+            elif count > 1:
+                self.__references[name] = count - 1
+
+    def add(self, path, make_room=None):
+        """
+        Store the content of the file for a failure zip and return its name
+        in the store, or None if the size limit of the store is reached.
+        make_room() is called while the store is full, it should release
+        stored files and return False if it can not.
+        """
+        name = 'sources/' + util.get_file_content_hash(path)
+        if name not in self.__sizes:
+            while self.__size >= self.__max_size:
+                if make_room is None or not make_room():
+                    return None
+
+            if self.__archive is None:
+                self.__archive = zipfile.ZipFile(self.path, 'a',
+                                                 zipfile.ZIP_DEFLATED)
+
+            self.__archive.write(path, name)
+            self.__sizes[name] = self.__archive.getinfo(name).compress_size
+
+        self.refer([name])
+        return name
+
+    def close(self):
+        """
+        Close the store and remove the files which are not referred by any
+        failure zip.
+        """
+        if self.__archive is not None:
+            self.__archive.close()
+            self.__archive = None
+
+        unreferred = [name for name in self.__sizes
+                      if name not in self.__references]
+        if not unreferred:
+            return
+
+        if not self.__references:
+            os.remove(self.path)
+        else:
+            tmp_path = self.path + '.tmp'
+            with zipfile.ZipFile(self.path) as archive, \
+                    zipfile.ZipFile(tmp_path, 'w',
+                                    zipfile.ZIP_DEFLATED) as compacted:
+                for info in archive.infolist():
+                    if info.filename in self.__references:
+                        compacted.writestr(info, archive.read(info))
+            os.rename(tmp_path, self.path)
+
+        for name in unreferred:
+            del self.__sizes[name]
+
+
+def read_failure_sources(zip_file):
+    """
+    Return the names of the stored source files which the failure zip
+    refers to.
+    """
     try:
-        if out:
-            with open(base_file_name + ".stdout.txt", 'w') as outf:
-                outf.write(out)
+        with zipfile.ZipFile(zip_file) as archive:
+            return json.loads(archive.read('sources.json')).values()
+    except (IOError, KeyError, ValueError, zipfile.BadZipfile):
+        # Failure zips which contain their sources, or broken ones.
+        return []
 
-        if err:
-            with open(base_file_name + ".stderr.txt", 'w') as outf:
-                outf.write(err)
+
+class FailureArchiver(object):
+    """
+    Create the failure zips of the failed analyses on a background thread,
+    in the order the workers report the failures (see handle_failure()).
+
+    A toolchain problem can make thousands of translation units fail, so at
+    most max_archives failure zips are kept in the output directory, and
+    their source files are kept in a FailureSourceStore with a size limit.
+    The failure zips of the earlier analyses are removed, the oldest first,
+    to make room for the new ones. If only the failure zips of this
+    analysis are left, the new failures are not archived.
+    """
+
+    def __init__(self, output_path, actions_map,
+                 max_archives=MAX_FAILURE_ARCHIVES,
+                 max_sources_size=MAX_FAILURE_SOURCES_SIZE):
+        self.__store = FailureSourceStore(output_path, max_sources_size)
+        self.__actions_map = actions_map
+        self.__max_archives = max_archives
+        self.__queue = Queue()
+
+        # The failure zips of the earlier analyses, the oldest first, with
+        # the stored source files they refer to.
+        failed_dir = os.path.join(output_path, 'failed')
+        old_zips = []
+        if os.path.isdir(failed_dir):
+            old_zips = [os.path.join(failed_dir, name)
+                        for name in os.listdir(failed_dir)
+                        if name.endswith('.zip')]
+        old_zips.sort(key=os.path.getmtime)
+        self.__old_zips = OrderedDict()
+        for zip_file in old_zips:
+            sources = read_failure_sources(zip_file)
+            self.__store.refer(sources)
+            self.__old_zips[zip_file] = sources
+
+        while (len(self.__old_zips) > max_archives or
+               self.__store.size > max_sources_size) and \
+                self.__remove_oldest():
+            pass
+
+        self.archived_num = 0
+        self.dropped_num = 0
+
+        self.__thread = threading.Thread(target=self.__run,
+                                         name='FailureArchiver')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __remove_oldest(self):
+        """
+        Remove the oldest failure zip of the earlier analyses. Returns False
+        if there is no such failure zip.
+        """
+        if not self.__old_zips:
+            return False
+
+        zip_file, sources = self.__old_zips.popitem(last=False)
+        LOG.debug("Removing the old failure zip '%s'.", zip_file)
+        try:
+            os.remove(zip_file)
+        except OSError as ex:
+            LOG.debug(ex)
+        self.__store.release(sources)
+        return True
+
+    def add(self, action, failure):
+        """
+        Queue the failure record of the build action for archiving.
+        """
+        self.__queue.put((action, failure))
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+
+            action, failure = item
+
+            # The failure zip of an earlier analysis of the same build
+            # action is overwritten.
+            zip_file = failure['zip_file']
+            if zip_file in self.__old_zips:
+                self.__store.release(self.__old_zips.pop(zip_file))
+
+            while len(self.__old_zips) + self.archived_num >= \
+                    self.__max_archives:
+                if not self.__remove_oldest():
+                    break
+            if self.archived_num >= self.__max_archives:
+                self.dropped_num += 1
+                continue
+
+            try:
+                collect_debug_data(failure['zip_file'],
+                                   failure['mentioned_files'],
+                                   action,
+                                   failure['stdout'],
+                                   failure['stderr'],
+                                   action.original_command,
+                                   failure['analyzer_cmd'],
+                                   failure['return_code'],
+                                   action.directory,
+                                   action.target,
+                                   self.__actions_map,
+                                   self.__store,
+                                   self.__remove_oldest)
+                self.archived_num += 1
+                LOG.debug("ZIP file written at '" + failure['zip_file'] +
+                          "'")
+            except Exception:
+                LOG.debug("Failed to write the failure zip '" +
+                          failure['zip_file'] + "'.")
+                LOG.debug(traceback.format_exc())
+
+        self.__store.close()
+
+    def finish(self, discard_pending=False):
+        """
+        Wait until the queued failure zips are written, or drop the ones
+        which are not started yet.
+        """
+        if discard_pending:
+            while True:
+                try:
+                    if self.__queue.get(False) is not None:
+                        self.dropped_num += 1
+                except Empty:
+                    break
+
+        self.__queue.put(None)
+        # The timeout makes the main thread receive signals while waiting.
+        while self.__thread.is_alive():
+            self.__thread.join(1.0)
+
+        if self.dropped_num:
+            LOG.warning("%d failed analyses were not archived, at most %d "
+                        "failure zips are kept in the output directory.",
+                        self.dropped_num, self.__max_archives)
+
+
+def save_output(base_file_name, rh):
+    try:
+        rh.save_analyzer_output(base_file_name + ".stdout.txt",
+                                base_file_name + ".stderr.txt")
     except IOError as ioerr:
         LOG.debug("Failed to save analyzer output")
         LOG.debug(ioerr)
 
 
-def save_metadata(result_file, analyzer_result_file, analyzed_source_file):
+def save_result_file(result_file, analyzer_result_file):
     """
-    Save some extra information next to the plist, .source
-    acting as an extra metadata file.
+    Move the result file of the analyzer to its final place if needed.
     """
-    with open(result_file + ".source", 'w') as orig:
-        orig.write(analyzed_source_file.replace(r'\ ', ' ') + "\n")
-
     if os.path.exists(analyzer_result_file) and \
             not os.path.exists(result_file):
         os.rename(analyzer_result_file, result_file)
@@ -424,10 +843,9 @@ def prepare_check(source, action, analyzer_config_map, output_dir,
 
     # The result handler for analysis is an empty result handler
     # which only returns metadata, but can't process the results.
-    rh = analyzer_types.construct_analyze_handler(action,
-                                                  output_dir,
-                                                  severity_map,
-                                                  skip_handler)
+    rh = analyzer_types.construct_analyze_handler(
+        action, output_dir, severity_map, skip_handler,
+        source_analyzer.config_handler.report_format)
 
     # NOTICE!
     # The currently analyzed source file needs to be set before the
@@ -445,37 +863,34 @@ def prepare_check(source, action, analyzer_config_map, output_dir,
     return source_analyzer, analyzer_cmd, rh, reanalyzed
 
 
-def handle_success(rh, result_file, result_base, skip_handler,
+def handle_success(rh, result_file, result_base,
                    capture_analysis_output, success_dir):
     """
     Result postprocessing is required if the analysis was
     successful (mainly clang tidy output conversion is done).
 
-    Skipping reports for header files is done here too.
+    Skipping reports for header files is done by the postprocessing too.
     """
     if capture_analysis_output:
-        save_output(os.path.join(success_dir, result_base),
-                    rh.analyzer_stdout, rh.analyzer_stderr)
+        save_output(os.path.join(success_dir, result_base), rh)
 
-    rh.postprocess_result()
-    # Generated reports will be handled separately at store.
+    # The result file is postprocessed at its final place, because the
+    # analyzer may write the result file with the unescaped name.
+    save_result_file(result_file, rh.analyzer_result_file)
 
-    save_metadata(result_file, rh.analyzer_result_file,
-                  rh.analyzed_source_file)
-
-    if skip_handler:
-        # We need to check the plist content because skipping
-        # reports in headers can be done only this way.
-        plist_parser.skip_report_from_plist(result_file,
-                                            skip_handler)
+    rh.postprocess_result(result_file)
+    # Generated reports will be handled separately at store.
 
 
-def handle_failure(source_analyzer, rh, action, zip_file,
-                   result_base, actions_map):
+def handle_failure(source_analyzer, rh, zip_file, result_base):
     """
     If the analysis fails a debug zip is packed together which contains
     build, analysis information and source files to be able to
     reproduce the failed analysis.
+
+    Collecting the source files is slow, so the zip is not created here, but
+    in the background by the FailureArchiver of the main process. Returns
+    the record of the failure which the FailureArchiver needs.
     """
     other_files = set()
 
@@ -484,51 +899,65 @@ def handle_failure(source_analyzer, rh, action, zip_file,
                   "output...")
         other_files.update(
             source_analyzer.get_analyzer_mentioned_files(
-                rh.analyzer_stdout))
+                rh.analyzer_stdout_tail))
 
         other_files.update(
             source_analyzer.get_analyzer_mentioned_files(
-                rh.analyzer_stderr))
+                rh.analyzer_stderr_tail))
     except Exception as ex:
         LOG.debug("Couldn't generate list of other files "
                   "from analyzer output:")
         LOG.debug(str(ex))
 
-    collect_debug_data(zip_file,
-                       other_files,
-                       rh.buildaction,
-                       rh.analyzer_stdout,
-                       rh.analyzer_stderr,
-                       action.original_command,
-                       rh.analyzer_cmd,
-                       rh.analyzer_returncode,
-                       action.directory,
-                       action.target,
-                       actions_map)
-    LOG.debug("ZIP file written at '" + zip_file + "'")
-
     # Remove files that successfully analyzed earlier on.
     plist_file = result_base + ".plist"
     if os.path.exists(plist_file):
         os.remove(plist_file)
 
+    return {'zip_file': zip_file,
+            'mentioned_files': sorted(other_files),
+            'stdout': rh.analyzer_stdout_tail,
+            'stderr': rh.analyzer_stderr_tail,
+            'analyzer_cmd': rh.analyzer_cmd,
+            'return_code': rh.analyzer_returncode}
+
 
-def check(check_data):
+def check(job):
     """
     Invoke clang with an action which called by processes.
     Different analyzer object belongs to for each build action.
 
+    job is an (index, build action) pair. The rest of the analysis
+    configuration is taken from the analysis state of the worker process,
+    see init_worker().
     skiplist handler is None if no skip file was configured.
+
+    Besides the analysis status, the result contains the analyzed source
+    file of every result file (None if the result file was removed because
+    the analysis failed), the index of the build action, the performance
+    profile of the analyzed source files, if they are collected, the
+    dependencies of the successfully analyzed source file (see
+    get_action_dependencies()) and the records of the failed analyses (see
+    handle_failure()).
     """
 
-    actions_map, action, context, analyzer_config_map, \
+    action_index, action = job
+
+    _, context, analyzer_config_map, \
         output_dir, skip_handler, quiet_output_on_stdout, \
         capture_analysis_output, analysis_timeout, \
         analyzer_environment, ctu_reanalyze_on_failure, \
-        output_dirs, statistics_data = check_data
+        output_dirs, statistics_data, cache_fingerprints, \
+        analyzer_memory_limit, collect_dependencies = analysis_state
 
     skipped = False
     reanalyzed = False
+    cache_entry = None
+    result_sources = {}
+    profile = []
+    dependencies = None
+    failures = []
+    start_time = time.time()
 
     failed_dir = output_dirs["failed"]
     success_dir = output_dirs["success"]
@@ -553,6 +982,15 @@ def check(check_data):
 
             source = util.escape_source_path(source)
 
+            if cache_fingerprints and cache_entry is None:
+                # Dependencies are fingerprinted before the analysis so if
+                # a file is modified while the analyzer runs, the next
+                # analysis will notice it.
+                cache_key = analysis_cache.get_action_key(
+                    action, cache_fingerprints[action.analyzer_type])
+                cache_entry = [cache_key, None,
+                               fingerprint_action_dependencies(action)]
+
             source_analyzer, analyzer_cmd, rh, reanalyzed = \
                 prepare_check(source, action, analyzer_config_map,
                               output_dir, context.severity_map,
@@ -584,9 +1022,16 @@ def check(check_data):
                     # shouldn't do anything.
                     pass
 
+            profile_entry = analysis_profile.new_entry(action.analyzer_type,
+                                                       source)
+            profile.append(profile_entry)
+
             # Fills up the result handler with the analyzer information.
+            analysis_start = time.time()
             source_analyzer.analyze(analyzer_cmd, rh, analyzer_environment,
-                                    __create_timeout)
+                                    __create_timeout, analyzer_memory_limit)
+            analysis_profile.add_run(profile_entry, rh,
+                                     time.time() - analysis_start)
 
             # If execution reaches this line, the analyzer process has quit.
             if timeout_cleanup[0]():
@@ -596,7 +1041,17 @@ def check(check_data):
                 rh.analyzer_returncode = -1
                 rh.analyzer_stderr = (">>> CodeChecker: Analysis timed out "
                                       "after {0} seconds. <<<\n{1}") \
-                    .format(analysis_timeout, rh.analyzer_stderr)
+                    .format(analysis_timeout, rh.analyzer_stderr_tail)
+            elif analyzer_memory_limit and rh.analyzer_returncode != 0 and \
+                    memory_governor.is_out_of_memory(
+                        rh.analyzer_stderr_tail):
+                LOG.warning("Analyzer ran out of the memory limit of {0} MB."
+                            .format(analyzer_memory_limit //
+                                    memory_governor.MB))
+                rh.analyzer_stderr = (">>> CodeChecker: Analysis exceeded "
+                                      "the memory limit of {0} MB. <<<\n{1}") \
+                    .format(analyzer_memory_limit // memory_governor.MB,
+                            rh.analyzer_stderr_tail)
 
             # If source file contains escaped spaces ("\ " tokens), then
             # clangSA writes the plist file with removing this escape
@@ -628,29 +1083,25 @@ def check(check_data):
                     os.remove(ctu_zip_file)
 
                 handle_success(rh, result_file, result_base,
-                               skip_handler, capture_analysis_output,
-                               success_dir)
+                               capture_analysis_output, success_dir)
+                result_sources[result_file] = \
+                    rh.analyzed_source_file.replace(r'\ ', ' ')
                 LOG.info("[%d/%d] %s analyzed %s successfully." %
                          (progress_checked_num.value, progress_actions.value,
                           action.analyzer_type, source_file_name))
 
-                if skip_handler:
-                    # We need to check the plist content because skipping
-                    # reports in headers can be done only this way.
-                    plist_parser.skip_report_from_plist(result_file,
-                                                        skip_handler)
-
             else:
                 LOG.error("Analyzing '" + source_file_name + "' with " +
                           action.analyzer_type +
                           " CTU" if ctu_active else " " + "failed.")
 
                 if not quiet_output_on_stdout:
-                    LOG.error('\n' + rh.analyzer_stdout)
-                    LOG.error('\n' + rh.analyzer_stderr)
+                    LOG.error('\n' + rh.analyzer_stdout_tail)
+                    LOG.error('\n' + rh.analyzer_stderr_tail)
 
-                handle_failure(source_analyzer, rh, action, zip_file,
-                               result_base, actions_map)
+                failures.append(handle_failure(source_analyzer, rh,
+                                               zip_file, result_base))
+                result_sources[result_file] = None
 
                 if ctu_active and ctu_reanalyze_on_failure:
                     LOG.error("Try to reanalyze without CTU")
@@ -666,15 +1117,22 @@ def check(check_data):
 
                     # Fills up the result handler with
                     # the analyzer information.
+                    analysis_start = time.time()
                     source_analyzer.analyze(analyzer_cmd,
                                             rh,
-                                            analyzer_environment)
+                                            analyzer_environment,
+                                            None,
+                                            analyzer_memory_limit)
+                    analysis_profile.add_run(profile_entry, rh,
+                                             time.time() - analysis_start)
 
                     return_codes = rh.analyzer_returncode
                     if rh.analyzer_returncode == 0:
                         handle_success(rh, result_file, result_base,
-                                       skip_handler, capture_analysis_output,
-                                       success_dir, zipfile)
+                                       capture_analysis_output,
+                                       success_dir)
+                        result_sources[result_file] = \
+                            rh.analyzed_source_file.replace(r'\ ', ' ')
 
                         msg = "[{0}/{1}] {2} analyzed {3} without" \
                             " CTU successfully.".format(
@@ -691,54 +1149,315 @@ def check(check_data):
 
                         zip_file = result_base + '.zip'
                         zip_file = os.path.join(failed_dir, zip_file)
-                        handle_failure(source_analyzer, rh, action,
-                                       zip_file, result_base, actions_map)
+                        failures.append(handle_failure(source_analyzer, rh,
+                                                       zip_file,
+                                                       result_base))
+
+            analysis_profile.finish_entry(profile_entry, result_file,
+                                          rh.analyzer_returncode == 0)
 
             if not quiet_output_on_stdout:
                 if rh.analyzer_returncode:
-                    LOG.error('\n' + rh.analyzer_stdout)
-                    LOG.error('\n' + rh.analyzer_stderr)
+                    LOG.error('\n' + rh.analyzer_stdout_tail)
+                    LOG.error('\n' + rh.analyzer_stderr_tail)
                 else:
-                    LOG.debug_analyzer('\n' + rh.analyzer_stdout)
-                    LOG.debug_analyzer('\n' + rh.analyzer_stderr)
+                    LOG.debug_analyzer('\n' + rh.analyzer_stdout_tail)
+                    LOG.debug_analyzer('\n' + rh.analyzer_stderr_tail)
 
         progress_checked_num.value += 1
 
+        if cache_entry:
+            cache_entry[1] = result_file
+
+        if collect_dependencies and return_codes == 0 and not skipped:
+            dependencies = get_action_dependencies(action, cache_entry)
+
         return return_codes, skipped, reanalyzed, action.analyzer_type, \
-            result_file
+            result_file, cache_entry, time.time() - start_time, \
+            result_sources, action_index, profile, dependencies, failures
 
     except Exception as e:
         LOG.debug_analyzer(str(e))
         traceback.print_exc(file=sys.stdout)
-        return 1, skipped, reanalyzed, action.analyzer_type, None
+        return 1, skipped, reanalyzed, action.analyzer_type, None, \
+            cache_entry, time.time() - start_time, result_sources, \
+            action_index, profile, dependencies, failures
 
 
-def start_workers(actions_map, actions, context, analyzer_config_map,
-                  jobs, output_path, skip_handler, metadata,
-                  quiet_analyze, capture_analysis_output, timeout,
-                  ctu_reanalyze_on_failure, statistics_data):
+def check_batch(jobs):
     """
-    Start the workers in the process pool.
-    For every build action there is worker which makes the analysis.
+    Analyze the build actions of a batch created by create_jobs() with one
+    clang-tidy run, and split the output of clang-tidy into the result files
+    of the build actions, which are the same files check() would write.
+
+    jobs is a list of (index, build action) pairs. Returns the list of the
+    results of the build actions, in the same format as check() does. If the
+    analysis of the batch fails (e.g. one of the sources does not compile)
+    the build actions are analyzed one by one by check() instead, so the
+    failure is reported for the right source file.
     """
 
-    # Handle SIGINT to stop this script running.
-    def signal_handler(*arg, **kwarg):
-        try:
-            pool.terminate()
-        finally:
-            sys.exit(1)
+    _, context, analyzer_config_map, \
+        output_dir, skip_handler, quiet_output_on_stdout, \
+        capture_analysis_output, analysis_timeout, \
+        analyzer_environment, _, \
+        output_dirs, statistics_data, cache_fingerprints, \
+        analyzer_memory_limit, collect_dependencies = analysis_state
+
+    start_time = time.time()
+
+    results = []
+    batch = []
+    for job in jobs:
+        source = next(job[1].sources)
+        if skip_handler and skip_handler.should_skip(source):
+            results.append(check(job))
+        else:
+            batch.append(job)
 
-    signal.signal(signal.SIGINT, signal_handler)
+    if len(batch) < 2:
+        return results + [check(job) for job in batch]
 
-    # Start checking parallel.
-    checked_var = multiprocessing.Value('i', 1)
-    actions_num = multiprocessing.Value('i', len(actions))
-    pool = multiprocessing.Pool(jobs,
-                                initializer=init_worker,
-                                initargs=(checked_var,
-                                          actions_num))
+    try:
+        checks = []
+        for _, action in batch:
+            cache_entry = None
+            if cache_fingerprints:
+                cache_key = analysis_cache.get_action_key(
+                    action, cache_fingerprints[action.analyzer_type])
+                cache_entry = [cache_key, None,
+                               fingerprint_action_dependencies(action)]
+
+            source = util.escape_source_path(next(action.sources))
+            checks.append(prepare_check(source, action, analyzer_config_map,
+                                        output_dir, context.severity_map,
+                                        skip_handler, statistics_data) +
+                          (cache_entry,))
+
+        # The command of the first build action analyzes every source of
+        # the batch, as the build actions only differ in their source.
+        source_analyzer, analyzer_cmd, batch_rh, _, _ = checks[0]
+        sources = [rh.analyzed_source_file for _, _, rh, _, _ in checks]
+        separator = analyzer_cmd.index('--')
+        source_index = analyzer_cmd.index(sources[0], 0, separator)
+        analyzer_cmd[source_index:source_index + 1] = sources
+
+        timeout_cleanup = [lambda: False]
+
+        def __create_timeout(analyzer_process):
+            if analysis_timeout and analysis_timeout > 0:
+                timeout_cleanup[0] = util.setup_process_timeout(
+                    analyzer_process, analysis_timeout * len(batch),
+                    signal.SIGKILL)
+
+        analysis_start = time.time()
+        source_analyzer.analyze(analyzer_cmd, batch_rh, analyzer_environment,
+                                __create_timeout, analyzer_memory_limit)
+        analysis_time = time.time() - analysis_start
+
+        if timeout_cleanup[0]() or batch_rh.analyzer_returncode != 0:
+            LOG.debug_analyzer("Analyzing a batch of %d source files with "
+                               "clang-tidy failed, analyzing them one by "
+                               "one.", len(batch))
+            LOG.debug_analyzer('\n' + batch_rh.analyzer_stderr_tail)
+            return results + [check(job) for job in batch]
+
+        if not quiet_output_on_stdout:
+            LOG.debug_analyzer('\n' + batch_rh.analyzer_stdout_tail)
+            LOG.debug_analyzer('\n' + batch_rh.analyzer_stderr_tail)
+
+        # The dependencies are only needed if a header has a message which
+        # does not tell the source file it belongs to.
+        batch_sources = dict(
+            (rh.analyzed_source_file.replace(r'\ ', ' '),
+             (action, cache_entry))
+            for (_, action), (_, _, rh, _, cache_entry) in zip(batch, checks))
+        batch_dependencies = {}
+
+        def get_dependencies(source):
+            action, cache_entry = batch_sources[source]
+            dependencies = get_action_dependencies(action, cache_entry)
+            batch_dependencies[source] = dependencies
+            return dependencies.values()[0] if dependencies else None
+
+        outputs = tidy_output_converter.split_output_by_source(
+            batch_rh.iter_analyzer_stdout_lines(),
+            [source.replace(r'\ ', ' ') for source in sources],
+            batch_rh.buildaction.directory, get_dependencies)
+
+        share = 1.0 / len(batch)
+        for (action_index, action), \
+                (_, _, rh, reanalyzed, cache_entry) in zip(batch, checks):
+            source = rh.analyzed_source_file.replace(r'\ ', ' ')
+
+            rh.analyzer_cmd = analyzer_cmd
+            rh.analyzer_returncode = 0
+            rh.analyzer_stdout = outputs[source]
+            if rh is not batch_rh:
+                rh.analyzer_stderr = ''
+
+            result_file = rh.analyzer_result_file.replace(r'\ ', ' ')
+            result_base = os.path.basename(result_file)
+
+            # Remove the previously generated error file.
+            zip_file = os.path.join(output_dirs["failed"],
+                                    result_base + '.zip')
+            if os.path.exists(zip_file):
+                os.remove(zip_file)
+
+            handle_success(rh, result_file, result_base,
+                           capture_analysis_output, output_dirs["success"])
+
+            profile_entry = analysis_profile.new_entry(action.analyzer_type,
+                                                       rh.analyzed_source_file)
+            analysis_profile.add_run(profile_entry, batch_rh, analysis_time,
+                                     share)
+            analysis_profile.finish_entry(profile_entry, result_file, True)
+
+            LOG.info("[%d/%d] %s analyzed %s successfully." %
+                     (progress_checked_num.value, progress_actions.value,
+                      action.analyzer_type, os.path.basename(source)))
+            progress_checked_num.value += 1
+
+            if cache_entry:
+                cache_entry[1] = result_file
+
+            dependencies = None
+            if source in batch_dependencies:
+                dependencies = batch_dependencies[source]
+            elif collect_dependencies:
+                dependencies = get_action_dependencies(action, cache_entry)
+
+            results.append((0, False, reanalyzed, action.analyzer_type,
+                            result_file, cache_entry,
+                            (time.time() - start_time) * share,
+                            {result_file: source}, action_index,
+                            [profile_entry], dependencies, []))
+
+        return results
+
+    except Exception as e:
+        LOG.debug_analyzer(str(e))
+        traceback.print_exc(file=sys.stdout)
+
+        done = set(result[8] for result in results)
+        return results + [check(job) for job in batch if job[0] not in done]
+
+
+def get_tidy_batch_key(action):
+    """
+    Return the key of the build actions which can be analyzed together by
+    one clang-tidy run: the build actions of one source file, which are
+    compiled in the same directory with the same options. Returns None if
+    the build action can not be analyzed in a batch.
+    """
+    if action.analyzer_type != analyzer_types.CLANG_TIDY or \
+            action.source_count != 1:
+        return None
+
+    options = tuple(option.strip() for option in action.analyzer_options
+                    if option.strip())
+    return (action.directory, action.lang, action.target, options,
+            tuple(action.compiler_includes))
+
+
+def create_jobs(actions, tidy_batch_size=None):
+    """
+    Return the jobs of the analysis workers for the build actions, in the
+    order of the build actions. A job is an (index, build action) pair,
+    which is analyzed by check(), or a list of such pairs, a batch of at most
+    tidy_batch_size clang-tidy build actions with the same options, which is
+    analyzed by check_batch().
+    """
+    if not tidy_batch_size or tidy_batch_size < 2:
+        return list(enumerate(actions))
+
+    jobs = []
+    open_batches = {}
+    for job in enumerate(actions):
+        key = get_tidy_batch_key(job[1])
+        if key is None:
+            jobs.append(job)
+            continue
+
+        batch = open_batches.get(key)
+        if batch is None or len(batch) == tidy_batch_size:
+            batch = open_batches[key] = []
+            jobs.append(batch)
+        batch.append(job)
+
+    return [job[0] if isinstance(job, list) and len(job) == 1 else job
+            for job in jobs]
+
+
+def run_job(job):
+    """
+    Analyze the build actions of a job created by create_jobs() and return
+    the list of their results.
+    """
+    if isinstance(job, list):
+        return check_batch(job)
+    return [check(job)]
+
+
+def run_job_in_state(state_job):
+    """
+    Run a job of create_jobs() in a worker of a WarmPool. state_job is an
+    (analysis state, environment, job) tuple: the workers of a warm pool serve
+    more analyses, in the environments of different clients, so the state and
+    the environment are sent with every job.
+    """
+    global analysis_state
+    analysis_state, environment, job = state_job
+    util.replace_environ(environment)
+    return run_job(job)
+
+
+class WarmPool(object):
+    """
+    A process pool which is kept alive between the analyses of a long-lived
+    process (see analysis_daemon), so the workers are not started again for
+    every analysis.
+    """
 
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.__checked_num = multiprocessing.Value('i', 1)
+        self.__actions_num = multiprocessing.Value('i', 0)
+        self.__pool = multiprocessing.Pool(jobs,
+                                           initializer=init_worker,
+                                           initargs=(self.__checked_num,
+                                                     self.__actions_num))
+
+    def start_analysis(self, actions_num):
+        """
+        Reset the progress counters of the workers for a new analysis and
+        return the process pool.
+        """
+        self.__checked_num.value = 1
+        self.__actions_num.value = actions_num
+        return self.__pool
+
+    def close(self):
+        self.__pool.close()
+        self.__pool.join()
+
+
+def create_analysis_state(actions_map, context, analyzer_config_map,
+                          output_path, skip_handler, quiet_analyze,
+                          capture_analysis_output, timeout,
+                          ctu_reanalyze_on_failure, statistics_data,
+                          cache_fingerprints, analyzer_memory_limit=None,
+                          collect_dependencies=False):
+    """
+    Create the output directories of the analysis and return the state which
+    has to be given to init_worker() in the analysis worker processes.
+
+    If an analyzer memory limit is given (in bytes) the address space of
+    every analyzer process is limited to it. If collect_dependencies is True
+    the results contain the dependencies of the analyzed source files for
+    the dependency index.
+    """
     failed_dir = os.path.join(output_path, "failed")
     # If the analysis has failed, we help debugging.
     if not os.path.exists(failed_dir):
@@ -758,44 +1477,216 @@ def start_workers(actions_map, actions, context, analyzer_config_map,
         context.path_env_extra,
         context.ld_lib_path_extra)
 
+    # This state is the same for every build action, so it is given to the
+    # workers only once, at their startup.
+    return (actions_map,
+            context,
+            analyzer_config_map,
+            output_path,
+            skip_handler,
+            quiet_analyze,
+            capture_analysis_output,
+            timeout,
+            analyzer_environment,
+            ctu_reanalyze_on_failure,
+            output_dirs,
+            statistics_data,
+            cache_fingerprints,
+            analyzer_memory_limit,
+            collect_dependencies)
+
+
+def remove_empty_output_dirs(output_path):
+    """
+    Remove the directories created by create_analysis_state() if nothing
+    was written into them.
+    """
+    for output_dir in ["success", "failed"]:
+        output_dir = os.path.join(output_path, output_dir)
+        if os.path.isdir(output_dir) and not os.listdir(output_dir):
+            shutil.rmtree(output_dir)
+
+
+def start_workers(actions_map, actions, context, analyzer_config_map,
+                  jobs, output_path, skip_handler, metadata,
+                  quiet_analyze, capture_analysis_output, timeout,
+                  ctu_reanalyze_on_failure, statistics_data,
+                  result_cache=None, cache_fingerprints=None,
+                  up_to_date_num=0, governor=None,
+                  analyzer_memory_limit=None, tidy_batch_size=None,
+                  warm_pool=None, result_callback=None):
+    """
+    Start the workers in the process pool.
+    For every build action there is worker which makes the analysis.
+
+    If a result cache is given, the dependencies of the analyzed build actions
+    are fingerprinted with the given per analyzer fingerprints and the cache
+    is updated with the results of the analysis.
+
+    The build actions are started in the descending order of their analysis
+    time measured in the previous runs into the same output directory.
+
+    If a memory governor is given, 'jobs' is only the upper limit of the
+    parallel analyses, and a new analysis is only started if the governor
+    allows it. The address space of the analyzers is limited to the given
+    analyzer memory limit (in bytes).
+
+    If a clang-tidy batch size greater than one is given, the clang-tidy
+    build actions with the same options are analyzed in batches of at most
+    that many build actions, by one clang-tidy run per batch.
+
+    If a WarmPool is given, the analysis runs in its workers instead of a new
+    process pool, which is left running after the analysis.
+
+    The results are processed as soon as the workers finish with them and
+    the metadata file of the analysis is kept up-to-date during the analysis,
+    as well as the dependency index of the analyzed source files in the
+    output directory, if it was created there. The failure zips of the
+    failed analyses are written in the background.
+    The result callback is called with every build action and its result
+    after the result was processed.
+    """
+
+    if warm_pool is None:
+        # Handle SIGINT to stop this script running.
+        def signal_handler(*arg, **kwarg):
+            try:
+                pool.terminate()
+            finally:
+                sys.exit(1)
+
+        signal.signal(signal.SIGINT, signal_handler)
+
+    # The dependencies of the analyzed source files are only collected if
+    # the dependency index of the output directory is in use.
+    index = dependency_index.DependencyIndex(output_path)
+    if not index.exists:
+        index = None
+
+    state = create_analysis_state(actions_map, context, analyzer_config_map,
+                                  output_path, skip_handler, quiet_analyze,
+                                  capture_analysis_output, timeout,
+                                  ctu_reanalyze_on_failure, statistics_data,
+                                  cache_fingerprints, analyzer_memory_limit,
+                                  index is not None)
+
+    history = analysis_scheduler.AnalysisHistory(output_path)
+    actions, predicted_makespan = history.order_longest_first(actions, jobs)
+    worker_jobs = create_jobs(actions, tidy_batch_size)
+
+    # Start checking parallel.
+    if warm_pool is None:
+        checked_var = multiprocessing.Value('i', 1)
+        actions_num = multiprocessing.Value('i', len(actions))
+        pool = multiprocessing.Pool(jobs,
+                                    initializer=init_worker,
+                                    initargs=(checked_var,
+                                              actions_num,
+                                              state))
+        worker = run_job
+    else:
+        pool = warm_pool.start_analysis(len(actions))
+        worker = run_job_in_state
+        environment = dict(os.environ)
+        worker_jobs = [(state, environment, job) for job in worker_jobs]
+
+    result_handler = WorkerResultHandler(metadata, output_path, result_cache,
+                                         dependency_index=index)
+    failure_archiver = FailureArchiver(output_path, actions_map)
+
+    def handle(result):
+        result_handler.handle(result)
+
+        skipped, duration, action_index = result[1], result[6], result[8]
+        if not skipped:
+            history.record(actions[action_index], duration)
+
+        for failure in result[11]:
+            failure_archiver.add(actions[action_index], failure)
+
+        if result_callback:
+            result_callback(actions[action_index], result)
+
+    start_time = time.time()
+    completed = False
     try:
-        # Workaround, equivalent of map.
-        # The main script does not get signal
-        # while map or map_async function is running.
-        # It is a python bug, this does not happen if a timeout is specified;
-        # then receive the interrupt immediately.
-
-        analyzed_actions = [(actions_map,
-                             build_action,
-                             context,
-                             analyzer_config_map,
-                             output_path,
-                             skip_handler,
-                             quiet_analyze,
-                             capture_analysis_output,
-                             timeout,
-                             analyzer_environment,
-                             ctu_reanalyze_on_failure,
-                             output_dirs,
-                             statistics_data)
-                            for build_action in actions]
-
-        pool.map_async(check,
-                       analyzed_actions,
-                       1,
-                       callback=lambda results: worker_result_handler(
-                           results, metadata, output_path)
-                       ).get(float('inf'))
-
-        pool.close()
+        if governor:
+            __run_governed(pool, worker, worker_jobs, jobs, governor,
+                           handle)
+        else:
+            # The results are returned in the order the analyses finish.
+            # The timeout is a workaround: the main script does not get
+            # signals while it waits for a result without timeout. It is a
+            # python bug.
+            results = pool.imap_unordered(worker, worker_jobs, 1)
+            for _ in range(len(worker_jobs)):
+                for result in results.next(float('inf')):
+                    handle(result)
+
+        if warm_pool is None:
+            pool.close()
+        completed = True
     except Exception:
-        pool.terminate()
+        if warm_pool is None:
+            pool.terminate()
         raise
     finally:
-        pool.join()
+        if warm_pool is None:
+            pool.join()
+
+        # An interrupted analysis does not wait for the failure zips which
+        # are not started yet.
+        failure_archiver.finish(discard_pending=not completed)
 
-    if not os.listdir(success_dir):
-        shutil.rmtree(success_dir)
+        # Keep the metadata of the finished analyses even if the analysis
+        # was interrupted.
+        result_handler.flush()
+        history.save()
 
-    if not os.listdir(failed_dir):
-        shutil.rmtree(failed_dir)
+    result_handler.finish(up_to_date_num,
+                          (predicted_makespan, time.time() - start_time))
+
+    remove_empty_output_dirs(output_path)
+
+
+def __run_governed(pool, worker, worker_jobs, jobs, governor, handle):
+    """
+    Give the worker jobs to the pool one by one, when the memory governor
+    allows a new analysis, and handle their results.
+    """
+    # The results are put into this queue by the result handler thread of
+    # the pool, together with the number of their job.
+    finished = Queue()
+    pending = deque(enumerate(worker_jobs))
+    running = {}
+    max_running = 0
+
+    while pending or running:
+        while pending and governor.may_start(len(running)):
+            job_num, job = pending.popleft()
+            running[job_num] = pool.apply_async(
+                worker, (job,),
+                callback=lambda result, job_num=job_num:
+                finished.put((job_num, result)))
+        max_running = max(max_running, len(running))
+
+        try:
+            # The timeout also makes the main thread receive signals, and
+            # the memory usage is checked again when it expires.
+            job_num, result = finished.get(True,
+                                           memory_governor.POLL_INTERVAL)
+        except Empty:
+            # The callback is not called for a job which raised an
+            # exception, get() raises it here.
+            for async_result in running.values():
+                if async_result.ready() and not async_result.successful():
+                    async_result.get()
+            continue
+
+        del running[job_num]
+        for action_result in result:
+            handle(action_result)
+
+    LOG.info("At most %d of %d analyses ran in parallel. Estimated memory "
+             "need of an analysis: %d MB.", max_running, jobs,
+             governor.estimate // memory_governor.MB)
@@ -0,0 +1,178 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Performance profile of the analyzed translation units.
+
+For every result file the analysis metadata contains the wall time, CPU
+time and peak memory usage of the analyzer, and the size and the number of
+reports of the result file. The profile report shows the translation units
+which are the most expensive to analyze.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from collections import defaultdict
+import os
+import sys
+
+from libcodechecker.analyze import plist_parser
+from libcodechecker.logger import get_logger
+from libcodechecker.output_formatters import twodim_to_str
+
+LOG = get_logger('analyzer')
+
+# Number of translation units shown in the tables of the profile report.
+DEFAULT_REPORT_SIZE = 10
+
+# The maximum resident set size of the resource usage is given in kilobytes
+# on Linux and in bytes on OS X.
+MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def new_entry(analyzer_type, source):
+    """
+    Return an empty profile entry of the analysis of the given source file.
+    """
+    return {'analyzer': analyzer_type,
+            'source': source,
+            'wall_time': 0.0,
+            'cpu_time': 0.0,
+            'peak_rss': 0,
+            'plist_size': 0,
+            'reports': 0,
+            'result_file': None,
+            'successful': False}
+
+
+def add_run(entry, rh, wall_time, share=1.0):
+    """
+    Add the cost of an analyzer run to the profile entry. An analysis can
+    consist of more runs if it is reanalyzed without CTU after a failure.
+
+    If the analyzer run analyzed more source files at once, only the given
+    share of its time is added to the entry.
+    """
+    entry['wall_time'] += wall_time * share
+
+    usage = rh.analyzer_resource_usage
+    if usage is not None:
+        entry['cpu_time'] += (usage.ru_utime + usage.ru_stime) * share
+        entry['peak_rss'] = max(entry['peak_rss'],
+                                usage.ru_maxrss * MAXRSS_UNIT)
+
+
+def finish_entry(entry, result_file, successful):
+    """
+    Record the size and the number of reports of the result file of the
+    analysis in the profile entry.
+    """
+    entry['result_file'] = os.path.basename(result_file)
+    entry['successful'] = successful
+
+    if not successful or not os.path.exists(result_file):
+        return
+
+    try:
+        with open(result_file) as plist:
+            content = plist.read()
+        entry['plist_size'] = len(content)
+        entry['reports'] = plist_parser.count_plist_reports(content)
+    except IOError as ioerr:
+        LOG.debug("Failed to read result file for the profile: %s", ioerr)
+
+
+def __format_mb(value):
+    return '{0:.1f}'.format(value / (1024 * 1024))
+
+
+def __format_seconds(value):
+    return '{0:.2f}'.format(value)
+
+
+def __entry_row(entry):
+    return [entry['analyzer'],
+            entry['source'],
+            __format_seconds(entry['wall_time']),
+            __format_seconds(entry['cpu_time']),
+            __format_mb(entry['peak_rss']),
+            '{0:.1f}'.format(entry['plist_size'] / 1024),
+            entry['reports'],
+            'yes' if entry['successful'] else 'no']
+
+
+def get_checker_set_costs(metadata):
+    """
+    Sum up the cost of the analyses by analyzer. Every analysis of an
+    analyzer runs with the same set of checkers, which are in the metadata.
+    """
+    costs = defaultdict(lambda: {'analyses': 0,
+                                 'wall_time': 0.0,
+                                 'cpu_time': 0.0,
+                                 'peak_rss': 0,
+                                 'reports': 0})
+
+    for entry in metadata.get('analysis_profile', {}).values():
+        cost = costs[entry['analyzer']]
+        cost['analyses'] += 1
+        cost['wall_time'] += entry['wall_time']
+        cost['cpu_time'] += entry['cpu_time']
+        cost['peak_rss'] = max(cost['peak_rss'], entry['peak_rss'])
+        cost['reports'] += entry['reports']
+
+    checkers = metadata.get('checkers', {})
+    for analyzer, cost in costs.items():
+        cost['checkers'] = len(checkers.get(analyzer, []))
+
+    return dict(costs)
+
+
+def print_profile_report(metadata, size=DEFAULT_REPORT_SIZE,
+                         output=sys.stdout):
+    """
+    Print the slowest and the most memory-hungry analyses and the cost of
+    the analyses by checker set, from the profile in the given metadata.
+    """
+    entries = list(metadata.get('analysis_profile', {}).values())
+    if not entries:
+        output.write("No analysis profile is available. Analyze the "
+                     "project again to create it.\n")
+        return
+
+    keys = ['Analyzer', 'Source', 'Wall time (s)', 'CPU time (s)',
+            'Peak RSS (MB)', 'Plist size (KB)', 'Reports', 'Successful']
+
+    slowest = sorted(entries, key=lambda e: e['wall_time'],
+                     reverse=True)[:size]
+    output.write("\n----==== Slowest analyses ====----\n")
+    output.write(twodim_to_str('table', keys,
+                               [__entry_row(e) for e in slowest]))
+    output.write('\n')
+
+    hungriest = sorted(entries, key=lambda e: e['peak_rss'],
+                       reverse=True)[:size]
+    output.write("\n----==== Most memory-hungry analyses ====----\n")
+    output.write(twodim_to_str('table', keys,
+                               [__entry_row(e) for e in hungriest]))
+    output.write('\n')
+
+    rows = []
+    for analyzer, cost in sorted(get_checker_set_costs(metadata).items()):
+        rows.append([analyzer,
+                     cost['checkers'],
+                     cost['analyses'],
+                     __format_seconds(cost['wall_time']),
+                     __format_seconds(cost['cpu_time']),
+                     __format_mb(cost['peak_rss']),
+                     cost['reports']])
+
+    output.write("\n----==== Cost by checker set ====----\n")
+    output.write(twodim_to_str('table',
+                               ['Analyzer', 'Enabled checkers', 'Analyses',
+                                'Wall time (s)', 'CPU time (s)',
+                                'Peak RSS (MB)', 'Reports'],
+                               rows))
+    output.write('\n')
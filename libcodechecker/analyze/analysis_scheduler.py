@@ -0,0 +1,166 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Order the build actions for the analysis based on the analysis times
+recorded in previous runs.
+
+Long running analyses are started first (longest processing time first
+scheduling), so a few slow translation units do not keep the analysis
+running on a single core at the end of the run.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import hashlib
+import heapq
+import json
+import os
+
+from libcodechecker import util
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+HISTORY_FILE_NAME = 'analysis_durations.json'
+
+
+def get_history_key(action):
+    """
+    Return the key of the build action in the duration history.
+    """
+    source = next(action.sources, '')
+    hasher = hashlib.sha1()
+    hasher.update(str(action.analyzer_type))
+    hasher.update(source)
+    hasher.update(action.original_command_hash)
+    return hasher.hexdigest()
+
+
+def get_source_size(action):
+    """
+    Size of the (first) source file of the build action in bytes or 0 if it
+    can not be determined.
+    """
+    source = next(action.sources, None)
+    if not source:
+        return 0
+
+    try:
+        return os.path.getsize(os.path.join(action.directory, source))
+    except OSError:
+        return 0
+
+
+def predict_makespan(durations, jobs):
+    """
+    Predict the total length of the analysis if the given job durations are
+    scheduled in the given order on the given number of workers, each worker
+    taking the next job when it becomes free.
+    """
+    if not durations:
+        return 0.0
+
+    workers = [0.0] * max(jobs, 1)
+    for duration in durations:
+        earliest_free = heapq.heappop(workers)
+        heapq.heappush(workers, earliest_free + duration)
+    return max(workers)
+
+
+class AnalysisHistory(object):
+    """
+    Analysis durations of the build actions from the previous runs which were
+    analyzed into the same output directory.
+    """
+
+    def __init__(self, output_path):
+        self.__history_file = os.path.join(output_path, HISTORY_FILE_NAME)
+        self.__durations = {}
+
+        if os.path.exists(self.__history_file):
+            self.__durations = util.load_json_or_empty(self.__history_file,
+                                                       {},
+                                                       'analysis history')
+
+    def __seconds_per_byte(self):
+        """
+        Average analysis time of one byte of source code among the recorded
+        build actions. Returns None if there is no usable history.
+        """
+        total_duration = 0.0
+        total_size = 0
+        for duration, size in self.__durations.values():
+            if size:
+                total_duration += duration
+                total_size += size
+
+        if not total_size:
+            return None
+
+        return total_duration / total_size
+
+    def estimate_durations(self, actions):
+        """
+        Return the estimated analysis time of the given build actions in
+        seconds and whether the estimations are based on measurements.
+
+        Build actions without recorded history are estimated by their source
+        size, scaled by the average speed of the recorded analyses. If there
+        is no history at all, the source sizes themselves are returned which
+        are only usable to order the build actions.
+        """
+        seconds_per_byte = self.__seconds_per_byte()
+
+        estimates = []
+        for action in actions:
+            recorded = self.__durations.get(get_history_key(action))
+            if recorded:
+                estimates.append(recorded[0])
+            elif seconds_per_byte is not None:
+                estimates.append(get_source_size(action) * seconds_per_byte)
+            else:
+                estimates.append(get_source_size(action))
+
+        return estimates, seconds_per_byte is not None
+
+    def order_longest_first(self, actions, jobs):
+        """
+        Sort the build actions by their estimated analysis time in descending
+        order. Returns the sorted actions and the predicted length of the
+        analysis in seconds or None if it can not be predicted.
+        """
+        estimates, measured = self.estimate_durations(actions)
+
+        ordered = sorted(zip(estimates, range(len(actions))),
+                         key=lambda est: est[0],
+                         reverse=True)
+
+        ordered_actions = [actions[idx] for _, idx in ordered]
+
+        predicted = None
+        if measured:
+            predicted = predict_makespan([est for est, _ in ordered], jobs)
+
+        return ordered_actions, predicted
+
+    def record(self, action, duration):
+        """
+        Record the analysis time of the given build action.
+        """
+        self.__durations[get_history_key(action)] = \
+            [duration, get_source_size(action)]
+
+    def save(self):
+        """
+        Write the history to the output directory.
+        """
+        LOG.debug("Writing analysis durations to '" +
+                  self.__history_file + "'")
+        tmp_file = self.__history_file + '.tmp'
+        with open(tmp_file, 'w') as history:
+            json.dump(self.__durations, history)
+        os.rename(tmp_file, self.__history_file)
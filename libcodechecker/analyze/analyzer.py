@@ -10,8 +10,6 @@ from __future__ import print_function
 from __future__ import division
 from __future__ import absolute_import
 
-import copy
-from multiprocessing import Manager
 import os
 import shlex
 import shutil
@@ -19,8 +17,14 @@ import subprocess
 import time
 
 from libcodechecker.logger import get_logger
+from libcodechecker.analyze import analysis_cache
+from libcodechecker.analyze import analysis_coordinator
 from libcodechecker.analyze import analysis_manager
 from libcodechecker.analyze import analyzer_env
+from libcodechecker.analyze import analyzer_info_cache
+from libcodechecker.analyze import ctu_ast_cache
+from libcodechecker.analyze import ctu_pipeline
+from libcodechecker.analyze import memory_governor
 from libcodechecker.analyze import pre_analysis_manager
 from libcodechecker.analyze import skiplist_handler
 from libcodechecker.analyze.analyzers import analyzer_types
@@ -32,27 +36,23 @@ LOG = get_logger('analyzer')
 def prepare_actions(actions, enabled_analyzers):
     """
     Set the analyzer type for each buildaction.
-    Multiple actions if multiple source analyzers are set.
+    Multiple actions if multiple source analyzers are set, which share the
+    data of the original build action.
     """
-    res = []
+    return [action.for_analyzer(ea)
+            for ea in enabled_analyzers for action in actions]
 
-    for ea in enabled_analyzers:
-        for action in actions:
-            new_action = copy.deepcopy(action)
-            new_action.analyzer_type = ea
-            res.append(new_action)
-    return res
 
-
-def create_actions_map(actions, manager):
+def create_actions_map(actions):
     """
-    Create a dict for the build actions which is shareable
-    safely between processes.
+    Create a dict for the build actions.
+    The dict is only read by the analysis worker processes, which inherit it
+    from the parent process when the process pool is started.
     Key: (source_file, target)
     Value: BuildAction
     """
 
-    result = manager.dict()
+    result = {}
 
     for act in actions:
         if act.source_count > 1:
@@ -81,8 +81,8 @@ def __get_analyzer_version(context, analyzer_config_map):
         analyzer_bin = analyzer_cfg.analyzer_binary
         version = [analyzer_bin, u' --version']
         try:
-            output = subprocess.check_output(shlex.split(' '.join(version)),
-                                             env=check_env)
+            output = analyzer_info_cache.check_output(
+                shlex.split(' '.join(version)), check_env)
             versions[analyzer_bin] = output
         except (subprocess.CalledProcessError, OSError) as oerr:
             LOG.warning("Failed to get analyzer version: " + ' '.join(version))
@@ -105,11 +105,113 @@ def __get_skip_handler(args):
         LOG.debug_analyzer('Skip file was not set in the command line')
 
 
-def perform_analysis(args, context, actions, metadata):
+def __get_cache_fingerprints(args, config_map, versions, checkers):
+    """
+    Compute the analysis cache fingerprint for every enabled analyzer.
+    """
+    skip_content = ''
+    if 'skipfile' in args:
+        with open(args.skipfile) as skip_file:
+            skip_content = skip_file.read()
+
+    fingerprints = {}
+    for analyzer, config in config_map.items():
+        fingerprints[analyzer] = analysis_cache.get_analyzer_fingerprint(
+            versions.get(config.analyzer_binary),
+            checkers.get(analyzer, []),
+            [config.analyzer_extra_arguments, skip_content])
+    return fingerprints
+
+
+def __get_ctu_ast_cache(args, context, config_map, versions):
+    """
+    Create the cache of the CTU collect phase, or return None if the cache
+    is turned off.
+    """
+    cache_size = args.ctu_ast_cache_size if 'ctu_ast_cache_size' in args \
+        else ctu_ast_cache.DEFAULT_CACHE_SIZE
+    if cache_size <= 0:
+        return None
+
+    cache_dir = args.ctu_ast_cache_dir if 'ctu_ast_cache_dir' in args \
+        else os.path.join(args.output_path, ctu_ast_cache.CACHE_DIR_NAME)
+
+    config = config_map[analyzer_types.CLANG_SA]
+    fingerprint = analysis_cache.get_analyzer_fingerprint(
+        versions.get(config.analyzer_binary), [], [context.ctu_func_map_cmd])
+
+    return ctu_ast_cache.CtuAstCache(os.path.abspath(cache_dir), fingerprint,
+                                     cache_size)
+
+
+def __start_pipelined_workers(ctu_data):
+    """
+    Return a function with the signature of analysis_manager.start_workers()
+    which runs the CTU collect and analyze phases pipelined.
+    """
+    def start_workers(actions_map, actions, context, config_map, jobs,
+                      output_path, skip_handler, metadata, quiet_analyze,
+                      capture_analysis_output, timeout,
+                      ctu_reanalyze_on_failure, statistics_data,
+                      result_cache, cache_fingerprints, up_to_date_num):
+        ctu_pipeline.start_workers(actions_map, actions, context, config_map,
+                                   jobs, output_path, skip_handler, metadata,
+                                   quiet_analyze, capture_analysis_output,
+                                   timeout, ctu_reanalyze_on_failure,
+                                   ctu_data, up_to_date_num)
+    return start_workers
+
+
+def __start_tuned_workers(adaptive_jobs, analyzer_memory_limit,
+                          tidy_batch_size, warm_state):
+    """
+    Return a function with the signature of analysis_manager.start_workers()
+    which adapts the number of parallel analyses to the available memory,
+    limits the memory of the analyzer processes, analyzes the clang-tidy
+    build actions in batches and/or analyzes in the warm worker pool of the
+    analysis daemon.
+    """
+    def start_workers(actions_map, actions, context, config_map, jobs,
+                      output_path, skip_handler, metadata, quiet_analyze,
+                      capture_analysis_output, timeout,
+                      ctu_reanalyze_on_failure, statistics_data,
+                      result_cache, cache_fingerprints, up_to_date_num):
+        warm_pool = None
+        result_callback = None
+        if warm_state:
+            warm_pool = warm_state.pool
+            result_callback = warm_state.handle_result
+            jobs = warm_pool.jobs
+
+        governor = None
+        if adaptive_jobs:
+            initial_estimate = analyzer_memory_limit or \
+                memory_governor.DEFAULT_ESTIMATE
+            governor = memory_governor.MemoryGovernor(
+                jobs, initial_estimate=initial_estimate)
+
+        analysis_manager.start_workers(actions_map, actions, context,
+                                       config_map, jobs, output_path,
+                                       skip_handler, metadata, quiet_analyze,
+                                       capture_analysis_output, timeout,
+                                       ctu_reanalyze_on_failure,
+                                       statistics_data, result_cache,
+                                       cache_fingerprints, up_to_date_num,
+                                       governor, analyzer_memory_limit,
+                                       tidy_batch_size, warm_pool,
+                                       result_callback)
+    return start_workers
+
+
+def perform_analysis(args, context, actions, metadata, warm_state=None):
     """
     Perform static analysis via the given (or if not, all) analyzers,
     in the given analysis context for the supplied build actions.
     Additionally, insert statistical information into the metadata dict.
+
+    The warm state of the analysis daemon (see analysis_daemon) provides the
+    analyzer configuration and the worker pool if the analysis runs in the
+    daemon.
     """
 
     analyzers = args.analyzers if 'analyzers' in args \
@@ -136,7 +238,11 @@ def perform_analysis(args, context, actions, metadata):
             return
 
     actions = prepare_actions(actions, analyzers)
-    config_map = analyzer_types.build_config_handlers(args, context, analyzers)
+    if warm_state:
+        config_map = warm_state.get_config_handlers(args, context, analyzers)
+    else:
+        config_map = analyzer_types.build_config_handlers(args, context,
+                                                          analyzers)
 
     # Save some metadata information.
     versions = __get_analyzer_version(context, config_map)
@@ -160,33 +266,47 @@ def perform_analysis(args, context, actions, metadata):
 
     start_time = time.time()
 
-    # Use Manager to create data objects which can be
-    # safely shared between processes.
-    manager = Manager()
-
-    config_map = manager.dict(config_map)
-    actions_map = create_actions_map(actions, manager)
+    # The data below is read-only during the analysis. It is handed to the
+    # worker processes once, when the process pools are started, instead of
+    # sharing it through a multiprocessing.Manager. (Every access to a
+    # Manager proxy is a round trip to the manager process.)
+    actions_map = create_actions_map(actions)
 
     # Setting to not None value will enable statistical analysis features.
     statistics_data = None
 
     if 'stats_enabled' in args and args.stats_enabled:
-        statistics_data = manager.dict({
-            'stats_out_dir': os.path.join(args.output_path, "stats")})
+        statistics_data = {
+            'stats_out_dir': os.path.join(args.output_path, "stats")}
 
     if 'stats_output' in args and args.stats_output:
-        statistics_data = manager.dict({'stats_out_dir':
-                                        args.stats_output})
+        statistics_data = {'stats_out_dir': args.stats_output}
 
     skip_handler = __get_skip_handler(args)
-    if ctu_collect or statistics_data:
-        ctu_data = None
-        if ctu_collect or ctu_analyze:
-            ctu_data = manager.dict({'ctu_dir': ctu_dir,
-                                     'ctu_func_map_file': 'externalFnMap.txt',
-                                     'ctu_temp_fnmap_folder':
-                                     'tmpExternalFnMaps'})
 
+    ctu_data = None
+    if ctu_collect or ctu_analyze:
+        ctu_data = {'ctu_dir': ctu_dir,
+                    'ctu_func_map_file': 'externalFnMap.txt',
+                    'ctu_temp_fnmap_folder': 'tmpExternalFnMaps',
+                    'ctu_ast_cache': __get_ctu_ast_cache(args, context,
+                                                         config_map,
+                                                         versions)}
+
+    ctu_pipelined = False
+    if 'ctu_pipelined' in args:
+        if not ctu_collect or not ctu_analyze:
+            LOG.warning("Pipelined CTU analysis is only available if both "
+                        "the 'collect' and 'analyze' phases are run "
+                        "(--ctu).")
+        elif statistics_data:
+            # The statistics have to be collected before the analysis.
+            LOG.warning("Pipelined CTU analysis is not supported together "
+                        "with statistics analysis.")
+        else:
+            ctu_pipelined = True
+
+    if (ctu_collect or statistics_data) and not ctu_pipelined:
         pre_analyze = [a for a in actions
                        if a.analyzer_type == analyzer_types.CLANG_SA]
         pre_analysis_manager.run_pre_analysis(pre_analyze,
@@ -201,25 +321,99 @@ def perform_analysis(args, context, actions, metadata):
         return
 
     if 'stats_dir' in args and args.stats_dir:
-        statistics_data = manager.dict({'stats_out_dir': args.stats_dir})
+        statistics_data = {'stats_out_dir': args.stats_dir}
 
     ctu_reanalyze_on_failure = 'ctu_reanalyze_on_failure' in args and \
         args.ctu_reanalyze_on_failure
 
+    result_cache = None
+    cache_fingerprints = None
+    up_to_date_actions = []
+    if 'incremental' in args and args.incremental:
+        if ctu_collect or ctu_analyze or statistics_data:
+            # The results of these analyses depend on other translation
+            # units too, which are not tracked by the cache.
+            LOG.warning("Incremental analysis is not supported together "
+                        "with CTU or statistics analysis. Every build action "
+                        "will be analyzed.")
+        else:
+            result_cache = analysis_cache.AnalysisCache(args.output_path)
+            cache_fingerprints = __get_cache_fingerprints(
+                args, config_map, versions, metadata['checkers'])
+            actions, up_to_date_actions = \
+                analysis_cache.filter_up_to_date_actions(actions,
+                                                         result_cache,
+                                                         cache_fingerprints)
+            LOG.info("%d build action(s) are up-to-date and will not be "
+                     "reanalyzed.", len(up_to_date_actions))
+
+    coordinator_listen = None
+    if 'coordinator_listen' in args:
+        if ctu_collect or ctu_analyze or statistics_data:
+            # The agents would need the CTU and statistics data of the
+            # coordinator's machine.
+            LOG.warning("Distributed analysis is not supported together "
+                        "with CTU or statistics analysis. The analysis is "
+                        "executed locally.")
+        else:
+            coordinator_listen = args.coordinator_listen
+
+    adaptive_jobs = 'adaptive_jobs' in args
+    analyzer_memory_limit = None
+    if 'analyzer_memory_limit' in args and args.analyzer_memory_limit > 0:
+        analyzer_memory_limit = args.analyzer_memory_limit * memory_governor.MB
+
+    if (adaptive_jobs or analyzer_memory_limit) and \
+            (coordinator_listen or ctu_pipelined):
+        LOG.warning("Memory-aware analysis is not supported together with "
+                    "distributed or pipelined CTU analysis. The number of "
+                    "jobs is not adapted and the memory of the analyzers is "
+                    "not limited.")
+        adaptive_jobs = False
+        analyzer_memory_limit = None
+
+    tidy_batch_size = None
+    if 'tidy_batch_size' in args and args.tidy_batch_size > 1:
+        tidy_batch_size = args.tidy_batch_size
+
+    if tidy_batch_size and (coordinator_listen or ctu_pipelined):
+        LOG.warning("Batched clang-tidy analysis is not supported together "
+                    "with distributed or pipelined CTU analysis. The build "
+                    "actions are analyzed one by one.")
+        tidy_batch_size = None
+
     if ctu_analyze or statistics_data or (not ctu_analyze and not ctu_collect):
 
         LOG.info("Starting static analysis ...")
-        analysis_manager.start_workers(actions_map, actions, context,
-                                       config_map, args.jobs,
-                                       args.output_path,
-                                       skip_handler,
-                                       metadata,
-                                       'quiet' in args,
-                                       'capture_analysis_output' in args,
-                                       args.timeout if 'timeout' in args
-                                       else None,
-                                       ctu_reanalyze_on_failure,
-                                       statistics_data)
+        if coordinator_listen:
+            start_workers = analysis_coordinator.start_coordinator
+            workers = coordinator_listen
+        elif ctu_pipelined:
+            start_workers = __start_pipelined_workers(ctu_data)
+            workers = args.jobs
+        elif warm_state or adaptive_jobs or analyzer_memory_limit or \
+                tidy_batch_size:
+            start_workers = __start_tuned_workers(
+                adaptive_jobs, analyzer_memory_limit, tidy_batch_size,
+                warm_state)
+            workers = args.jobs
+        else:
+            start_workers = analysis_manager.start_workers
+            workers = args.jobs
+
+        start_workers(actions_map, actions, context,
+                      config_map, workers,
+                      args.output_path,
+                      skip_handler,
+                      metadata,
+                      'quiet' in args,
+                      'capture_analysis_output' in args,
+                      args.timeout if 'timeout' in args else None,
+                      ctu_reanalyze_on_failure,
+                      statistics_data,
+                      result_cache,
+                      cache_fingerprints,
+                      len(up_to_date_actions))
         LOG.info("Analysis finished.")
         LOG.info("To view results in the terminal use the "
                  "\"CodeChecker parse\" command.")
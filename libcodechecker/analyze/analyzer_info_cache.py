@@ -0,0 +1,162 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Persistent cache of the information queried from the analyzer binaries.
+
+The version, the checker list and the features of the analyzers are queried
+by running the analyzer binaries at the start of every 'analyze', 'check' and
+'checkers' command. The results of these queries are stored in a file in the
+user's home directory, keyed by the analyzer binary (its path, modification
+time, size and inode), the query and the files the query depends on (e.g.
+the checker plugins), so the binaries are only run again if one of them was
+changed.
+
+The location of the cache file can be set by the CC_ANALYZER_INFO_CACHE
+environment variable, an empty value turns the cache off. The cache file is
+shared by the concurrently running CodeChecker commands (see json_cache).
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from distutils.spawn import find_executable
+import hashlib
+import os
+import subprocess
+
+from libcodechecker import util
+from libcodechecker.analyze import json_cache
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+CACHE_FILE_NAME = 'analyzer_info_cache.json'
+
+CACHE_FILE_ENV_VAR = 'CC_ANALYZER_INFO_CACHE'
+
+# Increase this if the layout of the cache file changes, old caches will be
+# dropped automatically.
+CACHE_FORMAT_VERSION = 1
+
+
+def get_default_cache_file():
+    """
+    The cache is shared by every analysis of the user, unless another file
+    is set in the environment. Returns None if the cache is turned off.
+    """
+    cache_file = os.environ.get(
+        CACHE_FILE_ENV_VAR,
+        os.path.join(util.get_default_workspace(), CACHE_FILE_NAME))
+    return cache_file or None
+
+
+def __file_signature(path):
+    """
+    Return a string which changes if the file is replaced or modified, or
+    None if the file does not exist.
+    """
+    try:
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return '\0'.join([path, repr(stat.st_mtime), str(stat.st_size),
+                      str(stat.st_ino)])
+
+
+def get_analyzer_key(binary, query, files=None):
+    """
+    Return the cache key of the given query (a list of strings) of the
+    analyzer binary, which depends on the given files too. Returns None if
+    the binary can not be found.
+    """
+    if os.sep in binary:
+        binary_path = os.path.abspath(binary)
+    else:
+        binary_path = find_executable(binary)
+
+    signature = __file_signature(binary_path) if binary_path else None
+    if not signature:
+        return None
+
+    hasher = hashlib.sha1()
+    hasher.update(signature)
+    for part in query:
+        hasher.update('\0' + part)
+    for path in sorted(files or []):
+        hasher.update('\0' + path + '\0' + str(__file_signature(path)))
+    return hasher.hexdigest()
+
+
+class AnalyzerInfoCache(json_cache.JsonCache):
+    """
+    Stores the results of the analyzer queries.
+    """
+
+    def __init__(self, cache_file):
+        json_cache.JsonCache.__init__(self, cache_file, CACHE_FORMAT_VERSION,
+                                      'analyzer info cache')
+
+    def set(self, key, value):
+        """
+        Store the entry and write it to the cache file right away.
+        """
+        json_cache.JsonCache.set(self, key, value)
+        self.save()
+
+
+# The cache of the current process, see get_cache().
+__cache = None
+
+
+def get_cache():
+    """
+    Return the analyzer info cache of the process, or None if the cache is
+    turned off.
+    """
+    global __cache
+
+    cache_file = get_default_cache_file()
+    if not cache_file:
+        return None
+
+    if __cache is None or __cache[0] != cache_file:
+        __cache = (cache_file, AnalyzerInfoCache(cache_file))
+    return __cache[1]
+
+
+def get_or_run(binary, query, run, files=None):
+    """
+    Return the cached result of the query of the analyzer binary, or call
+    run() to get it. The result of run() is stored in the cache, unless it
+    is None.
+    """
+    cache = get_cache()
+    key = get_analyzer_key(binary, query, files) if cache else None
+
+    if key:
+        value = cache.get(key)
+        if value is not None:
+            LOG.debug_analyzer("Cached analyzer query: %s %s",
+                               binary, ' '.join(query))
+            return value
+
+    value = run()
+    if key and value is not None:
+        cache.set(key, value)
+    return value
+
+
+def check_output(command, env=None, files=None):
+    """
+    Return the output of the command running an analyzer binary like
+    subprocess.check_output() does, from the cache if the analyzer and the
+    given files did not change. Failed commands are not cached.
+    """
+    return get_or_run(command[0], ['output'] + command[1:],
+                      lambda: subprocess.check_output(command, env=env),
+                      files)
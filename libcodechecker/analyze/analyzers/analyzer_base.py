@@ -12,16 +12,23 @@ from __future__ import division
 from __future__ import absolute_import
 
 from abc import ABCMeta, abstractmethod
+import errno
 import os
 import shlex
 import signal
 import subprocess
 import sys
+import tempfile
 
+from libcodechecker import util
+from libcodechecker.analyze import memory_governor
 from libcodechecker.logger import get_logger
 
 LOG = get_logger('analyzer')
 
+# The analyzer is killed if it writes more output than this, in bytes.
+MAX_OUTPUT_SIZE = 512 * memory_governor.MB
+
 
 class SourceAnalyzer(object):
     """
@@ -85,9 +92,15 @@ class SourceAnalyzer(object):
         """
         pass
 
-    def analyze(self, analyzer_cmd, res_handler, env=None, proc_callback=None):
+    def analyze(self, analyzer_cmd, res_handler, env=None, proc_callback=None,
+                memory_limit=None):
         """
-        Run the analyzer.
+        Run the analyzer. If a memory limit is given (in bytes) the address
+        space of the analyzer process is limited to it.
+
+        The output of the analyzer is spooled to temporary files, which are
+        given to the result handler, instead of being kept in memory. The
+        analyzer is killed if its output exceeds MAX_OUTPUT_SIZE.
         """
         LOG.debug('Running analyzer ...')
 
@@ -95,15 +108,40 @@ class SourceAnalyzer(object):
 
         res_handler.analyzer_cmd = analyzer_cmd
         analyzer_cmd = ' '.join(analyzer_cmd)
+
+        stdout = tempfile.TemporaryFile(prefix='codechecker-analyzer-',
+                                        suffix='.stdout')
+        stderr = tempfile.TemporaryFile(prefix='codechecker-analyzer-',
+                                        suffix='.stderr')
+        output_watch = [lambda: False]
+
+        def __start_watches(proc):
+            output_watch[0] = util.get_process_supervisor().watch_output(
+                proc, [stdout, stderr], MAX_OUTPUT_SIZE)
+            if proc_callback:
+                proc_callback(proc)
+
         try:
-            ret_code, stdout, stderr \
-                = SourceAnalyzer.run_proc(analyzer_cmd,
-                                          env,
-                                          res_handler.buildaction.directory,
-                                          proc_callback)
+            ret_code, usage = SourceAnalyzer.run_proc_to_files(
+                analyzer_cmd,
+                stdout,
+                stderr,
+                env,
+                res_handler.buildaction.directory,
+                __start_watches,
+                memory_limit)
             res_handler.analyzer_returncode = ret_code
-            res_handler.analyzer_stdout = stdout
-            res_handler.analyzer_stderr = stderr
+            res_handler.set_analyzer_output(stdout, stderr)
+            res_handler.analyzer_resource_usage = usage
+
+            if output_watch[0]():
+                LOG.warning("Analyzer output exceeded the limit of {0} MB."
+                            .format(MAX_OUTPUT_SIZE // memory_governor.MB))
+                res_handler.analyzer_stderr = \
+                    (">>> CodeChecker: Analyzer output exceeded the limit "
+                     "of {0} MB. <<<\n{1}").format(
+                        MAX_OUTPUT_SIZE // memory_governor.MB,
+                        res_handler.analyzer_stderr_tail)
             return res_handler
 
         except Exception as ex:
@@ -119,11 +157,47 @@ class SourceAnalyzer(object):
         pass
 
     @staticmethod
-    def run_proc(command, env=None, cwd=None, proc_callback=None):
+    def run_proc(command, env=None, cwd=None, proc_callback=None,
+                 memory_limit=None):
         """
         Just run the given command and return the return code
         and the stdout and stderr outputs of the process.
         """
+        ret_code, stdout, stderr, _ = SourceAnalyzer.run_proc_with_usage(
+            command, env, cwd, proc_callback, memory_limit)
+        return ret_code, stdout, stderr
+
+    @staticmethod
+    def run_proc_with_usage(command, env=None, cwd=None, proc_callback=None,
+                            memory_limit=None):
+        """
+        Run the given command and return the return code, the stdout and
+        stderr outputs and the resource usage (resource.struct_rusage) of
+        the process, including its descendants.
+        """
+        with tempfile.TemporaryFile() as stdout, \
+                tempfile.TemporaryFile() as stderr:
+            ret_code, usage = SourceAnalyzer.run_proc_to_files(
+                command, stdout, stderr, env, cwd, proc_callback,
+                memory_limit)
+
+            stdout.seek(0)
+            stderr.seek(0)
+            return ret_code, stdout.read(), stderr.read(), usage
+
+    @staticmethod
+    def run_proc_to_files(command, stdout, stderr, env=None, cwd=None,
+                          proc_callback=None, memory_limit=None):
+        """
+        Run the given command with its stdout and stderr outputs written to
+        the given files, and return the return code and the resource usage
+        (resource.struct_rusage) of the process, including its descendants.
+        """
+
+        def preexec():
+            os.setsid()
+            if memory_limit:
+                memory_governor.set_memory_limit(memory_limit)
 
         def signal_handler(*args, **kwargs):
             # Clang does not kill its child processes, so I have to.
@@ -139,14 +213,28 @@ class SourceAnalyzer(object):
         proc = subprocess.Popen(cmd,
                                 bufsize=-1,
                                 env=env,
-                                preexec_fn=os.setsid,
+                                preexec_fn=preexec,
                                 cwd=cwd,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE)
+                                stdout=stdout,
+                                stderr=stderr)
 
         # Send the created analyzer process' object if somebody wanted it.
         if proc_callback:
             proc_callback(proc)
 
-        stdout, stderr = proc.communicate()
-        return proc.returncode, stdout, stderr
+        # The outputs are written directly into the files, so the process
+        # can be waited for here, which returns its resource usage too.
+        while True:
+            try:
+                _, status, usage = os.wait4(proc.pid, 0)
+                break
+            except OSError as oerr:
+                if oerr.errno != errno.EINTR:
+                    raise
+
+        if os.WIFSIGNALED(status):
+            proc.returncode = -os.WTERMSIG(status)
+        else:
+            proc.returncode = os.WEXITSTATUS(status)
+
+        return proc.returncode, usage
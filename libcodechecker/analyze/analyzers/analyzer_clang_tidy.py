@@ -14,6 +14,7 @@ import re
 import shlex
 import subprocess
 
+from libcodechecker.analyze import analyzer_info_cache
 from libcodechecker.analyze.analyzers import analyzer_base
 from libcodechecker.logger import get_logger
 from libcodechecker.util import get_binary_in_path
@@ -60,7 +61,7 @@ class ClangTidy(analyzer_base.SourceAnalyzer):
 
             try:
                 command = shlex.split(' '.join(command))
-                result = subprocess.check_output(command, env=env)
+                result = analyzer_info_cache.check_output(command, env)
                 self.__parse_checkers(result)
             except (subprocess.CalledProcessError, OSError):
                 return {}
@@ -16,6 +16,7 @@ import re
 import shlex
 import subprocess
 
+from libcodechecker.analyze import analyzer_info_cache
 from libcodechecker.analyze.analyzers import analyzer_base
 from libcodechecker.analyze.analyzers import ctu_triple_arch
 from libcodechecker.analyze import analyzer_env
@@ -118,8 +119,8 @@ class ClangSA(analyzer_base.SourceAnalyzer):
 
         try:
             command = shlex.split(' '.join(command))
-            result = subprocess.check_output(command,
-                                             env=env)
+            result = analyzer_info_cache.check_output(
+                command, env, config_handler.analyzer_plugins)
             return parse_checkers(result)
         except (subprocess.CalledProcessError, OSError):
             return {}
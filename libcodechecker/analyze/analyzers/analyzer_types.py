@@ -431,6 +431,9 @@ def build_config_handlers(args, context, enabled_analyzers):
             config_handler = __build_clang_tidy_config_handler(args, context)
         else:
             LOG.debug("Unhandled analyzer: " + str(ea))
+
+        if 'output_format' in args:
+            config_handler.report_format = args.output_format
         analyzer_config_map[ea] = config_handler
 
     return analyzer_config_map
@@ -439,12 +442,13 @@ def build_config_handlers(args, context, enabled_analyzers):
 def construct_analyze_handler(buildaction,
                               report_output,
                               severity_map,
-                              skiplist_handler):
+                              skiplist_handler,
+                              report_format='plist'):
     """
     Construct an empty (base) ResultHandler which is capable of returning
     analyzer worker statuses to the caller method, but does not provide
     actual parsing and processing of results, instead only saves the analysis
-    results.
+    results in the given report format.
     """
     if buildaction.analyzer_type not in supported_analyzers:
         return None
@@ -458,4 +462,5 @@ def construct_analyze_handler(buildaction,
 
     res_handler.severity_map = severity_map
     res_handler.skiplist_handler = skiplist_handler
+    res_handler.report_format = report_format
     return res_handler
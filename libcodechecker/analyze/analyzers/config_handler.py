@@ -32,6 +32,7 @@ class AnalyzerConfigHandler(object):
         self.__analyzer_plugins_dir = None
         self.__compiler_resource_dir = ''
         self.__analyzer_extra_arguments = ''
+        self.__report_format = 'plist'
 
         # The key is the checker name, the value is a tuple.
         # False if disabled (should be by default).
@@ -141,3 +142,17 @@ class AnalyzerConfigHandler(object):
         Extra arguments forwarded to the analyzer without modification.
         """
         self.__analyzer_extra_arguments = value
+
+    @property
+    def report_format(self):
+        """
+        Format of the analysis result files: 'plist' or 'compact'.
+        """
+        return self.__report_format
+
+    @report_format.setter
+    def report_format(self, value):
+        """
+        Set the format of the analysis result files.
+        """
+        self.__report_format = value
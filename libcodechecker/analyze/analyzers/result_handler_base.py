@@ -14,11 +14,19 @@ from __future__ import absolute_import
 from abc import ABCMeta
 import hashlib
 import os
+import shutil
 
+from libcodechecker.analyze import compact_report
+from libcodechecker.analyze import plist_parser
+from libcodechecker.analyze import tidy_output_converter
 from libcodechecker.logger import get_logger
 
 LOG = get_logger('analyzer')
 
+# At most this much of the end of an analyzer output is loaded to report a
+# failed analysis, in bytes.
+OUTPUT_TAIL_SIZE = 64 * 1024
+
 
 class ResultHandler(object):
     """
@@ -54,11 +62,15 @@ class ResultHandler(object):
         self.__analyzer_cmd = []
         self.__analyzer_stdout = ''
         self.__analyzer_stderr = ''
+        self.__stdout_spool = None
+        self.__stderr_spool = None
         self.__severity_map = {}
         self.__skiplist_handler = None
         self.__analyzed_source_file = None
         self.__analyzer_returncode = 1
+        self.__analyzer_resource_usage = None
         self.__buildaction = action
+        self.__report_format = 'plist'
 
         self.__result_file = None
 
@@ -110,6 +122,20 @@ class ResultHandler(object):
         """
         self.__severity_map = value
 
+    @property
+    def report_format(self):
+        """
+        Format of the result file: 'plist' or 'compact'.
+        """
+        return self.__report_format
+
+    @report_format.setter
+    def report_format(self, value):
+        """
+        Set the format of the result file.
+        """
+        self.__report_format = value
+
     @property
     def workspace(self):
         """
@@ -130,11 +156,61 @@ class ResultHandler(object):
         """
         self.__analyzer_returncode = return_code
 
+    @property
+    def analyzer_resource_usage(self):
+        """
+        Resource usage (resource.struct_rusage) of the analyzer process or
+        None if it is not known.
+        """
+        return self.__analyzer_resource_usage
+
+    @analyzer_resource_usage.setter
+    def analyzer_resource_usage(self, usage):
+        """
+        Set the resource usage of the analyzer process.
+        """
+        self.__analyzer_resource_usage = usage
+
+    def set_analyzer_output(self, stdout_file, stderr_file):
+        """
+        Set the files which the stdout and the stderr of the analyzer were
+        spooled to. The outputs are only loaded from them when needed.
+        """
+        self.__stdout_spool = stdout_file
+        self.__stderr_spool = stderr_file
+        self.__analyzer_stdout = None
+        self.__analyzer_stderr = None
+
+    @staticmethod
+    def __read_spool(spool, size=None):
+        """
+        Read the spooled output, or only its last 'size' bytes.
+        """
+        spool.seek(0, os.SEEK_END)
+        length = spool.tell()
+        if size is None or length <= size:
+            spool.seek(0)
+            return spool.read()
+
+        spool.seek(length - size)
+        return ">>> CodeChecker: {0} bytes of the output were dropped. " \
+            "<<<\n{1}".format(length - size, spool.read())
+
+    @staticmethod
+    def __get_tail(text):
+        if len(text) <= OUTPUT_TAIL_SIZE:
+            return text
+        return ">>> CodeChecker: {0} bytes of the output were dropped. " \
+            "<<<\n{1}".format(len(text) - OUTPUT_TAIL_SIZE,
+                              text[-OUTPUT_TAIL_SIZE:])
+
     @property
     def analyzer_stdout(self):
         """
         Get the stdout from the analyzer.
         """
+        if self.__analyzer_stdout is None:
+            self.__analyzer_stdout = self.__read_spool(self.__stdout_spool)
         return self.__analyzer_stdout
 
     @analyzer_stdout.setter
@@ -143,12 +219,24 @@ class ResultHandler(object):
         Set the stdout of the analyzer.
         """
         self.__analyzer_stdout = stdout
+        self.__stdout_spool = None
+
+    @property
+    def analyzer_stdout_tail(self):
+        """
+        Get the end of the stdout from the analyzer, to report a failure.
+        """
+        if self.__analyzer_stdout is None:
+            return self.__read_spool(self.__stdout_spool, OUTPUT_TAIL_SIZE)
+        return self.__get_tail(self.__analyzer_stdout)
 
     @property
     def analyzer_stderr(self):
         """
         Get stderr of the analyzer.
         """
+        if self.__analyzer_stderr is None:
+            self.__analyzer_stderr = self.__read_spool(self.__stderr_spool)
         return self.__analyzer_stderr
 
     @analyzer_stderr.setter
@@ -157,6 +245,50 @@ class ResultHandler(object):
         Set the stderr of the analyzer.
         """
         self.__analyzer_stderr = stderr
+        self.__stderr_spool = None
+
+    @property
+    def analyzer_stderr_tail(self):
+        """
+        Get the end of stderr of the analyzer, to report a failure.
+        """
+        if self.__analyzer_stderr is None:
+            return self.__read_spool(self.__stderr_spool, OUTPUT_TAIL_SIZE)
+        return self.__get_tail(self.__analyzer_stderr)
+
+    def iter_analyzer_stdout_lines(self):
+        """
+        Yield the lines of the stdout from the analyzer without the line
+        endings. A spooled output is read line by line.
+        """
+        if self.__analyzer_stdout is not None:
+            for line in tidy_output_converter.iter_lines(
+                    self.__analyzer_stdout):
+                yield line
+            return
+
+        self.__stdout_spool.seek(0)
+        for line in self.__stdout_spool:
+            line = line.rstrip('\n')
+            yield line[:-1] if line.endswith('\r') else line
+
+    def save_analyzer_output(self, stdout_file, stderr_file):
+        """
+        Write the non-empty stdout and stderr of the analyzer into the given
+        files.
+        """
+        for text, spool, output_file in \
+                [(self.__analyzer_stdout, self.__stdout_spool, stdout_file),
+                 (self.__analyzer_stderr, self.__stderr_spool, stderr_file)]:
+            if text is None:
+                spool.seek(0, os.SEEK_END)
+                if spool.tell():
+                    spool.seek(0)
+                    with open(output_file, 'wb') as output:
+                        shutil.copyfileobj(spool, output)
+            elif text:
+                with open(output_file, 'w') as output:
+                    output.write(text)
 
     @property
     def analyzed_source_file(self):
@@ -210,12 +342,29 @@ class ResultHandler(object):
                 # There might be no result file if analysis failed.
                 LOG.debug(oserr)
 
-    def postprocess_result(self):
+    def postprocess_result(self, result_file=None):
         """
         Postprocess result if needed.
         Should be called after the analyses finished.
+
+        result_file is the final place of the result file, if the result
+        file of the analyzer was already moved there (the analyzer result
+        file by default).
+
+        The reports in the skipped files are removed from the result file,
+        because skipping reports in headers can be done only this way.
+
+        The plist file of the analyzer is converted to the compact format if
+        it was requested.
         """
-        pass
+        result_file = result_file or self.analyzer_result_file
+
+        if self.report_format == 'compact' and os.path.exists(result_file):
+            compact_report.convert_plist_to_compact(result_file)
+
+        if self.skiplist_handler:
+            plist_parser.skip_report_from_plist(result_file,
+                                                self.skiplist_handler)
 
     def handle_results(self, client):
         """
@@ -18,18 +18,25 @@ from libcodechecker.logger import get_logger
 LOG = get_logger('report')
 
 
-def generate_plist_from_tidy_result(output_file, tidy_stdout):
+def generate_plist_from_tidy_result(output_file, tidy_stdout,
+                                    skip_handler=None, compact=False):
     """
-    Generate a plist file from the clang tidy analyzer results.
+    Generate a plist file from the clang tidy analyzer results. The reports
+    in the files skipped by the skip handler are left out. If compact is
+    True, a compact result file is generated instead.
+
+    The output lines are converted one by one and every diagnostic is written
+    to the plist file as soon as it is parsed.
     """
     parser = tidy_output_converter.OutputParser()
 
-    messages = parser.parse_messages(tidy_stdout)
-
-    plist_converter = tidy_output_converter.PListConverter()
-    plist_converter.add_messages(messages)
-
-    plist_converter.write_to_file(output_file)
+    with open(output_file, 'wb') as output:
+        writer = tidy_output_converter.PListStreamWriter(output,
+                                                         skip_handler,
+                                                         compact)
+        for message in parser.iter_messages(tidy_stdout):
+            writer.add_message(message)
+        writer.close()
 
 
 class ClangTidyPlistToFile(ResultHandler):
@@ -37,12 +44,14 @@ class ClangTidyPlistToFile(ResultHandler):
     Create a plist file from clang-tidy results.
     """
 
-    def postprocess_result(self):
+    def postprocess_result(self, result_file=None):
         """
         Generate plist file which can be parsed and processed for
         results which can be stored into the database.
         """
-        output_file = self.analyzer_result_file
-        LOG.debug_analyzer(self.analyzer_stdout)
-        tidy_stdout = self.analyzer_stdout.splitlines()
-        generate_plist_from_tidy_result(output_file, tidy_stdout)
+        output_file = result_file or self.analyzer_result_file
+        LOG.debug_analyzer(self.analyzer_stdout_tail)
+        generate_plist_from_tidy_result(output_file,
+                                        self.iter_analyzer_stdout_lines(),
+                                        self.skiplist_handler,
+                                        self.report_format == 'compact')
@@ -0,0 +1,189 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Compact format of the analysis result files.
+
+The compact result files hold the same data as the plist files written by
+the analyzers, as JSON lines which are much faster to read than the XML
+plist. The first line of the file is the FORMAT_HEADER, every other line is
+a JSON array, which is one of
+ - ["m", entries]: the top-level entries of the plist besides the files and
+   the diagnostics, e.g. the version of the analyzer,
+ - ["f", path]: the next file of the interned file table, whose indexes are
+   used in the 'file' fields of the diagnostics, or
+ - ["d", diagnostic]: a diagnostic in the same structure as the elements of
+   the 'diagnostics' array of the plist files.
+
+A file is always added to the file table before the first diagnostic which
+refers to it, so the diagnostics can be written as soon as they are known.
+
+The compact result files have the same name as the plist files, so they are
+found by every command processing the results, and plist_parser reads both
+formats.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import json
+import plistlib
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+FORMAT_HEADER = '#CodeChecker compact report v1'
+
+META_RECORD = 'm'
+FILE_RECORD = 'f'
+DIAGNOSTIC_RECORD = 'd'
+
+# The lines of the diagnostics start with this prefix.
+DIAGNOSTIC_LINE_PREFIX = '["%s",' % DIAGNOSTIC_RECORD
+
+
+def is_compact_content(content):
+    """
+    Return True if the given result file content is in the compact format.
+    """
+    return content.startswith(FORMAT_HEADER)
+
+
+def is_compact_file(path):
+    """
+    Return True if the given result file is in the compact format.
+    """
+    with open(path, 'rb') as result_file:
+        return is_compact_content(result_file.read(len(FORMAT_HEADER)))
+
+
+def count_reports(content):
+    """
+    Return the number of reports in the compact content without parsing it.
+    """
+    return content.count('\n' + DIAGNOSTIC_LINE_PREFIX)
+
+
+class CompactReportWriter(object):
+    """
+    Write the files and the diagnostics of an analysis result to the output
+    one by one.
+    """
+
+    def __init__(self, output):
+        self.__output = output
+        self.__output.write(FORMAT_HEADER + '\n')
+
+    def __write(self, record):
+        self.__output.write(json.dumps(record, separators=(',', ':')))
+        self.__output.write('\n')
+
+    def add_file(self, path):
+        """
+        Add the next file of the file table.
+        """
+        self.__write([FILE_RECORD, path])
+
+    def add_meta(self, entries):
+        """
+        Write top-level entries of the result besides the files and the
+        diagnostics.
+        """
+        self.__write([META_RECORD, entries])
+
+    def add_diagnostic(self, diagnostic):
+        """
+        Write a diagnostic, whose files are already in the file table.
+        """
+        self.__write([DIAGNOSTIC_RECORD, diagnostic])
+
+
+def loads(content):
+    """
+    Parse the compact content to a dict with 'files' and 'diagnostics' keys,
+    like the dict read from a plist file.
+    """
+    files = []
+    diagnostics = []
+    report_data = {}
+
+    lines = content.splitlines()
+    if not lines or lines[0] != FORMAT_HEADER:
+        raise ValueError("Not a compact report file.")
+
+    for line in lines[1:]:
+        if not line:
+            continue
+
+        kind, value = json.loads(line)
+        if kind == DIAGNOSTIC_RECORD:
+            diagnostics.append(value)
+        elif kind == FILE_RECORD:
+            files.append(value)
+        elif kind == META_RECORD:
+            report_data.update(value)
+        else:
+            raise ValueError("Unknown record in the compact report: " +
+                             kind)
+
+    report_data['files'] = files
+    report_data['diagnostics'] = diagnostics
+    return report_data
+
+
+def load(path):
+    """
+    Read the compact result file, see loads().
+    """
+    with open(path, 'rb') as result_file:
+        return loads(result_file.read())
+
+
+def dump(report_data, output):
+    """
+    Write the files and the diagnostics of the report data (read from a
+    plist or a compact file) to the output in the compact format.
+    """
+    writer = CompactReportWriter(output)
+
+    meta = dict((key, value) for key, value in report_data.items()
+                if key not in ['files', 'diagnostics'])
+    if meta:
+        writer.add_meta(meta)
+
+    for path in report_data.get('files', []):
+        writer.add_file(path)
+    for diagnostic in report_data.get('diagnostics', []):
+        writer.add_diagnostic(diagnostic)
+
+
+def dumps(report_data):
+    """
+    Return the report data in the compact format, see dump().
+    """
+    output = StringIO()
+    dump(report_data, output)
+    return output.getvalue()
+
+
+def convert_plist_to_compact(plist_file, output_file=None):
+    """
+    Convert the plist result file to the compact format. The plist file is
+    overwritten if no output file is given.
+    """
+    report_data = plistlib.readPlist(plist_file)
+    with open(output_file or plist_file, 'wb') as output:
+        dump(report_data, output)
+
+
+def convert_compact_to_plist(compact_file, output_file=None):
+    """
+    Convert the compact result file to a plist file. The compact file is
+    overwritten if no output file is given.
+    """
+    report_data = load(compact_file)
+    plistlib.writePlist(report_data, output_file or compact_file)
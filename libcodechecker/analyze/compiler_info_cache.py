@@ -0,0 +1,77 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Persistent cache of the built-in include paths and target triples queried
+from the compilers of the build.
+
+Querying these requires running every compiler of the build, which is slow
+for builds using a lot of toolchains. The output of the queries is stored in
+a file in the user's home directory, keyed by the compiler binary (its path,
+modification time and size) and the options of the query, so the compilers
+are only run again if they were changed. The cache file is shared by the
+concurrently running CodeChecker commands (see json_cache).
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from distutils.spawn import find_executable
+import hashlib
+import os
+
+from libcodechecker import util
+from libcodechecker.analyze import json_cache
+
+CACHE_FILE_NAME = 'compiler_info_cache.json'
+
+# Increase this if the layout of the cache file changes, old caches will be
+# dropped automatically.
+CACHE_FORMAT_VERSION = 1
+
+
+def get_default_cache_file():
+    """
+    The cache is shared by every analysis of the user.
+    """
+    return os.path.join(util.get_default_workspace(), CACHE_FILE_NAME)
+
+
+def get_compiler_key(compiler, query):
+    """
+    Return the cache key of the given query (a list of strings) of the
+    compiler, or None if the compiler binary can not be found.
+    """
+    if os.sep in compiler:
+        compiler_path = os.path.abspath(compiler)
+    else:
+        compiler_path = find_executable(compiler)
+
+    if not compiler_path:
+        return None
+
+    try:
+        compiler_path = os.path.realpath(compiler_path)
+        stat = os.stat(compiler_path)
+    except OSError:
+        return None
+
+    hasher = hashlib.sha1()
+    hasher.update(compiler_path)
+    hasher.update('\0' + repr(stat.st_mtime) + '\0' + str(stat.st_size))
+    for part in query:
+        hasher.update('\0' + part)
+    return hasher.hexdigest()
+
+
+class CompilerInfoCache(json_cache.JsonCache):
+    """
+    Stores the output of compiler queries. The cache can be used from
+    multiple threads, the new entries are written by save().
+    """
+
+    def __init__(self, cache_file):
+        json_cache.JsonCache.__init__(self, cache_file, CACHE_FORMAT_VERSION,
+                                      'compiler info cache')
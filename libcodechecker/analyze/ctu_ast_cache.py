@@ -0,0 +1,192 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Persistent cache of the ASTs and function maps created by the CTU collect
+phase.
+
+The collect phase dumps the AST and the function map of every translation
+unit into the CTU directory, which is removed whenever the collect phase is
+run again. The cache keeps these files in a separate directory, addressed by
+the hash of everything they are generated from: the compile command, the
+analyzer binary and the content of the source file and every header included
+by it. Translation units which did not change since a previous collect phase
+get their AST and function map from the cache instead of recompiling them.
+
+The cache is bounded in size, the least recently used entries are evicted
+at the end of the collect phase.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import hashlib
+import os
+import shlex
+import shutil
+import tempfile
+
+from libcodechecker.analyze import analysis_cache
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+CACHE_DIR_NAME = 'ctu-cache'
+
+# Default size limit of the cache in megabytes.
+DEFAULT_CACHE_SIZE = 4096
+
+AST_FILE = 'ast'
+FUNC_MAP_FILE = 'fnmap'
+
+
+def link_or_copy(source, target):
+    """
+    Hard link the source file to the target path, or copy it if the files
+    are on different file systems. The ASTs are only read after they are
+    created, so they can be shared.
+    """
+    target_dir = os.path.dirname(target)
+    if not os.path.isdir(target_dir):
+        try:
+            os.makedirs(target_dir)
+        except OSError:
+            pass
+
+    if os.path.exists(target):
+        os.remove(target)
+
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class CtuAstCache(object):
+    """
+    Stores the AST and the function map of the translation units in entries
+    named by their content hash.
+    """
+
+    def __init__(self, cache_dir, analyzer_fingerprint,
+                 max_size=DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.__analyzer_fingerprint = analyzer_fingerprint
+
+    def __entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get_key(self, action, triple_arch, compile_command):
+        """
+        Return the cache key of the AST built by the given compile command,
+        or None if the build action can not be cached because its
+        dependencies can not be collected.
+        """
+        try:
+            dependencies = analysis_manager.create_dependencies(
+                shlex.split(action.original_command), action.directory)
+        except Exception as ex:
+            LOG.debug("Couldn't create dependencies for the CTU cache:")
+            LOG.debug(str(ex))
+            return None
+
+        fingerprints = analysis_cache.fingerprint_dependencies(
+            dependencies, action.directory)
+        if fingerprints is None:
+            return None
+
+        hasher = hashlib.sha1()
+        hasher.update(self.__analyzer_fingerprint)
+        hasher.update('\0' + triple_arch)
+        hasher.update('\0' + action.directory)
+        hasher.update('\0' + ' '.join(compile_command))
+        for path in sorted(fingerprints):
+            hasher.update('\0' + path + '\0' + fingerprints[path][2])
+        return hasher.hexdigest()
+
+    def restore(self, key, ast_path):
+        """
+        Put the cached AST to the given path and return the cached function
+        map lines. Returns None if there is no such entry.
+        """
+        entry_dir = self.__entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, FUNC_MAP_FILE), 'r') as fnmap:
+                func_ast_list = fnmap.read().splitlines()
+
+            link_or_copy(os.path.join(entry_dir, AST_FILE), ast_path)
+
+            # The modification time of the entry marks its last use.
+            os.utime(entry_dir, None)
+        except (IOError, OSError):
+            return None
+
+        return func_ast_list
+
+    def store(self, key, ast_path, func_ast_list):
+        """
+        Store the AST and the function map lines of a translation unit.
+        """
+        entry_dir = self.__entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+
+        parent_dir = os.path.dirname(entry_dir)
+        try:
+            if not os.path.isdir(parent_dir):
+                os.makedirs(parent_dir)
+        except OSError:
+            # Created by an other worker meanwhile.
+            pass
+
+        # The entry is assembled in a temporary directory and renamed in
+        # place, so other processes never see a partial entry.
+        tmp_dir = tempfile.mkdtemp(dir=parent_dir)
+        try:
+            link_or_copy(ast_path, os.path.join(tmp_dir, AST_FILE))
+            with open(os.path.join(tmp_dir, FUNC_MAP_FILE), 'w') as fnmap:
+                fnmap.write('\n'.join(func_ast_list))
+            os.rename(tmp_dir, entry_dir)
+        except (IOError, OSError) as ex:
+            LOG.debug("Failed to store '%s' in the CTU cache: %s",
+                      ast_path, ex)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the size of the cache
+        fits into the limit.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        total_size = 0
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                try:
+                    size = sum(os.path.getsize(os.path.join(entry_dir, f))
+                               for f in os.listdir(entry_dir))
+                    entries.append((os.path.getmtime(entry_dir), size,
+                                    entry_dir))
+                except OSError:
+                    continue
+                total_size += size
+
+        max_size = self.max_size * 1024 * 1024
+        evicted = 0
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            evicted += 1
+
+        if evicted:
+            LOG.debug("Evicted %d entries from the CTU cache.", evicted)
@@ -11,6 +11,8 @@ from __future__ import division
 from __future__ import absolute_import
 
 import glob
+import heapq
+import multiprocessing
 import os
 import shutil
 import tempfile
@@ -22,6 +24,12 @@ from libcodechecker.logger import get_logger
 LOG = get_logger('analyzer')
 
 
+# Number of function map lines which are sorted in memory at once when the
+# function maps of the translation units are merged. Longer inputs are
+# sorted in chunks of this size which are merged from temporary files.
+FUNC_MAP_CHUNK_SIZE = 500000
+
+
 def generate_func_map_lines(fnmap_dir):
     """ Iterate over all lines of input files in random order. """
 
@@ -32,29 +40,86 @@ def generate_func_map_lines(fnmap_dir):
                 yield line
 
 
-def create_global_ctu_function_map(func_map_lines):
-    """ Takes iterator of individual function maps and creates a global map
-    keeping only unique names. We leave conflicting names out of CTU.
-    A function map contains the id of a function (mangled name) and the
-    originating source (the corresponding AST file) name."""
+def __write_sorted_run(lines, tmp_dir):
+    """ Sort the given lines and write them into a new temporary file. """
 
-    mangled_to_asts = {}
+    lines.sort()
+    with tempfile.NamedTemporaryFile(mode='w', dir=tmp_dir,
+                                     delete=False) as run_file:
+        run_file.writelines(lines)
+    return run_file.name
 
-    for line in func_map_lines:
-        mangled_name, ast_file = line.strip().split(' ', 1)
-        # We collect all occurences of a function name into a list
-        if mangled_name not in mangled_to_asts:
-            mangled_to_asts[mangled_name] = {ast_file}
-        else:
-            mangled_to_asts[mangled_name].add(ast_file)
 
-    mangled_ast_pairs = []
+def sort_func_map_lines(func_map_lines, tmp_dir,
+                        chunk_size=FUNC_MAP_CHUNK_SIZE):
+    """ Iterate over the given function map lines in sorted order.
+
+    At most chunk_size lines are kept in memory. If there are more lines,
+    sorted chunks of them are written to temporary files in tmp_dir which are
+    merged while iterating."""
+
+    run_files = []
+    chunk = []
+    opened_runs = []
+    try:
+        for line in func_map_lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            chunk.append(line + '\n')
+            if len(chunk) >= chunk_size:
+                run_files.append(__write_sorted_run(chunk, tmp_dir))
+                chunk = []
+
+        if not run_files:
+            chunk.sort()
+            for line in chunk:
+                yield line
+            return
+
+        if chunk:
+            run_files.append(__write_sorted_run(chunk, tmp_dir))
+            chunk = []
+
+        opened_runs = [open(run_file, 'r') for run_file in run_files]
+        for line in heapq.merge(*opened_runs):
+            yield line
+    finally:
+        for run_file in opened_runs:
+            run_file.close()
+        for run_file in run_files:
+            os.remove(run_file)
+
+
+def create_global_ctu_function_map(sorted_func_map_lines):
+    """ Takes the sorted lines of the individual function maps and yields a
+    global map keeping only unique names. We leave conflicting names out of
+    CTU. A function map contains the id of a function (mangled name) and the
+    originating source (the corresponding AST file) name.
+
+    As the lines are sorted, every occurrence of a function name is adjacent,
+    so only the current name has to be kept in memory. (A space sorts before
+    every character which can appear in a mangled name.)"""
+
+    current_name = None
+    current_ast = None
+    conflicting = False
 
-    for mangled_name, ast_files in mangled_to_asts.items():
-        if len(ast_files) == 1:
-            mangled_ast_pairs.append((mangled_name, ast_files.pop()))
+    for line in sorted_func_map_lines:
+        mangled_name, ast_file = line.strip().split(' ', 1)
+        if mangled_name != current_name:
+            if current_name is not None and not conflicting:
+                yield current_name, current_ast
+
+            current_name = mangled_name
+            current_ast = ast_file
+            conflicting = False
+        elif ast_file != current_ast:
+            conflicting = True
 
-    return mangled_ast_pairs
+    if current_name is not None and not conflicting:
+        yield current_name, current_ast
 
 
 def write_global_map(ctu_dir, arch, ctu_func_map_file, mangled_ast_pairs):
@@ -66,7 +131,32 @@ def write_global_map(ctu_dir, arch, ctu_func_map_file, mangled_ast_pairs):
             out_file.write('%s %s\n' % (mangled_name, ast_file))
 
 
-def merge_ctu_func_maps(ctu_dir, ctu_func_map_file, ctu_temp_fnmap_folder):
+def merge_arch_func_maps(params):
+    """ Merge the individual function maps of one triple arch into the
+    global map of the arch."""
+
+    ctu_dir, triple_arch, ctu_func_map_file, ctu_temp_fnmap_folder = params
+
+    arch_dir = os.path.join(ctu_dir, triple_arch)
+    fnmap_dir = os.path.join(arch_dir, ctu_temp_fnmap_folder)
+
+    # The sorted chunks are stored next to the individual function maps.
+    sort_dir = tempfile.mkdtemp(dir=arch_dir)
+    try:
+        func_map_lines = generate_func_map_lines(fnmap_dir)
+        sorted_lines = sort_func_map_lines(func_map_lines, sort_dir)
+        mangled_ast_pairs = create_global_ctu_function_map(sorted_lines)
+        write_global_map(ctu_dir, triple_arch, ctu_func_map_file,
+                         mangled_ast_pairs)
+    finally:
+        shutil.rmtree(sort_dir, ignore_errors=True)
+
+    # Remove all temporary files
+    shutil.rmtree(fnmap_dir, ignore_errors=True)
+
+
+def merge_ctu_func_maps(ctu_dir, ctu_func_map_file, ctu_temp_fnmap_folder,
+                        jobs=1):
     """ Merge individual function maps into a global one.
 
     As the collect phase runs parallel on multiple threads, all compilation
@@ -74,30 +164,49 @@ def merge_ctu_func_maps(ctu_dir, ctu_func_map_file, ctu_temp_fnmap_folder):
     These function maps contain the mangled names of functions and the source
     (AST generated from the source) which had them.
     These files should be merged at the end into a global map file:
-    ctu_func_map_file."""
+    ctu_func_map_file.
+
+    The function maps are merged with an external sort, so the memory usage
+    does not depend on the number of functions. The triple arches are merged
+    in parallel, using at most 'jobs' processes."""
 
+    merge_params = []
     triple_arches = glob.glob(os.path.join(ctu_dir, '*'))
     for triple_path in triple_arches:
         if os.path.isdir(triple_path):
             triple_arch = os.path.basename(triple_path)
-            fnmap_dir = os.path.join(ctu_dir, triple_arch,
-                                     ctu_temp_fnmap_folder)
+            merge_params.append((ctu_dir, triple_arch, ctu_func_map_file,
+                                 ctu_temp_fnmap_folder))
 
-            func_map_lines = generate_func_map_lines(fnmap_dir)
-            mangled_ast_pairs = create_global_ctu_function_map(func_map_lines)
-            write_global_map(ctu_dir, triple_arch, ctu_func_map_file,
-                             mangled_ast_pairs)
-
-            # Remove all temporary files
-            shutil.rmtree(fnmap_dir, ignore_errors=True)
+    if jobs > 1 and len(merge_params) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(merge_params)))
+        try:
+            pool.map_async(merge_arch_func_maps,
+                           merge_params).get(float('inf'))
+            pool.close()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    else:
+        for params in merge_params:
+            merge_arch_func_maps(params)
+
+
+def get_ast_path(ctu_dir, triple_arch, source):
+    """ Returns the path of the AST dump of the given source file. """
+
+    ast_joined_path = os.path.join(ctu_dir, triple_arch, 'ast',
+                                   os.path.realpath(source)[1:] + '.ast')
+    return os.path.abspath(ast_joined_path)
 
 
 def generate_ast(triple_arch, action, source, config, env):
-    """ Generates ASTs for the current compilation command. """
+    """ Generates ASTs for the current compilation command.
+    Returns True if the AST was generated successfully. """
 
-    ast_joined_path = os.path.join(config.ctu_dir, triple_arch, 'ast',
-                                   os.path.realpath(source)[1:] + '.ast')
-    ast_path = os.path.abspath(ast_joined_path)
+    ast_path = get_ast_path(config.ctu_dir, triple_arch, source)
     ast_dir = os.path.dirname(ast_path)
     if not os.path.isdir(ast_dir):
         try:
@@ -116,6 +225,9 @@ def generate_ast(triple_arch, action, source, config, env):
     if ret_code != 0:
         LOG.error("Error generating AST.\n\ncommand:\n\n%s\n\nstderr:\n\n%s",
                   cmdstr, err)
+        return False
+
+    return True
 
 
 def func_map_list_src_to_ast(func_src_list):
@@ -136,9 +248,29 @@ def func_map_list_src_to_ast(func_src_list):
     return func_ast_list
 
 
+def write_func_map(ctu_dir, triple_arch, temp_fnmap_folder, func_ast_list):
+    """ Write the function map of a translation unit into a new file of the
+    temporary function map folder, to be merged later. """
+
+    extern_fns_map_folder = os.path.join(ctu_dir, triple_arch,
+                                         temp_fnmap_folder)
+    if not os.path.isdir(extern_fns_map_folder):
+        try:
+            os.makedirs(extern_fns_map_folder)
+        except OSError:
+            pass
+
+    if func_ast_list:
+        with tempfile.NamedTemporaryFile(mode='w',
+                                         dir=extern_fns_map_folder,
+                                         delete=False) as out_file:
+            out_file.write("\n".join(func_ast_list) + "\n")
+
+
 def map_functions(triple_arch, action, source, config, env,
                   func_map_cmd, temp_fnmap_folder):
-    """ Generate function map file for the current source. """
+    """ Generate function map file for the current source.
+    Returns the lines of the function map or None on failure. """
 
     cmd = ctu_triple_arch.get_compile_command(action, config)
     cmd[0] = func_map_cmd
@@ -154,20 +286,10 @@ def map_functions(triple_arch, action, source, config, env,
     if ret_code != 0:
         LOG.error("Error generating function map."
                   "\n\ncommand:\n\n%s\n\nstderr:\n\n%s", cmdstr, err)
-        return
+        return None
 
     func_src_list = stdout.splitlines()
     func_ast_list = func_map_list_src_to_ast(func_src_list)
-    extern_fns_map_folder = os.path.join(config.ctu_dir, triple_arch,
-                                         temp_fnmap_folder)
-    if not os.path.isdir(extern_fns_map_folder):
-        try:
-            os.makedirs(extern_fns_map_folder)
-        except OSError:
-            pass
-
-    if func_ast_list:
-        with tempfile.NamedTemporaryFile(mode='w',
-                                         dir=extern_fns_map_folder,
-                                         delete=False) as out_file:
-            out_file.write("\n".join(func_ast_list) + "\n")
+    write_func_map(config.ctu_dir, triple_arch, temp_fnmap_folder,
+                   func_ast_list)
+    return func_ast_list
@@ -0,0 +1,427 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Pipelined CTU analysis.
+
+By default the CTU 'collect' phase (AST and function map generation) has to
+finish for every translation unit, and the function maps have to be merged,
+before the first analysis can start. In the pipelined mode both phases run
+in the same process pool. The function maps of the translation units are
+merged into the global function map as they arrive, and the workers which
+would idle in the tail of the collect phase already analyze translation
+units using the partial map. The partial map only contains functions whose
+AST is already written.
+
+An analysis started with a partial map may miss functions which were added
+to the map later, or may have imported a function which later turned out to
+be defined in multiple ASTs (such functions are left out of the final map).
+When the collect phase is finished, the result of such an analysis is only
+kept if the translation unit does not refer to any of the functions which
+changed in the map since its analysis was started. The other translation
+units are analyzed again, with the final map.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from collections import defaultdict, deque
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import time
+import traceback
+
+try:
+    from Queue import Empty, Queue
+except ImportError:
+    from queue import Empty, Queue
+
+from libcodechecker import util
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import analysis_scheduler
+from libcodechecker.analyze import analyzer_env
+from libcodechecker.analyze import ctu_manager
+from libcodechecker.analyze import pre_analysis_manager
+from libcodechecker.analyze.analyzers import analyzer_types
+from libcodechecker.analyze.analyzers import ctu_triple_arch
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+# The partial function map is written at most this often (in seconds).
+PUBLISH_INTERVAL = 1
+
+
+def get_identifier(mangled_name):
+    """
+    Return the name of the function identified by the given USR, e.g.
+    'foo' for 'c:@N@ns@F@foo#I#', or None if it can not be determined.
+    """
+    if not mangled_name.startswith('c:'):
+        return None
+
+    identifier = mangled_name.rsplit('@', 1)[-1].split('#', 1)[0]
+    return identifier or None
+
+
+def refers_to_any(ast_path, mangled_names):
+    """
+    Check whether the AST of a translation unit may refer to any of the given
+    functions. The identifier table of the AST contains the name of every
+    function declared in the translation unit, so the check is conservative:
+    it returns True if in doubt.
+    """
+    if not mangled_names:
+        return False
+
+    identifiers = set()
+    for mangled_name in mangled_names:
+        identifier = get_identifier(mangled_name)
+        if identifier is None:
+            return True
+        identifiers.add(identifier)
+
+    try:
+        with open(ast_path, 'rb') as ast:
+            content = ast.read()
+    except (IOError, OSError):
+        return True
+
+    return any(identifier in content for identifier in identifiers)
+
+
+class IncrementalFuncMap(object):
+    """
+    The global CTU function map of every triple arch, built from the function
+    maps of the translation units one by one. Conflicting function names
+    (which are defined in multiple ASTs) are left out of the map, like in
+    ctu_manager.merge_ctu_func_maps().
+
+    Every written (published) state of the map has a version number, and the
+    version in which a function name was last changed is recorded.
+    """
+
+    def __init__(self, ctu_dir, ctu_func_map_file):
+        self.__ctu_dir = ctu_dir
+        self.__ctu_func_map_file = ctu_func_map_file
+
+        # Triple arch -> function name -> AST file, or None for conflicts.
+        self.__func_maps = defaultdict(dict)
+        self.__changed = {}
+        self.__unpublished = set()
+        self.__last_publish = 0
+
+        self.version = 0
+
+    def add(self, triple_arch, func_ast_list):
+        """
+        Merge the function map lines of a translation unit.
+        """
+        func_map = self.__func_maps[triple_arch]
+        for line in func_ast_list:
+            mangled_name, ast_file = line.strip().split(' ', 1)
+            current = func_map.get(mangled_name, '')
+            if current == '':
+                func_map[mangled_name] = ast_file
+            elif current is not None and current != ast_file:
+                func_map[mangled_name] = None
+            else:
+                continue
+            self.__unpublished.add(mangled_name)
+
+    def publish(self, force=False):
+        """
+        Write the function map files if they changed since the last time,
+        but not more often than PUBLISH_INTERVAL unless forced. Returns the
+        version of the written map.
+        """
+        if not self.__unpublished or \
+                (not force and
+                 time.time() - self.__last_publish < PUBLISH_INTERVAL):
+            return self.version
+
+        self.version += 1
+        for mangled_name in self.__unpublished:
+            self.__changed[mangled_name] = self.version
+        self.__unpublished = set()
+
+        for triple_arch, func_map in self.__func_maps.items():
+            map_file = os.path.join(self.__ctu_dir, triple_arch,
+                                    self.__ctu_func_map_file)
+            tmp_file = map_file + '.tmp'
+            with open(tmp_file, 'w') as out_file:
+                for mangled_name, ast_file in func_map.items():
+                    if ast_file is not None:
+                        out_file.write('%s %s\n' % (mangled_name, ast_file))
+
+            # The analyzers may read the map at any time, so it is replaced
+            # atomically.
+            os.rename(tmp_file, map_file)
+
+        self.__last_publish = time.time()
+        return self.version
+
+    def changed_since(self, version):
+        """
+        Return the function names which changed after the given version.
+        """
+        return [mangled_name for mangled_name, changed in
+                self.__changed.items() if changed > version]
+
+
+# Read-only data of the collect jobs which is the same for every build
+# action. It is set once in every worker process by init_worker().
+collect_state = None
+
+
+def init_worker(collected_num, collect_num, checked_num, action_num,
+                pre_state, analysis_state):
+    """
+    Initialize a worker process which runs both collect and analysis jobs.
+    """
+    global collect_state
+    collect_state = pre_state
+
+    pre_analysis_manager.init_worker(collected_num, collect_num)
+    analysis_manager.init_worker(checked_num, action_num, analysis_state)
+
+
+def collect(job):
+    """
+    Generate the AST and the function map of the sources of a build action.
+    Returns the index of the build action and a (triple arch, AST path,
+    function map lines) triple for every collected source.
+    """
+    action_index, action = job
+
+    context, analyzer_config_map, skip_handler, ctu_data, \
+        analyzer_environment = collect_state
+
+    config = analyzer_config_map.get(analyzer_types.CLANG_SA)
+
+    pre_analysis_manager.progress_checked_num.value += 1
+
+    collected = []
+    try:
+        for source in action.sources:
+            if skip_handler and skip_handler.should_skip(source):
+                continue
+
+            source = util.escape_source_path(source)
+
+            LOG.info("[%d/%d] %s" %
+                     (pre_analysis_manager.progress_checked_num.value,
+                      pre_analysis_manager.progress_actions.value,
+                      os.path.basename(source)))
+
+            triple_arch = ctu_triple_arch.get_triple_arch(
+                action, source, config, analyzer_environment)
+            func_ast_list = pre_analysis_manager.collect_ctu_data(
+                triple_arch, action, source, config, analyzer_environment,
+                context.ctu_func_map_cmd, ctu_data['ctu_temp_fnmap_folder'],
+                ctu_data.get('ctu_ast_cache'))
+
+            collected.append((triple_arch,
+                              ctu_manager.get_ast_path(config.ctu_dir,
+                                                       triple_arch, source),
+                              func_ast_list or []))
+    except Exception as ex:
+        LOG.debug_analyzer(str(ex))
+        traceback.print_exc(file=sys.stdout)
+
+    return action_index, collected
+
+
+def start_workers(actions_map, actions, context, analyzer_config_map,
+                  jobs, output_path, skip_handler, metadata,
+                  quiet_analyze, capture_analysis_output, timeout,
+                  ctu_reanalyze_on_failure, ctu_data,
+                  up_to_date_num=0):
+    """
+    Run the CTU collect and analyze phases of the build actions pipelined,
+    in one pool of worker processes.
+
+    This is the pipelined equivalent of running
+    pre_analysis_manager.run_pre_analysis() and then
+    analysis_manager.start_workers().
+    """
+
+    def signal_handler(*arg, **kwarg):
+        try:
+            pool.terminate()
+        finally:
+            sys.exit(1)
+
+    signal.signal(signal.SIGINT, signal_handler)
+
+    LOG.info("Collecting data for ctu analysis while analyzing.")
+
+    state = analysis_manager.create_analysis_state(
+        actions_map, context, analyzer_config_map, output_path, skip_handler,
+        quiet_analyze, capture_analysis_output, timeout,
+        ctu_reanalyze_on_failure, None, None)
+
+    pre_state = (context,
+                 analyzer_config_map,
+                 skip_handler,
+                 ctu_data,
+                 analyzer_env.get_check_env(context.path_env_extra,
+                                            context.ld_lib_path_extra))
+
+    history = analysis_scheduler.AnalysisHistory(output_path)
+    actions, predicted_makespan = history.order_longest_first(actions, jobs)
+
+    # The build actions of the other analyzers do not depend on the collect
+    # phase, they are ready to be analyzed right away.
+    pending_collect = deque()
+    ready = deque()
+    for job in enumerate(actions):
+        if job[1].analyzer_type == analyzer_types.CLANG_SA:
+            pending_collect.append(job)
+        else:
+            ready.append(job)
+
+    collected_var = multiprocessing.Value('i', 0)
+    collect_num = multiprocessing.Value('i', len(pending_collect))
+    checked_var = multiprocessing.Value('i', 1)
+    actions_num = multiprocessing.Value('i', len(actions))
+    pool = multiprocessing.Pool(jobs,
+                                initializer=init_worker,
+                                initargs=(collected_var,
+                                          collect_num,
+                                          checked_var,
+                                          actions_num,
+                                          pre_state,
+                                          state))
+
+    func_map = IncrementalFuncMap(ctu_data['ctu_dir'],
+                                  ctu_data['ctu_func_map_file'])
+    result_handler = analysis_manager.WorkerResultHandler(metadata,
+                                                          output_path)
+    failure_archiver = analysis_manager.FailureArchiver(output_path,
+                                                        actions_map)
+
+    # The results are put into this queue by the result handler thread of
+    # the pool.
+    finished = Queue()
+
+    # Number of the running jobs, and the map version with which the running
+    # and the not yet validated analyses were started.
+    running = [0]
+    collecting_num = [0]
+    started_version = {}
+    speculative = []
+    ast_paths = {}
+
+    def submit(func, job, kind):
+        running[0] += 1
+        pool.apply_async(func, (job,),
+                         callback=lambda result: finished.put((kind, result)))
+
+    def dispatch():
+        while running[0] < jobs:
+            if pending_collect:
+                collecting_num[0] += 1
+                submit(collect, pending_collect.popleft(), 'collect')
+            elif ready:
+                job = ready.popleft()
+                if job[1].analyzer_type == analyzer_types.CLANG_SA:
+                    started_version[job[0]] = func_map.publish(
+                        not pending_collect and not collecting_num[0])
+                submit(analysis_manager.check, job, 'check')
+            else:
+                break
+
+    def accept(result):
+        result_handler.handle(result)
+        if not result[1]:
+            history.record(actions[result[8]], result[6])
+        for failure in result[11]:
+            failure_archiver.add(actions[result[8]], failure)
+
+    def validate(result):
+        """
+        Keep the result of an analysis which was started with a partial
+        function map if the map did not change in a relevant way since.
+        """
+        index = result[8]
+        changed = func_map.changed_since(started_version[index])
+        if any(refers_to_any(ast_path, changed)
+               for ast_path in ast_paths.get(index, [])):
+            LOG.debug("The function map changed since the analysis of %s, "
+                      "analyzing it again.",
+                      ', '.join(actions[index].sources))
+            actions_num.value += 1
+            ready.append((index, actions[index]))
+        else:
+            accept(result)
+
+    start_time = time.time()
+    completed = False
+    try:
+        dispatch()
+        while running[0]:
+            try:
+                # The timeout also makes the main thread receive signals.
+                kind, result = finished.get(True, 1)
+            except Empty:
+                continue
+
+            running[0] -= 1
+            if kind == 'collect':
+                collecting_num[0] -= 1
+                index, collected = result
+                for triple_arch, ast_path, func_ast_list in collected:
+                    func_map.add(triple_arch, func_ast_list)
+                ast_paths[index] = [c[1] for c in collected]
+                ready.append((index, actions[index]))
+
+                if not pending_collect and not collecting_num[0]:
+                    # The map is complete, the analyses which were started
+                    # with a partial map can be validated.
+                    func_map.publish(True)
+                    LOG.info("CTU function map is complete.")
+                    for spec_result in speculative:
+                        validate(spec_result)
+                    speculative = []
+            elif result[8] not in started_version:
+                accept(result)
+            elif pending_collect or collecting_num[0]:
+                speculative.append(result)
+            else:
+                validate(result)
+
+            dispatch()
+
+        pool.close()
+        completed = True
+    except Exception:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        failure_archiver.finish(discard_pending=not completed)
+        result_handler.flush()
+        history.save()
+
+        # The function maps of the translation units are merged already.
+        ctu_dir = ctu_data['ctu_dir']
+        triple_arches = os.listdir(ctu_dir) if os.path.isdir(ctu_dir) else []
+        for triple_arch in triple_arches:
+            shutil.rmtree(os.path.join(ctu_dir, triple_arch,
+                                       ctu_data['ctu_temp_fnmap_folder']),
+                          ignore_errors=True)
+
+        ast_cache = ctu_data.get('ctu_ast_cache')
+        if ast_cache:
+            ast_cache.evict()
+
+    result_handler.finish(up_to_date_num,
+                          (predicted_makespan, time.time() - start_time))
+
+    analysis_manager.remove_empty_output_dirs(output_path)
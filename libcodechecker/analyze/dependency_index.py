@@ -0,0 +1,183 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Persistent reverse dependency index of the analyzed translation units.
+
+The index is stored in the output directory of the analysis and maps every
+source and header file to the source files of the translation units which
+include it, so the build actions affected by a set of changed files (e.g.
+the files of a pull request) can be selected without analyzing the whole
+compilation database.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import json
+import os
+import subprocess
+
+from libcodechecker import util
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+INDEX_FILE_NAME = 'dependency_index.json'
+
+# Increase this if the layout of the index file changes, old indexes will be
+# dropped automatically.
+INDEX_FORMAT_VERSION = 1
+
+# The --changed-files value which means the output of 'git diff'.
+GIT_DIFF = 'git-diff'
+
+
+class DependencyIndex(object):
+    """
+    The files every analyzed source file depends on and its reverse: the
+    source files which depend on a file. Every path is a real path.
+    """
+
+    def __init__(self, output_path):
+        self.__index_file = os.path.join(output_path, INDEX_FILE_NAME)
+        self.__dependents = {}
+        self.__dependencies = {}
+        self.__changed = False
+        self.__exists = os.path.exists(self.__index_file)
+
+        data = None
+        if self.__exists:
+            data = util.load_json_or_empty(self.__index_file, {},
+                                           'dependency index')
+
+        if data and data.get('version') == INDEX_FORMAT_VERSION:
+            for path, sources in data.get('dependents', {}).items():
+                self.__dependents[path] = set(sources)
+                for source in sources:
+                    self.__dependencies.setdefault(source, set()).add(path)
+        elif data:
+            LOG.debug("Dropping dependency index with unknown format.")
+
+    @property
+    def exists(self):
+        """
+        The index was created in the output directory. Collecting the
+        dependencies costs a compiler run per analyzed source file, so the
+        index is only kept up-to-date once it was created (see create()).
+        """
+        return self.__exists
+
+    def create(self):
+        """
+        Write the (possibly empty) index to the output directory, so the
+        following analyses keep it up-to-date.
+        """
+        self.__changed = True
+        self.save()
+
+    def __len__(self):
+        return len(self.__dependencies)
+
+    def __contains__(self, source):
+        return source in self.__dependencies
+
+    def update(self, source, dependencies):
+        """
+        Store the dependencies of a successfully analyzed source file.
+        """
+        old = self.__dependencies.get(source, set())
+        new = set(dependencies)
+        new.add(source)
+        if old == new:
+            return
+
+        for path in old - new:
+            dependents = self.__dependents[path]
+            dependents.discard(source)
+            if not dependents:
+                del self.__dependents[path]
+        for path in new - old:
+            self.__dependents.setdefault(path, set()).add(source)
+
+        self.__dependencies[source] = new
+        self.__changed = True
+
+    def get_dependents(self, path):
+        """
+        Return the source files which depend on the given file.
+        """
+        return self.__dependents.get(path, set())
+
+    def save(self):
+        """
+        Write the index to the output directory if it was updated.
+        """
+        if not self.__changed:
+            return
+
+        LOG.debug("Writing dependency index to '" + self.__index_file + "'")
+        tmp_file = self.__index_file + '.tmp'
+        with open(tmp_file, 'w') as index:
+            json.dump({'version': INDEX_FORMAT_VERSION,
+                       'dependents': {path: sorted(sources) for path, sources
+                                      in self.__dependents.items()}},
+                      index)
+        os.rename(tmp_file, self.__index_file)
+        self.__changed = False
+        self.__exists = True
+
+
+def get_git_changed_files(revision='HEAD'):
+    """
+    Return the files of the git repository of the working directory which
+    differ from the given revision (a range like 'origin/master...HEAD' is
+    also accepted).
+    """
+    top_level = subprocess.check_output(
+        ['git', 'rev-parse', '--show-toplevel']).strip()
+    output = subprocess.check_output(
+        ['git', 'diff', '--name-only', revision, '--'], cwd=top_level)
+    return [os.path.join(top_level, path)
+            for path in output.splitlines() if path]
+
+
+def get_changed_files(changed_files):
+    """
+    Resolve the values of the --changed-files option to real paths. A value
+    is either a file path or 'git-diff[:REVISION]' for the files reported by
+    'git diff' against the revision (HEAD by default).
+
+    Raises subprocess.CalledProcessError or OSError if git fails.
+    """
+    paths = set()
+    for changed in changed_files:
+        if changed == GIT_DIFF or changed.startswith(GIT_DIFF + ':'):
+            revision = changed[len(GIT_DIFF) + 1:] or 'HEAD'
+            paths.update(get_git_changed_files(revision))
+        else:
+            paths.add(changed)
+    return set(os.path.realpath(path) for path in paths)
+
+
+def select_affected_actions(actions, index, changed_files):
+    """
+    Return the build actions whose source file or one of its dependencies is
+    among the changed files (real paths). Build actions which are not in the
+    index (e.g. they were never analyzed successfully) are also returned, as
+    their dependencies are unknown.
+    """
+    affected = set()
+    for path in changed_files:
+        affected.update(index.get_dependents(path))
+
+    selected = []
+    for action in actions:
+        source = os.path.realpath(os.path.join(action.directory,
+                                               next(action.sources)))
+        if source in affected or source in changed_files or \
+                source not in index:
+            selected.append(action)
+    return selected
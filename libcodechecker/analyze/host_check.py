@@ -14,6 +14,7 @@ import errno
 import subprocess
 import tempfile
 
+from libcodechecker.analyze import analyzer_info_cache
 from libcodechecker.logger import get_logger
 
 LOG = get_logger('analyze')
@@ -26,11 +27,15 @@ def check_clang(compiler_bin, env):
     clang_version_cmd = [compiler_bin, '--version']
     LOG.debug_analyzer(' '.join(clang_version_cmd))
     try:
-        res = subprocess.call(clang_version_cmd,
-                              env=env,
-                              stdout=subprocess.PIPE,
-                              stderr=subprocess.PIPE)
-        if not res:
+        # Only the successful check is cached, so a failing binary is run
+        # again next time.
+        available = analyzer_info_cache.get_or_run(
+            compiler_bin, ['check'],
+            lambda: subprocess.call(clang_version_cmd,
+                                    env=env,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE) == 0 or None)
+        if available:
             return True
 
         LOG.debug_analyzer('Failed to run: "' + ' '.join(clang_version_cmd) +
@@ -44,7 +49,7 @@ def check_clang(compiler_bin, env):
             return False
 
 
-def has_analyzer_feature(clang_bin, feature, env=None):
+def __has_analyzer_feature(clang_bin, feature, env):
     with tempfile.NamedTemporaryFile() as inputFile:
         inputFile.write("void foo(){}")
         inputFile.flush()
@@ -67,11 +72,16 @@ def has_analyzer_feature(clang_bin, feature, env=None):
             raise
 
 
-def get_resource_dir(clang_bin, env=None):
+def has_analyzer_feature(clang_bin, feature, env=None):
     """
-    Returns the resource_dir of Clang or None if the switch is not supported by
-    Clang.
+    Check if the analyzer accepts the given option. The answer is cached.
     """
+    return analyzer_info_cache.get_or_run(
+        clang_bin, ['feature', feature],
+        lambda: __has_analyzer_feature(clang_bin, feature, env))
+
+
+def __get_resource_dir(clang_bin, env):
     cmd = [clang_bin, "-print-resource-dir"]
     LOG.debug('run: "' + ' '.join(cmd) + '"')
     try:
@@ -91,3 +101,13 @@ def get_resource_dir(clang_bin, env=None):
     except OSError:
         LOG.error('Failed to run: "' + ' '.join(cmd) + '"')
         raise
+
+
+def get_resource_dir(clang_bin, env=None):
+    """
+    Returns the resource_dir of Clang or None if the switch is not supported by
+    Clang. The resource dir is cached.
+    """
+    return analyzer_info_cache.get_or_run(
+        clang_bin, ['-print-resource-dir'],
+        lambda: __get_resource_dir(clang_bin, env))
@@ -0,0 +1,94 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Persistent key-value cache in a JSON file, which is shared by the
+concurrently running CodeChecker commands.
+
+The new entries are merged into the current content of the file under a
+file lock when the cache is saved, so the entries written by others since
+the file was read are kept.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import fcntl
+import json
+import os
+import threading
+
+from libcodechecker import util
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('system')
+
+
+class JsonCache(object):
+    """
+    Key-value cache stored in a JSON file with the given format version.
+    Caches with another format version are dropped. The cache can be used
+    from multiple threads.
+    """
+
+    def __init__(self, cache_file, version, description):
+        self.__cache_file = cache_file
+        self.__version = version
+        self.__description = description
+        self.__changed = False
+        self.__lock = threading.Lock()
+        self.__entries = self.__load()
+
+    def __load(self):
+        if not os.path.exists(self.__cache_file):
+            return {}
+
+        data = util.load_json_or_empty(self.__cache_file, {},
+                                       self.__description)
+        if data and data.get('version') == self.__version:
+            return data.get('entries', {})
+        elif data:
+            LOG.debug("Dropping %s with unknown format.", self.__description)
+        return {}
+
+    def get(self, key):
+        with self.__lock:
+            return self.__entries.get(key)
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__entries[key] = value
+            self.__changed = True
+
+    def save(self):
+        """
+        Write the cache file if new entries were added, together with the
+        entries written by others since the cache file was read.
+        """
+        with self.__lock:
+            if not self.__changed:
+                return
+
+            try:
+                cache_dir = os.path.dirname(self.__cache_file)
+                if not os.path.isdir(cache_dir):
+                    os.makedirs(cache_dir)
+
+                with open(self.__cache_file + '.lock', 'a') as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+
+                    entries = self.__load()
+                    entries.update(self.__entries)
+                    self.__entries = entries
+
+                    tmp_file = self.__cache_file + '.' + str(os.getpid())
+                    with open(tmp_file, 'w') as cache:
+                        json.dump({'version': self.__version,
+                                   'entries': entries}, cache)
+                    os.rename(tmp_file, self.__cache_file)
+                self.__changed = False
+            except (IOError, OSError, ValueError) as ex:
+                LOG.debug("Failed to write the %s: %s", self.__description,
+                          ex)
@@ -12,14 +12,19 @@ from __future__ import print_function
 from __future__ import division
 from __future__ import absolute_import
 
+import hashlib
 import json
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
 import re
 import shlex
 import subprocess
 import sys
+import threading
 import traceback
 
+from libcodechecker.analyze import compiler_info_cache
 # TODO: This is a cross-subpackage import!
 from libcodechecker.analyze import gcc_toolchain
 from libcodechecker.log import build_action
@@ -39,6 +44,15 @@ COMPILE_OPTS_FWD_TO_DEFAULTS_GETTER = frozenset(
 compiler_includes_dump_file = "compiler_includes.json"
 compiler_target_dump_file = "compiler_target.json"
 
+# The compilers are queried in parallel, the dump files are written under
+# this lock.
+dump_lock = threading.Lock()
+
+# The compilation database is read in chunks of this many characters.
+JSON_READ_CHUNK_SIZE = 1024 * 1024
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
 
 def get_compiler_err(cmd):
     """
@@ -140,13 +154,14 @@ def parse_compiler_target(lines):
 
 def dump_compiler_info(output_path, filename, data):
     filename = os.path.join(output_path, filename)
-    all_data = dict()
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            all_data = json.load(f)
-    all_data.update(data)
-    with open(filename, 'w') as f:
-        f.write(json.dumps(all_data))
+    with dump_lock:
+        all_data = dict()
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                all_data = json.load(f)
+        all_data.update(data)
+        with open(filename, 'w') as f:
+            f.write(json.dumps(all_data))
 
 
 def load_compiler_info(filename, compiler):
@@ -159,8 +174,27 @@ def load_compiler_info(filename, compiler):
     return value
 
 
+def get_cached_compiler_err(cmd, compiler, query, info_cache):
+    """
+    Returns the stderr of a compiler invocation from the compiler info cache,
+    or runs the compiler and stores its output in the cache.
+    """
+    key = None
+    if info_cache is not None:
+        key = compiler_info_cache.get_compiler_key(compiler, query)
+        err = info_cache.get(key) if key else None
+        if err is not None:
+            LOG.debug("Using cached output of '" + cmd + "'")
+            return err
+
+    err = get_compiler_err(cmd)
+    if key and err is not None:
+        info_cache.set(key, err)
+    return err
+
+
 def get_compiler_includes(parseLogOptions, compiler, lang, compile_opts,
-                          extra_opts=None):
+                          extra_opts=None, info_cache=None):
     """
     Returns a list of default includes of the given compiler.
     """
@@ -179,7 +213,10 @@ def get_compiler_includes(parseLogOptions, compiler, lang, compile_opts,
     err = ""
     if parseLogOptions.compiler_includes_file is None:
         LOG.debug("Retrieving default includes via '" + cmd + "'")
-        err = get_compiler_err(cmd)
+        err = get_cached_compiler_err(cmd, compiler,
+                                      ['includes', lang, sysroot] +
+                                      extra_opts,
+                                      info_cache)
     else:
         err = load_compiler_info(parseLogOptions.compiler_includes_file,
                                  compiler)
@@ -193,7 +230,7 @@ def get_compiler_includes(parseLogOptions, compiler, lang, compile_opts,
         filter_compiler_includes(parse_compiler_includes(err)))
 
 
-def get_compiler_target(parseLogOptions, compiler):
+def get_compiler_target(parseLogOptions, compiler, info_cache=None):
     """
     Returns the target triple of the given compiler as a string.
     """
@@ -201,7 +238,7 @@ def get_compiler_target(parseLogOptions, compiler):
     if parseLogOptions.compiler_target_file is None:
         cmd = compiler + ' -v'
         LOG.debug("Retrieving target platform information via '" + cmd + "'")
-        err = get_compiler_err(cmd)
+        err = get_cached_compiler_err(cmd, compiler, ['target'], info_cache)
     else:
         err = load_compiler_info(parseLogOptions.compiler_target_file,
                                  compiler)
@@ -218,9 +255,77 @@ def remove_file_if_exists(filename):
         os.remove(filename)
 
 
+def iter_json_array(stream, chunk_size=JSON_READ_CHUNK_SIZE):
+    """
+    Yield the elements of the JSON array in the given file object one by one,
+    without reading the whole file into the memory. Raises ValueError if the
+    file does not contain a valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill(buf, pos):
+        """
+        Drop the consumed part of the buffer and append the next chunk.
+        """
+        chunk = stream.read(chunk_size)
+        return buf[pos:] + chunk, 0, not chunk
+
+    def skip_whitespace(buf, pos, eof):
+        while True:
+            pos = JSON_WHITESPACE.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return buf, pos, eof
+            buf, pos, eof = fill(buf, pos)
+
+    buf, pos, eof = skip_whitespace(buf, pos, eof)
+    if buf[pos:pos + 1] != '[':
+        raise ValueError("The JSON document is not an array.")
+    pos += 1
+
+    first = True
+    while True:
+        buf, pos, eof = skip_whitespace(buf, pos, eof)
+        if buf[pos:pos + 1] == ']':
+            pos += 1
+            break
+
+        if not first:
+            if buf[pos:pos + 1] != ',':
+                raise ValueError("Expecting ',' delimiter at character "
+                                 "{0}.".format(pos))
+            buf, pos, eof = skip_whitespace(buf, pos + 1, eof)
+        first = False
+
+        while True:
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+                # An element ending at the end of the buffer may be cut in
+                # half, e.g. a number.
+                if end < len(buf) or eof:
+                    break
+            except ValueError:
+                if eof:
+                    raise
+            buf, pos, eof = fill(buf, pos)
+
+        pos = end
+        yield element
+
+    buf, pos, eof = skip_whitespace(buf, pos, eof)
+    if pos != len(buf):
+        raise ValueError("Extra data after the JSON array at character "
+                         "{0}.".format(pos))
+
+
 def parse_compile_commands_json(logfile, parseLogOptions):
     """
     logfile: is a compile command json
+
+    The compilation database is processed entry by entry, only the unique
+    build actions are kept in the memory.
     """
 
     output_path = parseLogOptions.output_path
@@ -230,16 +335,25 @@ def parse_compile_commands_json(logfile, parseLogOptions):
         remove_file_if_exists(os.path.join(output_path,
                                            compiler_target_dump_file))
 
-    actions = []
-    filtered_build_actions = {}
+    # The unique build actions and the compiler which gives their built in
+    # includes and target.
+    compile_actions = []
+
+    # Digests of the build actions seen so far. The target of the build
+    # actions is not known until the compilers are queried, so the compiler
+    # stands in for it.
+    seen_actions = set()
 
-    data = json.load(logfile)
+    # The parameters of the compiler queries, by compiler. The compilers are
+    # queried with the options of the first build command using them.
+    compiler_queries = {}
 
-    compiler_includes = {}
-    compiler_target = {}
+    # The build actions of a project usually share a few directories and
+    # option lists, which are stored once.
+    shared_values = build_action.SharedValues()
 
     counter = 0
-    for entry in data:
+    for entry in iter_json_array(logfile):
         sourcefile = entry['file']
 
         if not os.path.isabs(sourcefile):
@@ -286,10 +400,10 @@ def parse_compile_commands_json(logfile, parseLogOptions):
                     compile_opts[i] = '-I' + \
                         os.path.join(entry['directory'], inc_dir)
 
-        action.analyzer_options = compile_opts
+        action.analyzer_options = shared_values.get_list(compile_opts)
 
         action.lang = results.lang
-        action.target = results.arch
+        action.target = shared_values.get(results.arch)
         action.output = results.output
 
         add_compiler_defaults = True
@@ -310,8 +424,10 @@ def parse_compile_commands_json(logfile, parseLogOptions):
             add_compiler_defaults = False
 
         # Store the compiler built in include paths and defines.
+        compiler = None
         if add_compiler_defaults and results.compiler:
-            if not (results.compiler in compiler_includes):
+            compiler = results.compiler
+            if compiler not in compiler_queries:
                 # Fetch defaults from the compiler,
                 # make sure we use the correct architecture.
                 extra_opts = []
@@ -321,37 +437,88 @@ def parse_compile_commands_json(logfile, parseLogOptions):
                         if re.match(pattern, comp_opt):
                             extra_opts.append(comp_opt)
 
-                compiler_includes[results.compiler] = \
-                    get_compiler_includes(parseLogOptions, results.compiler,
-                                          results.lang, results.compile_opts,
-                                          extra_opts)
-
-            if not (results.compiler in compiler_target):
-                compiler_target[results.compiler] = \
-                    get_compiler_target(parseLogOptions, results.compiler)
-
-            action.compiler_includes = compiler_includes[results.compiler]
-            action.target = compiler_target[results.compiler]
+                compiler_queries[compiler] = (results.lang,
+                                              results.compile_opts,
+                                              extra_opts)
 
         if results.action != option_parser.ActionType.COMPILE:
             continue
 
         # TODO: Check arch.
-        action.directory = entry['directory']
+        action.directory = shared_values.get(entry['directory'])
         action.sources = sourcefile
-        # Filter out duplicate compilation commands.
-        unique_key = action.cmp_key
-        if filtered_build_actions.get(unique_key) is None:
-            filtered_build_actions[unique_key] = action
+
+        action.target = shared_values.get(results.arch)
+
+        # Filter out duplicate compilation commands. The target of the
+        # compiler is not known yet, so the compiler is part of the key.
+        unique_key = hashlib.sha1(action.cmp_key + '\0' +
+                                  (compiler or '')).digest()
+        if unique_key in seen_actions:
+            continue
+        seen_actions.add(unique_key)
+
+        compile_actions.append((action, compiler))
 
         del action
         counter += 1
 
-    for _, ba in filtered_build_actions.items():
-        actions.append(ba)
+    del seen_actions
+
+    compiler_info = query_compilers(parseLogOptions, compiler_queries)
+
+    # Different compilers may have the same target, the build actions are
+    # filtered again with their real targets.
+    actions = []
+    unique_actions = set()
+    for action, compiler in compile_actions:
+        if compiler:
+            action.compiler_includes, action.target = compiler_info[compiler]
+
+        unique_key = hashlib.sha1(action.cmp_key).digest()
+        if unique_key not in unique_actions:
+            unique_actions.add(unique_key)
+            actions.append(action)
+
     return actions
 
 
+def query_compilers(parseLogOptions, compiler_queries):
+    """
+    Get the built in include paths and the target of the compilers in
+    parallel. compiler_queries maps the compilers to the (language, compile
+    options, options forwarded to the include query) of the query. Returns
+    a dict which maps the compilers to (include options, target) pairs.
+    """
+    info_cache = None
+    cache_file = getattr(parseLogOptions, 'compiler_info_cache', None)
+    if cache_file:
+        info_cache = compiler_info_cache.CompilerInfoCache(cache_file)
+
+    def query(compiler):
+        lang, compile_opts, extra_opts = compiler_queries[compiler]
+        return compiler, \
+            (get_compiler_includes(parseLogOptions, compiler, lang,
+                                   compile_opts, extra_opts, info_cache),
+             get_compiler_target(parseLogOptions, compiler, info_cache))
+
+    compilers = sorted(compiler_queries)
+    if len(compilers) > 1:
+        pool = ThreadPool(min(len(compilers), multiprocessing.cpu_count()))
+        try:
+            compiler_info = dict(pool.map(query, compilers))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        compiler_info = dict(query(compiler) for compiler in compilers)
+
+    if info_cache is not None:
+        info_cache.save()
+
+    return compiler_info
+
+
 def parse_log(logfilepath, parseLogOptions):
     '''
     logfilepath: the compile command json file which should be parsed.
@@ -0,0 +1,184 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Memory-aware concurrency of the analysis.
+
+With a static number of jobs a few huge translation units (CTU, heavy
+template code) analyzed at the same time can make the machine run out of
+memory. In the adaptive mode the number of jobs is only an upper limit: a
+new analysis is started only if the available memory of the system is
+enough for it, on top of the memory the running analyzers may still need.
+
+The memory need of an analysis is estimated by the highest resident set
+size of the analyzer processes seen so far in the run.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+
+import psutil
+
+from libcodechecker.logger import get_logger
+
+LOG = get_logger('analyzer')
+
+MB = 1024 * 1024
+
+# Memory need of an analysis before the first analyzer process is measured.
+DEFAULT_ESTIMATE = 1024 * MB
+
+# This much memory is always left available for the rest of the system.
+DEFAULT_RESERVE = 512 * MB
+
+# The memory usage is checked this often (in seconds) while new analyses
+# are held back.
+POLL_INTERVAL = 1
+
+
+def get_available_memory():
+    """
+    Memory available for starting new processes without swapping, in bytes.
+    """
+    return psutil.virtual_memory().available
+
+
+def get_analyzer_memory_usage(parent_pid):
+    """
+    Return the resident set size in bytes of the analyzers started by every
+    worker process of the given parent process.
+
+    The workers are the children of the parent process, every descendant of
+    a worker belongs to the analysis run by that worker. Workers which do
+    not run an analyzer right now are left out.
+    """
+    usage = []
+    try:
+        workers = psutil.Process(parent_pid).children()
+    except psutil.NoSuchProcess:
+        return usage
+
+    for worker in workers:
+        rss = 0
+        try:
+            analyzers = worker.children(recursive=True)
+        except psutil.NoSuchProcess:
+            continue
+
+        for analyzer in analyzers:
+            try:
+                rss += analyzer.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                # The process finished in the meantime.
+                pass
+
+        if rss:
+            usage.append(rss)
+
+    return usage
+
+
+def set_memory_limit(memory_limit):
+    """
+    Limit the address space of the current process. This is called in the
+    analyzer process before the analyzer binary is executed, so an analyzer
+    exceeding the limit fails instead of exhausting the memory of the system.
+    """
+    import resource
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def is_out_of_memory(stderr):
+    """
+    Check whether the output of a failed analyzer shows that it could not
+    allocate memory.
+    """
+    return any(msg in stderr for msg in ['out of memory',
+                                         'std::bad_alloc',
+                                         'Cannot allocate memory'])
+
+
+class MemoryGovernor(object):
+    """
+    Decide whether a new analysis can be started in the pool of the current
+    process, based on the available memory of the system and the memory
+    usage of the running analyzers.
+    """
+
+    def __init__(self, max_jobs, reserve=DEFAULT_RESERVE,
+                 initial_estimate=DEFAULT_ESTIMATE,
+                 available_memory=get_available_memory,
+                 analyzer_memory_usage=get_analyzer_memory_usage):
+        self.__max_jobs = max_jobs
+        self.__reserve = reserve
+        self.__estimate = initial_estimate
+        self.__measured = False
+        self.__available_memory = available_memory
+        self.__analyzer_memory_usage = analyzer_memory_usage
+        self.__holding_back = False
+
+    @property
+    def estimate(self):
+        """
+        Estimated memory need of one analysis in bytes.
+        """
+        return self.__estimate
+
+    def __update_estimate(self, usage):
+        """
+        Raise the estimated memory need of an analysis to the highest
+        analyzer memory usage seen so far. The initial estimate is only kept
+        until the first analyzer is measured.
+        """
+        if not usage:
+            return
+
+        peak = max(usage)
+        if not self.__measured:
+            self.__measured = True
+            self.__estimate = peak
+        else:
+            self.__estimate = max(self.__estimate, peak)
+
+    def may_start(self, running):
+        """
+        Return True if a new analysis can be started while the given number
+        of analyses are running.
+
+        The running analyses may grow up to the estimated memory need, so
+        only the memory above that growth is considered free. One analysis
+        is always allowed to run so the analysis keeps progressing.
+        """
+        if running >= self.__max_jobs:
+            return False
+
+        usage = self.__analyzer_memory_usage(os.getpid())
+        self.__update_estimate(usage)
+
+        if not running:
+            return True
+
+        # Analyses which did not start their analyzer yet are counted with
+        # no memory usage.
+        usage = sorted(usage, reverse=True)[:running]
+        usage += [0] * (running - len(usage))
+        growth = sum(max(0, self.__estimate - rss) for rss in usage)
+
+        headroom = self.__available_memory() - self.__reserve - growth
+        allowed = headroom >= self.__estimate
+
+        if allowed == self.__holding_back:
+            self.__holding_back = not allowed
+            if allowed:
+                LOG.debug("Enough memory is available, starting new "
+                          "analyses again.")
+            else:
+                LOG.debug("Not enough memory available for a new analysis "
+                          "(estimated %d MB), running %d analyses.",
+                          self.__estimate // MB, running)
+
+        return allowed
@@ -37,11 +37,14 @@ from collections import defaultdict
 import math
 import os
 import plistlib
+import re
 import sys
 import traceback
 from xml.parsers.expat import ExpatError
+from xml.sax.saxutils import unescape
 
 from libcodechecker import util
+from libcodechecker.analyze import compact_report
 from libcodechecker.logger import get_logger
 from libcodechecker.report import Report, generate_report_hash, \
     get_report_path_hash
@@ -80,17 +83,41 @@ def get_report_hash(diagnostic, source_file):
     return report_hash
 
 
+def read_report_data(path):
+    """
+    Read the files and the diagnostics of a result file, which is either a
+    plist or a compact result file.
+    """
+    if compact_report.is_compact_file(path):
+        return compact_report.load(path)
+    return plistlib.readPlist(path)
+
+
+def write_report_data(report_data, path, compact=False):
+    """
+    Write the files and the diagnostics to a plist or a compact result file.
+    """
+    if compact:
+        with open(path, 'wb') as result_file:
+            compact_report.dump(report_data, result_file)
+    else:
+        plistlib.writePlist(report_data, path)
+
+
 def parse_plist(path, source_root=None, allow_plist_update=True):
     """
     Parse the reports from a plist file.
-    One plist file can contain multiple reports.
+    One plist file can contain multiple reports. Compact result files are
+    parsed too.
     """
     LOG.debug("Parsing plist: " + path)
 
     reports = []
     files = []
     try:
-        plist = plistlib.readPlist(path)
+        compact = compact_report.is_compact_file(path)
+        plist = compact_report.load(path) if compact \
+            else plistlib.readPlist(path)
 
         files = plist['files']
 
@@ -134,8 +161,8 @@ def parse_plist(path, source_root=None, allow_plist_update=True):
             # If the diagnostic section has changed we update the plist file.
             # This way the client will always send a plist file where the
             # report hash field is filled.
-            plistlib.writePlist(plist, path)
-    except (ExpatError, TypeError, AttributeError) as err:
+            write_report_data(plist, path, compact)
+    except (ExpatError, TypeError, AttributeError, ValueError) as err:
         LOG.error('Failed to process plist file: ' + path +
                   ' wrong file format?')
         LOG.error(err)
@@ -223,40 +250,108 @@ def fids_in_path(report_data, file_ids_to_remove):
     return all_fids, kept_diagnostics
 
 
+# The 'files' array of the plist files written by the analyzers.
+PLIST_FILES_ARRAY = re.compile(
+    r'<key>files</key>\s*(?:<array/>|<array>(.*?)</array>)', re.S)
+
+PLIST_STRING = re.compile(r'<string>([^<]*)</string>\s*')
+
+PLIST_ENTITIES = {'&apos;': "'", '&quot;': '"'}
+
+
+def get_plist_files(plist_content):
+    """
+    Return the 'files' array of the plist content without parsing the whole
+    plist, or None if it can not be found this way.
+    """
+    matches = PLIST_FILES_ARRAY.findall(plist_content)
+    if len(matches) != 1:
+        return None
+
+    files = []
+    pos = 0
+    array = matches[0].strip()
+    while pos < len(array):
+        match = PLIST_STRING.match(array, pos)
+        if not match or '&#' in match.group(1):
+            return None
+        files.append(unescape(match.group(1), PLIST_ENTITIES))
+        pos = match.end()
+    return files
+
+
+# Only the diagnostics have a 'category' key in the plist files written by
+# the analyzers, the bug path events do not.
+PLIST_DIAGNOSTIC_KEY = '<key>category</key>'
+
+
+def count_plist_reports(plist_content):
+    """
+    Return the number of reports in the plist or compact content without
+    parsing it.
+    """
+    if compact_report.is_compact_content(plist_content):
+        return compact_report.count_reports(plist_content)
+    return plist_content.count(PLIST_DIAGNOSTIC_KEY)
+
+
+def remove_skipped_reports(report_data, skip_handler):
+    """
+    Remove the reports of the skipped files from the parsed plist data.
+    Returns False if there was nothing to remove.
+    """
+    file_ids_to_remove = set(i for i, f in enumerate(report_data['files'])
+                             if skip_handler.should_skip(f))
+    if not file_ids_to_remove:
+        return False
+
+    _, kept_diagnostics = fids_in_path(report_data, file_ids_to_remove)
+    report_data['diagnostics'] = kept_diagnostics
+    return True
+
+
 def remove_report_from_plist(plist_content, skip_handler):
     """
     Parse the original plist content provided by the analyzer
     and return a new plist content where reports were removed
-    if they should be skipped.
+    if they should be skipped. The original content is returned if
+    none of the files in the plist are skipped.
 
     WARN !!!!
     If the 'files' array in the plist is modified all of the
     diagnostic section (control, event ...) nodes should be
     re indexed to use the proper file array indexes!!!
+
+    Compact result content is handled the same way.
     """
-    new_data = {}
+    compact = compact_report.is_compact_content(plist_content)
+
+    # Most of the plists have nothing to skip, this can be decided without
+    # parsing them.
+    files = None if compact else get_plist_files(plist_content)
+    if files is not None and \
+            not any(skip_handler.should_skip(f) for f in files):
+        return plist_content
+
     try:
-        report_data = plistlib.readPlistFromString(plist_content)
-    except (ExpatError, TypeError, AttributeError) as ex:
+        if compact:
+            report_data = compact_report.loads(plist_content)
+        else:
+            report_data = plistlib.readPlistFromString(plist_content)
+    except (ExpatError, TypeError, AttributeError, ValueError) as ex:
         LOG.error("Failed to parse plist content, "
                   "keeping the original version")
         LOG.error(plist_content)
         LOG.error(ex)
         return plist_content
 
-    file_ids_to_remove = []
-
     try:
-        for i, f in enumerate(report_data['files']):
-            if skip_handler.should_skip(f):
-                file_ids_to_remove.append(i)
+        if not remove_skipped_reports(report_data, skip_handler):
+            return plist_content
 
-        _, kept_diagnostics = fids_in_path(report_data, file_ids_to_remove)
-        report_data['diagnostics'] = kept_diagnostics
-
-        new_data = report_data
-        res = plistlib.writePlistToString(new_data)
-        return res
+        if compact:
+            return compact_report.dumps(report_data)
+        return plistlib.writePlistToString(report_data)
 
     except KeyError:
         LOG.error("Failed to modify plist content, "
@@ -267,14 +362,24 @@ def remove_report_from_plist(plist_content, skip_handler):
 def skip_report_from_plist(plist_file, skip_handler):
     """
     Rewrites the provided plist file where reports
-    were removed if they should be skipped.
+    were removed if they should be skipped. The file is only written if
+    there were reports to remove, returns True in this case.
     """
+    if not os.path.exists(plist_file):
+        # The analyzers don't create a result file for every analysis.
+        return False
+
     with open(plist_file, 'r+') as plist:
-        new_plist_content = remove_report_from_plist(plist.read(),
+        plist_content = plist.read()
+        new_plist_content = remove_report_from_plist(plist_content,
                                                      skip_handler)
+        if new_plist_content is plist_content:
+            return False
+
         plist.seek(0)
         plist.write(new_plist_content)
         plist.truncate()
+        return True
 
 
 def skip_report(report_hash, source_file, report_line, checker_name,
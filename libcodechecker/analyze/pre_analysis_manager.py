@@ -74,25 +74,62 @@ def collect_statistics(action, source, config, environ, statistics_data):
     return ret_code
 
 
+def collect_ctu_data(triple_arch, action, source, config, environ,
+                     func_map_cmd, temp_fnmap_folder, ast_cache):
+    """
+    Generate the AST and the function map of the source file, or take them
+    from the CTU AST cache if the translation unit did not change since they
+    were cached. Returns the lines of the function map or None if it could
+    not be created.
+    """
+    cache_key = None
+    if ast_cache:
+        compile_command = ctu_triple_arch.get_compile_command(action, config,
+                                                              source)
+        cache_key = ast_cache.get_key(action, triple_arch, compile_command)
+
+    ast_path = ctu_manager.get_ast_path(config.ctu_dir, triple_arch, source)
+
+    if cache_key:
+        func_ast_list = ast_cache.restore(cache_key, ast_path)
+        if func_ast_list is not None:
+            LOG.debug("Reusing the cached AST of " + source)
+            ctu_manager.write_func_map(config.ctu_dir, triple_arch,
+                                       temp_fnmap_folder, func_ast_list)
+            return func_ast_list
+
+    ast_generated = ctu_manager.generate_ast(triple_arch, action, source,
+                                             config, environ)
+    func_ast_list = ctu_manager.map_functions(triple_arch, action, source,
+                                              config, environ, func_map_cmd,
+                                              temp_fnmap_folder)
+
+    if cache_key and ast_generated and func_ast_list is not None:
+        ast_cache.store(cache_key, ast_path, func_ast_list)
+
+    return func_ast_list
+
+
 # Progress reporting.
 progress_checked_num = None
 progress_actions = None
 
+# Read-only data of the pre analysis which is the same for every build action.
+# It is set once in every worker process by init_worker().
+pre_analysis_state = None
 
-def init_worker(checked_num, action_num):
-    global progress_checked_num, progress_actions
+
+def init_worker(checked_num, action_num, state=None):
+    global progress_checked_num, progress_actions, pre_analysis_state
     progress_checked_num = checked_num
     progress_actions = action_num
+    pre_analysis_state = state
 
 
-def pre_analyze(params):
-
-    action, context, analyzer_config_map, skip_handler, \
-        ctu_data, statistics_data = params
+def pre_analyze(action):
 
-    analyzer_environment = analyzer_env.get_check_env(
-        context.path_env_extra,
-        context.ld_lib_path_extra)
+    context, analyzer_config_map, skip_handler, \
+        ctu_data, statistics_data, analyzer_environment = pre_analysis_state
 
     progress_checked_num.value += 1
 
@@ -121,12 +158,11 @@ def pre_analyze(params):
                     ctu_triple_arch.get_triple_arch(action, source,
                                                     config,
                                                     analyzer_environment)
-                ctu_manager.generate_ast(triple_arch, action, source,
-                                         config, analyzer_environment)
-                ctu_manager.map_functions(triple_arch, action, source, config,
-                                          analyzer_environment,
-                                          context.ctu_func_map_cmd,
-                                          ctu_temp_fnmap_folder)
+                collect_ctu_data(triple_arch, action, source, config,
+                                 analyzer_environment,
+                                 context.ctu_func_map_cmd,
+                                 ctu_temp_fnmap_folder,
+                                 ctu_data.get('ctu_ast_cache'))
 
         except Exception as ex:
             LOG.debug_analyzer(str(ex))
@@ -167,14 +203,6 @@ def run_pre_analysis(actions, context, analyzer_config_map,
 
     signal.signal(signal.SIGINT, signal_handler)
 
-    processed_var = multiprocessing.Value('i', 0)
-    actions_num = multiprocessing.Value('i', len(actions))
-
-    pool = multiprocessing.Pool(jobs,
-                                initializer=init_worker,
-                                initargs=(processed_var,
-                                          actions_num))
-
     if statistics_data:
         # Statistics collection is enabled setup temporary
         # directories.
@@ -189,16 +217,30 @@ def run_pre_analysis(actions, context, analyzer_config_map,
 
         statistics_data['stat_tmp_dir'] = stat_tmp_dir
 
+    analyzer_environment = analyzer_env.get_check_env(
+        context.path_env_extra,
+        context.ld_lib_path_extra)
+
+    # This state is the same for every build action, so it is given to the
+    # workers only once, at their startup.
+    state = (context,
+             analyzer_config_map,
+             skip_handler,
+             ctu_data,
+             statistics_data,
+             analyzer_environment)
+
+    processed_var = multiprocessing.Value('i', 0)
+    actions_num = multiprocessing.Value('i', len(actions))
+
+    pool = multiprocessing.Pool(jobs,
+                                initializer=init_worker,
+                                initargs=(processed_var,
+                                          actions_num,
+                                          state))
+
     try:
-        collect_actions = [(build_action,
-                            context,
-                            analyzer_config_map,
-                            skip_handler,
-                            ctu_data,
-                            statistics_data)
-                           for build_action in actions]
-
-        pool.map_async(pre_analyze, collect_actions).get(float('inf'))
+        pool.map_async(pre_analyze, actions).get(float('inf'))
         pool.close()
     except Exception:
         pool.terminate()
@@ -208,14 +250,21 @@ def run_pre_analysis(actions, context, analyzer_config_map,
 
     # Postprocessing the pre analysis results.
     if ctu_data:
-        ctu_manager.merge_ctu_func_maps(**ctu_data)
+        ctu_manager.merge_ctu_func_maps(ctu_data['ctu_dir'],
+                                        ctu_data['ctu_func_map_file'],
+                                        ctu_data['ctu_temp_fnmap_folder'],
+                                        jobs)
+
+        ast_cache = ctu_data.get('ctu_ast_cache')
+        if ast_cache:
+            ast_cache.evict()
 
     if statistics_data:
 
         stats_in = statistics_data.get('stat_tmp_dir')
         stats_out = statistics_data.get('stats_out_dir')
 
-        statistics_collector.postprocess_stats(stats_in, stats_out)
+        statistics_collector.postprocess_stats(stats_in, stats_out, jobs)
 
         if os.path.exists(stats_in):
             LOG.debug('Cleaning up temporary statistics directory')
@@ -25,13 +25,34 @@ class SkipListHandler(object):
     -/do/not/check/this.file
     +/dir/check.this.file
     -/dir/*
+
+    Checking a path against every pattern one by one is slow for long skip
+    files. The literal prefixes of the patterns (the part before the first
+    wildcard) are stored in a prefix tree. Walking the path down the tree
+    gives the nodes of the patterns which may match it. The patterns of a
+    node are combined into an alternation, which finds the first matching
+    one in a single regex match, and the first of these matches decides.
+    The verdicts are cached by path too, because the same files are checked
+    again and again (for every report in them).
     """
 
+    # The number of patterns combined into one regex. Python 2 supports only
+    # 100 groups in a regex.
+    MAX_PATTERNS = 90
+
+    # The maximum number of cached verdicts, the cache is cleared when it
+    # gets full.
+    MAX_CACHE_SIZE = 65536
+
     def __init__(self, skip_file_content=""):
         """
         Process the lines of the skip file.
         """
         self.__skip = []
+        self.__patterns = []
+        self.__prefix_tree = {}
+        self.__combined = {}
+        self.__cache = {}
 
         self.__skip_file_lines = [line.strip() for line
                                   in skip_file_content.splitlines()
@@ -49,10 +70,69 @@ class SkipListHandler(object):
         the regular expressions.
         """
         for skip_line in skip_lines:
-            rexpr = re.compile(
-                fnmatch.translate(skip_line[1:].strip() + '*'))
+            glob = skip_line[1:].strip() + '*'
+            pattern = fnmatch.translate(glob)
+            rexpr = re.compile(pattern)
             self.__skip.append((skip_line, rexpr))
 
+            # Older Pythons put the flags at the end of the pattern, they
+            # would apply to every alternative, so they are given to the
+            # combined regex instead.
+            if pattern.endswith('(?ms)'):
+                pattern = pattern[:-len('(?ms)')]
+            self.__patterns.append(pattern)
+
+            # The tree nodes store the index of the patterns having that
+            # prefix under the '' key.
+            node = self.__prefix_tree
+            for char in re.split(r'[*?[]', glob, 1)[0]:
+                node = node.setdefault(char, {})
+            node.setdefault('', []).append(len(self.__skip) - 1)
+
+        self.__combined = {}
+        self.__cache = {}
+
+    def __get_candidates(self, source):
+        """
+        Return the lists of the pattern indexes in the prefix tree nodes
+        which are on the path of the source.
+        """
+        node = self.__prefix_tree
+        candidates = []
+        if '' in node:
+            candidates.append(node[''])
+        for char in source:
+            node = node.get(char)
+            if node is None:
+                break
+            if '' in node:
+                candidates.append(node[''])
+        return candidates
+
+    def __get_combined(self, indexes):
+        """
+        Return the regexes combining the patterns of a prefix tree node, or
+        None if the patterns can not be combined.
+        """
+        key = indexes[0]
+        if key in self.__combined:
+            return self.__combined[key]
+
+        combined = []
+        try:
+            for start in range(0, len(indexes), self.MAX_PATTERNS):
+                chunk = indexes[start:start + self.MAX_PATTERNS]
+                combined.append(re.compile(
+                    '|'.join('(?P<r{0}>{1})'.format(idx, self.__patterns[idx])
+                             for idx in chunk),
+                    re.M | re.S))
+        except (re.error, AssertionError) as ex:
+            LOG.debug("Failed to combine the skip patterns: %s", ex)
+            combined = None
+
+        self.__combined[key] = combined
+        return combined
+
     def __check_line_format(self, skip_lines):
         """
         Check if the skip line is given in a valid format.
@@ -81,6 +161,8 @@ class SkipListHandler(object):
         and rebuilds the list from the given skip_lines.
         """
         self.__skip = []
+        self.__patterns = []
+        self.__prefix_tree = {}
         valid_lines = self.__check_line_format(skip_lines)
         self.__gen_regex(valid_lines)
 
@@ -92,8 +174,40 @@ class SkipListHandler(object):
         if not self.__skip:
             return False
 
-        for line, rexpr in self.__skip:
-            if rexpr.match(source):
-                sign = line[0]
-                return sign == '-'
-        return False
+        skip = self.__cache.get(source)
+        if skip is None:
+            skip = self.__match(source)
+            if len(self.__cache) >= self.MAX_CACHE_SIZE:
+                self.__cache.clear()
+            self.__cache[source] = skip
+        return skip
+
+    def __match(self, source):
+        """
+        Find the first skip line matching the source.
+        """
+        first = None
+        for indexes in self.__get_candidates(source):
+            if first is not None and indexes[0] > first:
+                continue
+
+            combined = self.__get_combined(indexes)
+            if combined is None:
+                for idx in indexes:
+                    if self.__skip[idx][1].match(source):
+                        first = idx if first is None else min(first, idx)
+                        break
+                continue
+
+            for regex in combined:
+                match = regex.match(source)
+                if match:
+                    idx = int(match.lastgroup[1:])
+                    first = idx if first is None else min(first, idx)
+                    break
+
+        if first is None:
+            return False
+
+        line, _ = self.__skip[first]
+        return line[0] == '-'
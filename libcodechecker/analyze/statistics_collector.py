@@ -13,6 +13,7 @@ from __future__ import absolute_import
 
 from StringIO import StringIO
 from collections import defaultdict
+import multiprocessing
 import os
 import re
 
@@ -23,6 +24,14 @@ from libcodechecker.logger import get_logger
 
 LOG = get_logger('analyzer')
 
+# Every line processed by the collectors contains this text. Other lines are
+# dropped before the regular expressions of the collectors are tried.
+STATS_LINE_MARKER = 'Return Value'
+
+# The output files are given to the statistics postprocessing workers in
+# about this many batches per worker.
+BATCHES_PER_JOB = 4
+
 
 def build_stat_coll_cmd(action, config, source, environ):
     """
@@ -153,6 +162,14 @@ class SpecialReturnValueCollector(object):
             self.stats['nof_negative'][func] += int(ret_negative)
             self.stats['nof_null'][func] += int(ret_null)
 
+    def merge(self, stats):
+        """
+        Add the statistics collected by another collector to this one.
+        """
+        for counter, values in stats.items():
+            for func, count in values.items():
+                self.stats[counter][func] += count
+
     def filter_stats(self, threshold=0.85, min_occurence_count=1):
 
         neg = []
@@ -260,6 +277,14 @@ class ReturnValueCollector(object):
             self.stats['total'][func] += 1
             self.stats['nof_unchecked'][func] += int(checked)
 
+    def merge(self, stats):
+        """
+        Add the statistics collected by another collector to this one.
+        """
+        for counter, values in stats.items():
+            for func, count in values.items():
+                self.stats[counter][func] += count
+
     def filter_stats(self, threshold=0.85, min_occurence_count=1):
         """
         Filter the collected statistics based on the threshold.
@@ -293,11 +318,35 @@ class ReturnValueCollector(object):
         return stats_yaml.getvalue()
 
 
-def postprocess_stats(clang_output_dir, stats_dir):
+def collect_stats(clang_outs):
+    """
+    Collect the statistics from the given clang analyzer output files.
+    Returns the statistics of the return value and the special return value
+    collectors, which can be merged into other collectors.
+    """
+    ret_collector = ReturnValueCollector()
+    special_ret_collector = SpecialReturnValueCollector()
+
+    for clang_output in clang_outs:
+        with open(clang_output, 'r') as out:
+            for line in out:
+                if STATS_LINE_MARKER not in line:
+                    continue
+
+                ret_collector.process_line(line)
+                special_ret_collector.process_line(line)
+
+    return ret_collector.stats, special_ret_collector.stats
+
+
+def postprocess_stats(clang_output_dir, stats_dir, jobs=1):
     """
     Read the clang analyzer outputs where the statistics emitter checkers
     were enabled and collect the statistics.
 
+    The output files are processed in parallel, using at most 'jobs'
+    processes.
+
     After the statistics collection cleanup the output files.
     """
 
@@ -330,11 +379,28 @@ def postprocess_stats(clang_output_dir, stats_dir):
     ret_collector = ReturnValueCollector()
     special_ret_collector = SpecialReturnValueCollector()
 
-    for clang_output in clang_outs:
-        with open(clang_output, 'r') as out:
-            for line in out:
-                ret_collector.process_line(line)
-                special_ret_collector.process_line(line)
+    def merge(partial_stats):
+        ret_stats, special_ret_stats = partial_stats
+        ret_collector.merge(ret_stats)
+        special_ret_collector.merge(special_ret_stats)
+
+    if jobs > 1 and len(clang_outs) > 1:
+        batch_num = min(len(clang_outs), jobs * BATCHES_PER_JOB)
+        batches = [clang_outs[i::batch_num] for i in range(batch_num)]
+
+        pool = multiprocessing.Pool(min(jobs, batch_num))
+        try:
+            results = pool.imap_unordered(collect_stats, batches)
+            for _ in range(batch_num):
+                merge(results.next(float('inf')))
+            pool.close()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    else:
+        merge(collect_stats(clang_outs))
 
     LOG.debug("Collecting statistics finished.")
 
@@ -12,11 +12,13 @@ from __future__ import division
 from __future__ import absolute_import
 
 import copy
+import hashlib
 import json
 import os
 import plistlib
 import re
 
+from libcodechecker.analyze import compact_report
 from libcodechecker.logger import get_logger
 from libcodechecker.report import generate_report_hash
 
@@ -123,18 +125,28 @@ class OutputParser(object):
             tidy_out: something iterable (e.g.: a file object)
         """
 
+        self.messages.extend(self.iter_messages(tidy_out))
+        return self.messages
+
+    def iter_messages(self, tidy_out):
+        """
+        Parse the given clang-tidy output and yield the messages one by one,
+        as they are parsed. The messages are not kept by the parser.
+
+        Parameters:
+            tidy_out: something iterable (e.g.: a file object)
+        """
+
         titer = iter(tidy_out)
         try:
             next_line = next(titer)
             while True:
                 message, next_line = self._parse_message(titer, next_line)
                 if message is not None:
-                    self.messages.append(message)
+                    yield message
         except StopIteration:
             pass
 
-        return self.messages
-
     def _parse_message(self, titer, line):
         """
         Parse the given line. Returns a (message, next_line) pair or throws a
@@ -395,3 +407,238 @@ class PListConverter(object):
 
     def __str__(self):
         return str(json.dumps(self.plist, indent=4, separators=(',', ': ')))
+
+
+def iter_lines(text):
+    """
+    Yield the lines of the given text without the line endings, without
+    splitting the whole text into a list first.
+    """
+    pos = 0
+    length = len(text)
+    while pos < length:
+        end = text.find('\n', pos)
+        if end == -1:
+            end = length
+        line = text[pos:end]
+        yield line[:-1] if line.endswith('\r') else line
+        pos = end + 1
+
+
+def split_output_by_source(tidy_out, sources, directory='',
+                           get_dependencies=None):
+    """
+    Split the output of a clang-tidy run which analyzed more source files at
+    once into the outputs belonging to the analysis of the single sources.
+
+    A message (with its code lines, fixits and notes) belongs to the source
+    file it was reported in. A message in a header belongs to the first
+    source file which is mentioned by its notes. Otherwise it belongs to
+    every source file which includes the header: clang-tidy reports the
+    messages of a header only once per run, even if more analyzed sources
+    include it. get_dependencies(source) returns the real paths of the files
+    included by a source file, or None if they are unknown. If no source
+    file is known to include the header, the message belongs to the first
+    source file.
+
+    Relative paths in the output are relative to the given directory, where
+    clang-tidy was run. Returns a source file -> output text dict which has an
+    entry for every source file.
+    """
+    source_keys = {}
+    for source in sources:
+        path = os.path.normpath(os.path.join(directory, source))
+        source_keys.setdefault(path, source)
+
+    dependencies = {}
+
+    def includers(path):
+        if get_dependencies is None:
+            return []
+
+        path = os.path.realpath(os.path.join(directory, path))
+        result = []
+        for source in source_keys.values():
+            if source not in dependencies:
+                dependencies[source] = set(get_dependencies(source) or [])
+            if path in dependencies[source]:
+                result.append(source)
+        return sorted(result, key=sources.index)
+
+    def owners(paths):
+        for path in paths:
+            source = source_keys.get(
+                os.path.normpath(os.path.join(directory, path)))
+            if source is not None:
+                return [source]
+        return includers(paths[0]) or [sources[0]]
+
+    outputs = dict((source, []) for source in sources)
+    block = []
+    block_paths = []
+
+    def add_block():
+        for source in owners(block_paths):
+            outputs[source].extend(block)
+
+    for line in tidy_out:
+        match = OutputParser.message_line_re.match(line)
+        if match and match.group('severity') != 'note':
+            if block:
+                add_block()
+            block = []
+            block_paths = [match.group('path')]
+        elif block_paths:
+            match = OutputParser.note_line_re.match(line)
+            if match:
+                block_paths.append(match.group('path'))
+        block.append(line)
+
+    if block_paths:
+        add_block()
+
+    return dict((source, '\n'.join(lines) + '\n' if lines else '')
+                for source, lines in outputs.items())
+
+
+# The beginning of a plist file, as plistlib writes it.
+PLIST_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+    '<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" ' \
+    '"http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n'
+
+_plist_control_char_re = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _plist_escape(text):
+    """
+    Escape the text for a plist string element like plistlib does, and
+    encode it as UTF-8.
+    """
+    if _plist_control_char_re.search(text):
+        raise ValueError("strings can't contain control characters")
+
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text if isinstance(text, bytes) else text.encode('utf-8')
+
+
+def _plist_lines(value, level, lines):
+    """
+    Append the plist XML lines of the given value to the lines list, the same
+    way as plistlib.writePlist() writes them. Only the types used in the
+    diagnostics are handled here, as this is about three times faster than
+    the generic plistlib writer.
+    """
+    indent = '\t' * level
+    if isinstance(value, dict):
+        lines.append(indent + '<dict>\n')
+        for key, item in sorted(value.items()):
+            lines.append('%s\t<key>%s</key>\n' % (indent, _plist_escape(key)))
+            _plist_lines(item, level + 1, lines)
+        lines.append(indent + '</dict>\n')
+    elif isinstance(value, list):
+        lines.append(indent + '<array>\n')
+        for item in value:
+            _plist_lines(item, level + 1, lines)
+        lines.append(indent + '</array>\n')
+    elif isinstance(value, bool):
+        lines.append(indent + ('<true/>\n' if value else '<false/>\n'))
+    elif isinstance(value, int):
+        lines.append('%s<integer>%d</integer>\n' % (indent, value))
+    else:
+        lines.append('%s<string>%s</string>\n' %
+                     (indent, _plist_escape(value)))
+
+
+class PListStreamWriter(object):
+    """
+    Clang-tidy messages to plist converter which writes every diagnostic to
+    the output as soon as its message is added, so neither the messages nor
+    the diagnostics are kept in memory.
+
+    The output is the same as the output of the PListConverter, except that
+    repeated diagnostics are written only once, and the diagnostics in the
+    files skipped by the skip handler are left out. If compact is True, the
+    output is written in the compact result format instead of plist.
+    """
+
+    def __init__(self, output, skip_handler=None, compact=False):
+        self.__files = []
+        self.__fmap = {}
+        self.__seen = set()
+        self.__skip_handler = skip_handler
+        self.__skipped_fids = set()
+        self.diagnostics_num = 0
+
+        if compact:
+            self.__writer = None
+            self.__compact_writer = \
+                compact_report.CompactReportWriter(output)
+            return
+        self.__compact_writer = None
+
+        # The keys of the plist dict are written in sorted order, so the
+        # diagnostics come before the files, whose list is only complete
+        # when every message is added.
+        self.__writer = output
+        self.__writer.write(PLIST_HEADER +
+                            '<plist version="1.0">\n'
+                            '<dict>\n'
+                            '\t<key>diagnostics</key>\n'
+                            '\t<array>\n')
+
+    def __add_file(self, path):
+        if path not in self.__fmap:
+            fid = len(self.__files)
+            self.__fmap[path] = fid
+            self.__files.append(path)
+            if self.__compact_writer:
+                self.__compact_writer.add_file(path)
+
+            if self.__skip_handler and self.__skip_handler.should_skip(path):
+                self.__skipped_fids.add(fid)
+
+    def add_message(self, message):
+        """
+        Write the diagnostic of the given clang-tidy message to the output.
+        """
+        self.__add_file(message.path)
+        for note in message.notes:
+            self.__add_file(note.path)
+
+        if self.__fmap[message.path] in self.__skipped_fids:
+            return
+
+        diag = PListConverter._create_diag(message, self.__fmap,
+                                           self.__files)
+
+        key = hashlib.sha1(repr((diag['location'],
+                                 diag['check_name'],
+                                 diag['description'],
+                                 diag['issue_hash_content_of_line_in_context']
+                                 ))).digest()
+        if key in self.__seen:
+            return
+        self.__seen.add(key)
+
+        self.diagnostics_num += 1
+        if self.__compact_writer:
+            self.__compact_writer.add_diagnostic(diag)
+            return
+
+        lines = []
+        _plist_lines(diag, 2, lines)
+        self.__writer.write(''.join(lines))
+
+    def close(self):
+        """
+        Write the list of the files and finish the plist. The compact output
+        is complete without this.
+        """
+        if self.__compact_writer:
+            return
+
+        lines = ['\t</array>\n', '\t<key>files</key>\n']
+        _plist_lines(self.__files, 1, lines)
+        lines.append('</dict>\n</plist>\n')
+        self.__writer.write(''.join(lines))
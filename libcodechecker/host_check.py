@@ -19,6 +19,7 @@ import subprocess
 from libcodechecker import generic_package_context
 from libcodechecker.logger import get_logger
 from libcodechecker.analyze import analyzer_env
+from libcodechecker.analyze import analyzer_info_cache
 from libcodechecker.analyze.analyzers import analyzer_types
 
 LOG = get_logger('system')
@@ -30,7 +31,8 @@ def is_ctu_capable():
     context = generic_package_context.get_context()
     ctu_func_map_cmd = context.ctu_func_map_cmd
     try:
-        version = subprocess.check_output([ctu_func_map_cmd, '-version'])
+        version = analyzer_info_cache.check_output([ctu_func_map_cmd,
+                                                    '-version'])
     except (subprocess.CalledProcessError, OSError):
         version = 'ERROR'
     return version != 'ERROR'
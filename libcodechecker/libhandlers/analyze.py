@@ -14,12 +14,19 @@ import argparse
 import json
 import os
 import shutil
+import socket
+import subprocess
 import sys
 
 from libcodechecker import logger
 from libcodechecker import generic_package_context
 from libcodechecker import host_check
+from libcodechecker.analyze import analysis_daemon
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import analysis_profile
 from libcodechecker.analyze import analyzer
+from libcodechecker.analyze import compiler_info_cache
+from libcodechecker.analyze import dependency_index
 from libcodechecker.analyze import log_parser
 from libcodechecker.analyze.analyzers import analyzer_types
 
@@ -139,13 +146,26 @@ def add_arguments_to_parser(parser):
                              "file rather than invoke the compiler "
                              "executable.")
 
+    parser.add_argument('--compiler-info-cache',
+                        dest="compiler_info_cache",
+                        required=False,
+                        default=compiler_info_cache.get_default_cache_file(),
+                        help="The built-in include paths and the target of "
+                             "the compilers are cached in this file, and "
+                             "the compilers are only executed again if they "
+                             "change. An empty string turns the cache off.")
+
     parser.add_argument('-t', '--type', '--output-format',
                         dest="output_format",
                         required=False,
-                        choices=['plist'],
+                        choices=['plist', 'compact'],
                         default='plist',
                         help="Specify the format the analysis results should "
-                             "use.")
+                             "use. The 'compact' result files keep the "
+                             "'.plist' extension, but they contain JSON "
+                             "lines which are much faster to process by "
+                             "'parse', 'store' and 'cmd diff' than the XML "
+                             "plist.")
 
     parser.add_argument('-q', '--quiet',
                         dest="quiet",
@@ -173,6 +193,34 @@ def add_arguments_to_parser(parser):
                         help="Annotate the run analysis with a custom name in "
                              "the created metadata file.")
 
+    parser.add_argument('--file',
+                        nargs='+',
+                        dest="files",
+                        metavar='FILE',
+                        required=False,
+                        default=argparse.SUPPRESS,
+                        help="Analyze only the build actions of the given "
+                             "source files from the compilation database.")
+
+    parser.add_argument('--changed-files',
+                        nargs='+',
+                        dest="changed_files",
+                        metavar='CHANGED',
+                        required=False,
+                        default=argparse.SUPPRESS,
+                        help="Analyze only the build actions affected by the "
+                             "given changed source or header files, using "
+                             "the dependency index of the previous analyses "
+                             "into the output directory. The index is "
+                             "created by the first analysis with this "
+                             "option. A value is either "
+                             "a file path or 'git-diff[:REVISION]' for the "
+                             "files which 'git diff' reports against the "
+                             "revision (HEAD by default, a range like "
+                             "'origin/master...HEAD' is also accepted). "
+                             "Build actions which were not analyzed "
+                             "successfully before are always analyzed.")
+
     analyzer_opts = parser.add_argument_group("analyzer arguments")
 
     analyzer_opts.add_argument('--analyzers',
@@ -237,6 +285,118 @@ def add_arguments_to_parser(parser):
                                     "the analysis is considered as a failed "
                                     "one.")
 
+    analyzer_opts.add_argument('--incremental',
+                               dest='incremental',
+                               action='store_true',
+                               default=argparse.SUPPRESS,
+                               required=False,
+                               help="Keep a cache of the successful analyses "
+                                    "in the output directory and only "
+                                    "reanalyze those build actions whose "
+                                    "build command, source file, included "
+                                    "headers, analyzer binary or checker "
+                                    "configuration changed since the "
+                                    "previous analysis. Not supported "
+                                    "together with CTU and statistics "
+                                    "analysis.")
+
+    analyzer_opts.add_argument('--coordinator-listen',
+                               dest='coordinator_listen',
+                               metavar='[HOST:]PORT',
+                               required=False,
+                               default=argparse.SUPPRESS,
+                               help="Do not analyze the build actions "
+                                    "locally, but hand them out to analysis "
+                                    "agents ('CodeChecker analyze-agent') "
+                                    "which connect to the given address "
+                                    "(localhost if only a port is given), "
+                                    "and collect their results into the "
+                                    "output directory. The agents must send "
+                                    "the token of the CC_COORDINATOR_TOKEN "
+                                    "environment variable, or the printed "
+                                    "generated one if it is not set. Build "
+                                    "actions of the agents which stop "
+                                    "responding are handed out again. Not "
+                                    "supported together with CTU and "
+                                    "statistics analysis.")
+
+    analyzer_opts.add_argument('--daemon',
+                               dest='daemon',
+                               metavar='SOCKET',
+                               nargs='?',
+                               const=analysis_daemon.get_default_socket(),
+                               required=False,
+                               default=argparse.SUPPRESS,
+                               help="Do not analyze in this process, but "
+                                    "send the analysis to the analysis "
+                                    "daemon ('CodeChecker analyze-daemon') "
+                                    "listening on the given socket, which "
+                                    "keeps the worker processes, the "
+                                    "compilation database and the analyzer "
+                                    "configuration warm between the "
+                                    "analyses. The analysis runs in the "
+                                    "environment and with the number of "
+                                    "jobs of the daemon. (default: " +
+                                    analysis_daemon.get_default_socket() +
+                                    ")")
+
+    analyzer_opts.add_argument('--adaptive-jobs',
+                               dest='adaptive_jobs',
+                               action='store_true',
+                               default=argparse.SUPPRESS,
+                               required=False,
+                               help="Treat '--jobs' as the upper limit of "
+                                    "the parallel analyses. A new analysis "
+                                    "is only started if the available memory "
+                                    "of the system is enough for it, besides "
+                                    "the memory the running analyzers may "
+                                    "still need. The memory need of an "
+                                    "analysis is estimated by the largest "
+                                    "analyzer process seen in the run.")
+
+    analyzer_opts.add_argument('--analyzer-memory-limit',
+                               type=int,
+                               dest='analyzer_memory_limit',
+                               metavar='MB',
+                               required=False,
+                               default=argparse.SUPPRESS,
+                               help="Limit the address space of every "
+                                    "analyzer process to the given amount "
+                                    "of memory (in megabytes). An analysis "
+                                    "which exceeds the limit is considered "
+                                    "as a failed one.")
+
+    analyzer_opts.add_argument('--tidy-batch-size',
+                               type=int,
+                               dest='tidy_batch_size',
+                               metavar='N',
+                               required=False,
+                               default=argparse.SUPPRESS,
+                               help="Analyze at most N source files with "
+                                    "one clang-tidy process, if they are "
+                                    "compiled in the same directory with the "
+                                    "same options. The result files are the "
+                                    "same as if the source files were "
+                                    "analyzed one by one.")
+
+    analyzer_opts.add_argument('--profile-report',
+                               type=int,
+                               dest='profile_report',
+                               metavar='N',
+                               nargs='?',
+                               const=analysis_profile.DEFAULT_REPORT_SIZE,
+                               required=False,
+                               default=argparse.SUPPRESS,
+                               help="After the analysis, print the N "
+                                    "slowest and the N most memory-hungry "
+                                    "analyses and the cost of the analyses "
+                                    "by checker set. The wall time, CPU "
+                                    "time, peak memory usage, result size "
+                                    "and report count of every analysis is "
+                                    "recorded in 'metadata.json' in the "
+                                    "output directory regardless of this "
+                                    "option. (default: %(const)s)")
+
     if host_check.is_ctu_capable():
         ctu_opts = parser.add_argument_group(
             "cross translation unit analysis arguments",
@@ -289,6 +449,41 @@ def add_arguments_to_parser(parser):
                                    "same translation unit without "
                                    "Cross-TU enabled.")
 
+        ctu_opts.add_argument('--ctu-pipelined',
+                              action='store_true',
+                              dest='ctu_pipelined',
+                              default=argparse.SUPPRESS,
+                              help="Together with '--ctu', start analyzing "
+                                   "the translation units while the "
+                                   "'collect' phase is still running, using "
+                                   "the part of the function map which is "
+                                   "already available. Translation units "
+                                   "which refer to functions that changed in "
+                                   "the map since their analysis started are "
+                                   "analyzed again.")
+
+        ctu_opts.add_argument('--ctu-ast-cache-dir',
+                              type=str,
+                              dest='ctu_ast_cache_dir',
+                              default=argparse.SUPPRESS,
+                              help="Directory of the cache which keeps the "
+                                   "ASTs and function maps of the 'collect' "
+                                   "phase across analysis runs. Translation "
+                                   "units which did not change since they "
+                                   "were cached are not recompiled. "
+                                   "(default: '<OUTPUT_DIR>/ctu-cache')")
+
+        ctu_opts.add_argument('--ctu-ast-cache-size',
+                              type=int,
+                              dest='ctu_ast_cache_size',
+                              metavar='MEGABYTES',
+                              default=argparse.SUPPRESS,
+                              help="Size limit of the CTU AST cache. The "
+                                   "least recently used ASTs are removed "
+                                   "from the cache if it grows bigger. "
+                                   "0 turns the cache off. "
+                                   "(default: 4096)")
+
     if host_check.is_statistics_capable():
         stat_opts = parser.add_argument_group(
             "EXPERIMENTAL statistics analysis feature arguments",
@@ -390,12 +585,65 @@ class ParseLogOptions:
             self.output_path = None
             self.compiler_includes_file = None
             self.compiler_target_file = None
+            self.compiler_info_cache = None
         else:
             self.output_path = getattr(args, 'output_path', None)
             self.compiler_includes_file =\
                 getattr(args, 'compiler_includes_file', None)
             self.compiler_target_file =\
                 getattr(args, 'compiler_target_file', None)
+            self.compiler_info_cache =\
+                getattr(args, 'compiler_info_cache', None)
+
+
+def __analyze_in_daemon(args):
+    """
+    Send the analysis to the analysis daemon and print the results of the
+    build actions as they arrive. Returns the exit code of the analysis.
+    """
+    # The daemon runs in another working directory.
+    for path_arg in ['skipfile', 'compiler_includes_file',
+                     'compiler_target_file', 'compiler_info_cache',
+                     'clangsa_args_cfg_file', 'tidy_args_cfg_file',
+                     'stats_output', 'stats_dir']:
+        if getattr(args, path_arg, None):
+            setattr(args, path_arg, os.path.abspath(getattr(args, path_arg)))
+    args.logfile = [os.path.abspath(log_file) for log_file in args.logfile]
+    if 'files' in args:
+        args.files = [os.path.abspath(f) for f in args.files]
+
+    request = {'command': 'analyze',
+               'args': dict((key, value) for key, value in vars(args).items()
+                            if key not in ['func', 'daemon']),
+               'argv': sys.argv,
+               'cwd': os.getcwd(),
+               'env': dict(os.environ)}
+
+    LOG.info("Sending the analysis to the analysis daemon at '%s' ...",
+             args.daemon)
+    try:
+        for message in analysis_daemon.send_request(args.daemon, request):
+            if message['type'] == 'result':
+                log = LOG.error if message['status'] == 'failed' \
+                    else LOG.info
+                log("%s analyzed %s: %s (%.2f sec).", message['analyzer'],
+                    message['source'], message['status'],
+                    message['duration'])
+            elif message['type'] == 'error':
+                LOG.error("Analysis daemon error: %s", message['message'])
+            elif message['type'] == 'finished':
+                LOG.info("Analysis finished: %d successful, %d failed, "
+                         "%d skipped.", message['successful'],
+                         message['failed'], message['skipped'])
+                return message['return_code']
+    except socket.error as ex:
+        LOG.error("Failed to reach the analysis daemon at '%s': %s",
+                  args.daemon, ex)
+        LOG.error("Start it with 'CodeChecker analyze-daemon'.")
+        return 1
+
+    LOG.error("The analysis daemon stopped during the analysis.")
+    return 1
 
 
 def main(args):
@@ -416,6 +664,26 @@ def main(args):
                   args.output_path)
         sys.exit(1)
 
+    if 'daemon' in args:
+        if 'coordinator_listen' in args:
+            LOG.error("Distributed analysis can not be sent to the analysis "
+                      "daemon.")
+            sys.exit(1)
+        sys.exit(__analyze_in_daemon(args))
+
+    context = generic_package_context.get_context()
+    run_analysis(args, context, sys.argv)
+
+
+def run_analysis(args, context, command, warm_state=None):
+    """
+    Analyze the build actions of the logfile into the output directory and
+    write the metadata of the analysis. The command is the command line of
+    the analysis, which is saved into the metadata.
+
+    The analysis daemon runs the analysis with its warm state, see
+    analysis_daemon.
+    """
     if 'enable_all' in args:
         LOG.info("'--enable-all' was supplied for this analysis.")
 
@@ -447,15 +715,52 @@ def main(args):
             continue
 
         parseLogOptions = ParseLogOptions(args)
-        actions += log_parser.parse_log(log_file, parseLogOptions)
+        if warm_state:
+            actions += warm_state.get_actions(log_file, parseLogOptions)
+        else:
+            actions += log_parser.parse_log(log_file, parseLogOptions)
+
+    if 'files' in args:
+        files = set(os.path.abspath(f) for f in args.files)
+        actions = [a for a in actions
+                   if os.path.normpath(os.path.join(a.directory,
+                                                    next(a.sources, '')))
+                   in files]
+        if not actions:
+            LOG.error("None of the given files are in the compilation "
+                      "database.")
+            sys.exit(1)
+
+    if 'changed_files' in args and actions:
+        try:
+            changed_files = dependency_index.get_changed_files(
+                args.changed_files)
+        except (subprocess.CalledProcessError, OSError) as ex:
+            LOG.error("Failed to get the changed files from git: %s", ex)
+            sys.exit(1)
+
+        index = dependency_index.DependencyIndex(args.output_path)
+        if not len(index):
+            LOG.warning("There is no dependency index in '%s', every build "
+                        "action is analyzed.", args.output_path)
+            # The analysis fills the index for the next analyses.
+            index.create()
+        else:
+            actions = dependency_index.select_affected_actions(
+                actions, index, changed_files)
+            LOG.info("%d build actions are affected by the %d changed "
+                     "files.", len(actions), len(changed_files))
+            if not actions:
+                LOG.info("No analysis needed...")
+                return
+
     if len(actions) == 0:
         LOG.info("None of the specified build log files contained "
                  "valid compilation commands. No analysis needed...")
         sys.exit(1)
 
-    context = generic_package_context.get_context()
     metadata = {'action_num': len(actions),
-                'command': sys.argv,
+                'command': command,
                 'versions': {
                     'codechecker': "{0} ({1})".format(
                         context.package_git_tag,
@@ -474,12 +779,15 @@ def main(args):
             metadata_prev = json.load(data)
             metadata['result_source_files'] =\
                 metadata_prev['result_source_files']
+            metadata['analysis_profile'] = \
+                metadata_prev.get('analysis_profile', {})
+
+    analyzer.perform_analysis(args, context, actions, metadata, warm_state)
 
-    analyzer.perform_analysis(args, context, actions, metadata)
+    analysis_manager.write_metadata(metadata, args.output_path)
 
-    LOG.debug("Analysis metadata write to '" + metadata_file + "'")
-    with open(metadata_file, 'w') as metafile:
-        json.dump(metadata, metafile)
+    if 'profile_report' in args:
+        analysis_profile.print_profile_report(metadata, args.profile_report)
 
     # WARN: store command will search for this file!!!!
     compile_cmd_json = os.path.join(args.output_path, 'compile_cmd.json')
@@ -0,0 +1,98 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Defines a subcommand for CodeChecker which analyzes the build actions handed
+out by a distributed 'CodeChecker analyze' coordinator.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import os
+import sys
+
+from libcodechecker import logger
+from libcodechecker import generic_package_context
+from libcodechecker.analyze import analysis_agent
+from libcodechecker.analyze import analysis_coordinator
+
+LOG = logger.get_logger('system')
+
+
+def get_argparser_ctor_args():
+    """
+    This method returns a dict containing the kwargs for constructing an
+    argparse.ArgumentParser (either directly or as a subparser).
+    """
+
+    return {
+        'prog': 'CodeChecker analyze-agent',
+        'formatter_class': argparse.ArgumentDefaultsHelpFormatter,
+
+        # Description is shown when the command's help is queried directly
+        'description': "Connect to a 'CodeChecker analyze' started with "
+                       "'--coordinator-listen' and analyze the build actions "
+                       "it hands out. The results are sent back to the "
+                       "coordinator. The analyzed sources and the analyzers "
+                       "must be available on the same paths as on the "
+                       "coordinator's machine. The token of the analysis "
+                       "must be given in the CC_COORDINATOR_TOKEN "
+                       "environment variable.",
+
+        # Help is shown when the "parent" CodeChecker command lists the
+        # individual subcommands.
+        'help': "Run an analysis agent of a distributed analysis."
+    }
+
+
+def add_arguments_to_parser(parser):
+    """
+    Add the subcommand's arguments to the given argparse.ArgumentParser.
+    """
+
+    parser.add_argument('coordinator',
+                        type=str,
+                        metavar='HOST:PORT',
+                        help="The address of the analysis coordinator. Only "
+                             "connect to trusted coordinators!")
+
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        dest="jobs",
+                        required=False,
+                        default=1,
+                        help="Number of threads to use in analysis. More "
+                             "threads mean faster analysis at the cost of "
+                             "using more memory.")
+
+    parser.add_argument('--work-dir',
+                        dest="work_dir",
+                        required=False,
+                        default=None,
+                        help="Directory for the result files until they are "
+                             "sent to the coordinator. By default a "
+                             "temporary directory is used.")
+
+    logger.add_verbose_arguments(parser)
+    parser.set_defaults(func=main)
+
+
+def main(args):
+    """
+    Analyze build actions for the coordinator until the analysis finishes.
+    """
+    logger.setup_logger(args.verbose if 'verbose' in args else None)
+
+    token = os.environ.get(analysis_coordinator.TOKEN_ENV_VAR)
+    if not token:
+        LOG.error("The token of the analysis must be given in the %s "
+                  "environment variable.", analysis_coordinator.TOKEN_ENV_VAR)
+        sys.exit(1)
+
+    context = generic_package_context.get_context()
+    analysis_agent.run_agent(args.coordinator, context, args.jobs, token,
+                             args.work_dir)
@@ -0,0 +1,128 @@
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+"""
+Defines a subcommand for CodeChecker which runs a long-lived analysis service
+for the 'CodeChecker analyze --daemon' commands.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import socket
+import sys
+
+from libcodechecker import logger
+from libcodechecker import generic_package_context
+from libcodechecker import libhandlers
+from libcodechecker.analyze import analysis_daemon
+
+LOG = logger.get_logger('system')
+
+
+def get_argparser_ctor_args():
+    """
+    This method returns a dict containing the kwargs for constructing an
+    argparse.ArgumentParser (either directly or as a subparser).
+    """
+
+    return {
+        'prog': 'CodeChecker analyze-daemon',
+        'formatter_class': argparse.ArgumentDefaultsHelpFormatter,
+
+        # Description is shown when the command's help is queried directly
+        'description': "Start an analysis daemon which serves the "
+                       "'CodeChecker analyze --daemon' commands on a local "
+                       "socket. The daemon keeps its worker processes, the "
+                       "parsed compilation databases and the analyzer "
+                       "configurations between the analyses, so the "
+                       "analysis of a few files takes about as long as the "
+                       "analyzers run.",
+
+        # Help is shown when the "parent" CodeChecker command lists the
+        # individual subcommands.
+        'help': "Run an analysis daemon for fast repeated analyses."
+    }
+
+
+def add_arguments_to_parser(parser):
+    """
+    Add the subcommand's arguments to the given argparse.ArgumentParser.
+    """
+
+    parser.add_argument('--socket',
+                        dest="socket",
+                        required=False,
+                        default=analysis_daemon.get_default_socket(),
+                        help="The local socket the daemon listens on.")
+
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        dest="jobs",
+                        required=False,
+                        default=1,
+                        help="Number of worker processes of the daemon, "
+                             "which are kept running between the analyses. "
+                             "More processes mean faster analysis at the "
+                             "cost of using more memory.")
+
+    actions = parser.add_mutually_exclusive_group(required=False)
+
+    actions.add_argument('--status',
+                         dest="status",
+                         action='store_true',
+                         default=argparse.SUPPRESS,
+                         required=False,
+                         help="Do not start a daemon, but print the status of "
+                              "the one listening on the socket.")
+
+    actions.add_argument('--stop',
+                         dest="stop",
+                         action='store_true',
+                         default=argparse.SUPPRESS,
+                         required=False,
+                         help="Do not start a daemon, but stop the one "
+                              "listening on the socket after its running "
+                              "analysis.")
+
+    logger.add_verbose_arguments(parser)
+    parser.set_defaults(func=main)
+
+
+def main(args):
+    """
+    Serve the analysis requests until the daemon is stopped.
+    """
+    logger.setup_logger(args.verbose if 'verbose' in args else None)
+
+    if 'status' in args or 'stop' in args:
+        command = 'status' if 'status' in args else 'shutdown'
+        try:
+            for message in analysis_daemon.send_request(args.socket,
+                                                        {'command': command}):
+                if message['type'] == 'status':
+                    LOG.info("Analysis daemon %d is listening on '%s' with "
+                             "%d job(s), served %d analyses in %.0f sec.",
+                             message['pid'], args.socket, message['jobs'],
+                             message['served'], message['uptime'])
+                elif message['type'] == 'finished':
+                    LOG.info("Analysis daemon on '%s' is stopping.",
+                             args.socket)
+        except socket.error as ex:
+            LOG.error("No analysis daemon is listening on '%s': %s",
+                      args.socket, ex)
+            sys.exit(1)
+        return
+
+    analyze_module = libhandlers.load_module('analyze')
+
+    def analyze(analyze_args, command, warm_state):
+        # The analyzers are looked up in the environment of the client.
+        context = generic_package_context.get_context()
+        analyze_module.run_analysis(analyze_args, context, command,
+                                    warm_state)
+
+    sys.exit(analysis_daemon.serve(args.socket, args.jobs, analyze))
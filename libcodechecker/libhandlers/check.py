@@ -111,10 +111,13 @@ def add_arguments_to_parser(parser):
     parser.add_argument('-t', '--type', '--output-format',
                         dest="output_format",
                         required=False,
-                        choices=['plist'],
+                        choices=['plist', 'compact'],
                         default='plist',
                         help="Specify the format the analysis results "
-                             "should use.")
+                             "should use. The 'compact' result files keep "
+                             "the '.plist' extension, but they contain JSON "
+                             "lines which are much faster to process than "
+                             "the XML plist.")
 
     parser.add_argument('-q', '--quiet',
                         dest="quiet",
@@ -432,7 +435,7 @@ def main(args):
         analyze_args = argparse.Namespace(
             logfile=[logfile],
             output_path=output_dir,
-            output_format='plist',
+            output_format=args.output_format,
             jobs=args.jobs
         )
         # Some arguments don't have default values.
@@ -23,6 +23,7 @@ from libcodechecker import generic_package_context
 from libcodechecker import generic_package_suppress_handler
 from libcodechecker import logger
 from libcodechecker import util
+from libcodechecker.analyze import analysis_profile
 from libcodechecker.analyze import plist_parser
 from libcodechecker.analyze.skiplist_handler import SkipListHandler
 from libcodechecker.report import Report, get_report_path_hash
@@ -134,6 +135,20 @@ def add_arguments_to_parser(parser):
                         help="Print the steps the analyzers took in finding "
                              "the reported defect.")
 
+    parser.add_argument('--profile-report',
+                        type=int,
+                        dest="profile_report",
+                        metavar='N',
+                        nargs='?',
+                        const=analysis_profile.DEFAULT_REPORT_SIZE,
+                        required=False,
+                        default=argparse.SUPPRESS,
+                        help="Instead of the reports, print the N slowest "
+                             "and the N most memory-hungry analyses and the "
+                             "cost of the analyses by checker set, from the "
+                             "metadata of the given analysis output "
+                             "directories. (default: %(const)s)")
+
     parser.add_argument('-i', '--ignore', '--skip',
                         dest="skipfile",
                         required=False,
@@ -305,6 +320,17 @@ def main(args):
         os.chdir(original_cwd)
         LOG.debug("Parsing input argument: '" + input_path + "'")
 
+        if 'profile_report' in args:
+            metadata_file = os.path.join(input_path, "metadata.json")
+            if not os.path.exists(metadata_file):
+                LOG.error("No analysis metadata found in '%s'.", input_path)
+                continue
+
+            with open(metadata_file, 'r') as metadata:
+                analysis_profile.print_profile_report(json.load(metadata),
+                                                      args.profile_report)
+            continue
+
         export = args.export if 'export' in args else None
         if export is not None and export == 'html':
             output_path = os.path.abspath(args.output_path)
@@ -319,7 +345,8 @@ def main(args):
                               output_path,
                               context.path_plist_to_html_dist,
                               skip_html_report_data_handler,
-                              html_builder)
+                              html_builder,
+                              plist_parser.read_report_data)
             continue
 
         severity_stats = Counter({})
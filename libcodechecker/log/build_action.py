@@ -12,6 +12,17 @@ import hashlib
 
 
 class BuildAction(object):
+    """
+    A build action of the compilation database. The compilation database of
+    a large project has millions of build actions, so the instances have no
+    attribute dict and the per analyzer copies share the data of the
+    original build action (see for_analyzer()).
+    """
+
+    __slots__ = ('_id', '_analyzer_options', '_compiler_includes',
+                 '_analyzer_type', '_original_command', '_directory',
+                 '_output', '_lang', '_target', '_source_count', '_sources')
+
     def __init__(self, build_action_id=0):
         self._id = build_action_id
         self._analyzer_options = []
@@ -36,6 +47,26 @@ class BuildAction(object):
                    self._directory, self._output, self._lang, self._target,
                    self._source_count, self._sources)
 
+    def __getstate__(self):
+        # The build actions are pickled for every analysis job, a tuple is
+        # more compact than a dict with the attribute names.
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def for_analyzer(self, analyzer_type):
+        """
+        Return a copy of the build action which is analyzed by the given
+        analyzer. The copy shares the options, the includes and the sources
+        of this build action, which must not be modified afterwards.
+        """
+        action = BuildAction.__new__(BuildAction)
+        action.__setstate__(self.__getstate__())
+        action._analyzer_type = analyzer_type
+        return action
+
     @property
     def analyzer_type(self):
         """
@@ -153,3 +184,27 @@ class BuildAction(object):
         hash_content.append(self.target)
         hash_content.extend(self.sources)
         return hashlib.sha1(''.join(hash_content)).hexdigest()
+
+
+class SharedValues(object):
+    """
+    Share the equal directories, option lists etc. of the build actions
+    instead of storing a copy of them for every build action.
+    """
+
+    def __init__(self):
+        self.__values = {}
+        self.__lists = {}
+
+    def get(self, value):
+        """
+        Return the stored value equal to the given one.
+        """
+        return self.__values.setdefault(value, value)
+
+    def get_list(self, values):
+        """
+        Return the stored list equal to the given one. The returned list must
+        not be modified.
+        """
+        return self.__lists.setdefault(tuple(values), values)
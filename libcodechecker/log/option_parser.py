@@ -372,151 +372,234 @@ class OptionIterator(object):
         return self._item
 
 
-def arg_check(it, result):
-    def regex_match(string, pattern):
-        regexp = re.compile(pattern)
-        match = regexp.match(string)
-        return match is not None
-
-    # Handler functions for options.
-    def append_to_list(table, target_list, regex=False):
-        """ Append n item from iterator to to result[att_name] list."""
-
-        def wrapped(value):
-            def append_n(size):
-                target_list.append(it.item)
-                for _ in range(size):
-                    next(it)
-                    target_list.append(it.item)
-
-            if regex:
-                for pattern in table:
-                    if regex_match(value, pattern):
-                        append_n(table[pattern])
-                        return True
-            elif value in table:
-                append_n(table[value])
-                return True
-            return False
-
-        return wrapped
-
-    def append_merged_to_list(table, target_list):
-        """ Append one or two item to the list.
-              1: if there is no space between two option.
-              2: otherwise.
+def append_to_list(it, result, list_name, size):
+    """ Append the option and its n parameters to the given result list. """
+    target_list = getattr(result, list_name)
+    target_list.append(it.item)
+    for _ in range(size):
+        next(it)
+        target_list.append(it.item)
+
+
+def append_merged_to_list(it, result, list_name, pattern):
+    """ Append one or two item to the list merged.
+          1: if there is no space between two option.
+          2: otherwise.
+    """
+    tmp = it.item
+    if pattern.match(tmp).group(1) == '':
+        next(it)
+        tmp = tmp + it.item
+    getattr(result, list_name).append(tmp)
+
+
+def append_to_list_from_file(it, result, list_name):
+    """ Append items from the file given in the next parameter. """
+    target_list = getattr(result, list_name)
+    next(it)
+    with open(it.item) as file:
+        for line in file:
+            target_list.append(line.strip())
+
+
+def append_replacement_to_list(it, result, list_name, items):
+    """ Append the replacement items of the option to the list. """
+    getattr(result, list_name).extend(items)
+    next(it)
+
+
+def set_attr(it, result, attr_name, attr_value):
+    """ Set an attr value. If no value given then
+    read next from iterator."""
+    if attr_value is None:
+        next(it)
+        attr_value = it.item
+    setattr(result, attr_name, attr_value)
+
+
+def skip(it, result, size):
+    """ Skip n item in iterator."""
+    for _ in range(size):
+        next(it)
+
+
+def table_rule(table, handler, *args):
+    """
+    A rule handling the options of the table. The value belonging to the
+    option in the table is the last parameter of the handler.
+    """
+    return [(option, handler, args + (value,))
+            for option, value in table.items()]
+
+
+def regex_rule(patterns, handler, *args):
+    """
+    A rule handling the options matching any of the patterns. The handler
+    gets the compiled pattern as its last parameter.
+    """
+    return [(pattern, handler, args + (re.compile(pattern),))
+            for pattern in patterns]
+
+
+# The handlers of the compiler arguments in the order of precedence: an
+# argument is handled by the first rule matching it. Every rule consists of
+# (exact options, regex options) lists, their elements are (option, handler,
+# handler parameters) triples.
+ARG_RULES = [
+    (table_rule(REPLACE_OPTIONS_MAP,
+                append_replacement_to_list, 'compile_opts'), []),
+    # The regex tables only need the matching, their values are not used.
+    ([], table_rule(UNKNOWN_OPTIONS_MAP_REGEX, skip)),
+    (table_rule(IGNORED_OPTION_MAP, skip), []),
+    ([], table_rule(IGNORED_OPTION_MAP_REGEX, skip)),
+    ([('-x', set_attr, ('lang', None))], []),
+    ([('-o', set_attr, ('output', None))], []),
+    ([('-arch', set_attr, ('arch', None))], []),
+    ([('-c', set_attr, ('action', ActionType.COMPILE))], []),
+    ([('^-(E|M[T|Q|F|J|P|V|M]*)$', set_attr,
+       ('action', ActionType.PREPROCESS))],
+     [('^-(E|M[T|Q|F|J|P|V|M]*)$', set_attr,
+       ('action', ActionType.PREPROCESS))]),
+    ([('-print-prog-name', set_attr, ('action', ActionType.INFO))], []),
+    (table_rule(COMPILE_OPTION_MAP, append_to_list, 'compile_opts'), []),
+    (table_rule(COMPILER_LINKER_OPTION_MAP, append_to_list, 'link_opts'),
+     []),
+    ([], table_rule(LINKER_OPTION_MAP_REGEX, append_to_list, 'link_opts')),
+    ([], table_rule(COMPILE_OPTION_MAP_REGEX, append_to_list,
+                    'compile_opts')),
+    ([], regex_rule(COMPILE_OPTION_MAP_MERGED, append_merged_to_list,
+                    'compile_opts')),
+    ([], regex_rule(LINK_OPTION_MAP_MERGED, append_merged_to_list,
+                    'link_opts')),
+    (table_rule(LINKER_OPTION_MAP, skip), []),
+    ([('-filelist', append_to_list_from_file, ('files',))], []),
+    ([], [('^[^-].+', append_to_list, ('files', 0))])]
+
+
+def literal_prefix(pattern):
+    """
+    Return the literal string every string matching the regex pattern starts
+    with.
+    """
+    if pattern.startswith('^'):
+        pattern = pattern[1:]
+
+    prefix = ''
+    for i, char in enumerate(pattern):
+        if char in '.^$*+?{}[]\\|()':
+            break
+        if pattern[i + 1:i + 2] in ('*', '?', '{'):
+            # The character is optional.
+            break
+        prefix += char
+    return prefix
+
+
+def non_capturing(pattern):
+    """
+    Turn the capturing groups of the regex pattern into non-capturing ones,
+    so the patterns can be combined into one regex without running out of
+    groups.
+    """
+    result = []
+    in_class = False
+    escaped = False
+    for i, char in enumerate(pattern):
+        result.append(char)
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(' and pattern[i + 1:i + 2] != '?':
+            result.append('?:')
+    return ''.join(result)
+
+
+class ArgumentDispatcher(object):
+    """
+    Find the handler of the compiler arguments.
+
+    Instead of trying every rule one by one, the exact options are looked up
+    in a dict, and the regex options are combined into one alternation which
+    finds the first matching pattern in a single match. Only the patterns
+    which may match an argument starting with the same two characters are
+    combined, these regexes are created on demand.
+    """
+
+    # The number of patterns in a combined regex. Python 2 supports only 100
+    # groups in a regex.
+    MAX_PATTERNS = 90
+
+    PREFIX_LENGTH = 2
+
+    def __init__(self, rules):
+        self.__exact = {}
+        self.__regex = []
+        for order, (exact_options, regex_options) in enumerate(rules):
+            for option, handler, args in exact_options:
+                if option not in self.__exact:
+                    self.__exact[option] = (order, handler, args)
+
+            for pattern, handler, args in regex_options:
+                self.__regex.append((literal_prefix(pattern), pattern,
+                                     (order, handler, args)))
+
+        self.__combined = {}
+
+    def __combine(self, prefix):
+        """
+        Combine the patterns possibly matching an argument with the given
+        prefix. Returns a list of (regex, handlers by group index) pairs.
         """
+        candidates = [(pattern, handler) for literal, pattern, handler
+                      in self.__regex
+                      if literal.startswith(prefix) or
+                      prefix.startswith(literal)]
+
+        combined = []
+        for i in range(0, len(candidates), self.MAX_PATTERNS):
+            chunk = candidates[i:i + self.MAX_PATTERNS]
+            regex = re.compile('|'.join('(' + non_capturing(pattern) + ')'
+                                        for pattern, _ in chunk))
+            combined.append((regex, [None] + [handler for _, handler
+                                              in chunk]))
+        return combined
+
+    def get_handler(self, arg):
+        """
+        Return the (order, handler, handler parameters) of the first rule
+        matching the argument or None.
+        """
+        prefix = arg[:self.PREFIX_LENGTH]
+        combined = self.__combined.get(prefix)
+        if combined is None:
+            combined = self.__combine(prefix)
+            self.__combined[prefix] = combined
+
+        found = self.__exact.get(arg)
+        for regex, handlers in combined:
+            match = regex.match(arg)
+            if match:
+                handler = handlers[match.lastindex]
+                if found is None or handler[0] < found[0]:
+                    found = handler
+                break
+        return found
 
-        def wrapped(value):
-            for pattern in table:
-                match = re.match(pattern, value)
-                if match is not None:
-                    tmp = it.item
-                    if match.group(1) == '':
-                        next(it)
-                        tmp = tmp + it.item
-                    target_list.append(tmp)
-                    return True
-            return False
-
-        return wrapped
-
-    def append_to_list_from_file(arg, target_list):
-        """ Append items from file to to result[att_name] list."""
-
-        def wrapped(value):
-            if value == arg:
-                next(it)
-                with open(it.item) as file:
-                    for line in file:
-                        target_list.append(line.strip())
-                return True
-            return False
-
-        return wrapped
-
-    def append_replacement_to_list(table, target_list, regex=False):
-        """ Append replacement items from table to to result[att_name] list."""
-
-        def wrapped(value):
-            def append_replacement(items):
-                for item in items:
-                    target_list.append(item)
-                next(it)
-
-            if regex:
-                for pattern in table:
-                    if regex_match(value, pattern):
-                        append_replacement(table[pattern])
-                        return True
-            elif value in table:
-                append_replacement(table[value])
-                return True
-            return False
-
-        return wrapped
-
-    def set_attr(arg, obj, attr_name, attr_value=None, regex=None):
-        """ Set an attr value. If no value given then
-        read next from iterator."""
-        def wrapped(value):
-            if (regex and regex_match(value, arg)) or value == arg:
-                tmp = attr_value
-                if attr_value is None:
-                    next(it)
-                    tmp = it.item
-                setattr(obj, attr_name, tmp)
-                return True
-            return False
-
-        return wrapped
-
-    def skip(table, regex=False):
-        """ Skip n item in iterator."""
-
-        def wrapped(value):
-            def skip_n(size):
-                for _ in range(size):
-                    next(it)
-
-            if regex:
-                for pattern in table:
-                    if regex_match(value, pattern):
-                        return True
-            elif value in table:
-                skip_n(table[value])
-                return True
-            return False
-
-        return wrapped
-
-    # Defines handler functions for tables and single options.
-    arg_collection = [
-        append_replacement_to_list(REPLACE_OPTIONS_MAP, result.compile_opts),
-        skip(UNKNOWN_OPTIONS_MAP_REGEX, True),
-        skip(IGNORED_OPTION_MAP),
-        skip(IGNORED_OPTION_MAP_REGEX, True),
-        set_attr('-x', result, 'lang'),
-        set_attr('-o', result, 'output'),
-        set_attr('-arch', result, 'arch'),
-        set_attr('-c', result, 'action', ActionType.COMPILE),
-        set_attr('^-(E|M[T|Q|F|J|P|V|M]*)$', result, 'action',
-                 ActionType.PREPROCESS, True),
-        set_attr('-print-prog-name', result, 'action', ActionType.INFO),
-        append_to_list(COMPILE_OPTION_MAP, result.compile_opts),
-        append_to_list(COMPILER_LINKER_OPTION_MAP, result.link_opts),
-        append_to_list(LINKER_OPTION_MAP_REGEX, result.link_opts, True),
-        append_to_list(COMPILE_OPTION_MAP_REGEX, result.compile_opts, True),
-        append_merged_to_list(COMPILE_OPTION_MAP_MERGED, result.compile_opts),
-        append_merged_to_list(LINK_OPTION_MAP_MERGED, result.link_opts),
-        skip(LINKER_OPTION_MAP),
-        append_to_list_from_file('-filelist', result.files),
-        append_to_list({'^[^-].+': 0}, result.files, True)]
-
-    for coll in arg_collection:
-        res = coll(it.item)
-        if res:
-            return True
+
+ARG_DISPATCHER = ArgumentDispatcher(ARG_RULES)
+
+
+def arg_check(it, result):
+    handler = ARG_DISPATCHER.get_handler(it.item)
+    if handler:
+        _, func, args = handler
+        func(it, result, *args)
+        return True
 
     # Unhandled compilation argument found.
     LOG.debug("Unhandled argument: " + str(it.item))
@@ -532,8 +615,10 @@ def parse_options(args):
 
     result_map = OptionParserResult()
 
+    args = shlex.split(args)
+
     # The first element in the list is the compiler skip it from parsing.
-    for it in OptionIterator(shlex.split(args)[1:]):
+    for it in OptionIterator(args[1:]):
         arg_check(it, result_map)
 
     for idx, opt in enumerate(result_map.compile_opts):
@@ -544,7 +629,7 @@ def parse_options(args):
             # mess up the result.
             result_map.compile_opts[idx] = opt.replace('"', r'"\"')
 
-    result_map.compiler = shlex.split(args)[0]
+    result_map.compiler = args[0]
 
     #  If the compiler is C++ (contains ++ in its name)
     #  we set the language explicitly to c++.
@@ -12,6 +12,8 @@ from __future__ import absolute_import
 
 import datetime
 import hashlib
+import heapq
+import itertools
 import json
 import os
 import re
@@ -21,10 +23,10 @@ import socket
 import stat
 import subprocess
 import tempfile
+import threading
+import time
 import uuid
 
-from threading import Timer
-
 import psutil
 
 from libcodechecker.logger import get_logger
@@ -188,12 +190,170 @@ def call_command(command, env=None, cwd=None):
         return oerr.strerror, oerr.errno
 
 
+class _ProcessWatch(object):
+    """
+    A process watched by the ProcessSupervisor.
+    """
+
+    def __init__(self, pid, signal_at_limit, failure_callback):
+        self.pid = pid
+        self.signal_at_limit = signal_at_limit
+        self.failure_callback = failure_callback
+        self.active = True
+        self.killed = False
+
+
+class ProcessSupervisor(object):
+    """
+    Enforce the timeouts and the output size limits of child processes on a
+    single thread, instead of a watcher thread per process.
+
+    The timeouts are kept in a heap ordered by their deadline, so the thread
+    only wakes up when the earliest deadline expires, or periodically while
+    there are output size limits to check.
+    """
+
+    # The output size limits are checked this often, in seconds.
+    POLL_INTERVAL = 1.0
+
+    def __init__(self):
+        self.__condition = threading.Condition()
+        self.__deadlines = []
+        self.__output_limits = {}
+        self.__counter = itertools.count()
+
+        thread = threading.Thread(target=self.__run,
+                                  name='ProcessSupervisor')
+        thread.daemon = True
+        thread.start()
+
+    def __add(self, watch, deadline=None, output=None):
+        with self.__condition:
+            if deadline is not None:
+                heapq.heappush(self.__deadlines,
+                               (deadline, next(self.__counter), watch))
+            if output is not None:
+                self.__output_limits[watch] = output
+            self.__condition.notify()
+
+        def __cleanup():
+            """
+            Stop watching the process, and return whether it was killed by
+            the supervisor. It is safe to call this more times.
+            """
+            with self.__condition:
+                if watch.active:
+                    watch.active = False
+                    self.__output_limits.pop(watch, None)
+                    self.__deadlines = [entry for entry in self.__deadlines
+                                        if entry[2] is not watch]
+                    heapq.heapify(self.__deadlines)
+                    self.__condition.notify()
+            return watch.killed
+
+        return __cleanup
+
+    def watch_timeout(self, proc, timeout, signal_at_timeout=signal.SIGTERM,
+                      failure_callback=None):
+        """
+        Kill the process by the signal if it runs longer than the timeout
+        (in seconds). Returns the cleanup function of the watch, see
+        setup_process_timeout().
+        """
+        LOG.debug("Setup timeout of {1} for PID {0}".format(proc.pid,
+                                                            timeout))
+        return self.__add(_ProcessWatch(proc.pid, signal_at_timeout,
+                                        failure_callback),
+                          deadline=time.time() + timeout)
+
+    def watch_output(self, proc, output_files, limit,
+                     signal_at_limit=signal.SIGKILL, failure_callback=None):
+        """
+        Kill the process by the signal if the total size of its output files
+        (file objects it writes into) exceeds the limit (in bytes). Returns
+        the cleanup function of the watch, like watch_timeout().
+        """
+        return self.__add(_ProcessWatch(proc.pid, signal_at_limit,
+                                        failure_callback),
+                          output=(output_files, limit))
+
+    def __get_over_limit(self):
+        """
+        Return the watches whose processes wrote more output than allowed.
+        """
+        over_limit = []
+        for watch, (output_files, limit) in self.__output_limits.items():
+            try:
+                size = sum(os.fstat(output.fileno()).st_size
+                           for output in output_files)
+            except (OSError, ValueError):
+                # The output file was closed, the process is finished.
+                continue
+            if size > limit:
+                LOG.debug("Process {0} wrote {1} bytes of output, killing "
+                          "it!".format(watch.pid, size))
+                over_limit.append(watch)
+        return over_limit
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                now = time.time()
+                expired = []
+                while self.__deadlines and self.__deadlines[0][0] <= now:
+                    watch = heapq.heappop(self.__deadlines)[2]
+                    LOG.debug("Process {0} has ran for too long, killing "
+                              "it!".format(watch.pid))
+                    expired.append(watch)
+                expired.extend(self.__get_over_limit())
+
+                for watch in expired:
+                    watch.active = False
+                    watch.killed = True
+                    self.__output_limits.pop(watch, None)
+                    try:
+                        os.kill(watch.pid, watch.signal_at_limit)
+                    except OSError:
+                        pass
+
+                wait_time = None
+                if self.__deadlines:
+                    wait_time = self.__deadlines[0][0] - now
+                if self.__output_limits:
+                    wait_time = min(wait_time or self.POLL_INTERVAL,
+                                    self.POLL_INTERVAL)
+
+                if not expired:
+                    self.__condition.wait(wait_time)
+
+            for watch in expired:
+                if watch.failure_callback:
+                    watch.failure_callback()
+
+
+# The supervisor of the current process, see get_process_supervisor().
+__process_supervisor = None
+
+
+def get_process_supervisor():
+    """
+    Return the ProcessSupervisor of the current process. Threads do not
+    survive a fork, so a forked (e.g. worker) process starts its own one.
+    """
+    global __process_supervisor
+    if __process_supervisor is None or \
+            __process_supervisor[0] != os.getpid():
+        __process_supervisor = (os.getpid(), ProcessSupervisor())
+    return __process_supervisor[1]
+
+
 def setup_process_timeout(proc, timeout,
                           signal_at_timeout=signal.SIGTERM,
                           failure_callback=None):
     """
     Setup a timeout on a process. After `timeout` seconds, the process is
-    killed by `signal_at_timeout` signal.
+    killed by `signal_at_timeout` signal. The timeouts of every process are
+    watched by the single ProcessSupervisor of the current process.
 
     :param proc: The subprocess.Process object representing the process to
       attach the watcher to.
@@ -209,64 +369,28 @@ def setup_process_timeout(proc, timeout,
     :return: A function is returned which should be called when the client code
       (usually via subprocess.Process.wait() or
       subprocess.Process.communicate())) figures out that the called process
-      has terminated. (See below for what this called function returns.)
-    """
-
-    # The watch dict encapsulated the captured variables for the timeout watch.
-    watch = {'pid': proc.pid,
-             'timer': None,  # Will be created later.
-             'counting': False,
-             'killed': False}
-
-    def __kill():
-        """
-        Helper function to execute the killing of a hung process.
-        """
-        LOG.debug("Process {0} has ran for too long, killing it!"
-                  .format(watch['pid']))
-        os.kill(watch['pid'], signal_at_timeout)
-        watch['counting'] = False
-        watch['killed'] = True
-
-        if failure_callback:
-            failure_callback()
-
-    timer = Timer(timeout, __kill)
-    watch['timer'] = timer
-
-    LOG.debug("Setup timeout of {1} for PID {0}".format(proc.pid, timeout))
-    timer.start()
-    watch['counting'] = True
+      has terminated. It stops the timeout watch if the process finished
+      within the grace period.
 
-    def __cleanup_timeout():
-        """
-        Stops the timer associated with the timeout watch if the process
-        finished within the grace period.
-
-        Due to race conditions and the possibility of the OS, or another
-        process also using signals to kill the watched process in particular,
-        it is possible that checking subprocess.Process.returncode on the
-        watched process is not enough to see if the timeout watched killed it,
-        or something else.
-
-        (Note: returncode is -N where N is the signal's value, but only on Unix
-        systems!)
+      Due to race conditions and the possibility of the OS, or another
+      process also using signals to kill the watched process in particular,
+      it is possible that checking subprocess.Process.returncode on the
+      watched process is not enough to see if the timeout watched killed it,
+      or something else.
 
-        It is safe to call this function multiple times to check for the result
-        of the watching.
+      (Note: returncode is -N where N is the signal's value, but only on Unix
+      systems!)
 
-        :return: Whether or not the process was killed by the watcher. If this
-          is False, the process could have finished gracefully, or could have
-          been destroyed by other means.
-        """
-        if watch['counting'] and not watch['killed'] and watch['timer']:
-            watch['timer'].cancel()
-            watch['timer'] = None
-            watch['counting'] = False
-
-        return watch['killed']
+      It is safe to call this function multiple times to check for the result
+      of the watching.
 
-    return __cleanup_timeout
+      The function returns whether or not the process was killed by the
+      watcher. If this is False, the process could have finished gracefully,
+      or could have been destroyed by other means.
+    """
+    return get_process_supervisor().watch_timeout(proc, timeout,
+                                                  signal_at_timeout,
+                                                  failure_callback)
 
 
 def kill_process_tree(parent_pid):
@@ -591,6 +715,22 @@ def get_last_mod_time(file_path):
         return None
 
 
+def replace_environ(environ):
+    """
+    Replace the environment of this process, and of the processes started by
+    it, with the given variables.
+    """
+    def to_str(text):
+        # The environment of a JSON request has unicode strings.
+        return text if isinstance(text, str) else text.encode('utf-8')
+
+    environ = dict((to_str(key), to_str(value))
+                   for key, value in environ.items())
+    if environ != dict(os.environ):
+        os.environ.clear()
+        os.environ.update(environ)
+
+
 def escape_source_path(source):
     """
     Escape the spaces in the source path, but make sure not to
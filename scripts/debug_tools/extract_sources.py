@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -------------------------------------------------------------------------
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+import argparse
+import os
+
+import failure_lib as lib
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract the source files '
+                                     'of a failure zip into the source root '
+                                     'directory.')
+    parser.add_argument(
+        'failure_zip',
+        help="The failure zip of the failed analysis.")
+    parser.add_argument(
+        '--sources_zip',
+        default=None,
+        help="Path of the failed_sources.zip file of the output directory "
+             "(next to the 'failed' directory of the failure zip by "
+             "default).")
+    parser.add_argument(
+        '--destination',
+        default='.',
+        help="The directory in which the sources-root directory is "
+             "created.")
+    args = parser.parse_args()
+
+    sources_zip = args.sources_zip
+    if sources_zip is None:
+        sources_zip = os.path.join(
+            os.path.dirname(os.path.dirname(
+                os.path.abspath(args.failure_zip))),
+            'failed_sources.zip')
+
+    lib.extract_sources(args.failure_zip, sources_zip, args.destination)
+    print("Source files are extracted into " +
+          os.path.join(args.destination, 'sources-root'))
@@ -13,6 +13,7 @@ from __future__ import absolute_import
 import json
 import os
 import subprocess
+import zipfile
 
 
 def find_path_end(string, path_begin):
@@ -67,6 +68,27 @@ def load_json_file(filename):
     return data
 
 
+def extract_sources(failure_zip, sources_zip, destination):
+    """
+    Extract the source files of the failure zip from the failed_sources.zip
+    of the output directory into the sources-root directory under the
+    destination, in the directory layout of the analyzed machine. The
+    'sources.json' file of the failure zip maps the paths of the source
+    files to their names in failed_sources.zip.
+    """
+    with zipfile.ZipFile(failure_zip, 'r') as archive:
+        sources = json.loads(archive.read('sources.json'))
+
+    with zipfile.ZipFile(sources_zip, 'r') as store:
+        for path, stored_name in sources.items():
+            target = os.path.join(destination, 'sources-root',
+                                  path.lstrip('/'))
+            if not os.path.isdir(os.path.dirname(target)):
+                os.makedirs(os.path.dirname(target))
+            with open(target, 'wb') as source:
+                source.write(store.read(stored_name))
+
+
 def get_resource_dir(clang_bin):
     """
     Returns the resource_dir of Clang or None if the switch is not supported by
@@ -349,13 +349,15 @@ class TestAnalyze(unittest.TestCase):
                 self.assertEqual(archived_buildcmd.read(),
                                  "gcc -c " + source_file)
 
-            source_in_archive = os.path.join("sources-root",
-                                             source_file.lstrip('/'))
-            self.assertIn(source_in_archive, files)
-
-            with archive.open(source_in_archive, 'r') as archived_code:
-                with open(source_file, 'r') as source_code:
-                    self.assertEqual(archived_code.read(), source_code.read())
+            sources = json.loads(archive.read("sources.json"))
+            self.assertIn(source_file, sources)
+
+        # The sources are in the source store of the failure zips.
+        store_file = os.path.join(self.report_dir, "failed_sources.zip")
+        with zipfile.ZipFile(store_file, 'r') as store:
+            with open(source_file, 'r') as source_code:
+                self.assertEqual(store.read(sources[source_file]),
+                                 source_code.read())
 
         os.remove(os.path.join(failed_dir, failed_files[0]))
 
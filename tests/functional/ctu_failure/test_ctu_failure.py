@@ -128,16 +128,18 @@ class TestCtuFailure(unittest.TestCase):
             self.assertIn("build-action", files)
             self.assertIn("analyzer-command", files)
 
+            sources = json.loads(archive.read("sources.json"))
+
+        # The sources are in the source store of the failure zips.
+        store_file = os.path.join(self.report_dir, "failed_sources.zip")
+        with zipfile.ZipFile(store_file, 'r') as store:
             def check_source_in_archive(source_in_archive):
                 source_file = os.path.join(self.test_dir, source_in_archive)
-                source_in_archive = os.path.join("sources-root",
-                                                 source_file.lstrip('/'))
-                self.assertIn(source_in_archive, files)
+                self.assertIn(source_file, sources)
                 # Check file content.
-                with archive.open(source_in_archive, 'r') as archived_code:
-                    with open(source_file, 'r') as source_code:
-                        self.assertEqual(archived_code.read(),
-                                         source_code.read())
+                with open(source_file, 'r') as source_code:
+                    self.assertEqual(store.read(sources[source_file]),
+                                     source_code.read())
 
             check_source_in_archive("main.c")
             check_source_in_archive("lib.c")
@@ -181,16 +183,18 @@ class TestCtuFailure(unittest.TestCase):
             self.assertIn("build-action", files)
             self.assertIn("analyzer-command", files)
 
+            sources = json.loads(archive.read("sources.json"))
+
+        # The sources are in the source store of the failure zips.
+        store_file = os.path.join(self.report_dir, "failed_sources.zip")
+        with zipfile.ZipFile(store_file, 'r') as store:
             def check_source_in_archive(source_in_archive):
                 source_file = os.path.join(self.test_dir, source_in_archive)
-                source_in_archive = os.path.join("sources-root",
-                                                 source_file.lstrip('/'))
-                self.assertIn(source_in_archive, files)
+                self.assertIn(source_file, sources)
                 # Check file content.
-                with archive.open(source_in_archive, 'r') as archived_code:
-                    with open(source_file, 'r') as source_code:
-                        self.assertEqual(archived_code.read(),
-                                         source_code.read())
+                with open(source_file, 'r') as source_code:
+                    self.assertEqual(store.read(sources[source_file]),
+                                     source_code.read())
 
             check_source_in_archive("main.c")
             check_source_in_archive("lib.c")
@@ -0,0 +1,136 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the overhead of dispatching build actions to the analysis workers.
+
+The analysis itself is replaced by a no-op which only reads the data that a
+real analysis worker reads (the build action map and the analyzer config), so
+the measured time is the cost of handing out the jobs:
+ - 'manager': the read-only data is shared through multiprocessing.Manager
+   proxies and sent together with every build action,
+ - 'initializer': the read-only data is given to the workers once, at their
+   startup, and only the build action is sent with each job.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+# The read-only state of the workers in the 'initializer' mode.
+STATE = None
+
+
+class FakeBuildAction(object):
+    """ Has roughly the same pickled size as a real BuildAction. """
+
+    def __init__(self, idx):
+        self.source = '/home/user/project/src/module_%d/file_%d.cpp' % \
+            (idx % 100, idx)
+        self.target = 'x86_64'
+        self.analyzer_options = ['-I/home/user/project/include/%d' % i
+                                 for i in range(20)]
+        self.compile_defines = ['-DFEATURE_%d=1' % i for i in range(10)]
+        self.directory = '/home/user/project/build'
+
+
+def create_data(action_num):
+    actions = [FakeBuildAction(i) for i in range(action_num)]
+    actions_map = dict(((a.source, a.target), a) for a in actions)
+    config_map = {'clangsa': {'checkers': ['checker.%d' % i
+                                           for i in range(200)]},
+                  'clang-tidy': {'checkers': ['check-%d' % i
+                                              for i in range(200)]}}
+    return actions, actions_map, config_map
+
+
+def simulate_worker(action, actions_map, config_map):
+    # A real worker looks up the action and its analyzer config.
+    actions_map.get((action.source, action.target))
+    config_map.get('clangsa')
+
+
+def check_with_manager(params):
+    action, actions_map, config_map = params
+    simulate_worker(action, actions_map, config_map)
+
+
+def init_worker(state):
+    global STATE
+    STATE = state
+
+
+def check_with_initializer(action):
+    actions_map, config_map = STATE
+    simulate_worker(action, actions_map, config_map)
+
+
+def run_manager(actions, actions_map, config_map, jobs):
+    start = time.time()
+    manager = multiprocessing.Manager()
+    shared_actions_map = manager.dict(actions_map)
+    shared_config_map = manager.dict(config_map)
+
+    pool = multiprocessing.Pool(jobs)
+    pool.map(check_with_manager,
+             [(action, shared_actions_map, shared_config_map)
+              for action in actions],
+             1)
+    pool.close()
+    pool.join()
+    manager.shutdown()
+    return time.time() - start
+
+
+def run_initializer(actions, actions_map, config_map, jobs):
+    start = time.time()
+    pool = multiprocessing.Pool(jobs,
+                                initializer=init_worker,
+                                initargs=((actions_map, config_map),))
+    pool.map(check_with_initializer, actions, 1)
+    pool.close()
+    pool.join()
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the per build action dispatch overhead of the "
+                    "analysis process pool.")
+
+    parser.add_argument('-a', '--actions',
+                        type=int,
+                        default=2000,
+                        help="Number of fake build actions.")
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="Number of worker processes.")
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=3,
+                        help="Number of measurements, the best is printed.")
+
+    args = parser.parse_args()
+
+    actions, actions_map, config_map = create_data(args.actions)
+
+    print("Dispatching %d build actions to %d workers."
+          % (args.actions, args.jobs))
+
+    for name, method in [('manager', run_manager),
+                         ('initializer', run_initializer)]:
+        best = min(method(actions, actions_map, config_map, args.jobs)
+                   for _ in range(args.repeat))
+        print("%-12s total: %8.3f s  per action: %8.1f us"
+              % (name, best, best / args.actions * 1e6))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
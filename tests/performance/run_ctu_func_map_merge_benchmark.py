@@ -0,0 +1,177 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the merge of the CTU function maps of the translation units into the
+global function map.
+
+A synthetic set of function maps is generated: every translation unit
+defines its own functions, and some of the functions (e.g. inline functions
+of headers) are defined in multiple translation units. Some of these are
+defined in different ASTs, these names are conflicting and are left out of
+the global map. The merge is measured with:
+ - 'in-memory': the previous implementation which collected every name into
+   a dict of sets,
+ - 'external': the external sort merge of ctu_manager, with bounded memory.
+
+Every merge runs in a separate process, so its peak memory usage can be
+measured. The package root must be on PYTHONPATH, e.g.:
+
+    PYTHONPATH=build/CodeChecker/lib/python2.7 \\
+        python run_ctu_func_map_merge_benchmark.py --lines 50000000
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+from collections import defaultdict
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from libcodechecker.analyze import ctu_manager
+
+ARCH = 'x86_64'
+FNMAP_FOLDER = 'tmpExternalFnMaps'
+FNMAP_FILE = 'externalFnMap.txt'
+
+
+def generate_func_maps(fnmap_dir, line_num, tu_num):
+    """
+    Generate the individual function maps of tu_num translation units with
+    line_num lines in total. A tenth of the lines are shared functions, a
+    tenth of these are defined in different ASTs.
+    """
+    rnd = random.Random(42)
+    lines_per_tu = line_num // tu_num
+    shared_num = max(line_num // 100, 1)
+
+    for tu_idx in range(tu_num):
+        ast = '/ctu-dir/%s/ast/src/module_%d/file_%d.cpp.ast' % \
+            (ARCH, tu_idx % 100, tu_idx)
+        with open(os.path.join(fnmap_dir, 'fnmap_%d' % tu_idx), 'w') as out:
+            for line_idx in range(lines_per_tu):
+                if line_idx % 10 == 0:
+                    shared = rnd.randrange(shared_num)
+                    if shared % 10 == 0:
+                        # Defined in every AST including it: conflict.
+                        out.write('c:@N@shared@F@conflict_%d# %s\n'
+                                  % (shared, ast))
+                    else:
+                        out.write('c:@N@shared@F@inline_%d# '
+                                  '/ctu-dir/%s/ast/src/inline_%d.h.ast\n'
+                                  % (shared, ARCH, shared))
+                else:
+                    out.write('c:@N@module_%d@F@func_%d_%d# %s\n'
+                              % (tu_idx % 100, tu_idx, line_idx, ast))
+
+
+def in_memory_merge(ctu_dir):
+    """ The merge which keeps every function name in memory. """
+    fnmap_dir = os.path.join(ctu_dir, ARCH, FNMAP_FOLDER)
+
+    mangled_to_asts = defaultdict(set)
+    for line in ctu_manager.generate_func_map_lines(fnmap_dir):
+        mangled_name, ast_file = line.strip().split(' ', 1)
+        mangled_to_asts[mangled_name].add(ast_file)
+
+    mangled_ast_pairs = []
+    for mangled_name, ast_files in mangled_to_asts.items():
+        if len(ast_files) == 1:
+            mangled_ast_pairs.append((mangled_name, next(iter(ast_files))))
+
+    ctu_manager.write_global_map(ctu_dir, ARCH, FNMAP_FILE,
+                                 mangled_ast_pairs)
+
+
+def external_merge(ctu_dir):
+    """ The external sort merge of ctu_manager. """
+    fnmap_dir = os.path.join(ctu_dir, ARCH, FNMAP_FOLDER)
+    sort_dir = tempfile.mkdtemp(dir=ctu_dir)
+
+    func_map_lines = ctu_manager.generate_func_map_lines(fnmap_dir)
+    sorted_lines = ctu_manager.sort_func_map_lines(func_map_lines, sort_dir)
+    mangled_ast_pairs = \
+        ctu_manager.create_global_ctu_function_map(sorted_lines)
+    ctu_manager.write_global_map(ctu_dir, ARCH, FNMAP_FILE,
+                                 mangled_ast_pairs)
+
+    shutil.rmtree(sort_dir)
+
+
+def measure(method, ctu_dir, queue):
+    """ Run the merge and report its duration and peak memory usage. """
+    start = time.time()
+    method(ctu_dir)
+    duration = time.time() - start
+
+    # ru_maxrss is in kilobytes on Linux.
+    queue.put((duration, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def run(method, ctu_dir):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=measure,
+                                      args=(method, ctu_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the merge of the CTU function maps.")
+
+    parser.add_argument('-l', '--lines',
+                        type=int,
+                        default=50000000,
+                        help="Number of lines in all function maps.")
+    parser.add_argument('-t', '--translation-units',
+                        type=int,
+                        default=20000,
+                        help="Number of function maps.")
+    parser.add_argument('--skip-in-memory',
+                        action='store_true',
+                        help="Do not run the in-memory merge. It needs "
+                             "multiple gigabytes of memory on the default "
+                             "input size.")
+    parser.add_argument('--work-dir',
+                        default=None,
+                        help="Directory of the generated function maps.")
+
+    args = parser.parse_args()
+
+    ctu_dir = tempfile.mkdtemp(dir=args.work_dir)
+    try:
+        fnmap_dir = os.path.join(ctu_dir, ARCH, FNMAP_FOLDER)
+        os.makedirs(fnmap_dir)
+
+        print("Generating %d lines in %d function maps..."
+              % (args.lines, args.translation_units))
+        generate_func_maps(fnmap_dir, args.lines, args.translation_units)
+
+        methods = [('external', external_merge)]
+        if not args.skip_in_memory:
+            methods.append(('in-memory', in_memory_merge))
+
+        for name, method in methods:
+            duration, max_rss = run(method, ctu_dir)
+            with open(os.path.join(ctu_dir, ARCH, FNMAP_FILE)) as fn_map:
+                func_num = sum(1 for _ in fn_map)
+            print("%-10s time: %8.2f s  peak RSS: %8.1f MiB  functions: %d"
+                  % (name, duration, max_rss / 1024, func_num))
+    finally:
+        shutil.rmtree(ctu_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the speed of the compiler option parser on realistic gcc and clang
+command lines.
+
+The arguments are dispatched to their handlers in two ways:
+ - 'linear': the rules are tried one by one in the order of precedence, as
+   the option parser used to do,
+ - 'dispatcher': the precompiled dispatch tables of the option parser.
+Both have to find the same handler for every argument. The time of the whole
+parse_options() call (including the splitting of the command line) is
+printed too.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import re
+import shlex
+import sys
+import time
+
+from libcodechecker.log import option_parser
+
+COMMANDS = [
+    "/usr/bin/gcc -DHAVE_CONFIG_H -I. -I../../src -I../../include "
+    "-I/usr/include/glib-2.0 -I/usr/lib/x86_64-linux-gnu/glib-2.0/include "
+    "-DG_LOG_DOMAIN=\\\"core\\\" -D_FORTIFY_SOURCE=2 -DNDEBUG -g -O2 "
+    "-fstack-protector-strong -Wformat -Werror=format-security -Wall "
+    "-Wextra -Wno-unused-parameter -Wno-missing-field-initializers -std=gnu99 "
+    "-fPIC -pthread -MT libcore_la-buffer.lo -MD -MP "
+    "-MF .deps/libcore_la-buffer.Tpo -c ../../src/core/buffer.c "
+    "-o libcore_la-buffer.o",
+
+    "/usr/bin/c++ -DBOOST_ALL_NO_LIB -DBOOST_FILESYSTEM_DYN_LINK "
+    "-Dproject_EXPORTS -I/home/user/project/include "
+    "-I/home/user/project/build/generated -isystem /opt/boost/include "
+    "-isystem /opt/protobuf/include -O3 -DNDEBUG -fPIC -std=gnu++14 "
+    "-Wall -Wextra -Wpedantic -Wshadow -Wnon-virtual-dtor -Wold-style-cast "
+    "-Wcast-align -Wunused -Woverloaded-virtual -Wconversion "
+    "-Wsign-conversion -Wnull-dereference -Wdouble-promotion "
+    "-fno-omit-frame-pointer -fvisibility=hidden -fvisibility-inlines-hidden "
+    "-flto -ffunction-sections -fdata-sections "
+    "-o CMakeFiles/project.dir/src/network/connection_manager.cpp.o "
+    "-c /home/user/project/src/network/connection_manager.cpp",
+
+    "clang++ -target armv7a-none-eabi -mfloat-abi=hard -mfpu=neon "
+    "-mthumb -march=armv7-a -mcpu=cortex-a9 --sysroot=/opt/sysroots/arm "
+    "-I/opt/sysroots/arm/usr/include/c++/7 -D__ARM_NEON__ -DUSE_HAL=1 "
+    "-Os -g3 -ggdb -fno-exceptions -fno-rtti -fno-strict-aliasing "
+    "-fno-common -ffreestanding -Wall -Wno-unknown-pragmas "
+    "-include config/board.h -iquote src/hal -c src/hal/gpio.cpp "
+    "-o build/hal/gpio.o",
+
+    "gcc -m32 -mno-sse -mno-mmx -march=i686 -fno-pic -fno-builtin "
+    "-fno-stack-protector -nostdinc -isystem "
+    "/usr/lib/gcc/x86_64-linux-gnu/7/include -Iarch/x86/include "
+    "-I./arch/x86/include/generated -Iinclude -include "
+    "./include/linux/kconfig.h -D__KERNEL__ -Wall -Wundef "
+    "-Wstrict-prototypes -Wno-trigraphs -fno-strict-aliasing "
+    "-fno-common -fshort-wchar -Werror-implicit-function-declaration "
+    "-Wno-format-security -std=gnu89 -fconserve-stack -fno-ipa-sra "
+    "-mpreferred-stack-boundary=2 -mregparm=3 -freg-struct-return "
+    "-DKBUILD_BASENAME='\"setup\"' -DKBUILD_MODNAME='\"setup\"' "
+    "-c -o arch/x86/kernel/setup.o arch/x86/kernel/setup.c",
+]
+
+
+def linear_rules():
+    """
+    Return the rules of the option parser in the order they are tried.
+    """
+    rules = []
+    for order, (exact_options, regex_options) in \
+            enumerate(option_parser.ARG_RULES):
+        rules.append((order, dict((option, (order, handler, args))
+                                  for option, handler, args
+                                  in exact_options),
+                      [(pattern, (order, handler, args))
+                       for pattern, handler, args in regex_options]))
+    return rules
+
+
+def linear_get_handler(rules, arg):
+    for _, exact_options, regex_options in rules:
+        if arg in exact_options:
+            return exact_options[arg]
+        for pattern, handler in regex_options:
+            if re.match(pattern, arg):
+                return handler
+    return None
+
+
+def measure(func, arguments, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        for arg in arguments:
+            func(arg)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the argument dispatch of the compiler option "
+                    "parser.")
+
+    parser.add_argument('-n', '--number',
+                        type=int,
+                        default=2000,
+                        help="Number of times every command line is "
+                             "parsed.")
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=3,
+                        help="Number of measurements, the best is printed.")
+
+    args = parser.parse_args()
+
+    arguments = []
+    for command in COMMANDS:
+        arguments.extend(shlex.split(command.replace('"', '"\\"'))[1:])
+
+    rules = linear_rules()
+    dispatcher = option_parser.ArgumentDispatcher(option_parser.ARG_RULES)
+    for arg in arguments:
+        if linear_get_handler(rules, arg) != dispatcher.get_handler(arg):
+            print("Different handlers found for '%s'." % arg)
+            return 1
+
+    arguments = arguments * args.number
+    print("Dispatching %d arguments of %d command lines."
+          % (len(arguments), len(COMMANDS) * args.number))
+
+    for name, func in [('linear',
+                        lambda arg: linear_get_handler(rules, arg)),
+                       ('dispatcher', dispatcher.get_handler)]:
+        best = measure(func, arguments, args.repeat)
+        print("%-12s total: %8.3f s  per argument: %8.2f us"
+              % (name, best, best / len(arguments) * 1e6))
+
+    commands = COMMANDS * args.number
+    best = measure(option_parser.parse_options, commands, args.repeat)
+    print("%-12s total: %8.3f s  per command: %8.2f us"
+          % ('parse', best, best / len(commands) * 1e6))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the parse throughput of the plist and the compact result files.
+
+The same reports are written to plist and to compact result files, which are
+parsed by plist_parser.parse_plist(), as 'parse', 'store' and 'cmd diff' do.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import os
+import plistlib
+import shutil
+import sys
+import tempfile
+import time
+
+from libcodechecker.analyze import compact_report
+from libcodechecker.analyze import plist_parser
+
+
+def create_diagnostic(file_num, index):
+    location = {'line': index + 10, 'col': 5, 'file': 0}
+    header_location = {'line': index % 50 + 1, 'col': 3, 'file': 1}
+    events = []
+    for i in range(3):
+        loc = header_location if i == 1 else location
+        events.append({'kind': 'event',
+                       'location': loc,
+                       'ranges': [[loc, loc]],
+                       'depth': 0,
+                       'extended_message': "Step %d of the report" % i,
+                       'message': "Step %d of the report" % i})
+        events.append({'kind': 'control',
+                       'edges': [{'start': [loc, loc],
+                                  'end': [location, location]}]})
+
+    return {'category': 'Logic error',
+            'check_name': 'core.DivideZero',
+            'description': 'Division by zero',
+            'type': 'Division by zero',
+            'issue_context': 'func%d' % index,
+            'issue_context_kind': 'function',
+            'issue_hash_content_of_line_in_context':
+                '%032x' % (file_num * 100000 + index),
+            'location': location,
+            'path': events}
+
+
+def create_results(plist_dir, compact_dir, file_num, report_num):
+    for i in range(file_num):
+        report_data = {'files': ['/src/main%d.cpp' % i, '/src/main.h'],
+                       'diagnostics': [create_diagnostic(i, j)
+                                       for j in range(report_num)]}
+        name = 'main%d.cpp_0.plist' % i
+        plistlib.writePlist(report_data, os.path.join(plist_dir, name))
+        with open(os.path.join(compact_dir, name), 'wb') as output:
+            compact_report.dump(report_data, output)
+
+
+def parse_all(result_dir):
+    reports = []
+    for name in sorted(os.listdir(result_dir)):
+        _, file_reports = plist_parser.parse_plist(
+            os.path.join(result_dir, name), allow_plist_update=False)
+        reports.extend(file_reports)
+    return reports
+
+
+def dir_size(result_dir):
+    return sum(os.path.getsize(os.path.join(result_dir, name))
+               for name in os.listdir(result_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the parsing of the result file formats.")
+
+    parser.add_argument('-f', '--files',
+                        type=int,
+                        default=1000,
+                        help="Number of result files.")
+    parser.add_argument('-r', '--reports',
+                        type=int,
+                        default=100,
+                        help="Number of reports in every result file.")
+
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        plist_dir = os.path.join(tmp_dir, 'plist')
+        compact_dir = os.path.join(tmp_dir, 'compact')
+        os.makedirs(plist_dir)
+        os.makedirs(compact_dir)
+        create_results(plist_dir, compact_dir, args.files, args.reports)
+
+        results = []
+        for name, result_dir in [('plist', plist_dir),
+                                 ('compact', compact_dir)]:
+            start = time.time()
+            reports = parse_all(result_dir)
+            elapsed = time.time() - start
+            results.append(reports)
+
+            print("%-8s reports: %7d  size: %7.1f MB  total: %8.3f s  "
+                  "reports/s: %8.0f"
+                  % (name, len(reports), dir_size(result_dir) / 1024 / 1024,
+                     elapsed, len(reports) / elapsed))
+
+        if [(r.main, r.bug_path) for r in results[0]] != \
+                [(r.main, r.bug_path) for r in results[1]]:
+            print("The compact result files gave different reports.")
+            return 1
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
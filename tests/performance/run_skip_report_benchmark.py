@@ -0,0 +1,131 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the cost of removing the reports of skipped files from the result
+plists with a large header skip list.
+
+The plists are filtered in two ways:
+ - 'rewrite': every plist is parsed and written back, as it used to be done
+   after every analysis,
+ - 'prefilter': the 'files' array of the plist is checked first, and only
+   the plists containing skipped files are parsed and written.
+The time and the number of bytes written are printed.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import os
+import plistlib
+import shutil
+import sys
+import tempfile
+import time
+
+from libcodechecker.analyze import plist_parser
+from libcodechecker.analyze.skiplist_handler import SkipListHandler
+
+
+def create_plist(idx, skipped):
+    files = ['/home/user/project/src/file%d.cpp' % idx] + \
+        ['/home/user/project/include/header%d.h' % i for i in range(20)]
+    if skipped:
+        files.append('/usr/include/lib%d/header.h' % idx)
+
+    diagnostics = []
+    for i in range(30):
+        file_id = i % len(files)
+        location = {'line': i + 1, 'col': 1, 'file': file_id}
+        diagnostics.append({
+            'description': 'Report %d' % i,
+            'category': 'Logic error',
+            'type': 'Division by zero',
+            'check_name': 'core.DivideZero',
+            'issue_hash_content_of_line_in_context': '%032x' % i,
+            'location': location,
+            'path': [{'kind': 'event',
+                      'location': location,
+                      'ranges': [[location, location]],
+                      'message': 'Step %d' % step,
+                      'extended_message': 'Step %d' % step}
+                     for step in range(10)]})
+
+    return plistlib.writePlistToString({'files': files,
+                                        'diagnostics': diagnostics})
+
+
+def rewrite(plist_file, skip_handler):
+    """
+    Filter the plist as it used to be done.
+    """
+    with open(plist_file, 'r+') as plist:
+        report_data = plistlib.readPlistFromString(plist.read())
+        plist_parser.remove_skipped_reports(report_data, skip_handler)
+        content = plistlib.writePlistToString(report_data)
+        plist.seek(0)
+        plist.write(content)
+        plist.truncate()
+    return len(content)
+
+
+def prefilter(plist_file, skip_handler):
+    if plist_parser.skip_report_from_plist(plist_file, skip_handler):
+        return os.path.getsize(plist_file)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark removing the skipped reports from the result "
+                    "plists.")
+
+    parser.add_argument('-p', '--plists',
+                        type=int,
+                        default=1000,
+                        help="Number of result plists.")
+    parser.add_argument('-l', '--lines',
+                        type=int,
+                        default=2000,
+                        help="Number of header patterns in the skip file.")
+    parser.add_argument('-s', '--skipped',
+                        type=int,
+                        default=5,
+                        help="Percentage of the plists having reports in "
+                             "skipped headers.")
+
+    args = parser.parse_args()
+
+    skip_lines = ['-/usr/include/lib%d/*' % i for i in range(args.lines)]
+    plists = [create_plist(i, i * 100 < args.skipped * args.plists)
+              for i in range(args.plists)]
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        for name, method in [('rewrite', rewrite),
+                             ('prefilter', prefilter)]:
+            plist_files = []
+            for i, content in enumerate(plists):
+                plist_file = os.path.join(work_dir, '%s_%d.plist' % (name, i))
+                with open(plist_file, 'w') as plist:
+                    plist.write(content)
+                plist_files.append(plist_file)
+
+            skip_handler = SkipListHandler('\n'.join(skip_lines))
+            start = time.time()
+            written = sum(method(plist_file, skip_handler)
+                          for plist_file in plist_files)
+            elapsed = time.time() - start
+
+            print("%-10s plists: %6d  total: %8.3f s  written: %8.1f MB"
+                  % (name, len(plist_files), elapsed,
+                     written / 1024 / 1024))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
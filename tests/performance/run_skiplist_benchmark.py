@@ -0,0 +1,125 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the speed of the skip list matching with a large skip file.
+
+The paths are checked in three ways:
+ - 'linear': every pattern of the skip file is tried one by one, as the skip
+   list handler used to do,
+ - 'combined': the first check of every path by the skip list handler, which
+   uses the combined regexes,
+ - 'cached': the repeated checks of the same paths, as it happens for the
+   reports of the same files.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import fnmatch
+import random
+import re
+import sys
+import time
+
+from libcodechecker.analyze.skiplist_handler import SkipListHandler
+
+
+def create_skip_lines(line_num):
+    lines = []
+    for i in range(line_num):
+        kind = i % 4
+        if kind == 0:
+            lines.append('-/home/user/project/thirdparty/lib%d/*' % i)
+        elif kind == 1:
+            lines.append('+/home/user/project/src/module%d/*.cpp' % i)
+        elif kind == 2:
+            lines.append('-*/generated/file%d_*.h' % i)
+        else:
+            lines.append('-/home/user/project/tests/test%d?.c' % i)
+    lines.append('+/home/user/project/*')
+    lines.append('-*')
+    return lines
+
+
+def create_paths(path_num, line_num):
+    random.seed(0)
+    paths = []
+    for i in range(path_num):
+        module = random.randint(0, line_num * 2)
+        paths.append(random.choice([
+            '/home/user/project/src/module%d/file%d.cpp' % (module, i),
+            '/home/user/project/thirdparty/lib%d/file%d.c' % (module, i),
+            '/home/user/project/build/generated/file%d_%d.h' % (module, i),
+            '/usr/include/c++/7/bits/header%d.h' % i]))
+    return paths
+
+
+def linear_should_skip(skip, source):
+    for line, rexpr in skip:
+        if rexpr.match(source):
+            return line[0] == '-'
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the skip list matching.")
+
+    parser.add_argument('-l', '--lines',
+                        type=int,
+                        default=2000,
+                        help="Number of lines in the skip file.")
+    parser.add_argument('-p', '--paths',
+                        type=int,
+                        default=5000,
+                        help="Number of different paths checked.")
+    parser.add_argument('-c', '--checks',
+                        type=int,
+                        default=20,
+                        help="Number of times every path is checked.")
+
+    args = parser.parse_args()
+
+    lines = create_skip_lines(args.lines)
+    paths = create_paths(args.paths, args.lines)
+
+    skip = [(line, re.compile(fnmatch.translate(line[1:] + '*')))
+            for line in lines]
+
+    start = time.time()
+    handler = SkipListHandler('\n'.join(lines))
+    print("Creating the skip list handler of %d lines: %.3f s"
+          % (len(lines), time.time() - start))
+
+    start = time.time()
+    expected = [linear_should_skip(skip, path) for path in paths]
+    linear = time.time() - start
+
+    start = time.time()
+    verdicts = [handler.should_skip(path) for path in paths]
+    combined = time.time() - start
+
+    if verdicts != expected:
+        print("The skip list handler gave different verdicts.")
+        return 1
+
+    start = time.time()
+    for _ in range(args.checks):
+        for path in paths:
+            handler.should_skip(path)
+    cached = time.time() - start
+
+    for name, elapsed, checks in [('linear', linear, len(paths)),
+                                  ('combined', combined, len(paths)),
+                                  ('cached', cached,
+                                   len(paths) * args.checks)]:
+        print("%-10s checks: %8d  total: %8.3f s  per check: %8.2f us"
+              % (name, checks, elapsed, elapsed / checks * 1e6))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
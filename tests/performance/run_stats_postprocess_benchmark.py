@@ -0,0 +1,123 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the postprocessing of the statistics collector outputs.
+
+The outputs are processed in two ways:
+ - 'sequential': every line of every file is given to both collectors, as
+   the statistics postprocessing used to do,
+ - 'parallel': postprocess_stats() with the given number of jobs.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from libcodechecker.analyze import statistics_collector
+
+
+def create_outputs(output_dir, file_num, line_num):
+    random.seed(0)
+    for i in range(file_num):
+        with open(os.path.join(output_dir, 'main%d.c.stat' % i), 'w') as out:
+            for j in range(line_num):
+                kind = random.randint(0, 9)
+                func = 'func%d' % random.randint(0, 500)
+                if kind == 0:
+                    out.write("/src/main%d.c:%d:5: warning: Return Value "
+                              "Check:/src/main%d.c:%d:5,%s,%d\n"
+                              % (i, j, i, j, func, random.randint(0, 1)))
+                elif kind == 1:
+                    out.write("/src/main%d.c:%d:5: warning: Special Return "
+                              "Value:/src/main%d.c:%d:5,%s,%d,%d\n"
+                              % (i, j, i, j, func, random.randint(0, 1),
+                                 random.randint(0, 1)))
+                else:
+                    out.write("/src/main%d.c:%d:5: note: Calling '%s'\n"
+                              % (i, j, func))
+
+
+def sequential(output_dir, stats_dir):
+    ret_collector = statistics_collector.ReturnValueCollector()
+    special_ret_collector = statistics_collector.SpecialReturnValueCollector()
+    for name in os.listdir(output_dir):
+        with open(os.path.join(output_dir, name)) as out:
+            for line in out:
+                ret_collector.process_line(line)
+                special_ret_collector.process_line(line)
+
+    os.makedirs(stats_dir)
+    for collector in [ret_collector, special_ret_collector]:
+        with open(collector.stats_file(stats_dir), 'w') as yaml:
+            yaml.write(collector.get_yaml())
+
+
+def read_stats(stats_dir):
+    stats = []
+    for collector in [statistics_collector.ReturnValueCollector,
+                      statistics_collector.SpecialReturnValueCollector]:
+        with open(collector.stats_file(stats_dir)) as yaml:
+            stats.append(yaml.read())
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the statistics postprocessing.")
+
+    parser.add_argument('-f', '--files',
+                        type=int,
+                        default=2000,
+                        help="Number of statistics output files.")
+    parser.add_argument('-l', '--lines',
+                        type=int,
+                        default=2000,
+                        help="Number of lines in every output file.")
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=4,
+                        help="Number of processes of the postprocessing.")
+
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        output_dir = os.path.join(tmp_dir, 'tmp')
+        os.makedirs(output_dir)
+        create_outputs(output_dir, args.files, args.lines)
+
+        start = time.time()
+        sequential(output_dir, os.path.join(tmp_dir, 'sequential'))
+        sequential_time = time.time() - start
+
+        start = time.time()
+        statistics_collector.postprocess_stats(
+            output_dir, os.path.join(tmp_dir, 'parallel'), args.jobs)
+        parallel_time = time.time() - start
+
+        if read_stats(os.path.join(tmp_dir, 'sequential')) != \
+                read_stats(os.path.join(tmp_dir, 'parallel')):
+            print("The parallel postprocessing gave different statistics.")
+            return 1
+
+        lines = args.files * args.lines
+        for name, elapsed in [('sequential', sequential_time),
+                              ('parallel', parallel_time)]:
+            print("%-10s lines: %9d  total: %8.3f s  per line: %6.2f us"
+                  % (name, lines, elapsed, elapsed / lines * 1e6))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
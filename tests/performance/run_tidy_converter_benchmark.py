@@ -0,0 +1,119 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+"""
+Measure the conversion of a large clang-tidy output to plist.
+
+The output is converted in two ways, each in a separate process whose peak
+memory usage is measured:
+ - 'converter': every message is parsed, then converted to a plist dict
+   which is written by plistlib, as the result handler used to do,
+ - 'streaming': the diagnostics are written one by one as the output lines
+   are parsed.
+"""
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from libcodechecker.analyze import tidy_output_converter
+from libcodechecker.analyze.analyzers.result_handler_clang_tidy import \
+    generate_plist_from_tidy_result
+
+
+def create_tidy_output(message_num):
+    lines = []
+    for i in range(message_num):
+        source = '/home/user/project/src/module%d/file%d.cpp' % (i % 50,
+                                                                 i % 500)
+        header = '/home/user/project/include/header%d.h' % (i % 200)
+        lines.append('%s:%d:%d: warning: use nullptr '
+                     '[modernize-use-nullptr]' % (source, i, i % 80 + 1))
+        lines.append('  int* x = 0;')
+        lines.append('           ^~')
+        lines.append('           nullptr')
+        for j in range(3):
+            lines.append('%s:%d:3: note: Calling \'f%d\'' % (header, j, j))
+            lines.append('    f%d(x);' % j)
+            lines.append('    ^')
+    return '\n'.join(lines) + '\n'
+
+
+def convert(tidy_stdout, output_file):
+    parser = tidy_output_converter.OutputParser()
+    messages = parser.parse_messages(tidy_stdout.splitlines())
+
+    plist_converter = tidy_output_converter.PListConverter()
+    plist_converter.add_messages(messages)
+    plist_converter.write_to_file(output_file)
+
+
+def stream(tidy_stdout, output_file):
+    generate_plist_from_tidy_result(
+        output_file, tidy_output_converter.iter_lines(tidy_stdout))
+
+
+def measure(func, tidy_stdout, output_file):
+    """
+    Run the conversion in a child process. Returns the elapsed time and the
+    peak memory usage of the child in megabytes.
+    """
+    start = time.time()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            func(tidy_stdout, output_file)
+        finally:
+            os._exit(0)
+
+    _, _, usage = os.wait4(pid, 0)
+    maxrss = usage.ru_maxrss
+    if sys.platform != 'darwin':
+        maxrss *= 1024
+    return time.time() - start, maxrss / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the clang-tidy output conversion.")
+
+    parser.add_argument('-m', '--messages',
+                        type=int,
+                        default=100000,
+                        help="Number of messages in the clang-tidy output.")
+
+    args = parser.parse_args()
+
+    tidy_stdout = create_tidy_output(args.messages)
+    print("Clang-tidy output: %d messages, %.1f MB"
+          % (args.messages, len(tidy_stdout) / (1024 * 1024)))
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        outputs = []
+        for name, func in [('converter', convert), ('streaming', stream)]:
+            output_file = os.path.join(tmp_dir, name + '.plist')
+            elapsed, peak = measure(func, tidy_stdout, output_file)
+            print("%-10s total: %8.3f s  peak RSS: %8.1f MB"
+                  % (name, elapsed, peak))
+
+            with open(output_file) as plist:
+                outputs.append(plist.read())
+
+        if outputs[0] != outputs[1]:
+            print("The streaming conversion gave a different plist.")
+            return 1
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,3 +14,6 @@ import sys
 
 # Add the generated thrift files for the unit tests.
 sys.path.append("build/thrift/v6/gen-py/")
+
+# Add the debug tools which process the failure zips.
+sys.path.append("scripts/debug_tools/")
@@ -0,0 +1,121 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the incremental analysis cache. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analysis_cache
+from libcodechecker.log.build_action import BuildAction
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    """
+    Test the up-to-date detection of the analysis cache.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        self.source = os.path.join(self.tmp_dir, 'main.cpp')
+        self.header = os.path.join(self.tmp_dir, 'main.h')
+        self.result = os.path.join(self.tmp_dir, 'main.cpp_123.plist')
+
+        for path, content in [(self.source, '#include "main.h"\n'),
+                              (self.header, 'int f();\n'),
+                              (self.result, '')]:
+            with open(path, 'w') as f:
+                f.write(content)
+
+        self.action = BuildAction()
+        self.action.original_command = 'g++ -c main.cpp'
+        self.action.directory = self.tmp_dir
+        self.action.analyzer_type = 'clangsa'
+        self.action.sources = self.source
+
+        self.fingerprint = analysis_cache.get_analyzer_fingerprint(
+            'clang version 6.0', ['core.DivideZero'])
+        self.key = analysis_cache.get_action_key(self.action,
+                                                 self.fingerprint)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __cache_action(self):
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        deps = analysis_cache.fingerprint_dependencies(['main.cpp', 'main.h'],
+                                                       self.tmp_dir)
+        cache.update(self.key, self.result, deps)
+        cache.save()
+
+    def test_unknown_action(self):
+        """ An action which was never analyzed is not up-to-date. """
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        self.assertFalse(cache.is_up_to_date(self.key))
+
+    def test_unchanged_action(self):
+        """ The saved cache is loaded back and the action is up-to-date. """
+        self.__cache_action()
+
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        self.assertEqual(1, len(cache))
+        self.assertTrue(cache.is_up_to_date(self.key))
+
+        to_analyze, up_to_date = analysis_cache.filter_up_to_date_actions(
+            [self.action], cache, {'clangsa': self.fingerprint})
+        self.assertEqual([], to_analyze)
+        self.assertEqual([self.action], up_to_date)
+
+    def test_changed_header(self):
+        """ Modifying an included header invalidates the action. """
+        self.__cache_action()
+
+        with open(self.header, 'w') as f:
+            f.write('int f(int);\n')
+
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        self.assertFalse(cache.is_up_to_date(self.key))
+
+    def test_touched_header(self):
+        """ Only the modification time changed, the content is the same. """
+        self.__cache_action()
+
+        stat = os.stat(self.header)
+        os.utime(self.header, (stat.st_atime, stat.st_mtime + 10))
+
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        self.assertTrue(cache.is_up_to_date(self.key))
+
+    def test_removed_result(self):
+        """ The action is reanalyzed if its result file was removed. """
+        self.__cache_action()
+        os.remove(self.result)
+
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        self.assertFalse(cache.is_up_to_date(self.key))
+
+    def test_changed_configuration(self):
+        """ Another checker set results in another cache key. """
+        self.__cache_action()
+
+        fingerprint = analysis_cache.get_analyzer_fingerprint(
+            'clang version 6.0', ['core.DivideZero', 'core.NullDereference'])
+
+        cache = analysis_cache.AnalysisCache(self.tmp_dir)
+        to_analyze, _ = analysis_cache.filter_up_to_date_actions(
+            [self.action], cache, {'clangsa': fingerprint})
+        self.assertEqual([self.action], to_analyze)
+
+    def test_missing_dependency(self):
+        """ Actions with unreadable dependencies can not be cached. """
+        self.assertIsNone(analysis_cache.fingerprint_dependencies(
+            ['main.cpp', 'missing.h'], self.tmp_dir))
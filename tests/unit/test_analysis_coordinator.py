@@ -0,0 +1,256 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the distribution of the build actions among analysis agents. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    from urllib2 import HTTPError
+except ImportError:
+    from urllib.error import HTTPError
+
+from libcodechecker.analyze import analysis_agent
+from libcodechecker.analyze import analysis_coordinator
+from libcodechecker.log.build_action import BuildAction
+
+
+def create_jobs(num):
+    jobs = []
+    for index in range(num):
+        action = BuildAction(index)
+        action.analyzer_type = 'clangsa'
+        action.sources = 'main_%d.cpp' % index
+        jobs.append((index, action))
+    return jobs
+
+
+class JobQueueTest(unittest.TestCase):
+    """
+    Test the leases and the requeueing of the build actions.
+    """
+
+    def test_lost_agent(self):
+        """ The job of an agent which stopped responding is requeued. """
+        queue = analysis_coordinator.JobQueue(create_jobs(2),
+                                              agent_timeout=0.2)
+
+        self.assertEqual(0, queue.lease('dead')[0])
+        self.assertEqual(1, queue.lease('alive')[0])
+        self.assertIsNone(queue.lease('alive'))
+
+        requeued, abandoned = queue.requeue_lost_jobs()
+        self.assertEqual([], requeued)
+
+        time.sleep(0.3)
+        queue.heartbeat('alive')
+        requeued, abandoned = queue.requeue_lost_jobs()
+        self.assertEqual([0], [job[0] for job in requeued])
+        self.assertEqual([], abandoned)
+
+        self.assertEqual(0, queue.lease('alive')[0])
+        self.assertTrue(queue.complete('alive', 0))
+        self.assertTrue(queue.complete('alive', 1))
+
+        # The lost agent comes back with its result too late.
+        self.assertFalse(queue.complete('dead', 0))
+        self.assertTrue(queue.is_finished())
+
+    def test_abandoned_job(self):
+        """ A job which was lost too many times is given up. """
+        queue = analysis_coordinator.JobQueue(create_jobs(1),
+                                              agent_timeout=10,
+                                              max_attempts=2)
+
+        for _ in range(2):
+            queue.lease('crashing')
+            requeued, abandoned = queue.requeue_lost_jobs(time.time() + 20)
+
+        self.assertEqual([], requeued)
+        self.assertEqual([0], [job[0] for job in abandoned])
+        self.assertTrue(queue.is_finished())
+
+    def test_released_job(self):
+        """
+        A job whose result could not be received is requeued, then given up.
+        """
+        queue = analysis_coordinator.JobQueue(create_jobs(1),
+                                              max_attempts=2)
+
+        self.assertEqual(0, queue.lease('agent')[0])
+        self.assertIsNone(queue.release('other', 0))
+        self.assertIsNone(queue.release('agent', 0))
+        self.assertFalse(queue.is_finished())
+
+        self.assertEqual(0, queue.lease('agent')[0])
+        self.assertEqual(0, queue.release('agent', 0)[0])
+        self.assertTrue(queue.is_done(0))
+        self.assertTrue(queue.is_finished())
+
+    def test_unknown_job(self):
+        """ Results of unknown build actions are rejected. """
+        queue = analysis_coordinator.JobQueue(create_jobs(1))
+        self.assertRaises(ValueError, queue.complete, 'agent', 42)
+
+
+class CoordinatorServerTest(unittest.TestCase):
+    """
+    Test the communication of the coordinator and the agents on localhost.
+    """
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.agent_dir = tempfile.mkdtemp()
+        for sub_dir in ['success', 'failed']:
+            os.makedirs(os.path.join(self.agent_dir, sub_dir))
+
+        self.queue = analysis_coordinator.JobQueue(create_jobs(2),
+                                                   agent_timeout=10)
+        self.server = analysis_coordinator.CoordinatorServer(
+            ('127.0.0.1', 0), self.queue, {'action_num': 2}, self.output_dir,
+            'secret')
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.address = '127.0.0.1:%d' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.output_dir)
+        shutil.rmtree(self.agent_dir)
+
+    def __client(self, agent_id, token='secret'):
+        return analysis_agent.CoordinatorClient(self.address, agent_id,
+                                                token)
+
+    def __analyze(self, job):
+        """ Create the result of a build action like check() would. """
+        result_file = os.path.join(self.agent_dir,
+                                   'main_%d.cpp_hash.plist' % job[0])
+        with open(result_file, 'w') as plist:
+            plist.write('plist %d' % job[0])
+
+        return (0, False, False, 'clangsa', result_file, None, 1.0,
+                {result_file: '/src/main_%d.cpp' % job[0]}, job[0], [], None,
+                [])
+
+    def test_distributed_analysis(self):
+        """ Two agents share the jobs, one of them dies during its job. """
+        dead_agent = self.__client('dead')
+        agent = self.__client('alive')
+
+        self.assertEqual({'action_num': 2}, agent.get_config())
+
+        self.assertEqual(0, dead_agent.get_job()[0])
+        job = agent.get_job()
+        self.assertEqual(1, job[0])
+        agent.send_result(*analysis_agent.collect_result_files(
+            self.__analyze(job), self.agent_dir))
+
+        self.queue.requeue_lost_jobs(time.time() + 10)
+        job = agent.get_job()
+        self.assertEqual(0, job[0])
+        agent.send_result(*analysis_agent.collect_result_files(
+            self.__analyze(job), self.agent_dir))
+
+        self.assertRaises(analysis_agent.CoordinatorGone, agent.get_job)
+
+        results = [self.server.results.get(False) for _ in range(2)]
+        self.assertEqual([1, 0], [result[8] for result in results])
+
+        result_file = os.path.join(os.path.realpath(self.output_dir),
+                                   'main_0.cpp_hash.plist')
+        self.assertEqual(result_file, results[1][4])
+        self.assertEqual({result_file: '/src/main_0.cpp'}, results[1][7])
+        with open(result_file) as plist:
+            self.assertEqual('plist 0', plist.read())
+
+        # The uploaded files were removed from the agent.
+        self.assertEqual(['failed', 'success'],
+                         sorted(os.listdir(self.agent_dir)))
+
+    def test_invalid_result(self):
+        """ The job of an invalid result is requeued. """
+        agent = self.__client('agent')
+
+        job = agent.get_job()
+        result, _ = analysis_agent.collect_result_files(self.__analyze(job),
+                                                        self.agent_dir)
+        with self.assertRaises(HTTPError) as context:
+            agent.send_result(result, {'../outside': 'cGxpc3Q='})
+        self.assertEqual(400, context.exception.code)
+
+        self.assertFalse(self.queue.is_done(job[0]))
+        self.assertEqual([], os.listdir(self.output_dir))
+
+        self.assertEqual(job[0], agent.get_job()[0])
+        agent.send_result(*analysis_agent.collect_result_files(
+            self.__analyze(job), self.agent_dir))
+        self.assertEqual(job[0], self.server.results.get(False)[8])
+
+    def test_agent_error(self):
+        """ A job which the agent fails to deliver is given back. """
+        agent = self.__client('agent')
+
+        def analyze(job):
+            raise ValueError("Failed analysis.")
+
+        job = agent.get_job()
+        analysis_agent.process_job(agent, job, analyze, self.agent_dir)
+        self.assertFalse(self.queue.is_done(job[0]))
+
+        # The agent keeps serving, the job is given out again.
+        self.assertEqual(job[0], agent.get_job()[0])
+        analysis_agent.process_job(agent, job, self.__analyze,
+                                   self.agent_dir)
+        self.assertEqual(job[0], self.server.results.get(False)[8])
+
+    def test_failure_record(self):
+        """ The failure zips of the agents are written by the coordinator. """
+        agent = self.__client('agent')
+
+        job = agent.get_job()
+        result = list(self.__analyze(job))
+        result[11] = [{'zip_file': os.path.join(self.agent_dir, 'failed',
+                                                'main_0.cpp.zip'),
+                       'mentioned_files': [],
+                       'stdout': '',
+                       'stderr': 'error',
+                       'analyzer_cmd': ['clang'],
+                       'return_code': 1}]
+        agent.send_result(*analysis_agent.collect_result_files(
+            result, self.agent_dir))
+
+        failures = self.server.results.get(False)[11]
+        self.assertEqual([os.path.join(os.path.realpath(self.output_dir),
+                                       'failed', 'main_0.cpp.zip')],
+                         [failure['zip_file'] for failure in failures])
+        self.assertEqual('error', failures[0]['stderr'])
+
+    def test_invalid_token(self):
+        """ The requests without the token of the analysis are rejected. """
+        agent = self.__client('agent', 'wrong')
+        self.assertRaises(analysis_agent.CoordinatorGone, agent.get_config)
+        self.assertRaises(analysis_agent.CoordinatorGone, agent.get_job)
+        self.assertEqual(0, self.__client('agent').get_job()[0])
+
+    def test_default_host(self):
+        """ Only the local host is listened on by default. """
+        self.assertEqual(('localhost', 8002),
+                         analysis_coordinator.parse_address('8002'))
+        self.assertEqual(('0.0.0.0', 8002),
+                         analysis_coordinator.parse_address('0.0.0.0:8002'))
@@ -0,0 +1,212 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the analysis daemon and its warm state. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import argparse
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+
+from libcodechecker.analyze import analysis_daemon
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze.analyzers import analyzer_types
+from libcodechecker.analyze.analyzers.config_handler_clang_tidy import \
+    ClangTidyConfigHandler
+from libcodechecker.libhandlers.analyze import ParseLogOptions
+from libcodechecker.log.build_action import BuildAction
+
+TIDY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'tidy_output_test_files')
+
+
+class FakeContext(object):
+    severity_map = {}
+    path_env_extra = []
+    ld_lib_path_extra = []
+
+
+class AnalysisDaemonTest(unittest.TestCase):
+    """
+    Test the requests of the daemon and the analysis in its warm pool.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, 'daemon.sock')
+        self.warm_state = None
+        self.server = None
+
+    def tearDown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.warm_state:
+            self.warm_state.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def __start_daemon(self, analyze):
+        self.warm_state = analysis_daemon.WarmState(1)
+        self.server = analysis_daemon.AnalysisDaemon(self.socket_path,
+                                                     self.warm_state, analyze)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def __request(self, request):
+        return list(analysis_daemon.send_request(self.socket_path, request))
+
+    def test_analyze_request(self):
+        """ The results of the analysis are streamed to the client. """
+        calls = []
+
+        def analyze(args, command, warm_state):
+            calls.append((args.output_path, command, os.getcwd()))
+            action = BuildAction()
+            action.directory = '/src'
+            action.sources = 'main.cpp'
+            warm_state.handle_result(
+                action, (0, False, False, 'clang-tidy', '/out/main.plist',
+                         None, 1.5, {'/out/main.plist': '/src/main.cpp'}, 0,
+                         [], None, []))
+            if args.fail:
+                raise SystemExit(2)
+
+        self.__start_daemon(analyze)
+
+        messages = self.__request({'command': 'analyze',
+                                   'args': {'output_path': '/out',
+                                            'fail': False},
+                                   'argv': ['CodeChecker', 'analyze'],
+                                   'cwd': self.tmp_dir})
+        self.assertEqual(['result', 'finished'],
+                         [m['type'] for m in messages])
+        self.assertEqual('/src/main.cpp', messages[0]['source'])
+        self.assertEqual('successful', messages[0]['status'])
+        self.assertEqual(0, messages[1]['return_code'])
+        self.assertEqual(1, messages[1]['successful'])
+        self.assertEqual([('/out', ['CodeChecker', 'analyze'],
+                           os.path.realpath(self.tmp_dir))],
+                         [(o, c, os.path.realpath(d)) for o, c, d in calls])
+
+        messages = self.__request({'command': 'analyze',
+                                   'args': {'output_path': '/out',
+                                            'fail': True}})
+        self.assertEqual(2, messages[-1]['return_code'])
+
+        status = self.__request({'command': 'status'})[0]
+        self.assertEqual(2, status['served'])
+        self.assertTrue(analysis_daemon.is_running(self.socket_path))
+
+        self.assertEqual('error',
+                         self.__request({'command': 'unknown'})[0]['type'])
+
+    def test_socket_mode(self):
+        """ Only the user of the daemon can connect to its socket. """
+        self.__start_daemon(None)
+        self.assertEqual(0o600,
+                         stat.S_IMODE(os.stat(self.socket_path).st_mode))
+
+    def test_client_environment(self):
+        """ The analysis runs in the environment of the client. """
+        environments = []
+
+        def analyze(args, command, warm_state):
+            environments.append(dict(os.environ))
+
+        self.__start_daemon(analyze)
+
+        env = dict(os.environ, CC_TEST_DAEMON_ENV='client')
+        env.pop('HOME', None)
+        self.__request({'command': 'analyze', 'args': {}, 'env': env})
+        self.assertEqual([env], environments)
+
+        self.assertNotIn('CC_TEST_DAEMON_ENV', os.environ)
+        self.__request({'command': 'analyze', 'args': {}})
+        self.assertEqual(dict(os.environ), environments[-1])
+
+    def test_shutdown(self):
+        """ The daemon stops on request and removes its socket. """
+        self.__start_daemon(None)
+        self.assertEqual('finished',
+                         self.__request({'command': 'shutdown'})[0]['type'])
+        self.server.server_close()
+        self.server = None
+
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertFalse(analysis_daemon.is_running(self.socket_path))
+
+    def test_warm_compile_database(self):
+        """ The compilation database is only parsed again if it changes. """
+        logfile = os.path.join(self.tmp_dir, 'compile_commands.json')
+        commands = [{'directory': TIDY_DIR,
+                     'command': 'g++ -c files/test.cpp',
+                     'file': 'files/test.cpp'}]
+        with open(logfile, 'w') as log:
+            json.dump(commands, log)
+
+        self.warm_state = analysis_daemon.WarmState(1)
+        options = ParseLogOptions(argparse.Namespace(
+            compiler_includes_file=None, compiler_target_file=None,
+            compiler_info_cache=None))
+
+        first = self.warm_state.get_actions(logfile, options)
+        self.assertEqual(1, len(first))
+        self.assertIs(first[0],
+                      self.warm_state.get_actions(logfile, options)[0])
+
+        commands.append({'directory': TIDY_DIR,
+                         'command': 'g++ -c files/test2.cpp',
+                         'file': 'files/test2.cpp'})
+        with open(logfile, 'w') as log:
+            json.dump(commands, log)
+        self.assertEqual(2, len(self.warm_state.get_actions(logfile,
+                                                            options)))
+
+    def test_warm_pool(self):
+        """ More analyses run in the same worker pool. """
+        clang_tidy = os.path.join(self.tmp_dir, 'clang-tidy')
+        with open(clang_tidy, 'w') as script:
+            script.write("#!/bin/sh\n"
+                         "cat {0}\n".format(os.path.join(TIDY_DIR,
+                                                         'tidy1.out')))
+        os.chmod(clang_tidy, stat.S_IRWXU)
+
+        config_handler = ClangTidyConfigHandler()
+        config_handler.analyzer_binary = clang_tidy
+        config_map = {analyzer_types.CLANG_TIDY: config_handler}
+
+        action = BuildAction()
+        action.original_command = 'g++ -c files/test.cpp'
+        action.directory = TIDY_DIR
+        action.analyzer_type = analyzer_types.CLANG_TIDY
+        action.lang = 'c++'
+        action.sources = os.path.join(TIDY_DIR, 'files', 'test.cpp')
+
+        warm_pool = analysis_manager.WarmPool(1)
+        try:
+            for output in ['reports1', 'reports2']:
+                output_dir = os.path.join(self.tmp_dir, output)
+                results = []
+                analysis_manager.start_workers(
+                    {}, [action], FakeContext(), config_map, 1, output_dir,
+                    None, {}, True, False, None, False, None,
+                    warm_pool=warm_pool,
+                    result_callback=lambda a, r: results.append(r))
+
+                self.assertEqual(1, len(results))
+                self.assertEqual(0, results[0][0])
+                self.assertTrue(results[0][4].startswith(output_dir))
+                self.assertTrue(os.path.exists(results[0][4]))
+        finally:
+            warm_pool.close()
@@ -0,0 +1,120 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the performance profile of the analyses. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import sys
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from libcodechecker.analyze import analysis_profile
+from libcodechecker.analyze.analyzers.analyzer_base import SourceAnalyzer
+
+PLIST_DIR = os.path.join(os.path.dirname(__file__), 'plist_test_files')
+
+
+class FakeResultHandler(object):
+    """ Result handler holding only the resource usage of the analyzer. """
+
+    def __init__(self, usage):
+        self.analyzer_resource_usage = usage
+
+
+def entry(source, wall_time, peak_rss, analyzer='clangsa'):
+    """ Create a finished profile entry. """
+    result = analysis_profile.new_entry(analyzer, source)
+    result.update({'wall_time': wall_time,
+                   'cpu_time': wall_time,
+                   'peak_rss': peak_rss,
+                   'reports': 1,
+                   'result_file': source + '.plist',
+                   'successful': True})
+    return result
+
+
+class AnalysisProfileTest(unittest.TestCase):
+    """
+    Test the measurement and the report of the analysis profile.
+    """
+
+    def test_resource_usage_of_process(self):
+        """ The resource usage of the finished process is returned. """
+        cmd = sys.executable + " -c 'x = bytearray(64 * 1024 * 1024)'"
+        ret, _, _, usage = SourceAnalyzer.run_proc_with_usage(cmd)
+        self.assertEqual(0, ret)
+
+        profile = analysis_profile.new_entry('clangsa', 'main.cpp')
+        analysis_profile.add_run(profile, FakeResultHandler(usage), 0.5)
+        analysis_profile.add_run(profile, FakeResultHandler(None), 0.25)
+
+        self.assertEqual(0.75, profile['wall_time'])
+        self.assertGreater(profile['cpu_time'], 0)
+        self.assertGreater(profile['peak_rss'], 64 * 1024 * 1024)
+
+    def test_signal_return_code(self):
+        """ A process killed by a signal has a negative return code. """
+        cmd = sys.executable + \
+            " -c 'import os, signal; os.kill(os.getpid(), signal.SIGKILL)'"
+        ret, _, _ = SourceAnalyzer.run_proc(cmd)
+        self.assertEqual(-9, ret)
+
+    def test_result_file(self):
+        """ The reports of the result file are counted. """
+        profile = analysis_profile.new_entry('clangsa', 'main.cpp')
+        result_file = os.path.join(PLIST_DIR, 'clang-4.0.plist')
+        analysis_profile.finish_entry(profile, result_file, True)
+
+        self.assertEqual('clang-4.0.plist', profile['result_file'])
+        self.assertEqual(3, profile['reports'])
+        self.assertEqual(os.path.getsize(result_file), profile['plist_size'])
+
+        failed = analysis_profile.new_entry('clangsa', 'main.cpp')
+        analysis_profile.finish_entry(failed, result_file, False)
+        self.assertEqual(0, failed['reports'])
+        self.assertFalse(failed['successful'])
+
+    def test_report(self):
+        """ The slowest and the biggest analyses come first. """
+        metadata = {'checkers': {'clangsa': ['core.DivideZero',
+                                             'core.NullDereference'],
+                                 'clang-tidy': ['misc-unused']},
+                    'analysis_profile': {}}
+        for profile in [entry('fast.cpp', 1.0, 9000),
+                        entry('slow.cpp', 100.0, 10),
+                        entry('tidy.cpp', 5.0, 20, 'clang-tidy')]:
+            metadata['analysis_profile'][profile['result_file']] = profile
+
+        costs = analysis_profile.get_checker_set_costs(metadata)
+        self.assertEqual(2, costs['clangsa']['analyses'])
+        self.assertEqual(2, costs['clangsa']['checkers'])
+        self.assertEqual(101.0, costs['clangsa']['wall_time'])
+        self.assertEqual(9000, costs['clangsa']['peak_rss'])
+        self.assertEqual(1, costs['clang-tidy']['checkers'])
+
+        output = StringIO()
+        analysis_profile.print_profile_report(metadata, 1, output)
+        report = output.getvalue()
+
+        slowest, hungriest, costs = report.split('----====')[1:]
+        self.assertIn('slow.cpp', slowest)
+        self.assertNotIn('fast.cpp', slowest)
+        self.assertIn('fast.cpp', hungriest)
+        self.assertNotIn('slow.cpp', hungriest)
+        self.assertIn('clang-tidy', costs)
+
+    def test_empty_report(self):
+        """ Metadata of earlier versions has no profile. """
+        output = StringIO()
+        analysis_profile.print_profile_report({}, output=output)
+        self.assertIn('No analysis profile', output.getvalue())
@@ -0,0 +1,79 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the history based ordering of the build actions. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analysis_scheduler
+from libcodechecker.log.build_action import BuildAction
+
+
+class AnalysisSchedulerTest(unittest.TestCase):
+    """
+    Test the longest job first ordering and the makespan prediction.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        self.actions = []
+        for name, size in [('small.c', 10), ('big.c', 1000),
+                           ('medium.c', 100)]:
+            with open(os.path.join(self.tmp_dir, name), 'w') as f:
+                f.write('x' * size)
+
+            action = BuildAction()
+            action.original_command = 'gcc -c ' + name
+            action.directory = self.tmp_dir
+            action.analyzer_type = 'clangsa'
+            action.sources = name
+            self.actions.append(action)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_predict_makespan(self):
+        """ Jobs are assigned to the earliest free worker. """
+        self.assertEqual(0, analysis_scheduler.predict_makespan([], 4))
+        self.assertEqual(6, analysis_scheduler.predict_makespan([1, 2, 3],
+                                                                1))
+        self.assertEqual(5, analysis_scheduler.predict_makespan([5, 3, 2],
+                                                                2))
+        self.assertEqual(7, analysis_scheduler.predict_makespan([2, 2, 5],
+                                                                2))
+
+    def test_order_without_history(self):
+        """ Without history the biggest sources are started first. """
+        history = analysis_scheduler.AnalysisHistory(self.tmp_dir)
+        ordered, predicted = history.order_longest_first(self.actions, 2)
+
+        self.assertEqual(['big.c', 'medium.c', 'small.c'],
+                         [next(a.sources) for a in ordered])
+        self.assertIsNone(predicted)
+
+    def test_order_with_history(self):
+        """ Recorded durations override the source size estimation. """
+        history = analysis_scheduler.AnalysisHistory(self.tmp_dir)
+        small, big, medium = self.actions
+        history.record(small, 30.0)
+        history.record(big, 10.0)
+        history.save()
+
+        history = analysis_scheduler.AnalysisHistory(self.tmp_dir)
+        ordered, predicted = history.order_longest_first(self.actions, 1)
+
+        # The unseen medium.c is estimated from the average speed of the
+        # recorded analyses: 40 seconds for 1010 bytes.
+        self.assertEqual(['small.c', 'big.c', 'medium.c'],
+                         [next(a.sources) for a in ordered])
+        self.assertAlmostEqual(40.0 + 100 * 40.0 / 1010, predicted)
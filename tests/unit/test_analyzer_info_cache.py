@@ -0,0 +1,132 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the persistent cache of the analyzer queries. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analyzer_info_cache
+from libcodechecker.analyze import host_check
+
+
+class AnalyzerInfoCacheTest(unittest.TestCase):
+    """
+    Test that the analyzers are only queried again if they change.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmp_dir, 'cache', 'cache.json')
+        self.run_log = os.path.join(self.tmp_dir, 'runs.txt')
+
+        self.original_env = os.environ.get(
+            analyzer_info_cache.CACHE_FILE_ENV_VAR)
+        os.environ[analyzer_info_cache.CACHE_FILE_ENV_VAR] = self.cache_file
+
+    def tearDown(self):
+        if self.original_env is None:
+            del os.environ[analyzer_info_cache.CACHE_FILE_ENV_VAR]
+        else:
+            os.environ[analyzer_info_cache.CACHE_FILE_ENV_VAR] = \
+                self.original_env
+        shutil.rmtree(self.tmp_dir)
+
+    def __create_analyzer(self, version, exit_code=0):
+        """ Create a fake analyzer which prints its version. """
+        analyzer = os.path.join(self.tmp_dir, 'clang')
+        with open(analyzer, 'w') as script:
+            script.write("#!/bin/sh\n"
+                         "echo \"$@\" >> {0}\n"
+                         "echo 'clang version {1}'\n"
+                         "exit {2}\n"
+                         .format(self.run_log, version, exit_code))
+        os.chmod(analyzer, stat.S_IRWXU)
+        return analyzer
+
+    def __run_count(self):
+        if not os.path.exists(self.run_log):
+            return 0
+        with open(self.run_log) as run_log:
+            return len(run_log.readlines())
+
+    def test_cached_output(self):
+        """ The output of an unchanged analyzer is taken from the cache. """
+        analyzer = self.__create_analyzer('6.0.0')
+        for _ in range(3):
+            self.assertEqual('clang version 6.0.0\n',
+                             analyzer_info_cache.check_output(
+                                 [analyzer, '--version']))
+        self.assertEqual(1, self.__run_count())
+
+        # Other arguments are another query.
+        analyzer_info_cache.check_output([analyzer, '-cc1', '--version'])
+        self.assertEqual(2, self.__run_count())
+
+        self.assertTrue(host_check.check_clang(analyzer, None))
+        self.assertTrue(host_check.check_clang(analyzer, None))
+        self.assertEqual(3, self.__run_count())
+
+    def test_changed_analyzer(self):
+        """ A changed analyzer binary or plugin is queried again. """
+        analyzer = self.__create_analyzer('6.0.0')
+        plugin = os.path.join(self.tmp_dir, 'plugin.so')
+        with open(plugin, 'w') as plugin_file:
+            plugin_file.write('v1')
+
+        analyzer_info_cache.check_output([analyzer, '-cc1'], files=[plugin])
+
+        with open(plugin, 'w') as plugin_file:
+            plugin_file.write('v2 of the plugin')
+        analyzer_info_cache.check_output([analyzer, '-cc1'], files=[plugin])
+        self.assertEqual(2, self.__run_count())
+
+        self.__create_analyzer('7.0.0-rc1')
+        self.assertEqual('clang version 7.0.0-rc1\n',
+                         analyzer_info_cache.check_output(
+                             [analyzer, '-cc1'], files=[plugin]))
+        self.assertEqual(3, self.__run_count())
+
+    def test_failure_not_cached(self):
+        """ A failing analyzer is run again. """
+        analyzer = self.__create_analyzer('6.0.0', 1)
+        for _ in range(2):
+            self.assertRaises(subprocess.CalledProcessError,
+                              analyzer_info_cache.check_output,
+                              [analyzer, '--version'])
+            self.assertFalse(host_check.check_clang(analyzer, None))
+        self.assertEqual(4, self.__run_count())
+
+    def test_concurrent_writers(self):
+        """
+        The entries written by another process since the cache file was read
+        are kept.
+        """
+        first = analyzer_info_cache.AnalyzerInfoCache(self.cache_file)
+        second = analyzer_info_cache.AnalyzerInfoCache(self.cache_file)
+
+        first.set('a', 1)
+        second.set('b', 2)
+        first.set('c', 3)
+
+        merged = analyzer_info_cache.AnalyzerInfoCache(self.cache_file)
+        self.assertEqual([1, 2, 3], [merged.get(k) for k in 'abc'])
+
+    def test_turned_off(self):
+        """ The cache is turned off by an empty cache file name. """
+        os.environ[analyzer_info_cache.CACHE_FILE_ENV_VAR] = ''
+        analyzer = self.__create_analyzer('6.0.0')
+        for _ in range(2):
+            analyzer_info_cache.check_output([analyzer, '--version'])
+        self.assertEqual(2, self.__run_count())
+        self.assertFalse(os.path.exists(self.cache_file))
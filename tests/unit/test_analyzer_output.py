@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the spooling of the analyzer output. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze.analyzers import analyzer_base
+from libcodechecker.analyze.analyzers import result_handler_base
+from libcodechecker.analyze.analyzers.result_handler_clang_tidy import \
+    ClangTidyPlistToFile
+from libcodechecker.log.build_action import BuildAction
+
+
+class AnalyzerOutputTest(unittest.TestCase):
+    """
+    Test that the analyzer output is only loaded when it is needed, and only
+    its end is loaded to report a failure.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        action = BuildAction()
+        action.directory = self.tmp_dir
+        self.rh = ClangTidyPlistToFile(action, self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __run(self, command):
+        stdout = tempfile.TemporaryFile()
+        stderr = tempfile.TemporaryFile()
+        ret_code, _ = analyzer_base.SourceAnalyzer.run_proc_to_files(
+            command, stdout, stderr, cwd=self.tmp_dir)
+        self.rh.set_analyzer_output(stdout, stderr)
+        return ret_code
+
+    def test_spooled_output(self):
+        """ The output is read from the spool files. """
+        self.assertEqual(3, self.__run(
+            "sh -c 'echo first; echo second; echo error >&2; exit 3'"))
+
+        self.assertEqual(['first', 'second'],
+                         list(self.rh.iter_analyzer_stdout_lines()))
+        self.assertEqual('first\nsecond\n', self.rh.analyzer_stdout)
+        self.assertEqual('error\n', self.rh.analyzer_stderr_tail)
+
+        stdout_file = os.path.join(self.tmp_dir, 'stdout.txt')
+        stderr_file = os.path.join(self.tmp_dir, 'stderr.txt')
+        self.rh.analyzer_stderr = ''
+        self.rh.save_analyzer_output(stdout_file, stderr_file)
+        with open(stdout_file) as stdout:
+            self.assertEqual('first\nsecond\n', stdout.read())
+        self.assertFalse(os.path.exists(stderr_file))
+
+    def test_output_tail(self):
+        """ Only the end of a long output is loaded to report a failure. """
+        size = result_handler_base.OUTPUT_TAIL_SIZE
+        self.__run("sh -c 'head -c {0} /dev/zero | tr \"\\\\0\" x; "
+                   "echo end >&2'".format(size * 2))
+
+        tail = self.rh.analyzer_stdout_tail
+        self.assertTrue(tail.startswith(
+            ">>> CodeChecker: {0} bytes of the output were dropped. <<<\n"
+            .format(size)))
+        self.assertTrue(tail.endswith('x' * size))
+        self.assertEqual(size * 2, len(self.rh.analyzer_stdout))
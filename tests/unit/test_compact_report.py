@@ -0,0 +1,152 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the compact format of the analysis result files. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import plistlib
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import compact_report
+from libcodechecker.analyze import plist_parser
+from libcodechecker.analyze import tidy_output_converter
+from libcodechecker.analyze.analyzers.result_handler_base import \
+    ResultHandler
+from libcodechecker.analyze.analyzers.result_handler_clang_tidy import \
+    generate_plist_from_tidy_result
+from libcodechecker.analyze.skiplist_handler import SkipListHandler
+from libcodechecker.log.build_action import BuildAction
+
+THIS_DIR = os.path.dirname(__file__)
+PLIST_DIR = os.path.join(THIS_DIR, 'plist_test_files')
+TIDY_DIR = os.path.join(THIS_DIR, 'tidy_output_test_files')
+
+PLIST_FILES = ['clang-3.7-noerror.plist', 'clang-3.8-trunk.plist',
+               'clang-4.0.plist', 'clang-5.0-trunk.plist']
+
+
+class CompactReportTest(unittest.TestCase):
+    """
+    The compact result files hold the same reports as the plist files.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __compact_copy(self, plist_file):
+        compact_file = os.path.join(self.tmp_dir, plist_file)
+        compact_report.convert_plist_to_compact(
+            os.path.join(PLIST_DIR, plist_file), compact_file)
+        return compact_file
+
+    def test_parse(self):
+        """ The compact files are parsed to the same reports. """
+        for plist_file in PLIST_FILES:
+            compact_file = self.__compact_copy(plist_file)
+            self.assertTrue(compact_report.is_compact_file(compact_file))
+
+            plist_files, plist_reports = plist_parser.parse_plist(
+                os.path.join(PLIST_DIR, plist_file),
+                allow_plist_update=False)
+            files, reports = plist_parser.parse_plist(compact_file)
+
+            self.assertEqual(plist_files, files)
+            self.assertEqual(len(plist_reports), len(reports))
+            for plist_report, report in zip(plist_reports, reports):
+                self.assertEqual(plist_report.main, report.main)
+                self.assertEqual(plist_report.bug_path, report.bug_path)
+
+    def test_convert_back(self):
+        """ The plist converted to compact and back has the same data. """
+        for plist_file in PLIST_FILES:
+            compact_file = self.__compact_copy(plist_file)
+            compact_report.convert_compact_to_plist(compact_file)
+            self.assertFalse(compact_report.is_compact_file(compact_file))
+
+            self.assertEqual(
+                plistlib.readPlist(os.path.join(PLIST_DIR, plist_file)),
+                plistlib.readPlist(compact_file))
+
+    def test_report_hash_update(self):
+        """ The generated report hashes are written in the compact format. """
+        compact_file = self.__compact_copy('clang-3.7.plist')
+        _, reports = plist_parser.parse_plist(compact_file)
+
+        report_data = compact_report.load(compact_file)
+        self.assertEqual(
+            [r.main['issue_hash_content_of_line_in_context']
+             for r in reports],
+            [d['issue_hash_content_of_line_in_context']
+             for d in report_data['diagnostics']])
+
+    def test_count_and_skip(self):
+        """ The reports of the compact content are counted and skipped. """
+        with open(self.__compact_copy('clang-4.0.plist')) as compact:
+            content = compact.read()
+
+        self.assertEqual(3, plist_parser.count_plist_reports(content))
+
+        keep_all = SkipListHandler("-/other/*")
+        self.assertIs(content,
+                      plist_parser.remove_report_from_plist(content,
+                                                            keep_all))
+
+        skip_header = SkipListHandler("-*.h")
+        report_data = compact_report.loads(
+            plist_parser.remove_report_from_plist(content, skip_header))
+        self.assertEqual(['test.cpp', './test.h'], report_data['files'])
+        self.assertEqual([0, 0], [d['location']['file']
+                                  for d in report_data['diagnostics']])
+
+    def test_tidy_output(self):
+        """ The clang-tidy output is converted to the compact format. """
+        with open(os.path.join(TIDY_DIR, 'tidy3.out')) as tidy_out:
+            tidy_stdout = tidy_out.read()
+
+        plist_file = os.path.join(self.tmp_dir, 'tidy.plist')
+        compact_file = os.path.join(self.tmp_dir, 'tidy_compact.plist')
+        generate_plist_from_tidy_result(
+            plist_file, tidy_output_converter.iter_lines(tidy_stdout))
+        generate_plist_from_tidy_result(
+            compact_file, tidy_output_converter.iter_lines(tidy_stdout),
+            compact=True)
+
+        self.assertEqual(plistlib.readPlist(plist_file),
+                         plist_parser.read_report_data(compact_file))
+
+    def test_result_file(self):
+        """
+        The result file is converted at its final place, the analyzer writes
+        it with the unescaped name of the source file.
+        """
+        action = BuildAction()
+        action.analyzer_type = 'clangsa'
+        action.original_command = 'clang -c my\\ file.cpp'
+        rh = ResultHandler(action, self.tmp_dir)
+        rh.analyzed_source_file = os.path.join(self.tmp_dir, r'my\ file.cpp')
+        rh.report_format = 'compact'
+
+        result_file = rh.analyzer_result_file.replace(r'\ ', ' ')
+        shutil.copy(os.path.join(PLIST_DIR, 'clang-4.0.plist'), result_file)
+
+        analysis_manager.handle_success(rh, result_file, 'my_file', False,
+                                        self.tmp_dir)
+        self.assertTrue(compact_report.is_compact_file(result_file))
+
+    def test_not_compact(self):
+        """ Other content is not read as compact report. """
+        self.assertRaises(ValueError, compact_report.loads, '<plist/>\n')
+        self.assertRaises(ValueError, compact_report.loads,
+                          compact_report.FORMAT_HEADER + '\n["x", 1]\n')
@@ -0,0 +1,101 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the persistent cache of the compiler queries. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from libcodechecker.analyze import compiler_info_cache
+from libcodechecker.analyze import log_parser
+from libcodechecker.libhandlers.analyze import ParseLogOptions
+
+
+class CompilerInfoCacheTest(unittest.TestCase):
+    """
+    Test that the compilers are only queried again if they change.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.options = ParseLogOptions()
+        self.options.compiler_info_cache = os.path.join(self.tmp_dir,
+                                                        'cache.json')
+        self.run_log = os.path.join(self.tmp_dir, 'runs.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __create_compiler(self, name, target):
+        """ Create a fake compiler which prints its target. """
+        compiler = os.path.join(self.tmp_dir, name)
+        with open(compiler, 'w') as script:
+            script.write("#!/bin/sh\n"
+                         "echo \"$0\" >> {1}\n"
+                         "echo 'Target: {0}' >&2\n"
+                         "echo '#include <...> search starts here:' >&2\n"
+                         "echo ' /opt/{0}/include' >&2\n"
+                         "echo 'End of search list.' >&2\n"
+                         .format(target, self.run_log))
+        os.chmod(compiler, stat.S_IRWXU)
+        return compiler
+
+    def __run_count(self):
+        with open(self.run_log) as run_log:
+            return len(run_log.readlines())
+
+    def __query(self, compilers):
+        queries = dict((compiler, ('c', [], [])) for compiler in compilers)
+        return log_parser.query_compilers(self.options, queries)
+
+    def test_query_compilers(self):
+        """ Every compiler is queried, and the results are cached. """
+        arm = self.__create_compiler('arm-gcc', 'arm-none-eabi')
+        x86 = self.__create_compiler('x86-gcc', 'x86_64-linux-gnu')
+
+        self.assertEqual({arm: (['-isystem /opt/arm-none-eabi/include'],
+                                'arm-none-eabi'),
+                          x86: (['-isystem /opt/x86_64-linux-gnu/include'],
+                                'x86_64-linux-gnu')},
+                         self.__query([arm, x86]))
+
+        # The same binaries are not executed again.
+        self.assertEqual(4, self.__run_count())
+        self.assertEqual('x86_64-linux-gnu', self.__query([arm, x86])[x86][1])
+        self.assertEqual(4, self.__run_count())
+
+    def test_changed_compiler(self):
+        """ A changed compiler binary is queried again. """
+        compiler = self.__create_compiler('gcc', 'x86_64-linux-gnu')
+        self.assertEqual('x86_64-linux-gnu',
+                         self.__query([compiler])[compiler][1])
+
+        self.__create_compiler('gcc', 'aarch64-linux-gnu')
+        self.assertEqual('aarch64-linux-gnu',
+                         self.__query([compiler])[compiler][1])
+
+    def test_concurrent_writers(self):
+        """
+        The entries saved by another process since the cache file was read
+        are kept.
+        """
+        cache_file = self.options.compiler_info_cache
+        first = compiler_info_cache.CompilerInfoCache(cache_file)
+        second = compiler_info_cache.CompilerInfoCache(cache_file)
+
+        first.set('a', 1)
+        second.set('b', 2)
+        first.save()
+        second.save()
+
+        merged = compiler_info_cache.CompilerInfoCache(cache_file)
+        self.assertEqual([1, 2], [merged.get(k) for k in 'ab'])
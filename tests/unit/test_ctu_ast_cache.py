@@ -0,0 +1,80 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the cache of the CTU collect phase. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from libcodechecker.analyze import ctu_ast_cache
+
+
+class CtuAstCacheTest(unittest.TestCase):
+    """
+    Test storing, restoring and evicting the cached ASTs.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'ctu-cache')
+        self.ctu_dir = os.path.join(self.tmp_dir, 'ctu-dir')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __create_ast(self, name, size=1000):
+        ast_path = os.path.join(self.ctu_dir, 'x86_64', 'ast', name + '.ast')
+        os.makedirs(os.path.dirname(ast_path))
+        with open(ast_path, 'w') as ast:
+            ast.write(name * size)
+        return ast_path
+
+    def test_store_and_restore(self):
+        """ The cached AST survives the removal of the CTU directory. """
+        cache = ctu_ast_cache.CtuAstCache(self.cache_dir, 'clang 6.0')
+
+        self.assertIsNone(cache.restore('abcdef', '/nonexistent'))
+
+        ast_path = self.__create_ast('a')
+        cache.store('abcdef', ast_path, ['c:@F@f ast/a.ast'])
+        shutil.rmtree(self.ctu_dir)
+
+        self.assertEqual(['c:@F@f ast/a.ast'],
+                         cache.restore('abcdef', ast_path))
+        with open(ast_path) as ast:
+            self.assertEqual('a' * 1000, ast.read())
+
+    def test_evict_least_recently_used(self):
+        """ The entries which were not used for the longest time go. """
+        cache = ctu_ast_cache.CtuAstCache(self.cache_dir, 'clang 6.0',
+                                          2500 / (1024 * 1024))
+
+        for key in ['aa', 'bb', 'cc']:
+            cache.store(key, self.__create_ast(key[0]), [])
+            shutil.rmtree(self.ctu_dir)
+
+        # Make 'aa' the most recently used entry.
+        old = time.time() - 100
+        for idx, key in enumerate(['bb', 'cc']):
+            os.utime(os.path.join(self.cache_dir, key[:2], key),
+                     (old + idx, old + idx))
+        self.assertIsNotNone(cache.restore('aa', os.path.join(self.ctu_dir,
+                                                              'a.ast')))
+
+        cache.evict()
+
+        self.assertIsNotNone(cache.restore('aa', os.path.join(self.ctu_dir,
+                                                              'a.ast')))
+        self.assertIsNone(cache.restore('bb', os.path.join(self.ctu_dir,
+                                                           'b.ast')))
+        self.assertIsNotNone(cache.restore('cc', os.path.join(self.ctu_dir,
+                                                              'c.ast')))
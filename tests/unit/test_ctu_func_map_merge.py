@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the merge of the CTU function maps. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze import ctu_manager
+
+
+FUNC_MAPS = {
+    'x86_64': [['c:@F@main /ast/main.c.ast',
+                'c:@F@inline /ast/header.h.ast',
+                'c:@F@conflict /ast/main.c.ast'],
+               ['c:@F@inline /ast/header.h.ast',
+                'c:@F@conflict /ast/lib.c.ast',
+                'c:@F@lib /ast/lib.c.ast',
+                'c:@F@lib_helper /ast/lib.c.ast']],
+    'armv7': [['c:@F@main /ast/arm/main.c.ast']]}
+
+
+class CtuFuncMapMergeTest(unittest.TestCase):
+    """
+    Test that conflicting function names are left out of the global map.
+    """
+
+    def setUp(self):
+        self.ctu_dir = tempfile.mkdtemp()
+        for arch, func_maps in FUNC_MAPS.items():
+            fnmap_dir = os.path.join(self.ctu_dir, arch, 'tmpExternalFnMaps')
+            os.makedirs(fnmap_dir)
+            for idx, lines in enumerate(func_maps):
+                with open(os.path.join(fnmap_dir, str(idx)), 'w') as fnmap:
+                    fnmap.write('\n'.join(lines) + '\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.ctu_dir)
+
+    def __read_global_map(self, arch):
+        with open(os.path.join(self.ctu_dir, arch,
+                               'externalFnMap.txt')) as global_map:
+            return global_map.read().splitlines()
+
+    def test_external_sort(self):
+        """ The sorted chunks are merged into a sorted sequence. """
+        lines = ['c:@F@b /b.ast', 'c:@F@a /a.ast', 'c:@F@c /c.ast',
+                 'c:@F@a /a.ast', 'c:@F@ab /ab.ast']
+        sorted_lines = ctu_manager.sort_func_map_lines(
+            iter(lines), self.ctu_dir, chunk_size=2)
+
+        self.assertEqual(sorted(line + '\n' for line in lines),
+                         list(sorted_lines))
+
+        # The temporary chunks are removed.
+        self.assertEqual(sorted(FUNC_MAPS.keys()),
+                         sorted(os.listdir(self.ctu_dir)))
+
+    def test_merge_func_maps(self):
+        """ Every triple arch has its own global map. """
+        ctu_manager.merge_ctu_func_maps(self.ctu_dir, 'externalFnMap.txt',
+                                        'tmpExternalFnMaps', jobs=2)
+
+        self.assertEqual(['c:@F@inline /ast/header.h.ast',
+                          'c:@F@lib /ast/lib.c.ast',
+                          'c:@F@lib_helper /ast/lib.c.ast',
+                          'c:@F@main /ast/main.c.ast'],
+                         self.__read_global_map('x86_64'))
+        self.assertEqual(['c:@F@main /ast/arm/main.c.ast'],
+                         self.__read_global_map('armv7'))
+
+        self.assertEqual(['externalFnMap.txt'],
+                         os.listdir(os.path.join(self.ctu_dir, 'x86_64')))
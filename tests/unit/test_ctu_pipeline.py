@@ -0,0 +1,79 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the incremental function map of the pipelined CTU analysis. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze import ctu_pipeline
+
+
+class IncrementalFuncMapTest(unittest.TestCase):
+    """
+    Test the partial function maps and the tracking of their changes.
+    """
+
+    def setUp(self):
+        self.ctu_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.ctu_dir, 'x86_64'))
+
+    def tearDown(self):
+        shutil.rmtree(self.ctu_dir)
+
+    def __read_map(self):
+        with open(os.path.join(self.ctu_dir, 'x86_64',
+                               'externalFnMap.txt')) as func_map:
+            return sorted(func_map.read().splitlines())
+
+    def test_conflicts_and_changes(self):
+        """ Conflicting names are removed from the published map. """
+        func_map = ctu_pipeline.IncrementalFuncMap(self.ctu_dir,
+                                                   'externalFnMap.txt')
+
+        func_map.add('x86_64', ['c:@F@main ast/main.c.ast',
+                                'c:@F@inline ast/main.c.ast'])
+        first = func_map.publish(True)
+        self.assertEqual(['c:@F@inline ast/main.c.ast',
+                          'c:@F@main ast/main.c.ast'], self.__read_map())
+
+        func_map.add('x86_64', ['c:@F@lib ast/lib.c.ast',
+                                'c:@F@inline ast/lib.c.ast'])
+        func_map.add('x86_64', ['c:@F@inline ast/other.c.ast'])
+        second = func_map.publish(True)
+
+        self.assertEqual(['c:@F@lib ast/lib.c.ast',
+                          'c:@F@main ast/main.c.ast'], self.__read_map())
+        self.assertEqual(['c:@F@inline', 'c:@F@lib'],
+                         sorted(func_map.changed_since(first)))
+        self.assertEqual([], func_map.changed_since(second))
+
+        # Nothing changed, so there is no new version.
+        self.assertEqual(second, func_map.publish(True))
+
+    def test_refers_to_changed_function(self):
+        """ The AST is searched for the names of the changed functions. """
+        ast_path = os.path.join(self.ctu_dir, 'main.c.ast')
+        with open(ast_path, 'wb') as ast:
+            ast.write(b'\x00main\x00lib_function\x00')
+
+        self.assertEqual('lib_function',
+                         ctu_pipeline.get_identifier('c:@F@lib_function#I#'))
+        self.assertTrue(ctu_pipeline.refers_to_any(
+            ast_path, ['c:@N@ns@F@lib_function#']))
+        self.assertFalse(ctu_pipeline.refers_to_any(
+            ast_path, ['c:@F@unrelated']))
+        self.assertFalse(ctu_pipeline.refers_to_any(ast_path, []))
+
+        # Names which can not be searched for are considered referred.
+        self.assertTrue(ctu_pipeline.refers_to_any(ast_path, ['_Z3fooi']))
+        self.assertTrue(ctu_pipeline.refers_to_any('/nonexistent',
+                                                   ['c:@F@main']))
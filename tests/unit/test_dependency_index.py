@@ -0,0 +1,140 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the reverse dependency index of the analyzed source files. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import dependency_index
+from libcodechecker.log.build_action import BuildAction
+
+
+def create_action(directory, source):
+    action = BuildAction()
+    action.original_command = 'g++ -c ' + source
+    action.directory = directory
+    action.sources = source
+    return action
+
+
+class DependencyIndexTest(unittest.TestCase):
+    """
+    Test the update of the index and the selection of the build actions
+    affected by the changed files.
+    """
+
+    def setUp(self):
+        self.tmp_dir = os.path.realpath(tempfile.mkdtemp())
+        self.main = os.path.join(self.tmp_dir, 'main.cpp')
+        self.util = os.path.join(self.tmp_dir, 'util.cpp')
+        self.header = os.path.join(self.tmp_dir, 'util.h')
+
+        with open(self.header, 'w') as header:
+            header.write("int util();\n")
+        for source in [self.main, self.util]:
+            with open(source, 'w') as src:
+                src.write('#include "util.h"\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_update_and_save(self):
+        """ The reverse dependencies are kept up-to-date and persisted. """
+        index = dependency_index.DependencyIndex(self.tmp_dir)
+        self.assertEqual(0, len(index))
+        self.assertFalse(index.exists)
+
+        # The empty index is created to be filled by the next analyses.
+        index.create()
+        self.assertTrue(
+            dependency_index.DependencyIndex(self.tmp_dir).exists)
+
+        index.update(self.main, [self.main, self.header])
+        index.update(self.util, [self.header])
+        index.save()
+
+        index = dependency_index.DependencyIndex(self.tmp_dir)
+        self.assertEqual(2, len(index))
+        self.assertEqual(set([self.main, self.util]),
+                         index.get_dependents(self.header))
+        self.assertEqual(set([self.util]), index.get_dependents(self.util))
+
+        # main.cpp does not include the header anymore.
+        index.update(self.main, [self.main])
+        self.assertEqual(set([self.util]), index.get_dependents(self.header))
+        self.assertEqual(set(), index.get_dependents('/no/such/file.h'))
+
+    def test_select_affected_actions(self):
+        """
+        The build actions which depend on a changed file or which are not in
+        the index are selected.
+        """
+        other = os.path.join(self.tmp_dir, 'other.cpp')
+        actions = [create_action(self.tmp_dir, 'main.cpp'),
+                   create_action(self.tmp_dir, 'util.cpp'),
+                   create_action(self.tmp_dir, 'other.cpp')]
+
+        index = dependency_index.DependencyIndex(self.tmp_dir)
+        index.update(self.main, [self.main, self.header])
+        index.update(self.util, [self.util])
+
+        def selected(changed_files):
+            return [next(action.sources) for action in
+                    dependency_index.select_affected_actions(
+                        actions, index, set(changed_files))]
+
+        # other.cpp was never analyzed.
+        self.assertEqual(['main.cpp', 'other.cpp'], selected([self.header]))
+        self.assertEqual(['util.cpp', 'other.cpp'], selected([self.util]))
+
+        index.update(other, [other])
+        self.assertEqual([], selected(['/no/such/file.h']))
+
+    def test_collect_dependencies(self):
+        """ The dependencies of a build action are taken from the compiler. """
+        action = create_action(self.tmp_dir, 'main.cpp')
+        dependencies = analysis_manager.get_action_dependencies(action)
+        self.assertEqual([self.main], dependencies.keys())
+        self.assertTrue(set([self.main, self.header]) <=
+                        set(dependencies[self.main]))
+
+        action.original_command = 'g++ -c no_such_file.cpp'
+        self.assertIsNone(analysis_manager.get_action_dependencies(action))
+
+    def test_git_diff(self):
+        """ The changed files are taken from git. """
+        def git(*args):
+            with open(os.devnull, 'w') as devnull:
+                subprocess.check_call(['git', '-c', 'user.name=test',
+                                       '-c', 'user.email=test@test'] +
+                                      list(args), cwd=self.tmp_dir,
+                                      stdout=devnull, stderr=devnull)
+
+        git('init')
+        git('add', 'main.cpp', 'util.cpp', 'util.h')
+        git('commit', '-m', 'Initial commit.')
+
+        with open(self.header, 'a') as header:
+            header.write("int other();\n")
+
+        cwd = os.getcwd()
+        try:
+            os.chdir(self.tmp_dir)
+            self.assertEqual(set([self.header]),
+                             dependency_index.get_changed_files(['git-diff']))
+            self.assertEqual(set([self.header, self.main]),
+                             dependency_index.get_changed_files(
+                                 ['git-diff:HEAD', 'main.cpp']))
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,156 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the background creation of the failure zips. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import failure_lib
+
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.log.build_action import BuildAction
+
+
+class FailureArchiverTest(unittest.TestCase):
+    """
+    Test that the failure zips share the source store and that their number
+    and the size of the store are limited.
+    """
+
+    def setUp(self):
+        self.tmp_dir = os.path.realpath(tempfile.mkdtemp())
+        self.output_dir = os.path.join(self.tmp_dir, 'reports')
+        self.failed_dir = os.path.join(self.output_dir, 'failed')
+        os.makedirs(self.failed_dir)
+
+        with open(os.path.join(self.tmp_dir, 'util.h'), 'w') as header:
+            header.write("int util();\n")
+
+        self.actions = [self.__action(source)
+                        for source in ['main.cpp', 'util.cpp']]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __action(self, source):
+        with open(os.path.join(self.tmp_dir, source), 'w') as src:
+            src.write('// ' + source + '\n#include "util.h"\n')
+
+        action = BuildAction()
+        action.original_command = 'g++ -c ' + source
+        action.directory = self.tmp_dir
+        action.lang = 'c++'
+        action.sources = source
+        return action
+
+    def __archive(self, actions=None, **limits):
+        archiver = analysis_manager.FailureArchiver(self.output_dir, {},
+                                                    **limits)
+        for action in actions or self.actions:
+            source = next(action.sources)
+            archiver.add(action, {
+                'zip_file': os.path.join(self.failed_dir, source + '.zip'),
+                'mentioned_files': [],
+                'stdout': '',
+                'stderr': 'error in ' + source,
+                'analyzer_cmd': ['clang', '--analyze', source],
+                'return_code': 1})
+        archiver.finish()
+        return archiver
+
+    def __read_zip(self, name):
+        with zipfile.ZipFile(os.path.join(self.failed_dir, name)) as archive:
+            return archive.namelist(), \
+                json.loads(archive.read('sources.json')), \
+                archive.read('stderr')
+
+    def test_shared_source_store(self):
+        """ The header of both failures is stored once. """
+        archiver = self.__archive()
+        self.assertEqual(2, archiver.archived_num)
+
+        _, main_sources, stderr = self.__read_zip('main.cpp.zip')
+        _, util_sources, _ = self.__read_zip('util.cpp.zip')
+        self.assertEqual('error in main.cpp', stderr)
+
+        header = os.path.join(self.tmp_dir, 'util.h')
+        self.assertEqual(main_sources[header], util_sources[header])
+
+        store_file = os.path.join(self.output_dir,
+                                  analysis_manager.FAILURE_SOURCES_FILE_NAME)
+        with zipfile.ZipFile(store_file) as store:
+            self.assertEqual(
+                sorted(set(main_sources.values()) |
+                       set(util_sources.values())),
+                sorted(store.namelist()))
+
+        failure_lib.extract_sources(
+            os.path.join(self.failed_dir, 'main.cpp.zip'), store_file,
+            self.output_dir)
+        with open(os.path.join(self.output_dir, 'sources-root',
+                               header.lstrip('/'))) as restored:
+            self.assertEqual("int util();\n", restored.read())
+
+    def test_limits(self):
+        """ The failures over the limits are not archived. """
+        archiver = self.__archive(max_archives=1, max_sources_size=0)
+        self.assertEqual(1, archiver.archived_num)
+        self.assertEqual(1, archiver.dropped_num)
+        self.assertEqual(['main.cpp.zip'], os.listdir(self.failed_dir))
+
+        files, sources, _ = self.__read_zip('main.cpp.zip')
+        self.assertEqual({}, sources)
+        self.assertIn(os.path.join('failed-sources-root',
+                                   self.tmp_dir.lstrip('/'), 'util.h'),
+                      files)
+
+    def __store_names(self):
+        store_file = os.path.join(self.output_dir,
+                                  analysis_manager.FAILURE_SOURCES_FILE_NAME)
+        with zipfile.ZipFile(store_file) as store:
+            return sorted(store.namelist())
+
+    def test_limits_of_output_directory(self):
+        """
+        The oldest failure zips of the earlier analyses and their sources
+        are removed to keep the limits of the output directory.
+        """
+        self.__archive()
+        main_zip = os.path.join(self.failed_dir, 'main.cpp.zip')
+        os.utime(main_zip, (0, 0))
+        _, main_sources, _ = self.__read_zip('main.cpp.zip')
+
+        archiver = self.__archive([self.__action('other.cpp')],
+                                  max_archives=2)
+        self.assertEqual(1, archiver.archived_num)
+        self.assertEqual(['other.cpp.zip', 'util.cpp.zip'],
+                         sorted(os.listdir(self.failed_dir)))
+
+        _, util_sources, _ = self.__read_zip('util.cpp.zip')
+        _, other_sources, _ = self.__read_zip('other.cpp.zip')
+        self.assertEqual(sorted(set(util_sources.values()) |
+                                set(other_sources.values())),
+                         self.__store_names())
+        source = os.path.join(self.tmp_dir, 'main.cpp')
+        self.assertNotIn(main_sources[source], self.__store_names())
+
+        # The store is full of the sources of the earlier analyses.
+        archiver = self.__archive([self.__action('new.cpp')],
+                                  max_sources_size=1)
+        self.assertEqual(1, archiver.archived_num)
+        self.assertEqual(['new.cpp.zip'], os.listdir(self.failed_dir))
+        _, new_sources, _ = self.__read_zip('new.cpp.zip')
+        self.assertTrue(new_sources)
+        self.assertEqual(sorted(set(new_sources.values())),
+                         self.__store_names())
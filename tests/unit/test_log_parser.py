@@ -9,10 +9,13 @@ from __future__ import print_function
 from __future__ import division
 from __future__ import absolute_import
 
+import json
 import os
+import pickle
 import unittest
 from StringIO import StringIO
 
+from libcodechecker.analyze import analyzer
 from libcodechecker.analyze import log_parser
 from libcodechecker.log import option_parser
 from libcodechecker.libhandlers.analyze import ParseLogOptions
@@ -224,3 +227,80 @@ class LogParserTest(unittest.TestCase):
         self.assertEqual(build_action.analyzer_options[0], '-I/tmp/../include')
         self.assertEqual(build_action.analyzer_options[1], '-I/tmp/../include')
         self.assertEqual(build_action.analyzer_options[2], '-I/tmp')
+
+    def test_iter_json_array(self):
+        """
+        The compilation database is read in chunks, the elements can be cut
+        by the chunk boundaries anywhere.
+        """
+        elements = [{"directory": "/tmp", "file": "/tmp/a b.c",
+                     "arguments": ["gcc", "-DX=\"1\"", "a b.c"]},
+                    [], 12345, u"\u00e1rv\u00edzt\u0171r\u0151", None, {}]
+        text = ' [ ' + ' ,\n'.join(json.dumps(e) for e in elements) + ' ]\n'
+
+        for chunk_size in [1, 2, 3, 7, 100]:
+            parsed = list(log_parser.iter_json_array(StringIO(text),
+                                                     chunk_size))
+            self.assertEqual(parsed, elements)
+
+        self.assertEqual(list(log_parser.iter_json_array(StringIO('[]'))),
+                         [])
+
+        for invalid in ['', '{}', '[1 2]', '[1, ]', '[{"a": 1}', '[1] x']:
+            with self.assertRaises(ValueError):
+                list(log_parser.iter_json_array(StringIO(invalid), 2))
+
+    def test_filter_duplicates(self):
+        """
+        Repeated compilation commands of the same source file are analyzed
+        only once.
+        """
+        entries = []
+        for _ in range(3):
+            for source in ['/tmp/a.cpp', '/tmp/b.cpp']:
+                entries.append({"directory": "/tmp",
+                                "command": "g++ -c " + source,
+                                "file": source})
+        entries.append({"directory": "/tmp",
+                        "command": "g++ -DA -c /tmp/a.cpp",
+                        "file": "/tmp/a.cpp"})
+
+        build_actions = log_parser.parse_compile_commands_json(
+            StringIO(json.dumps(entries)), ParseLogOptions())
+
+        self.assertEqual(sorted(a.original_command for a in build_actions),
+                         ['g++ -DA -c /tmp/a.cpp',
+                          'g++ -c /tmp/a.cpp',
+                          'g++ -c /tmp/b.cpp'])
+
+    def test_shared_values(self):
+        """
+        The build actions share their equal directories and options, and so
+        do their copies for the analyzers.
+        """
+        entries = [{"directory": "/tmp",
+                    "command": "g++ -DA -I/tmp -c /tmp/" + source,
+                    "file": "/tmp/" + source}
+                   for source in ['a.cpp', 'b.cpp']]
+
+        first, second = log_parser.parse_compile_commands_json(
+            StringIO(json.dumps(entries)), ParseLogOptions())
+        self.assertIs(first.analyzer_options, second.analyzer_options)
+        self.assertIs(first.directory, second.directory)
+
+        actions = analyzer.prepare_actions([first, second],
+                                           ['clangsa', 'clang-tidy'])
+        self.assertEqual([('clangsa', '/tmp/a.cpp'),
+                          ('clangsa', '/tmp/b.cpp'),
+                          ('clang-tidy', '/tmp/a.cpp'),
+                          ('clang-tidy', '/tmp/b.cpp')],
+                         [(a.analyzer_type, next(a.sources))
+                          for a in actions])
+        self.assertIs(first.analyzer_options, actions[2].analyzer_options)
+        self.assertEqual(-1, first.analyzer_type)
+
+        copied = pickle.loads(pickle.dumps(actions[2],
+                                           pickle.HIGHEST_PROTOCOL))
+        self.assertEqual('clang-tidy', copied.analyzer_type)
+        self.assertEqual(first.analyzer_options, copied.analyzer_options)
+        self.assertEqual(actions[2].cmp_key, copied.cmp_key)
@@ -0,0 +1,143 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the memory-aware concurrency of the analysis. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import multiprocessing
+import sys
+import unittest
+
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import memory_governor
+from libcodechecker.analyze.analyzers.analyzer_base import SourceAnalyzer
+
+MB = memory_governor.MB
+
+
+def run_job(job):
+    """ A worker which fails for the 'fail' job. """
+    if job == 'fail':
+        raise ValueError("Failed job.")
+    return [job]
+
+
+class MemoryGovernorTest(unittest.TestCase):
+    """
+    Test the decisions of the memory governor on simulated memory usage.
+    """
+
+    def setUp(self):
+        self.available = 10000 * MB
+        self.usage = []
+
+    def __governor(self, max_jobs=8, initial_estimate=1000 * MB):
+        return memory_governor.MemoryGovernor(
+            max_jobs, reserve=500 * MB, initial_estimate=initial_estimate,
+            available_memory=lambda: self.available,
+            analyzer_memory_usage=lambda pid: list(self.usage))
+
+    def test_max_jobs(self):
+        """ No more analyses are started than the number of jobs. """
+        governor = self.__governor(max_jobs=2)
+        self.assertTrue(governor.may_start(0))
+        self.assertTrue(governor.may_start(1))
+        self.assertFalse(governor.may_start(2))
+
+    def test_first_analysis_always_starts(self):
+        """ The analysis progresses even if the memory is short. """
+        self.available = 0
+        governor = self.__governor()
+        self.assertTrue(governor.may_start(0))
+        self.assertFalse(governor.may_start(1))
+
+    def test_running_analyses_can_grow(self):
+        """
+        The memory the running analyses may still need is not given to new
+        analyses.
+        """
+        self.available = 5000 * MB
+        governor = self.__governor()
+
+        # 5000 - 500 reserve - 3 * 1000 growth of the starting analyses.
+        self.assertTrue(governor.may_start(3))
+        # 5000 - 500 - 4 * 1000 is not enough for another one.
+        self.assertFalse(governor.may_start(4))
+
+    def test_estimate_follows_measurement(self):
+        """
+        The initial estimate is replaced by the largest analyzer measured,
+        which is the need of every later analysis.
+        """
+        governor = self.__governor(initial_estimate=8000 * MB)
+        self.assertFalse(governor.may_start(1))
+
+        self.usage = [2000 * MB]
+        self.available = 8000 * MB
+        self.assertTrue(governor.may_start(1))
+        self.assertEqual(2000 * MB, governor.estimate)
+
+        # A bigger analyzer raises the estimate, smaller ones do not lower
+        # it.
+        self.usage = [3000 * MB, 100 * MB]
+        self.available = 5000 * MB
+        self.assertFalse(governor.may_start(2))
+        self.assertEqual(3000 * MB, governor.estimate)
+
+        self.usage = [100 * MB]
+        governor.may_start(1)
+        self.assertEqual(3000 * MB, governor.estimate)
+
+    def test_ramp_up_when_memory_is_freed(self):
+        """ New analyses are started again when the memory is freed. """
+        governor = self.__governor()
+        self.usage = [1000 * MB, 1000 * MB]
+
+        self.available = 1000 * MB
+        self.assertFalse(governor.may_start(2))
+
+        self.available = 6000 * MB
+        self.assertTrue(governor.may_start(2))
+
+    def test_is_out_of_memory(self):
+        """ Allocation failures are recognized in the analyzer output. """
+        self.assertTrue(memory_governor.is_out_of_memory(
+            "LLVM ERROR: out of memory\n"))
+        self.assertTrue(memory_governor.is_out_of_memory(
+            "terminate called after throwing an instance of "
+            "'std::bad_alloc'\n"))
+        self.assertFalse(memory_governor.is_out_of_memory(
+            "error: unknown type name 'foo'\n"))
+
+    def test_memory_limit(self):
+        """ A process exceeding the memory limit fails. """
+        cmd = sys.executable + " -c 'bytearray(1024 * 1024 * 1024)'"
+
+        ret, _, err = SourceAnalyzer.run_proc(cmd, memory_limit=512 * MB)
+        self.assertNotEqual(0, ret)
+        self.assertIn('MemoryError', err)
+
+        ret, _, _ = SourceAnalyzer.run_proc(cmd)
+        self.assertEqual(0, ret)
+
+    def test_governed_worker_error(self):
+        """ An exception of a worker job stops the governed analysis. """
+        run_governed = getattr(analysis_manager, '__run_governed')
+        pool = multiprocessing.Pool(2)
+        try:
+            results = []
+            run_governed(pool, run_job, ['a', 'b'], 2, self.__governor(),
+                         results.append)
+            self.assertEqual(['a', 'b'], sorted(results))
+
+            with self.assertRaises(ValueError):
+                run_governed(pool, run_job, ['a', 'fail', 'b'], 2,
+                             self.__governor(), results.append)
+        finally:
+            pool.terminate()
+            pool.join()
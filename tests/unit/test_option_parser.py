@@ -212,3 +212,34 @@ class OptionParserTest(unittest.TestCase):
         print(res)
         self.assertTrue(set(compiler_options) == set(res.compile_opts))
         self.assertEqual(ActionType.COMPILE, res.action)
+
+    def test_rule_precedence(self):
+        """
+        The arguments are handled by the first matching rule, even if an
+        exact option and a regex option would both match them.
+        """
+        build_cmd = "gcc -DNDEBUG -DNDEBUG_X -D FOO -fno-ipa-sra " \
+                    "-fno-ipa-cp -O -O4 -m32 -lm -E -MG main.c"
+        res = option_parser.parse_options(build_cmd)
+        self.assertEqual(res.compile_opts,
+                         ['-DNDEBUG_X', '-DFOO', '-fno-ipa-cp', '-O',
+                          '-m32'])
+        self.assertEqual(res.link_opts, ['-lm'])
+        self.assertEqual(res.files, ['main.c'])
+        self.assertEqual(ActionType.PREPROCESS, res.action)
+
+    def test_dispatcher_regex_chunks(self):
+        """
+        The regex options are matched in the order of the rules when they
+        do not fit into one combined regex.
+        """
+        rules = [([], [('^-f%d$' % i, option_parser.skip, (i,))
+                       for i in range(200)]),
+                 ([('-f150', option_parser.skip, (-1,))],
+                  [('^-f.*', option_parser.skip, (-2,))])]
+        dispatcher = option_parser.ArgumentDispatcher(rules)
+
+        self.assertEqual(dispatcher.get_handler('-f150')[2], (150,))
+        self.assertEqual(dispatcher.get_handler('-f199')[2], (199,))
+        self.assertEqual(dispatcher.get_handler('-f200')[2], (-2,))
+        self.assertIsNone(dispatcher.get_handler('-g'))
@@ -27,9 +27,17 @@ from __future__ import division
 from __future__ import absolute_import
 
 import os
+import plistlib
+import shutil
+import tempfile
 import unittest
 
+from libcodechecker.analyze import analysis_manager
 from libcodechecker.analyze import plist_parser
+from libcodechecker.analyze.analyzers.result_handler_base import \
+    ResultHandler
+from libcodechecker.analyze.skiplist_handler import SkipListHandler
+from libcodechecker.log.build_action import BuildAction
 
 # These are the base skeletons for the main report sections where the
 # report hash and checker name is missing.
@@ -349,3 +357,77 @@ class PlistParserTestCaseNose(unittest.TestCase):
             if checker_name == 'core.StackAddressEscape':
                 self.assertEqual(report.main,
                                  stack_addr_skel_name_hash_after_v40)
+
+    def test_get_plist_files(self):
+        """
+        The 'files' array is read without parsing the plist.
+        """
+        for plist_file in ['clang-3.7-noerror.plist', 'clang-3.7.plist',
+                           'clang-3.8-trunk.plist', 'clang-4.0.plist',
+                           'clang-5.0-trunk.plist']:
+            plist = os.path.join(self.__plist_test_files, plist_file)
+            with open(plist) as content:
+                plist_content = content.read()
+
+            self.assertEqual(plist_parser.get_plist_files(plist_content),
+                             plistlib.readPlistFromString(
+                                 plist_content)['files'])
+
+        self.assertEqual(plist_parser.get_plist_files(
+            '<key>files</key>\n<array>\n'
+            '<string>/a &amp; b&apos;s.h</string>\n</array>'),
+            ["/a & b's.h"])
+        self.assertIsNone(plist_parser.get_plist_files(''))
+        self.assertIsNone(plist_parser.get_plist_files(
+            '<key>files</key><array><string>&#65;.h</string></array>'))
+
+    def test_remove_report_from_plist(self):
+        """
+        The reports of the skipped files are removed, the plist is kept as
+        it is if there is nothing to remove.
+        """
+        plist = os.path.join(self.__plist_test_files, 'clang-4.0.plist')
+        with open(plist) as content:
+            plist_content = content.read()
+
+        keep_all = SkipListHandler("-/other/*")
+        self.assertIs(plist_parser.remove_report_from_plist(plist_content,
+                                                            keep_all),
+                      plist_content)
+
+        skip_header = SkipListHandler("-*.h")
+        report_data = plistlib.readPlistFromString(
+            plist_parser.remove_report_from_plist(plist_content,
+                                                  skip_header))
+        self.assertEqual(report_data['files'], ['test.cpp', './test.h'])
+        self.assertEqual([d['location']['file']
+                          for d in report_data['diagnostics']], [0, 0])
+
+    def test_skip_in_result_file(self):
+        """
+        The reports are removed from the result file at its final place, the
+        analyzer writes it with the unescaped name of the source file.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            action = BuildAction()
+            action.analyzer_type = 'clangsa'
+            action.original_command = 'clang -c my\\ file.cpp'
+            rh = ResultHandler(action, tmp_dir)
+            rh.analyzed_source_file = os.path.join(tmp_dir, r'my\ file.cpp')
+            rh.skiplist_handler = SkipListHandler("-*.h")
+
+            result_file = rh.analyzer_result_file.replace(r'\ ', ' ')
+            self.assertNotEqual(result_file, rh.analyzer_result_file)
+            shutil.copy(os.path.join(self.__plist_test_files,
+                                     'clang-4.0.plist'), result_file)
+
+            analysis_manager.handle_success(rh, result_file, 'my_file',
+                                            False, tmp_dir)
+
+            report_data = plistlib.readPlist(result_file)
+            self.assertEqual(report_data['files'], ['test.cpp', './test.h'])
+            self.assertEqual([d['location']['file']
+                              for d in report_data['diagnostics']], [0, 0])
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,87 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the skip list handler. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import unittest
+
+from libcodechecker.analyze.skiplist_handler import SkipListHandler
+
+
+class SkipListHandlerTest(unittest.TestCase):
+    """
+    Test the matching of the source files against the skip file lines.
+    """
+
+    def test_first_match_wins(self):
+        """
+        The first matching line of the skip file decides.
+        """
+        handler = SkipListHandler("-/project/lib/*\n"
+                                  "+/project/*\n"
+                                  "-*.h\n"
+                                  "+*\n"
+                                  "-/never/reached.c\n")
+
+        self.assertTrue(handler.should_skip('/project/lib/a.c'))
+        self.assertTrue(handler.should_skip('/project/lib/a.h'))
+        self.assertFalse(handler.should_skip('/project/src/a.h'))
+        self.assertTrue(handler.should_skip('/usr/include/stdio.h'))
+        self.assertFalse(handler.should_skip('/never/reached.c'))
+
+        # The cached verdicts are the same.
+        self.assertTrue(handler.should_skip('/project/lib/a.c'))
+        self.assertFalse(handler.should_skip('/project/src/a.h'))
+
+    def test_prefix_and_malformed_lines(self):
+        """
+        The patterns match every path starting with them, malformed lines
+        are ignored.
+        """
+        handler = SkipListHandler("/no/sign\n"
+                                  "-\n"
+                                  "-/project/gen\n"
+                                  "+/project/[ab]?.c\n")
+
+        self.assertEqual(handler.skip_file_lines,
+                         ['/no/sign', '-', '-/project/gen',
+                          '+/project/[ab]?.c'])
+        self.assertTrue(handler.should_skip('/project/generated/x.c'))
+        self.assertFalse(handler.should_skip('/no/sign/x.c'))
+        self.assertFalse(handler.should_skip('/project/a1.c'))
+        self.assertFalse(handler.should_skip('/other/x.c'))
+
+        self.assertFalse(SkipListHandler().should_skip('/project/a.c'))
+
+    def test_many_lines(self):
+        """
+        The order of the lines is kept when they don't fit into one combined
+        regex.
+        """
+        lines = ['+/project/dir%d/*' % i for i in range(300)]
+        lines.insert(250, '-/project/dir260/*')
+        lines.append('-/project/*')
+        handler = SkipListHandler('\n'.join(lines))
+
+        self.assertFalse(handler.should_skip('/project/dir0/a.c'))
+        self.assertFalse(handler.should_skip('/project/dir249/a.c'))
+        self.assertTrue(handler.should_skip('/project/dir260/a.c'))
+        self.assertFalse(handler.should_skip('/project/dir299/a.c'))
+        self.assertTrue(handler.should_skip('/project/dir300/a.c'))
+
+    def test_overwrite_skip_content(self):
+        """
+        The cached verdicts are dropped when the skip lines change.
+        """
+        handler = SkipListHandler("-/project/*")
+        self.assertTrue(handler.should_skip('/project/a.c'))
+
+        handler.overwrite_skip_content(['+/project/a.c', '-*'])
+        self.assertFalse(handler.should_skip('/project/a.c'))
+        self.assertTrue(handler.should_skip('/project/b.c'))
@@ -9,6 +9,9 @@ from __future__ import print_function
 from __future__ import division
 from __future__ import absolute_import
 
+import os
+import shutil
+import tempfile
 import unittest
 
 from libcodechecker.analyze import statistics_collector
@@ -162,3 +165,64 @@ class statistics_collectorsTest(unittest.TestCase):
         self.assertEqual({'parsedate': 10}, ret_val_collector.total())
         self.assertEqual({'parsedate': 1}, ret_val_collector.nof_unchecked())
         self.assertEqual(['parsedate'], ret_val_collector.filter_stats())
+
+    def test_parallel_postprocessing(self):
+        """
+        The statistics collected in parallel from more output files are the
+        same as the statistics collected sequentially.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            clang_output_dir = os.path.join(tmp_dir, 'tmp')
+            os.makedirs(clang_output_dir)
+            for i in range(7):
+                with open(os.path.join(clang_output_dir,
+                                       'main%d.c.stat' % i), 'w') as out:
+                    out.write("/.../x.c:1:1: warning: unrelated\n")
+                    for _ in range(10):
+                        out.write("/.../x.c:551:12: warning: Return Value "
+                                  "Check:/.../x.c:551:12,parsedate,0\n")
+                        out.write("/.../x.c:551:12: warning: Special Return "
+                                  "Value:/.../x.c:551:12,getline,1,0\n")
+                    out.write("/.../x.c:551:12: warning: Special Return "
+                              "Value:/.../x.c:551:12,getline,%d,0\n"
+                              % (i % 2))
+                    out.write("/.../x.c:551:12: warning: Return Value "
+                              "Check:/.../x.c:551:12,parsedate,1\n")
+
+            yamls = []
+            for jobs in [1, 3]:
+                stats_dir = os.path.join(tmp_dir, 'stats%d' % jobs)
+                statistics_collector.postprocess_stats(clang_output_dir,
+                                                       stats_dir, jobs)
+                yaml = []
+                for collector in [statistics_collector.ReturnValueCollector,
+                                  statistics_collector.
+                                  SpecialReturnValueCollector]:
+                    with open(collector.stats_file(stats_dir)) as stats:
+                        yaml.append(stats.read())
+                yamls.append(yaml)
+
+            self.assertEqual(yamls[0], yamls[1])
+            self.assertIn('- parsedate', yamls[0][0])
+            self.assertIn('{name: getline, relation: LT, value: 0}',
+                          yamls[0][1])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_merge(self):
+        """ Partial statistics are added up. """
+        collector = statistics_collector.ReturnValueCollector()
+        collector.process_line("/.../x.c:551:12: warning: Return Value "
+                               "Check:/.../x.c:551:12,parsedate,1")
+
+        other = statistics_collector.ReturnValueCollector()
+        other.process_line("/.../x.c:551:12: warning: Return Value "
+                           "Check:/.../x.c:551:12,parsedate,0")
+        other.process_line("/.../x.c:551:12: warning: Return Value "
+                           "Check:/.../x.c:551:12,fopen,1")
+
+        collector.merge(other.stats)
+        self.assertEqual({'parsedate': 2, 'fopen': 1}, collector.total())
+        self.assertEqual({'parsedate': 1, 'fopen': 1},
+                         collector.nof_unchecked())
@@ -13,10 +13,13 @@ from __future__ import absolute_import
 
 import signal
 import subprocess
+import tempfile
+import threading
 import unittest
 
 import psutil
 
+from libcodechecker.util import get_process_supervisor
 from libcodechecker.util import setup_process_timeout
 
 
@@ -88,3 +91,34 @@ class subprocess_timeoutTest(unittest.TestCase):
         self.assertEquals(proc.returncode, -signal.SIGKILL,
                           "`yes` died in a way that it wasn't the process "
                           "timeout watcher killing it.")
+
+    def testSingleSupervisorThread(self):
+        """
+        Test if the timeouts of more processes are watched by one thread.
+        """
+        get_process_supervisor()
+        thread_num = threading.active_count()
+
+        procs = [subprocess.Popen(['sleep', '30']) for _ in range(5)]
+        futures = [setup_process_timeout(proc, 1, signal.SIGKILL)
+                   for proc in procs]
+        self.assertEqual(thread_num, threading.active_count())
+
+        for proc, future in zip(procs, futures):
+            proc.wait()
+            self.assertTrue(future())
+            self.assertEqual(-signal.SIGKILL, proc.returncode)
+
+    def testOutputLimit(self):
+        """
+        Test if the supervisor kills the process which writes too much
+        output.
+        """
+        with tempfile.TemporaryFile() as output:
+            proc = subprocess.Popen(['yes'], stdout=output)
+            future = get_process_supervisor().watch_output(proc, [output],
+                                                           1024 * 1024)
+            proc.wait()
+
+            self.assertTrue(future())
+            self.assertEqual(-signal.SIGKILL, proc.returncode)
@@ -0,0 +1,226 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the batched analysis of the clang-tidy build actions. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import multiprocessing
+import os
+import plistlib
+import shutil
+import stat
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analysis_manager
+from libcodechecker.analyze import tidy_output_converter
+from libcodechecker.analyze.analyzers import analyzer_types
+from libcodechecker.analyze.analyzers.config_handler_clang_tidy import \
+    ClangTidyConfigHandler
+from libcodechecker.analyze.analyzers.result_handler_clang_tidy import \
+    generate_plist_from_tidy_result
+from libcodechecker.log.build_action import BuildAction
+
+TIDY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'tidy_output_test_files')
+
+# The source files of the test and their clang-tidy output.
+SOURCES = [('test.cpp', 'tidy1.out'),
+           ('test2.cpp', 'tidy2.out'),
+           ('test3.cpp', 'tidy3.out')]
+
+
+class FakeContext(object):
+    severity_map = {}
+    path_env_extra = []
+    ld_lib_path_extra = []
+
+
+def create_action(source, analyzer_type=analyzer_types.CLANG_TIDY,
+                  options=None):
+    action = BuildAction()
+    action.original_command = 'g++ -c ' + source
+    action.directory = TIDY_DIR
+    action.analyzer_type = analyzer_type
+    action.analyzer_options = options or ['-DNDEBUG']
+    action.lang = 'c++'
+    action.sources = os.path.join(TIDY_DIR, 'files', source)
+    return action
+
+
+def read_output(name):
+    with open(os.path.join(TIDY_DIR, name)) as tidy_out:
+        return tidy_out.read()
+
+
+class TidyBatchesTest(unittest.TestCase):
+    """
+    Test the grouping of the build actions and the splitting of the
+    clang-tidy output into the result files of the build actions.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.tmp_dir, 'reports')
+        os.makedirs(self.output_dir)
+        self.run_log = os.path.join(self.tmp_dir, 'runs.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __create_clang_tidy(self, fail_batches=False):
+        """
+        Create a fake clang-tidy which prints the output of the test files
+        of the analyzed sources.
+        """
+        for source, output in SOURCES:
+            shutil.copy(os.path.join(TIDY_DIR, output),
+                        os.path.join(self.tmp_dir, source + '.out'))
+
+        clang_tidy = os.path.join(self.tmp_dir, 'clang-tidy')
+        with open(clang_tidy, 'w') as script:
+            script.write("#!/bin/sh\n"
+                         "echo \"$@\" >> {0}\n"
+                         "sources=0\n"
+                         "for arg in \"$@\"; do\n"
+                         "  [ \"$arg\" = -- ] && break\n"
+                         "  case \"$arg\" in *.cpp)\n"
+                         "    sources=$((sources + 1))\n"
+                         "    cat {1}/$(basename $arg).out;;\n"
+                         "  esac\n"
+                         "done\n"
+                         "[ {2} = 1 ] && [ $sources -gt 1 ] && exit 1\n"
+                         "exit 0\n"
+                         .format(self.run_log, self.tmp_dir,
+                                 int(fail_batches)))
+        os.chmod(clang_tidy, stat.S_IRWXU)
+        return clang_tidy
+
+    def __run_count(self):
+        with open(self.run_log) as run_log:
+            return len(run_log.readlines())
+
+    def __check_batch(self, jobs, clang_tidy):
+        config_handler = ClangTidyConfigHandler()
+        config_handler.analyzer_binary = clang_tidy
+        config_map = {analyzer_types.CLANG_TIDY: config_handler}
+
+        state = analysis_manager.create_analysis_state(
+            {}, FakeContext(), config_map, self.output_dir, None, True,
+            False, None, False, None, None)
+        analysis_manager.init_worker(multiprocessing.Value('i', 1),
+                                     multiprocessing.Value('i', len(jobs)),
+                                     state)
+        return analysis_manager.check_batch(jobs)
+
+    def __assert_results(self, results):
+        """
+        The result files are the same as the ones of the single analyses.
+        """
+        self.assertEqual([0] * len(SOURCES), [r[0] for r in results])
+        self.assertEqual(range(len(SOURCES)), sorted(r[8] for r in results))
+
+        for result in results:
+            source, output = SOURCES[result[8]]
+            self.assertEqual({result[4]: os.path.join(TIDY_DIR, 'files',
+                                                      source)},
+                             result[7])
+
+            expected = os.path.join(self.tmp_dir, output + '.plist')
+            generate_plist_from_tidy_result(
+                expected,
+                tidy_output_converter.iter_lines(read_output(output)))
+            self.assertEqual(plistlib.readPlist(expected),
+                             plistlib.readPlist(result[4]))
+
+    def test_create_jobs(self):
+        """
+        The clang-tidy build actions with the same options are batched.
+        """
+        actions = [create_action('a.cpp'),
+                   create_action('b.cpp', analyzer_types.CLANG_SA),
+                   create_action('c.cpp'),
+                   create_action('d.cpp', options=['-DDEBUG']),
+                   create_action('e.cpp'),
+                   create_action('f.cpp')]
+
+        jobs = analysis_manager.create_jobs(actions, 2)
+        self.assertEqual([[0, 2], 1, 3, [4, 5]],
+                         [[i for i, _ in job] if isinstance(job, list)
+                          else job[0] for job in jobs])
+
+        self.assertEqual(list(enumerate(actions)),
+                         analysis_manager.create_jobs(actions, 1))
+        self.assertEqual(list(enumerate(actions)),
+                         analysis_manager.create_jobs(actions))
+
+    def test_split_output(self):
+        """ The messages are split by the source file they belong to. """
+        sources = [os.path.join(TIDY_DIR, 'files', source)
+                   for source, _ in SOURCES]
+        outputs = tidy_output_converter.split_output_by_source(
+            tidy_output_converter.iter_lines(
+                ''.join(read_output(output) for _, output in SOURCES)),
+            sources, TIDY_DIR)
+
+        # The message in test3.hh belongs to test3.cpp, which is in its
+        # notes.
+        parser = tidy_output_converter.OutputParser()
+        for source, (_, output) in zip(sources, SOURCES):
+            self.assertEqual(
+                list(parser.iter_messages(
+                    tidy_output_converter.iter_lines(read_output(output)))),
+                list(parser.iter_messages(
+                    tidy_output_converter.iter_lines(outputs[source]))))
+
+    def test_split_header_message(self):
+        """
+        A message in a header without notes belongs to the source files
+        which include the header.
+        """
+        sources = [os.path.join(TIDY_DIR, 'files', source)
+                   for source in ['test.cpp', 'test2.cpp', 'test3.cpp']]
+        header = os.path.join(TIDY_DIR, 'files', 'test3.hh')
+        header_message = ["files/test3.hh:1:1: warning: Header "
+                          "[misc-header]",
+                          "int x;",
+                          "^"]
+        includes = {sources[1]: [header], sources[2]: [header]}
+
+        outputs = tidy_output_converter.split_output_by_source(
+            iter(header_message), sources, TIDY_DIR,
+            lambda source: includes.get(source))
+        self.assertEqual('', outputs[sources[0]])
+        self.assertEqual('\n'.join(header_message) + '\n',
+                         outputs[sources[1]])
+        self.assertEqual(outputs[sources[1]], outputs[sources[2]])
+
+        # Without the dependencies the first source file gets the message.
+        outputs = tidy_output_converter.split_output_by_source(
+            iter(header_message), sources, TIDY_DIR)
+        self.assertEqual(['', ''], [outputs[sources[1]],
+                                    outputs[sources[2]]])
+        self.assertNotEqual('', outputs[sources[0]])
+
+    def test_check_batch(self):
+        """ A batch is analyzed by one clang-tidy run. """
+        clang_tidy = self.__create_clang_tidy()
+        jobs = list(enumerate(create_action(source)
+                              for source, _ in SOURCES))
+
+        self.__assert_results(self.__check_batch(jobs, clang_tidy))
+        self.assertEqual(1, self.__run_count())
+
+    def test_failed_batch(self):
+        """ The actions of a failed batch are analyzed one by one. """
+        clang_tidy = self.__create_clang_tidy(fail_batches=True)
+        jobs = list(enumerate(create_action(source)
+                              for source, _ in SOURCES))
+
+        self.__assert_results(self.__check_batch(jobs, clang_tidy))
+        self.assertEqual(1 + len(SOURCES), self.__run_count())
@@ -14,6 +14,8 @@ from __future__ import absolute_import
 
 import copy
 import os
+import shutil
+import tempfile
 import unittest
 
 try:
@@ -22,6 +24,9 @@ except ImportError:
     from io import BytesIO as StringIO
 
 import libcodechecker.analyze.tidy_output_converter as tidy_out_conv
+from libcodechecker.analyze.analyzers.result_handler_clang_tidy import \
+    generate_plist_from_tidy_result
+from libcodechecker.analyze.skiplist_handler import SkipListHandler
 
 OLD_PWD = None
 
@@ -393,3 +398,100 @@ class TidyPListConverterTestCase(unittest.TestCase):
             self.assertEqual(exp, output.getvalue())
 
         output.close()
+
+
+class TidyPListStreamWriterTestCase(unittest.TestCase):
+    """
+    Test the streaming conversion of the Clang Tidy output to plist.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output_file = os.path.join(self.tmp_dir, 'out.plist')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def __convert(tidy_out):
+        """Convert the output file with the PListConverter."""
+        messages = tidy_out_conv.OutputParser().parse_messages_from_file(
+            tidy_out)
+        plist_conv = tidy_out_conv.PListConverter()
+        plist_conv.add_messages(messages)
+
+        output = StringIO()
+        plist_conv.write(output)
+        return output.getvalue()
+
+    def test_same_as_converter(self):
+        """The streamed plist is the same as the converted one."""
+        for tidy_out in ['empty1.out', 'tidy1.out', 'tidy2.out',
+                         'tidy3.out', 'tidy4.out', 'tidy5.out',
+                         'tidy5_v6.out']:
+            with open(tidy_out) as tfile:
+                content = tfile.read()
+
+            generate_plist_from_tidy_result(
+                self.output_file, tidy_out_conv.iter_lines(content))
+
+            with open(self.output_file) as pfile:
+                self.assertEqual(self.__convert(tidy_out), pfile.read(),
+                                 tidy_out)
+
+    def test_duplicates_and_skip(self):
+        """
+        Repeated diagnostics and the diagnostics in skipped files are left
+        out, the skipped files are kept in the file list.
+        """
+        with open('tidy3.out') as tfile:
+            content = tfile.read()
+
+        output = StringIO()
+        writer = tidy_out_conv.PListStreamWriter(output)
+        for tidy_out in [content, content]:
+            for message in tidy_out_conv.OutputParser().iter_messages(
+                    tidy_out_conv.iter_lines(tidy_out)):
+                writer.add_message(message)
+        writer.close()
+
+        self.assertEqual(self.__convert('tidy3.out'), output.getvalue())
+
+        skip_handler = SkipListHandler('-*test3.hh')
+        generate_plist_from_tidy_result(self.output_file,
+                                        tidy_out_conv.iter_lines(content),
+                                        skip_handler)
+        with open(self.output_file) as pfile:
+            plist = pfile.read()
+        self.assertIn('test3.hh', plist)
+        self.assertEqual(
+            [diag['location']['file'] for diag in
+             tidy_out_conv.plistlib.readPlistFromString(plist)
+             ['diagnostics']],
+            [1])
+
+    def test_same_as_plistlib(self):
+        """The plist elements are written like plistlib writes them."""
+        value = {'check_name': 'a<b>&c',
+                 'description': u'\u00e1rv\u00edzt\u0171r\u0151\r\n',
+                 'empty': [],
+                 'location': {'col': 3, 'file': 0, 'line': 12},
+                 'path': [{'kind': 'event', 'message': 'x'}],
+                 'skipped': False}
+
+        lines = [tidy_out_conv.PLIST_HEADER, '<plist version="1.0">\n']
+        tidy_out_conv._plist_lines(value, 0, lines)
+        lines.append('</plist>\n')
+
+        output = StringIO()
+        tidy_out_conv.plistlib.writePlist(value, output)
+        self.assertEqual(output.getvalue(), ''.join(lines))
+
+        self.assertRaises(ValueError, tidy_out_conv._plist_lines,
+                          'a\x01b', 0, [])
+
+    def test_iter_lines(self):
+        """Lines are split like splitlines() does for usual outputs."""
+        for text in ['', 'a', 'a\n', 'a\r\nb\n\nc', '\n\n']:
+            self.assertEqual(text.splitlines(),
+                             list(tidy_out_conv.iter_lines(text)))
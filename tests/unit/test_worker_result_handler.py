@@ -0,0 +1,90 @@
+# -----------------------------------------------------------------------------
+#                     The CodeChecker Infrastructure
+#   This file is distributed under the University of Illinois Open Source
+#   License. See LICENSE.TXT for details.
+# -----------------------------------------------------------------------------
+
+""" Test the streaming processing of the analysis results. """
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from libcodechecker.analyze import analysis_manager
+
+
+def result(result_sources, return_code=0, analyzer_type='clangsa',
+           profile=None):
+    """ Create a result record in the format which is returned by check(). """
+    return (return_code, False, False, analyzer_type, '', None, 1.0,
+            result_sources, 0, profile or [], None, [])
+
+
+class WorkerResultHandlerTest(unittest.TestCase):
+    """
+    Test that the metadata is kept up-to-date while the results arrive.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metadata_file = os.path.join(self.tmp_dir, 'metadata.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __load_metadata(self):
+        with open(self.metadata_file, 'r') as metadata:
+            return json.load(metadata)
+
+    def test_periodic_flush(self):
+        """ Every handled result is written if the interval is zero. """
+        metadata = {'result_source_files': {}}
+        handler = analysis_manager.WorkerResultHandler(metadata,
+                                                       self.tmp_dir,
+                                                       flush_interval=0)
+
+        handler.handle(result({'/out/a.plist': '/src/a.c'}))
+        self.assertEqual({'/out/a.plist': '/src/a.c'},
+                         self.__load_metadata()['result_source_files'])
+
+        handler.handle(result({'/out/b.plist': '/src/b.c'}))
+        written = self.__load_metadata()
+        self.assertEqual(2, len(written['result_source_files']))
+        self.assertEqual({'clangsa': 2}, written['successful'])
+
+    def test_failed_result_removed(self):
+        """ Result files of failed analyses are removed from the metadata. """
+        metadata = {'result_source_files': {'/out/a.plist': '/src/a.c'}}
+        handler = analysis_manager.WorkerResultHandler(metadata,
+                                                       self.tmp_dir)
+
+        handler.handle(result({'/out/a.plist': None}, 1))
+        handler.finish()
+
+        written = self.__load_metadata()
+        self.assertEqual({}, written['result_source_files'])
+        self.assertEqual({'clangsa': 1}, written['failed'])
+
+    def test_profile_recorded(self):
+        """ The profile of a result file replaces its previous profile. """
+        metadata = {'result_source_files': {},
+                    'analysis_profile': {'a.plist': {'wall_time': 9.0},
+                                         'b.plist': {'wall_time': 2.0}}}
+        handler = analysis_manager.WorkerResultHandler(metadata,
+                                                       self.tmp_dir)
+
+        handler.handle(result({'/out/a.plist': '/src/a.c'},
+                              profile=[{'result_file': 'a.plist',
+                                        'wall_time': 1.0}]))
+        handler.finish()
+
+        written = self.__load_metadata()
+        self.assertEqual({'a.plist': {'result_file': 'a.plist',
+                                      'wall_time': 1.0},
+                          'b.plist': {'wall_time': 2.0}},
+                         written['analysis_profile'])